@@ -0,0 +1,41 @@
+"""Add indexed rut_normalized to users, students and student_personal_data.
+
+Revision ID: 0017_rut_normalized_columns
+Revises: 0016_evaluation_area_templates
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.backend.utils.rut_normalize import RUT_NORMALIZED_MAX_LENGTH, rut_lookup_key
+
+revision = "0017_rut_normalized_columns"
+down_revision = "0016_evaluation_area_templates"
+branch_labels = None
+depends_on = None
+
+TARGETS = {
+    "users": "rut",
+    "students": "identification_number",
+    "student_personal_data": "identification_number",
+}
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    for table, source in TARGETS.items():
+        op.add_column(
+            table,
+            sa.Column("rut_normalized", sa.String(length=RUT_NORMALIZED_MAX_LENGTH), nullable=True),
+        )
+        op.create_index(f"ix_{table}_rut_normalized", table, ["rut_normalized"])
+        rows = conn.execute(sa.text(f"SELECT id, {source} FROM {table}")).all()
+        params = [{"id": row_id, "key": rut_lookup_key(raw)} for row_id, raw in rows if rut_lookup_key(raw)]
+        if params:
+            conn.execute(sa.text(f"UPDATE {table} SET rut_normalized = :key WHERE id = :id"), params)
+
+
+def downgrade() -> None:
+    for table in reversed(list(TARGETS)):
+        op.drop_index(f"ix_{table}_rut_normalized", table_name=table)
+        op.drop_column(table, "rut_normalized")
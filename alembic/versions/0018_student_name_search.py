@@ -0,0 +1,86 @@
+"""Add student_personal_data.full_name_folded and student_name_trigrams.
+
+Revision ID: 0018_student_name_search
+Revises: 0017_rut_normalized_columns
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.backend.utils.name_search import (
+    FULL_NAME_FOLDED_MAX_LENGTH,
+    name_trigrams,
+    student_full_name_folded,
+)
+
+revision = "0018_student_name_search"
+down_revision = "0017_rut_normalized_columns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "student_personal_data",
+        sa.Column("full_name_folded", sa.String(length=FULL_NAME_FOLDED_MAX_LENGTH), nullable=True),
+    )
+    op.create_table(
+        "student_name_trigrams",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("student_personal_data_id", sa.Integer(), nullable=False),
+        sa.Column("student_id", sa.Integer(), nullable=True),
+        sa.Column("trigram", sa.String(length=3), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "student_personal_data_id",
+            "trigram",
+            name="uq_student_name_trigrams_row_trigram",
+        ),
+    )
+    op.create_index(
+        "ix_student_name_trigrams_trigram_row",
+        "student_name_trigrams",
+        ["trigram", "student_personal_data_id"],
+    )
+    op.create_index(
+        "ix_student_name_trigrams_student_id",
+        "student_name_trigrams",
+        ["student_id"],
+    )
+
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.text(
+            "SELECT id, student_id, names, father_lastname, mother_lastname, social_name "
+            "FROM student_personal_data"
+        )
+    ).all()
+    updates = []
+    grams = []
+    for row_id, student_id, names, father, mother, social in rows:
+        folded = student_full_name_folded(names, father, mother, social)
+        updates.append({"id": row_id, "folded": folded})
+        grams.extend(
+            {"row_id": row_id, "student_id": student_id, "trigram": gram}
+            for gram in sorted(name_trigrams(folded))
+        )
+    if updates:
+        conn.execute(
+            sa.text("UPDATE student_personal_data SET full_name_folded = :folded WHERE id = :id"),
+            updates,
+        )
+    if grams:
+        conn.execute(
+            sa.text(
+                "INSERT INTO student_name_trigrams (student_personal_data_id, student_id, trigram) "
+                "VALUES (:row_id, :student_id, :trigram)"
+            ),
+            grams,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_student_name_trigrams_student_id", table_name="student_name_trigrams")
+    op.drop_index("ix_student_name_trigrams_trigram_row", table_name="student_name_trigrams")
+    op.drop_table("student_name_trigrams")
+    op.drop_column("student_personal_data", "full_name_folded")
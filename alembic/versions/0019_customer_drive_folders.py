@@ -0,0 +1,32 @@
+"""Create customer_drive_folders (Drive folder path → ID cache).
+
+Revision ID: 0019_customer_drive_folders
+Revises: 0018_student_name_search
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0019_customer_drive_folders"
+down_revision = "0018_student_name_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "customer_drive_folders",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("customer_id", sa.Integer(), nullable=False),
+        sa.Column("path_hash", sa.String(length=40), nullable=False),
+        sa.Column("root_folder_id", sa.String(length=255), nullable=False),
+        sa.Column("path", sa.Text(), nullable=False),
+        sa.Column("folder_id", sa.String(length=255), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("customer_id", "path_hash", name="uq_customer_drive_folders_path"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("customer_drive_folders")
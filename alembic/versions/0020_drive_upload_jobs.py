@@ -0,0 +1,50 @@
+"""Create drive_upload_jobs (Google Drive upload outbox).
+
+Revision ID: 0020_drive_upload_jobs
+Revises: 0019_customer_drive_folders
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0020_drive_upload_jobs"
+down_revision = "0019_customer_drive_folders"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "drive_upload_jobs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("customer_id", sa.Integer(), nullable=False),
+        sa.Column("idempotency_key", sa.String(length=64), nullable=False),
+        sa.Column("student_id", sa.Integer(), nullable=False),
+        sa.Column("document_id", sa.Integer(), nullable=False),
+        sa.Column("agent_id", sa.String(length=64), nullable=True),
+        sa.Column("save_id", sa.Integer(), nullable=True),
+        sa.Column("payload_json", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("revision", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("result_json", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("idempotency_key", name="uq_drive_upload_jobs_key"),
+    )
+    op.create_index(
+        "ix_drive_upload_jobs_status_next", "drive_upload_jobs", ["status", "next_attempt_at"]
+    )
+    op.create_index(
+        "ix_drive_upload_jobs_customer_student", "drive_upload_jobs", ["customer_id", "student_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_drive_upload_jobs_customer_student", table_name="drive_upload_jobs")
+    op.drop_index("ix_drive_upload_jobs_status_next", table_name="drive_upload_jobs")
+    op.drop_table("drive_upload_jobs")
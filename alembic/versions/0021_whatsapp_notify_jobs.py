@@ -0,0 +1,63 @@
+"""Create whatsapp_notify_jobs / whatsapp_notify_messages (WhatsApp notification outbox).
+
+Revision ID: 0021_whatsapp_notify_jobs
+Revises: 0020_drive_upload_jobs
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0021_whatsapp_notify_jobs"
+down_revision = "0020_drive_upload_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "whatsapp_notify_jobs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("school_id", sa.Integer(), nullable=True),
+        sa.Column("dynamic_form_id", sa.Integer(), nullable=True),
+        sa.Column("form_name", sa.String(length=255), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="pending"),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_whatsapp_notify_jobs_form", "whatsapp_notify_jobs", ["dynamic_form_id"])
+    op.create_table(
+        "whatsapp_notify_messages",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("job_id", sa.Integer(), nullable=False),
+        sa.Column("student_id", sa.Integer(), nullable=False),
+        sa.Column("student_name", sa.String(length=255), nullable=True),
+        sa.Column("phone", sa.String(length=32), nullable=True),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_at", sa.DateTime(), nullable=True),
+        sa.Column("claim_token", sa.String(length=32), nullable=True),
+        sa.Column("provider_message_id", sa.String(length=128), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_whatsapp_notify_messages_job", "whatsapp_notify_messages", ["job_id"])
+    op.create_index(
+        "ix_whatsapp_notify_messages_status_next",
+        "whatsapp_notify_messages",
+        ["status", "next_attempt_at"],
+    )
+    op.create_index("ix_whatsapp_notify_messages_claim", "whatsapp_notify_messages", ["claim_token"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_whatsapp_notify_messages_claim", table_name="whatsapp_notify_messages")
+    op.drop_index("ix_whatsapp_notify_messages_status_next", table_name="whatsapp_notify_messages")
+    op.drop_index("ix_whatsapp_notify_messages_job", table_name="whatsapp_notify_messages")
+    op.drop_table("whatsapp_notify_messages")
+    op.drop_index("ix_whatsapp_notify_jobs_form", table_name="whatsapp_notify_jobs")
+    op.drop_table("whatsapp_notify_jobs")
@@ -0,0 +1,21 @@
+"""Add folders.content_sha256 (upload de-duplication).
+
+Revision ID: 0022_folders_content_sha256
+Revises: 0021_whatsapp_notify_jobs
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0022_folders_content_sha256"
+down_revision = "0021_whatsapp_notify_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("folders", sa.Column("content_sha256", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("folders", "content_sha256")
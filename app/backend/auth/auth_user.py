@@ -2,11 +2,11 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from passlib.context import CryptContext
 from fastapi import HTTPException, Depends
 from app.backend.db.models import UserModel
-from typing import Union
-from datetime import datetime
+from typing import Optional, Union
 import os
 from jose import jwt, JWTError
 from app.backend.db.database import SessionLocal
+from app.backend.utils.principal_cache import Principal, get_principal_cache
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 import bcrypt
@@ -51,7 +51,7 @@ try:
 except Exception:
     pwd_context = None
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
     try:
         decoded_token = jwt.decode(token, os.environ['SECRET_KEY'], algorithms=[os.environ['ALGORITHM']])
 
@@ -61,44 +61,22 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
-    user = get_user(username)
+    principal = get_principal(username)
 
-    if not user:
+    if not principal:
         raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
-    
-    # Sobrescribir con los datos del token que pueden haber cambiado (como school_id al seleccionar escuela)
-    # No pisar rol_id con null: algunos tokens solo traen "sub" y dejan rol_id en null → rompe permisos
-    if 'rol_id' in decoded_token and decoded_token['rol_id'] is not None:
-        user.rol_id = decoded_token['rol_id']
-    if 'customer_id' in decoded_token:
-        user.customer_id = decoded_token['customer_id']
-    if 'school_id' in decoded_token:
-        user.school_id = decoded_token['school_id']
-    if 'teaching_id' in decoded_token:
-        user.teaching_id = decoded_token['teaching_id']
-    if 'course_id' in decoded_token:
-        user.course_id = decoded_token['course_id']
-    if 'career_type_id' in decoded_token:
-        user.career_type_id = decoded_token['career_type_id']
-    py = decoded_token.get("period_year")
-    if py is not None:
-        try:
-            user.period_year = int(py)
-        except (TypeError, ValueError):
-            user.period_year = datetime.now().year
-    else:
-        user.period_year = datetime.now().year
 
-    return user
+    # Sobrescribir con los datos del token que pueden haber cambiado (como school_id al seleccionar escuela)
+    return principal.with_claims(decoded_token)
     
-def get_current_active_user(current_user: UserModel = Depends(get_current_user)):
+def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     return current_user
 
 
 oauth2_scheme_optional = OAuth2PasswordBearer("/authentications/login", auto_error=False)
 
 
-def get_optional_current_user(token: Union[str, None] = Depends(oauth2_scheme_optional)):
+def get_optional_current_user(token: Union[str, None] = Depends(oauth2_scheme_optional)) -> Optional[Principal]:
     """Usuario autenticado o None si no hay token / token inválido."""
     if not token:
         return None
@@ -110,35 +88,14 @@ def get_optional_current_user(token: Union[str, None] = Depends(oauth2_scheme_op
     except JWTError:
         return None
 
-    user = get_user(username)
-    if not user:
+    principal = get_principal(username)
+    if not principal:
         return None
 
-    if 'rol_id' in decoded_token and decoded_token['rol_id'] is not None:
-        user.rol_id = decoded_token['rol_id']
-    if 'customer_id' in decoded_token:
-        user.customer_id = decoded_token['customer_id']
-    if 'school_id' in decoded_token:
-        user.school_id = decoded_token['school_id']
-    if 'teaching_id' in decoded_token:
-        user.teaching_id = decoded_token['teaching_id']
-    if 'course_id' in decoded_token:
-        user.course_id = decoded_token['course_id']
-    if 'career_type_id' in decoded_token:
-        user.career_type_id = decoded_token['career_type_id']
-    py = decoded_token.get("period_year")
-    if py is not None:
-        try:
-            user.period_year = int(py)
-        except (TypeError, ValueError):
-            user.period_year = datetime.now().year
-    else:
-        user.period_year = datetime.now().year
-
-    return user
+    return principal.with_claims(decoded_token)
 
 
-def get_current_superadmin_user(current_user: UserModel = Depends(get_current_active_user)) -> UserModel:
+def get_current_superadmin_user(current_user: Principal = Depends(get_current_active_user)) -> Principal:
     """Solo `rol_id == 1` (superadministrador), alineado con el front (`isKpiSuperadmin`)."""
     rid: Union[int, None] = getattr(current_user, "rol_id", None)
     if rid is None or int(rid) != 1:
@@ -148,6 +105,20 @@ def get_current_superadmin_user(current_user: UserModel = Depends(get_current_ac
         )
     return current_user
 
+def get_principal(sub: str) -> Optional[Principal]:
+    """
+    `Principal` inmutable del JWT `sub`, desde la caché por proceso (ver utils/principal_cache.py);
+    solo consulta `users` (vía `get_user`) si no está o venció.
+    """
+    if sub is None or str(sub).strip() == "":
+        return None
+
+    def _load() -> Optional[Principal]:
+        user = get_user(sub)
+        return Principal.from_user(user) if user else None
+
+    return get_principal_cache().get_or_load(sub, _load)
+
 def get_user(sub: str):
     """
     Resuelve el usuario del JWT `sub`.
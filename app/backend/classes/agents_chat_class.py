@@ -2,16 +2,27 @@
 
 from __future__ import annotations
 
-from collections.abc import Iterator
+import threading
+import time
+from collections.abc import AsyncIterator, Generator, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import aclosing, contextmanager
 from typing import Any
 
+import anyio
 from sqlalchemy.orm import Session
 
 from app.backend.classes.agents_class import AgentsClass
 from app.backend.classes.agents_llm_models_class import AgentsLlmModelsClass
 from app.backend.classes.agents_mcp_class import AgentsMcpClass
+from app.backend.classes.agents_rate_limit_class import (
+    AgentsRateLimitClass,
+    bulk_concurrency_per_customer,
+)
 from app.backend.classes.agents_usage_class import AgentsUsageClass
 from app.backend.core.config import settings
+from app.backend.core.executors import run_db
+from app.backend.db.database import SessionLocal
 from app.backend.db.models.agent import AgentModel
 from app.backend.utils.agents_bulk_reports import (
     FAMILIA_DOCUMENT_ID as _FAMILIA_DOCUMENT_ID,
@@ -43,8 +54,10 @@ from app.backend.utils.agents_scope_guard import (
     message_is_off_topic,
 )
 from app.backend.utils.agents_llm_client import (
+    astream_chat_completion,
     estimate_tokens_from_text,
     normalize_usage,
+    resolve_llm_api_key,
     stream_chat_completion,
 )
 from app.backend.utils.agents_mcp_fields import (
@@ -54,6 +67,13 @@ from app.backend.utils.agents_mcp_fields import (
     strip_fields_json_from_reply,
 )
 
+# Espera base entre reintentos de un informe masivo (se duplica en cada intento).
+BULK_RETRY_BACKOFF_SECONDS = 1.5
+# Con la ventana de solicitudes por minuto llena, la tanda reintenta cada tanto hasta este tope.
+BULK_RATE_WAIT_SECONDS = 2.0
+BULK_RATE_MAX_WAIT_SECONDS = 120.0
+
+
 def _missing_psychoped_files_reply() -> str:
     return (
         "No es posible elaborar el Informe de Evaluación Psicopedagógica: "
@@ -370,6 +390,10 @@ class AgentsChatClass:
         self.school_id = school_id
         self.user_id = user_id
         self.period_year = period_year
+        # Sessions de los hilos de informes masivos (la Session del request no es thread-safe).
+        self.session_factory = SessionLocal
+        # True dentro de astream_chat: el LLM lo transmite el cliente asyncio.
+        self._async_llm = False
 
     def stream_chat(
         self,
@@ -590,33 +614,18 @@ class AgentsChatClass:
         llm_timeout = 240 if want_doc else 120
         llm_max_tokens = 8192 if want_doc else None
 
-        reply_text = ""
-        usage: dict[str, Any] | None = None
-        first_token = True
-        for event in stream_chat_completion(
+        outcome = yield from self._llm_stream(
             messages,
-            model=model_code,
-            db=self.db,
+            model_code=model_code,
             timeout=llm_timeout,
             max_tokens=llm_max_tokens,
-        ):
-            if event.get("type") == "text_delta":
-                if first_token:
-                    first_token = False
-                    yield {"type": "step", "message": "Escribiendo respuesta…"}
-                reply_text += event.get("delta") or ""
-                yield event
-            elif event.get("type") == "done":
-                data = event.get("data") or {}
-                reply_text = data.get("reply") or reply_text
-                usage = normalize_usage(
-                    data.get("usage") if isinstance(data.get("usage"), dict) else None
-                )
-            elif event.get("type") == "error":
-                yield event
-                return
-            else:
-                yield event
+            first_token_step="Escribiendo respuesta…",
+        )
+        if outcome["error"]:
+            yield outcome["error"]
+            return
+        reply_text = outcome["reply"]
+        usage: dict[str, Any] | None = normalize_usage(outcome["usage"])
 
         visible_reply = reply_text
         response_files: list[dict[str, Any]] = []
@@ -647,48 +656,36 @@ class AgentsChatClass:
                 {"role": "assistant", "content": reply_text or "(sin JSON)"},
                 {"role": "user", "content": retry_msg},
             ]
-            retry_reply = ""
-            for event in stream_chat_completion(
+            retry = yield from self._llm_stream(
                 retry_messages,
-                model=model_code,
-                db=self.db,
+                model_code=model_code,
                 timeout=llm_timeout,
                 max_tokens=llm_max_tokens,
-            ):
-                if event.get("type") == "text_delta":
-                    delta = event.get("delta") or ""
-                    retry_reply += delta
-                    yield event
-                elif event.get("type") == "done":
-                    data = event.get("data") or {}
-                    retry_reply = data.get("reply") or retry_reply
-                    retry_usage = normalize_usage(
-                        data.get("usage")
-                        if isinstance(data.get("usage"), dict)
-                        else None
+            )
+            if retry["error"]:
+                yield retry["error"]
+                return
+            retry_reply = retry["reply"]
+            retry_usage = normalize_usage(retry["usage"])
+            if retry_usage and usage:
+                usage = {
+                    "prompt_tokens": int(usage.get("prompt_tokens") or 0)
+                    + int(retry_usage.get("prompt_tokens") or 0),
+                    "completion_tokens": int(usage.get("completion_tokens") or 0)
+                    + int(retry_usage.get("completion_tokens") or 0),
+                    "total_tokens": int(usage.get("total_tokens") or 0)
+                    + int(retry_usage.get("total_tokens") or 0),
+                    "prompt_cache_hit_tokens": int(
+                        usage.get("prompt_cache_hit_tokens") or 0
                     )
-                    if retry_usage and usage:
-                        usage = {
-                            "prompt_tokens": int(usage.get("prompt_tokens") or 0)
-                            + int(retry_usage.get("prompt_tokens") or 0),
-                            "completion_tokens": int(usage.get("completion_tokens") or 0)
-                            + int(retry_usage.get("completion_tokens") or 0),
-                            "total_tokens": int(usage.get("total_tokens") or 0)
-                            + int(retry_usage.get("total_tokens") or 0),
-                            "prompt_cache_hit_tokens": int(
-                                usage.get("prompt_cache_hit_tokens") or 0
-                            )
-                            + int(retry_usage.get("prompt_cache_hit_tokens") or 0),
-                            "prompt_cache_miss_tokens": int(
-                                usage.get("prompt_cache_miss_tokens") or 0
-                            )
-                            + int(retry_usage.get("prompt_cache_miss_tokens") or 0),
-                        }
-                    elif retry_usage:
-                        usage = retry_usage
-                elif event.get("type") == "error":
-                    yield event
-                    return
+                    + int(retry_usage.get("prompt_cache_hit_tokens") or 0),
+                    "prompt_cache_miss_tokens": int(
+                        usage.get("prompt_cache_miss_tokens") or 0
+                    )
+                    + int(retry_usage.get("prompt_cache_miss_tokens") or 0),
+                }
+            elif retry_usage:
+                usage = retry_usage
             if retry_reply:
                 reply_text = ((reply_text or "").rstrip() + "\n\n" + retry_reply).strip()
                 visible_reply = reply_text
@@ -744,6 +741,11 @@ class AgentsChatClass:
                                 "type": "step",
                                 "message": "Documento subido a Google Drive…",
                             }
+                        elif data.get("googleDrive") and data["googleDrive"].get("jobId"):
+                            yield {
+                                "type": "step",
+                                "message": "Documento listo (subiendo a Google Drive en segundo plano)…",
+                            }
                         elif data.get("googleDriveError"):
                             yield {
                                 "type": "step",
@@ -822,6 +824,102 @@ class AgentsChatClass:
         except Exception:
             self.db.rollback()
 
+    async def astream_chat(
+        self,
+        agent_id: str,
+        message: str,
+        student_id: int | None = None,
+        student_rut: str | None = None,
+        document_id: int | None = None,
+        history: list[dict[str, str]] | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """``stream_chat`` para rutas async: la BD avanza en el pool ``db`` y el LLM se
+        transmite con el cliente asyncio, sin ocupar un hilo durante el stream.
+
+        Si el navegador se desconecta, Starlette cancela este generador: se corta el
+        stream al proveedor y se cierra ``stream_chat`` (sin generar documento).
+        """
+        self._async_llm = True
+        gen = self.stream_chat(
+            agent_id,
+            message,
+            student_id=student_id,
+            student_rut=student_rut,
+            document_id=document_id,
+            history=history,
+        )
+        pending: dict[str, Any] | None = None
+        try:
+            while True:
+                event = await run_db(_advance_generator, gen, pending)
+                pending = None
+                if event is None:
+                    return
+                if event.get("type") != _LLM_REQUEST_EVENT:
+                    yield event
+                    continue
+                outcome = _new_llm_outcome()
+                # aclosing: al desconectarse el navegador se cierra el stream al proveedor.
+                async with aclosing(
+                    astream_chat_completion(
+                        event["messages"],
+                        api_key=event["api_key"],
+                        model=event["model"],
+                        timeout=event["timeout"],
+                        max_tokens=event["max_tokens"],
+                    )
+                ) as llm_events:
+                    async for llm_event in llm_events:
+                        for out in _collect_llm_event(
+                            outcome, llm_event, event["first_token_step"]
+                        ):
+                            yield out
+                pending = outcome
+        finally:
+            # Blindado: también corre cuando la desconexión canceló la tarea.
+            with anyio.CancelScope(shield=True):
+                try:
+                    await run_db(gen.close)
+                except ValueError:
+                    # Cancelado mientras un paso síncrono seguía en el pool: el GC lo cierra.
+                    pass
+
+    def _llm_stream(
+        self,
+        messages: list[dict[str, str]],
+        *,
+        model_code: str,
+        timeout: int,
+        max_tokens: int | None,
+        first_token_step: str | None = None,
+    ) -> Generator[dict[str, Any], Any, dict[str, Any]]:
+        """Reenvía el stream del LLM y devuelve ``{"reply", "usage", "error"}``.
+
+        Desde ``astream_chat`` solo emite el pedido y recibe el resultado por ``send``;
+        en modo síncrono (hilos, scripts) consume ``stream_chat_completion`` aquí mismo.
+        """
+        if self._async_llm:
+            outcome = yield {
+                "type": _LLM_REQUEST_EVENT,
+                "messages": messages,
+                "api_key": resolve_llm_api_key(self.db),
+                "model": model_code,
+                "timeout": timeout,
+                "max_tokens": max_tokens,
+                "first_token_step": first_token_step,
+            }
+            return outcome
+        outcome = _new_llm_outcome()
+        for event in stream_chat_completion(
+            messages,
+            model=model_code,
+            db=self.db,
+            timeout=timeout,
+            max_tokens=max_tokens,
+        ):
+            yield from _collect_llm_event(outcome, event, first_token_step)
+        return outcome
+
     def _stream_bulk_reports(
         self,
         *,
@@ -924,8 +1022,8 @@ class AgentsChatClass:
         header = (
             f"Curso **{course_title}**"
             f"{f' ({school_title}, {year_title})' if school_title else ''}: "
-            f"**{len(batch)}** estudiante(s). Generaré el {label} uno a uno "
-            "y lo guardaré en cada ficha.\n\n"
+            f"**{len(batch)}** estudiante(s). Generaré el {label} de cada uno "
+            "y lo guardaré en su ficha.\n\n"
             f"{roster}\n"
         )
         if len(students) > MAX_BULK_STUDENTS:
@@ -943,50 +1041,96 @@ class AgentsChatClass:
         filenames: list[str] = []
         usage_acc: dict[str, Any] | None = None
 
+        # Resultados por posición en la nómina: el resumen conserva el orden aunque terminen
+        # en otro orden. Cada generación corre en su hilo con su propia Session.
+        results: dict[int, dict[str, Any]] = {}
+        names: dict[int, str] = {}
+        tasks: list[tuple[int, int, str, str | None]] = []
         for index, student in enumerate(batch, start=1):
             sid = int(student.get("id") or 0)
             sname = (student.get("name") or f"Estudiante {sid}").strip()
             srut = (student.get("rut") or "").strip() or None
-            yield {
-                                "type": "step",
-                "message": f"{index}/{len(batch)} {sname}…",
-            }
+            names[index] = sname
             if not sid:
-                omitted.append((sname, "ficha incompleta"))
+                results[index] = {"ok": False, "reason": "ficha incompleta", "usage": None}
                 continue
-
-            result = self._generate_one_bulk_document(
+            tasks.append((index, sid, sname, srut))
+
+        finished = len(results)
+        halted: dict[str, Any] | None = None
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(
+            max_workers=max(1, min(len(tasks), bulk_concurrency_per_customer())),
+            thread_name_prefix="pie360-bulk",
+        )
+        try:
+            futures = {
+                pool.submit(
+                    self._run_bulk_student,
+                    stop=stop,
+                    agent_id=agent_id,
+                    agent_row_id=agent_row.id,
+                    student_id=sid,
+                    student_name=sname,
+                    student_rut=srut,
+                    document_id=int(document_id),
+                    label=label,
+                    model_code=model_code,
+                ): index
+                for index, sid, sname, srut in tasks
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    result = {"ok": False, "reason": f"error inesperado: {exc}", "usage": None}
+                results[index] = result
+                usage_acc = _merge_usage(usage_acc, result.get("usage"))
+                if result.get("skipped"):
+                    continue
+                finished += 1
+                mark = "listo" if result.get("ok") else "omitido"
+                yield {
+                    "type": "step",
+                    "message": f"{finished}/{len(batch)} {names[index]}: {mark}",
+                }
+                if (result.get("template_missing") or result.get("rate_limited")) and halted is None:
+                    # Sin plantilla o sin cupo de uso no tiene sentido seguir: no lanzar más,
+                    # esperar los en curso.
+                    halted = result
+                    stop.set()
+        finally:
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        if halted is not None:
+            ask = halted.get("reason") or "No hay plantilla en Documentos del agente."
+            yield {"type": "text_delta", "delta": f"\n\n{ask}"}
+            yield {
+                "type": "done",
+                "data": {
+                    "reply": header + "\n" + ask,
+                    "usage": usage_acc,
+                    "model": model_code,
+                    "responseFiles": [],
+                    "warning": ask,
+                },
+            }
+            self._record_bulk_usage(
                 agent_id=agent_id,
-                agent_row=agent_row,
-                student_id=sid,
-                student_name=sname,
-                student_rut=srut,
-                document_id=int(document_id),
-                label=label,
                 model_code=model_code,
+                usage=usage_acc,
+                input_text=text,
+                output_text=header + "\n" + ask,
             )
-            usage_acc = _merge_usage(usage_acc, result.get("usage"))
-            if result.get("template_missing"):
-                ask = result.get("reason") or "No hay plantilla en Documentos del agente."
-                yield {"type": "text_delta", "delta": f"\n\n{ask}"}
-                yield {
-                    "type": "done",
-                    "data": {
-                        "reply": header + "\n" + ask,
-                        "usage": usage_acc,
-                        "model": model_code,
-                        "responseFiles": [],
-                        "warning": ask,
-                    },
-                }
-                self._record_bulk_usage(
-                    agent_id=agent_id,
-                    model_code=model_code,
-                    usage=usage_acc,
-                    input_text=text,
-                    output_text=header + "\n" + ask,
-                )
-                return
+            return
+
+        for index in sorted(results):
+            result = results[index]
+            if result.get("skipped"):
+                continue
+            sname = names[index]
             if result.get("ok"):
                 ok_names.append(sname)
                 fname = (result.get("filename") or "").strip()
@@ -1039,9 +1183,98 @@ class AgentsChatClass:
             output_text=reply,
         )
 
+    def _run_bulk_student(
+        self,
+        *,
+        stop: threading.Event,
+        agent_id: str,
+        agent_row_id: str,
+        student_id: int,
+        student_name: str,
+        student_rut: str | None,
+        document_id: int,
+        label: str,
+        model_code: str,
+    ) -> dict[str, Any]:
+        """Un estudiante de la tanda, en un hilo del pool: Session propia, cupo por cliente y reintentos."""
+        skipped: dict[str, Any] = {"ok": False, "skipped": True, "usage": None}
+        if stop.is_set():
+            return skipped
+        with _bulk_customer_slot(int(self.customer_id)):
+            if stop.is_set():
+                return skipped
+            db = self.session_factory()
+            try:
+                agent_row = db.query(AgentModel).filter(AgentModel.id == agent_row_id).first()
+                if agent_row is None:
+                    return {"ok": False, "reason": "agente no encontrado", "usage": None}
+                worker = type(self)(
+                    db,
+                    customer_id=self.customer_id,
+                    school_id=self.school_id,
+                    user_id=self.user_id,
+                    period_year=self.period_year,
+                )
+                worker.session_factory = self.session_factory
+                retries = max(0, int(settings.agents_bulk_retries or 0))
+                usage: dict[str, Any] | None = None
+                attempt = 0
+                while True:
+                    result = worker._generate_one_bulk_document(
+                        stop=stop,
+                        agent_id=agent_id,
+                        agent_row=agent_row,
+                        student_id=student_id,
+                        student_name=student_name,
+                        student_rut=student_rut,
+                        document_id=document_id,
+                        label=label,
+                        model_code=model_code,
+                    )
+                    # Cada intento cobra tokens: se suman todos para el registro de uso.
+                    usage = _merge_usage(usage, result.get("usage"))
+                    if result.get("ok") or not result.get("retryable") or attempt >= retries:
+                        break
+                    if stop.is_set():
+                        break
+                    attempt += 1
+                    time.sleep(BULK_RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+                result["usage"] = usage
+                result["attempts"] = attempt + 1
+                return result
+            finally:
+                db.close()
+
+    def _register_bulk_llm_call(self, stop: threading.Event | None = None) -> dict[str, Any] | None:
+        """Cuenta una llamada LLM de la tanda en el rate limit, igual que un mensaje interactivo.
+
+        Con la ventana por minuto llena espera a que se libere (hasta
+        ``BULK_RATE_MAX_WAIT_SECONDS``); presupuesto o tokens del día agotados devuelven el
+        rechazo de inmediato. ``None`` si la llamada puede hacerse.
+        """
+        limiter = AgentsRateLimitClass(self.db)
+        waited = 0.0
+        while True:
+            rate = limiter.check_and_register_chat(
+                user_id=int(self.user_id) if self.user_id else None,
+                customer_id=int(self.customer_id) if self.customer_id else None,
+                school_id=int(self.school_id) if self.school_id else None,
+            )
+            if rate.get("ok"):
+                return None
+            if rate.get("code") != "rate_limit_requests" or waited >= BULK_RATE_MAX_WAIT_SECONDS:
+                return rate
+            if stop is not None:
+                if stop.wait(BULK_RATE_WAIT_SECONDS):
+                    return rate
+            else:
+                time.sleep(BULK_RATE_WAIT_SECONDS)
+            waited += BULK_RATE_WAIT_SECONDS
+
     def _generate_one_bulk_document(
         self,
         *,
+        stop: threading.Event | None = None,
         agent_id: str,
         agent_row: AgentModel,
         student_id: int,
@@ -1057,6 +1290,7 @@ class AgentsChatClass:
             "reason": None,
             "usage": None,
             "template_missing": False,
+            "retryable": False,
         }
         if document_id == _PSYCHOPED_DOCUMENT_ID:
             files_block = ""
@@ -1119,6 +1353,11 @@ class AgentsChatClass:
         )
         reply_text = ""
         usage: dict[str, Any] | None = None
+        denied = self._register_bulk_llm_call(stop)
+        if denied is not None:
+            empty["reason"] = denied.get("message") or "límite de uso de Agentes alcanzado"
+            empty["rate_limited"] = True
+            return empty
         for event in stream_chat_completion(
             messages,
             model=model_code,
@@ -1137,6 +1376,7 @@ class AgentsChatClass:
             elif event.get("type") == "error":
                 empty["reason"] = event.get("message") or "error del modelo"
                 empty["usage"] = usage
+                empty["retryable"] = _is_transient_llm_error(event)
                 return empty
 
         fields = extract_fields_from_reply(reply_text)
@@ -1151,6 +1391,12 @@ class AgentsChatClass:
                 {"role": "user", "content": retry_msg},
             ]
             retry_reply = ""
+            denied = self._register_bulk_llm_call(stop)
+            if denied is not None:
+                empty["reason"] = denied.get("message") or "límite de uso de Agentes alcanzado"
+                empty["usage"] = usage
+                empty["rate_limited"] = True
+                return empty
             for event in stream_chat_completion(
                 retry_messages,
                 model=model_code,
@@ -1190,6 +1436,7 @@ class AgentsChatClass:
                 elif event.get("type") == "error":
                     empty["reason"] = event.get("message") or "error del modelo"
                     empty["usage"] = usage
+                    empty["retryable"] = _is_transient_llm_error(event)
                     return empty
             fields = extract_fields_from_reply(retry_reply)
         if not fields:
@@ -1286,3 +1533,71 @@ def _merge_usage(
     ):
         acc[key] = int(acc.get(key) or 0) + int(extra.get(key) or 0)
     return acc
+
+
+def _is_transient_llm_error(event: dict[str, Any]) -> bool:
+    """Red / stream cortado / 429 / 5xx del proveedor: vale la pena reintentar."""
+    code = event.get("code")
+    if code in ("llm_network", "llm_stream"):
+        return True
+    if code == "llm_http":
+        status = int(event.get("status") or 0)
+        return status == 429 or status >= 500
+    return False
+
+
+_bulk_slots: dict[int, threading.BoundedSemaphore] = {}
+_bulk_slots_lock = threading.Lock()
+
+
+@contextmanager
+def _bulk_customer_slot(customer_id: int) -> Iterator[None]:
+    """Cupo compartido por todas las tandas masivas del mismo cliente en este proceso."""
+    with _bulk_slots_lock:
+        slot = _bulk_slots.get(customer_id)
+        if slot is None:
+            slot = _bulk_slots[customer_id] = threading.BoundedSemaphore(
+                bulk_concurrency_per_customer()
+            )
+    with slot:
+        yield
+
+
+_LLM_REQUEST_EVENT = "_llm_request"
+
+
+def _new_llm_outcome() -> dict[str, Any]:
+    return {"reply": "", "usage": None, "error": None, "started": False}
+
+
+def _collect_llm_event(
+    outcome: dict[str, Any], event: dict[str, Any], first_token_step: str | None
+) -> list[dict[str, Any]]:
+    """Acumula un evento del LLM en ``outcome``; devuelve lo que se reenvía al navegador."""
+    kind = event.get("type")
+    if kind == "text_delta":
+        forward: list[dict[str, Any]] = []
+        if not outcome["started"]:
+            outcome["started"] = True
+            if first_token_step:
+                forward.append({"type": "step", "message": first_token_step})
+        outcome["reply"] += event.get("delta") or ""
+        forward.append(event)
+        return forward
+    if kind == "done":
+        data = event.get("data") or {}
+        outcome["reply"] = data.get("reply") or outcome["reply"]
+        outcome["usage"] = data.get("usage") if isinstance(data.get("usage"), dict) else None
+        return []
+    if kind == "error":
+        outcome["error"] = event
+        return []
+    return [event]
+
+
+def _advance_generator(gen: Generator[dict[str, Any], Any, Any], value: Any) -> dict[str, Any] | None:
+    # StopIteration no puede cruzar un Future de asyncio: None marca el fin.
+    try:
+        return gen.send(value)
+    except StopIteration:
+        return None
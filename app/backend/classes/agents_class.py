@@ -17,6 +17,7 @@ from app.backend.utils.agents_template_inspector import (
     fields_to_json,
     inspect_template_fields,
 )
+from app.backend.utils.upload_sink import StagedUpload
 
 
 SECTION_LABELS = {
@@ -285,7 +286,7 @@ class AgentsClass:
         customer_id: int,
         document_id: int,
         document_name: str,
-        data: bytes,
+        data: bytes | StagedUpload,
         filename: str,
     ) -> dict[str, Any]:
         agent = self._get_agent(agent_id, customer_id)
@@ -387,7 +388,7 @@ class AgentsClass:
         self,
         agent_id: str,
         customer_id: int,
-        files: list[tuple[str, bytes]],
+        files: list[tuple[str, bytes | StagedUpload]],
     ) -> dict[str, Any]:
         agent = self._get_agent(agent_id, customer_id)
         if not agent:
@@ -547,6 +547,8 @@ class AgentsMcpClass:
         )
         if drive_info and drive_info.get("drive_path"):
             msg += f" Subido a Google Drive: {drive_info.get('drive_path')}."
+        elif drive_info and drive_info.get("jobId"):
+            msg += " Subida a Google Drive en segundo plano."
         elif drive_error:
             msg += f" (Drive no subido: {drive_error})"
 
@@ -582,12 +584,22 @@ class AgentsMcpClass:
         file_name: str | None = None,
     ) -> dict[str, Any]:
         """
-        Sube el documento generado a Drive:
+        Encola la subida del documento generado a Drive:
         Liceo > Año > Curso > RUT numérico > RUT_Tipo de documento.ext
+
+        La subida la hace el worker de drive_upload_jobs; ``data`` trae el estado del job
+        (``jobId``, ``status``) para consultarlo con ``get_drive_upload_status``. Con el worker
+        apagado (DRIVE_UPLOAD_WORKER_ENABLED=0) se sube aquí mismo y ``data`` ya trae drive_path.
         """
         from datetime import datetime, timezone
         from pathlib import Path
 
+        from app.backend.classes.drive_upload_jobs_class import (
+            JOB_DONE,
+            JOB_FAILED,
+            DriveUploadJobsClass,
+            process_due_drive_uploads,
+        )
         from app.backend.core.config import settings
         from app.backend.db.models.pie_core import (
             CourseModel,
@@ -597,7 +609,7 @@ class AgentsMcpClass:
             StudentModel,
             StudentPersonalInfoModel,
         )
-        from app.backend.utils import google_drive_storage as gdrive
+        from app.backend.utils.customer_drive_config import customer_drive_configured
 
         aid = (agent_id or "").strip()
         if not aid or int(customer_id) < 1 or int(student_id) < 1 or int(document_id) < 1:
@@ -617,6 +629,15 @@ class AgentsMcpClass:
         )
         if not agent:
             return {"status": "error", "message": "Agente no encontrado.", "http_status": 404}
+        if not customer_drive_configured(self.db, int(customer_id)):
+            return {
+                "status": "error",
+                "message": (
+                    "Google Drive no está configurado para este cliente. "
+                    "Conéctalo en Configuración → Google Drive."
+                ),
+                "http_status": 400,
+            }
 
         # Localizar archivo generado
         local_name = (file_name or "").strip() or None
@@ -721,27 +742,51 @@ class AgentsMcpClass:
         )
         ext = (getattr(template, "format_type", None) or local_path.suffix.lstrip(".") or "docx").lower()
 
-        try:
-            payload = gdrive.upload_student_document_tree(
-                db=self.db,
-                customer_id=int(customer_id),
-                school_name=school_name,
-                year=int(period_year),
-                course_name=course_name,
-                student_rut=rut,
-                document_type_name=document_type_name,
-                data=local_path.read_bytes(),
-                file_extension=ext,
-            )
-        except ValueError as exc:
-            return {"status": "error", "message": str(exc), "http_status": 400}
-        except Exception as exc:
-            return {"status": "error", "message": str(exc), "http_status": 500}
+        jobs = DriveUploadJobsClass(self.db)
+        queued = jobs.enqueue(
+            customer_id=int(customer_id),
+            student_id=int(student_id),
+            document_id=int(document_id),
+            agent_id=aid,
+            save_id=int(save_id) if save_id else None,
+            payload={
+                "school_name": school_name,
+                "year": int(period_year),
+                "course_name": course_name,
+                "student_rut": rut,
+                "document_type_name": document_type_name,
+                "file_extension": ext,
+                "file_name": local_path.name,
+            },
+        )
+        if queued.get("status") == "error":
+            return queued
+        job = queued.get("data") or {}
+        if settings.drive_upload_worker_enabled:
+            return {
+                "status": "success",
+                "message": f"Subida a Google Drive en cola (job {job.get('jobId')}).",
+                "data": job,
+            }
 
+        process_due_drive_uploads(job_ids=[int(job["jobId"])])
+        self.db.expire_all()
+        job = (jobs.get(job_id=int(job["jobId"]), customer_id=int(customer_id)).get("data")) or job
+        if job.get("status") == JOB_DONE:
+            return {
+                "status": "success",
+                "message": f"Documento subido a Google Drive: {job.get('drive_path')}",
+                "data": job,
+            }
+        if job.get("status") == JOB_FAILED:
+            return {"status": "error", "message": job.get("lastError") or "Error", "http_status": 400}
         return {
             "status": "success",
-            "message": f"Documento subido a Google Drive: {payload.get('drive_path')}",
-            "data": payload,
+            "message": (
+                f"Google Drive no respondió ({job.get('lastError')}); "
+                f"se reintentará (job {job.get('jobId')})."
+            ),
+            "data": job,
         }
 
     def _prompt_content_rules_for_document(self, document_id: int | None) -> list[str]:
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any
 
 from sqlalchemy import func
@@ -10,11 +10,9 @@ from sqlalchemy.orm import Session
 
 from app.backend.core.config import settings
 from app.backend.db.models import RolModel
-from app.backend.db.models.agents_usage import (
-    AgentsRateLimitHitModel,
-    AgentsTokenUsageModel,
-)
+from app.backend.db.models.agents_usage import AgentsTokenUsageModel
 from app.backend.db.models.pie_core import CustomerModel
+from app.backend.utils.agents_rate_store import get_rate_limit_store
 
 
 def can_use_agents_chat(session_user: Any, db: Session) -> bool:
@@ -31,60 +29,77 @@ def can_use_agents_chat(session_user: Any, db: Session) -> bool:
     return "coordinador" in n or "evaluador" in n
 
 
+def bulk_concurrency_per_customer() -> int:
+    """Generaciones LLM simultáneas por cliente en informes masivos (≤ solicitudes/min del cliente)."""
+    req_customer = max(1, int(settings.agents_rate_requests_per_min_customer or 30))
+    wanted = max(1, int(settings.agents_bulk_concurrency_per_customer or 1))
+    return min(wanted, req_customer)
+
+
 def _day_start_utc() -> datetime:
     now = datetime.utcnow()
     return now.replace(hour=0, minute=0, second=0, microsecond=0)
 
 
+def _reconcile_seconds() -> float:
+    return max(1.0, float(settings.agents_rate_reconcile_seconds or 60))
+
+
+def record_agents_usage(
+    *,
+    customer_id: int | None,
+    user_id: int | None,
+    total_tokens: int,
+    cost_usd: float,
+) -> None:
+    """Suma un consumo recién guardado a los totales en memoria (sin re-agregar en BD)."""
+    store = get_rate_limit_store()
+    day = _day_start_utc().date()
+    tokens = max(0, int(total_tokens or 0))
+    if user_id:
+        store.add_total(("tokens_day", "user", int(user_id)), tokens, day=day)
+    if customer_id:
+        store.add_total(("tokens_day", "customer", int(customer_id)), tokens, day=day)
+        store.add_total(("spent_usd", int(customer_id)), float(cost_usd or 0), day=None)
+
+
 class AgentsRateLimitClass:
     def __init__(self, db: Session):
         self.db = db
-
-    def _purge_old_hits(self, older_than: datetime) -> None:
-        (
-            self.db.query(AgentsRateLimitHitModel)
-            .filter(AgentsRateLimitHitModel.created_at < older_than)
-            .delete(synchronize_session=False)
-        )
-
-    def _count_hits(
-        self,
-        *,
-        since: datetime,
-        user_id: int | None = None,
-        customer_id: int | None = None,
-        school_id: int | None = None,
-    ) -> int:
-        q = self.db.query(func.count(AgentsRateLimitHitModel.id)).filter(
-            AgentsRateLimitHitModel.created_at >= since
-        )
-        if user_id is not None:
-            q = q.filter(AgentsRateLimitHitModel.user_id == int(user_id))
-        if customer_id is not None:
-            q = q.filter(AgentsRateLimitHitModel.customer_id == int(customer_id))
-        if school_id is not None:
-            q = q.filter(AgentsRateLimitHitModel.school_id == int(school_id))
-        return int(q.scalar() or 0)
+        self.store = get_rate_limit_store()
 
     def _tokens_today(
         self,
         *,
         user_id: int | None = None,
         customer_id: int | None = None,
-        school_id: int | None = None,
     ) -> int:
+        day_start = _day_start_utc()
+        if user_id is not None:
+            key = ("tokens_day", "user", int(user_id))
+        else:
+            key = ("tokens_day", "customer", int(customer_id or 0))
+        cached = self.store.total(key, day=day_start.date(), max_age_seconds=_reconcile_seconds())
+        if cached is not None:
+            return int(cached)
+        mark = self.store.add_mark(key, day=day_start.date())
         q = self.db.query(
             func.coalesce(func.sum(AgentsTokenUsageModel.total_tokens), 0)
-        ).filter(AgentsTokenUsageModel.created_at >= _day_start_utc())
+        ).filter(AgentsTokenUsageModel.created_at >= day_start)
         if user_id is not None:
             q = q.filter(AgentsTokenUsageModel.user_id == int(user_id))
-        if customer_id is not None:
-            q = q.filter(AgentsTokenUsageModel.customer_id == int(customer_id))
-        if school_id is not None:
-            q = q.filter(AgentsTokenUsageModel.school_id == int(school_id))
-        return int(q.scalar() or 0)
+        else:
+            q = q.filter(AgentsTokenUsageModel.customer_id == int(customer_id or 0))
+        value = int(q.scalar() or 0)
+        self.store.set_total(key, value, day=day_start.date(), mark=mark)
+        return value
 
     def _spent_usd(self, customer_id: int) -> float:
+        key = ("spent_usd", int(customer_id))
+        cached = self.store.total(key, day=None, max_age_seconds=_reconcile_seconds())
+        if cached is not None:
+            return float(cached)
+        mark = self.store.add_mark(key, day=None)
         total = (
             self.db.query(
                 func.coalesce(func.sum(AgentsTokenUsageModel.estimated_cost_usd), 0)
@@ -93,9 +108,11 @@ class AgentsRateLimitClass:
             .scalar()
         )
         try:
-            return float(total or 0)
+            value = float(total or 0)
         except (TypeError, ValueError):
-            return 0.0
+            value = 0.0
+        self.store.set_total(key, value, day=None, mark=mark)
+        return value
 
     def check_and_register_chat(
         self,
@@ -107,17 +124,17 @@ class AgentsRateLimitClass:
         """
         Enforce requests/min, tokens/day and presupuesto USD del cliente.
         Registers a hit only when allowed.
+
+        Ventanas y totales viven en memoria (``agents_rate_store``); la BD solo se agrega
+        al reconciliar, no en cada mensaje.
         """
-        now = datetime.utcnow()
-        window_start = now - timedelta(minutes=1)
         req_user = max(1, int(settings.agents_rate_requests_per_min_user or 10))
         req_customer = max(1, int(settings.agents_rate_requests_per_min_customer or 30))
         tok_user = max(1000, int(settings.agents_rate_tokens_per_day_user or 200000))
         tok_customer = max(1000, int(settings.agents_rate_tokens_per_day_customer or 2000000))
+        school_cap = max(req_user, min(req_customer, req_user * 3))
 
         try:
-            self._purge_old_hits(now - timedelta(minutes=10))
-
             if customer_id:
                 customer = (
                     self.db.query(CustomerModel)
@@ -144,16 +161,6 @@ class AgentsRateLimitClass:
                             }
 
             if user_id:
-                user_hits = self._count_hits(since=window_start, user_id=int(user_id))
-                if user_hits >= req_user:
-                    return {
-                        "ok": False,
-                        "code": "rate_limit_requests",
-                        "message": (
-                            f"Demasiadas solicitudes. Límite: {req_user} por minuto "
-                            "por usuario. Espera un momento e inténtalo de nuevo."
-                        ),
-                    }
                 user_tokens = self._tokens_today(user_id=int(user_id))
                 if user_tokens >= tok_user:
                     return {
@@ -166,18 +173,6 @@ class AgentsRateLimitClass:
                     }
 
             if customer_id:
-                cust_hits = self._count_hits(
-                    since=window_start, customer_id=int(customer_id)
-                )
-                if cust_hits >= req_customer:
-                    return {
-                        "ok": False,
-                        "code": "rate_limit_requests",
-                        "message": (
-                            f"Demasiadas solicitudes en este cliente. Límite: "
-                            f"{req_customer} por minuto. Espera un momento."
-                        ),
-                    }
                 cust_tokens = self._tokens_today(customer_id=int(customer_id))
                 if cust_tokens >= tok_customer:
                     return {
@@ -189,32 +184,32 @@ class AgentsRateLimitClass:
                         ),
                     }
 
+            checks: list[tuple[Any, int]] = []
+            if user_id:
+                checks.append((("hits", "user", int(user_id)), req_user))
+            if customer_id:
+                checks.append((("hits", "customer", int(customer_id)), req_customer))
             if school_id and customer_id:
-                school_hits = self._count_hits(
-                    since=window_start,
-                    customer_id=int(customer_id),
-                    school_id=int(school_id),
-                )
-                school_cap = max(req_user, min(req_customer, req_user * 3))
-                if school_hits >= school_cap:
-                    return {
-                        "ok": False,
-                        "code": "rate_limit_requests",
-                        "message": (
-                            f"Demasiadas solicitudes en este colegio. Límite: "
-                            f"{school_cap} por minuto. Espera un momento."
-                        ),
-                    }
-
-            self.db.add(
-                AgentsRateLimitHitModel(
-                    user_id=int(user_id) if user_id else None,
-                    customer_id=int(customer_id) if customer_id else None,
-                    school_id=int(school_id) if school_id else None,
-                    created_at=now,
-                )
-            )
-            self.db.commit()
+                checks.append((("hits", "school", int(customer_id), int(school_id)), school_cap))
+            full = self.store.acquire(checks) if checks else None
+            if full is not None:
+                scope = full[1]
+                if scope == "user":
+                    message = (
+                        f"Demasiadas solicitudes. Límite: {req_user} por minuto "
+                        "por usuario. Espera un momento e inténtalo de nuevo."
+                    )
+                elif scope == "customer":
+                    message = (
+                        f"Demasiadas solicitudes en este cliente. Límite: "
+                        f"{req_customer} por minuto. Espera un momento."
+                    )
+                else:
+                    message = (
+                        f"Demasiadas solicitudes en este colegio. Límite: "
+                        f"{school_cap} por minuto. Espera un momento."
+                    )
+                return {"ok": False, "code": "rate_limit_requests", "message": message}
             return {"ok": True, "code": None, "message": None}
         except Exception as exc:
             self.db.rollback()
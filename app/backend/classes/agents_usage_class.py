@@ -9,6 +9,7 @@ from typing import Any
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.backend.classes.agents_rate_limit_class import record_agents_usage
 from app.backend.db.models.agents_openai_models import AgentsOpenAIModel
 from app.backend.db.models.agents_usage import AgentsTokenUsageModel
 from app.backend.db.models.pie_core import CustomerModel
@@ -145,6 +146,12 @@ class AgentsUsageClass:
         self.db.add(row)
         self.db.commit()
         self.db.refresh(row)
+        record_agents_usage(
+            customer_id=int(customer_id),
+            user_id=int(user_id) if user_id else None,
+            total_tokens=tt,
+            cost_usd=float(cost),
+        )
         return {"status": "success", "id": row.id}
 
     def list_report(
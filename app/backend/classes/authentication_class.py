@@ -8,6 +8,8 @@ from jose import jwt, JWTError
 import bcrypt
 from argon2 import PasswordHasher
 from sqlalchemy import func, or_
+from app.backend.utils.principal_cache import invalidate_principal
+from app.backend.utils.rut_normalize import rut_lookup_key
 
 argon2_hasher = PasswordHasher()
 
@@ -20,17 +22,14 @@ class AuthenticationClass:
 
     def authenticate_user(self, username_or_rut, password):
         username = (username_or_rut or "").strip()
-        rut_norm = self._normalize_rut(username)
+        rut_key = rut_lookup_key(self._normalize_rut(username))
+        login_match = func.lower(UserModel.email) == username.lower()
+        if rut_key:
+            login_match = or_(login_match, UserModel.rut_normalized == rut_key)
         user = (
             self.db.query(UserModel)
             .filter(
-                or_(
-                    func.lower(UserModel.email) == username.lower(),
-                    func.upper(
-                        func.replace(func.replace(UserModel.rut, ".", ""), "-", "")
-                    )
-                    == rut_norm,
-                ),
+                login_match,
                 or_(UserModel.deleted_status_id == 0, UserModel.deleted_status_id.is_(None)),
             )
             .first()
@@ -155,6 +154,7 @@ class AuthenticationClass:
                 setattr(existing_user, key, value)
 
         self.db.commit()
+        invalidate_principal(existing_user.id)
 
         return 1
         
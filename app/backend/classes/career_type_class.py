@@ -1,5 +1,6 @@
 from app.backend.db.models import CareerTypeModel
 from datetime import datetime
+from app.backend.utils.catalog_cache import bump_catalog
 
 class CareerTypeClass:
     def __init__(self, db):
@@ -104,6 +105,7 @@ class CareerTypeClass:
 
             self.db.add(new_career_type)
             self.db.commit()
+            bump_catalog("career_types")
             self.db.refresh(new_career_type)
 
             return {
@@ -140,6 +142,7 @@ class CareerTypeClass:
             career_type.updated_date = datetime.now()
 
             self.db.commit()
+            bump_catalog("career_types")
 
             return {
                 "status": "success",
@@ -168,6 +171,7 @@ class CareerTypeClass:
             # Hard delete
             self.db.delete(career_type)
             self.db.commit()
+            bump_catalog("career_types")
 
             return {
                 "status": "success",
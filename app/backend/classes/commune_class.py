@@ -4,6 +4,7 @@ from typing import Any, Dict, List, Optional, Tuple
 from sqlalchemy import func
 
 from app.backend.db.models import CommuneModel, ProvinceModel, RegionModel
+from app.backend.utils.catalog_cache import bump_catalog
 
 
 def _extract_inspection_rows(inspection_body: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -194,6 +195,7 @@ class CommuneClass:
 
             self.db.add(new_commune)
             self.db.commit()
+            bump_catalog("communes")
             self.db.refresh(new_commune)
 
             return {
@@ -240,6 +242,7 @@ class CommuneClass:
                     existing.region_id = rid
                     existing.updated_date = datetime.now()
                     self.db.commit()
+                    bump_catalog("communes")
                     imported += 1
                     continue
 
@@ -264,6 +267,7 @@ class CommuneClass:
             if data:
                 self.db.delete(data)
                 self.db.commit()
+                bump_catalog("communes")
                 return {"status": "success", "message": "Commune deleted successfully"}
             else:
                 return {"status": "error", "message": "No data found"}
@@ -286,6 +290,7 @@ class CommuneClass:
             existing_commune.updated_date = datetime.now()
 
             self.db.commit()
+            bump_catalog("communes")
             self.db.refresh(existing_commune)
 
             return {"status": "success", "message": "Commune updated successfully"}
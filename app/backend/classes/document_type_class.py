@@ -1,5 +1,6 @@
 from datetime import datetime
 from app.backend.db.models import DocumentTypeModel
+from app.backend.utils.catalog_cache import bump_catalog
 
 class DocumentTypeClass:
     def __init__(self, db):
@@ -98,6 +99,7 @@ class DocumentTypeClass:
 
             self.db.add(new_doc)
             self.db.commit()
+            bump_catalog("document_types")
             self.db.refresh(new_doc)
 
             return {
@@ -128,6 +130,7 @@ class DocumentTypeClass:
             existing_doc.updated_date = datetime.now()
 
             self.db.commit()
+            bump_catalog("document_types")
             self.db.refresh(existing_doc)
 
             return {"status": "success", "message": "Document type updated successfully"}
@@ -145,6 +148,7 @@ class DocumentTypeClass:
             if doc:
                 self.db.delete(doc)
                 self.db.commit()
+                bump_catalog("document_types")
                 return {"status": "success", "message": "Document type deleted successfully"}
             else:
                 return {"status": "error", "message": "No data found"}
@@ -11,11 +11,24 @@ from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from datetime import datetime, date
+from app.backend.core.render_pool import RenderJob, render_pool
 from app.backend.db.models import DocumentModel, BirthCertificateDocumentModel, HealthEvaluationModel, FolderModel
+from app.backend.utils.generated_document_cache import (
+    generation_key,
+    get_generated_document_cache,
+    note_generation_etag,
+)
+from app.backend.utils.pdf_tag_placements import tag_placement_map
+from app.backend.utils.template_registry import (
+    open_docx_template,
+    open_fitz_template,
+    open_pdf_reader_template,
+    pdf_form_field_names,
+)
 
 # pypdf imports (opcional, solo si está instalado)
 try:
-    from pypdf import PdfReader, PdfWriter
+    from pypdf import PdfWriter
     from pypdf.generic import NameObject, NumberObject, BooleanObject, TextStringObject
     PYPDF_AVAILABLE = True
 except ImportError:
@@ -71,6 +84,69 @@ class DocumentsClass:
         template_path: Optional[str] = None,
         tag_replacements: Optional[Dict[str, str]] = None,
         output_directory: str = "files/system/students"
+    ) -> Dict[str, Any]:
+        """
+        Igual que ``_generate_document_pdf_uncached`` pero con caché por contenido: si ya se
+        generó hoy el mismo documento con los mismos datos y plantilla, copia ese PDF a
+        ``output_directory`` sin renderizar. ``result["etag"]`` trae la clave de caché.
+        """
+        cache = get_generated_document_cache(output_directory)
+        if cache is None:
+            return DocumentsClass._render_document_pdf(
+                document_id, document_data, db, template_path, tag_replacements, output_directory
+            )
+        try:
+            key = generation_key(
+                document_id,
+                document_data,
+                tag_replacements=tag_replacements,
+                template_path=template_path,
+            )
+        except (TypeError, ValueError):
+            key = None
+        if key:
+            hit = cache.lookup(key, output_directory)
+            if hit is not None:
+                note_generation_etag(key)
+                return hit
+        result = DocumentsClass._render_document_pdf(
+            document_id, document_data, db, template_path, tag_replacements, output_directory
+        )
+        if key and result.get("status") != "error" and result.get("file_path"):
+            cache.store(key, result)
+            result["etag"] = key
+            note_generation_etag(key)
+        return result
+
+    @staticmethod
+    def _render_document_pdf(
+        document_id: int,
+        document_data: Dict[str, Any],
+        db: Optional[Session],
+        template_path: Optional[str],
+        tag_replacements: Optional[Dict[str, str]],
+        output_directory: str,
+    ) -> Dict[str, Any]:
+        """
+        Los PDF ReportLab desde cero (sin BD) van al pool de procesos (core/render_pool);
+        el resto, o si el trabajo no es serializable, se renderiza en este hilo.
+        """
+        if render_pool.handles(document_id, template_path):
+            result = render_pool.render(RenderJob(int(document_id), document_data, output_directory))
+            if result is not None:
+                return result
+        return DocumentsClass._generate_document_pdf_uncached(
+            document_id, document_data, db, template_path, tag_replacements, output_directory
+        )
+
+    @staticmethod
+    def _generate_document_pdf_uncached(
+        document_id: int,
+        document_data: Dict[str, Any],
+        db: Optional[Session] = None,
+        template_path: Optional[str] = None,
+        tag_replacements: Optional[Dict[str, str]] = None,
+        output_directory: str = "files/system/students"
     ) -> Dict[str, Any]:
         """
         Función general para generar PDFs de cualquier documento.
@@ -397,137 +473,9 @@ class DocumentsClass:
             # Asegurar que el directorio de salida existe
             output_file.parent.mkdir(parents=True, exist_ok=True)
             
-            # Abrir el archivo PDF
-            pdf_document = fitz.open(template_file)
-            
-            # Procesar cada página del PDF
-            for page_num in range(len(pdf_document)):
-                page = pdf_document[page_num]
-                
-                # Obtener todo el texto de la página en formato dict para búsqueda más precisa
-                page_dict = None
-                try:
-                    page_dict = page.get_text("dict")
-                except:
-                    pass
-                
-                # Reemplazar cada tag
-                for tag, value in tag_replacements.items():
-                    text_instances = []
-                    
-                    # Intentar diferentes variaciones del tag
-                    tag_variations = [
-                        tag,  # Tag original con corchetes
-                        tag.upper(),  # Mayúsculas
-                        tag.lower(),  # Minúsculas
-                    ]
-                    
-                    # Buscar cada variación usando search_for
-                    for tag_variant in tag_variations:
-                        try:
-                            found = page.search_for(tag_variant, flags=fitz.TEXT_DEHYPHENATE)
-                            if found:
-                                text_instances.extend(found)
-                                break
-                        except:
-                            try:
-                                found = page.search_for(tag_variant)
-                                if found:
-                                    text_instances.extend(found)
-                                    break
-                            except:
-                                pass
-                    
-                    # Si aún no se encuentra, buscar usando get_text("dict")
-                    if not text_instances and page_dict:
-                        try:
-                            for block in page_dict.get("blocks", []):
-                                if "lines" in block:
-                                    for line in block["lines"]:
-                                        full_line_text = ""
-                                        line_spans = []
-                                        for span in line.get("spans", []):
-                                            span_text = span.get("text", "")
-                                            full_line_text += span_text
-                                            line_spans.append((span, span_text))
-                                        
-                                        full_line_text_upper = full_line_text.upper()
-                                        for tag_variant in tag_variations:
-                                            tag_variant_upper = tag_variant.upper()
-                                            if tag_variant_upper in full_line_text_upper:
-                                                matching_spans = []
-                                                for span, span_text in line_spans:
-                                                    span_text_upper = span_text.upper()
-                                                    if tag_variant_upper in span_text_upper:
-                                                        matching_spans.append(span)
-                                                
-                                                if matching_spans:
-                                                    x0 = min(s.get("bbox", [0, 0, 0, 0])[0] for s in matching_spans)
-                                                    y0 = min(s.get("bbox", [0, 0, 0, 0])[1] for s in matching_spans)
-                                                    x1 = max(s.get("bbox", [0, 0, 0, 0])[2] for s in matching_spans)
-                                                    y1 = max(s.get("bbox", [0, 0, 0, 0])[3] for s in matching_spans)
-                                                    rect = fitz.Rect(x0 - 2, y0 - 2, x1 + 2, y1 + 2)
-                                                    text_instances.append(rect)
-                                                break
-                        except:
-                            pass
-                    
-                    # Reemplazar todas las instancias encontradas
-                    if text_instances:
-                        seen_rects = set()
-                        unique_instances = []
-                        page_width = page.rect.width
-                        page_height = page.rect.height
-                        
-                        for rect in text_instances:
-                            if isinstance(rect, (list, tuple)) and len(rect) == 4:
-                                rect = fitz.Rect(rect[0], rect[1], rect[2], rect[3])
-                            
-                            if (rect.x0 >= 0 and rect.y0 >= 0 and 
-                                rect.x1 <= page_width and rect.y1 <= page_height and
-                                rect.x1 > rect.x0 and rect.y1 > rect.y0):
-                                
-                                rect_key = (round(rect.x0, 1), round(rect.y0, 1), round(rect.x1, 1), round(rect.y1, 1))
-                                if rect_key not in seen_rects:
-                                    seen_rects.add(rect_key)
-                                    unique_instances.append(rect)
-                        
-                        for rect in unique_instances:
-                            if rect.x1 > rect.x0 and rect.y1 > rect.y0:
-                                page.add_redact_annot(rect, fill=(1, 1, 1))
-                                page.apply_redactions()
-                                
-                                fontsize = 10
-                                try:
-                                    text_rect = fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y1)
-                                    rc = page.insert_textbox(
-                                        text_rect,
-                                        value,
-                                        fontsize=fontsize,
-                                        color=(0, 0, 0),
-                                        align=0,
-                                        overlay=True
-                                    )
-                                    
-                                    if rc < 0:
-                                        page.insert_text(
-                                            (rect.x0 + 2, rect.y0 + fontsize),
-                                            value,
-                                            fontsize=fontsize,
-                                            color=(0, 0, 0),
-                                            overlay=True
-                                        )
-                                except:
-                                    try:
-                                        page.insert_text(
-                                            (rect.x0 + 2, rect.y0 + fontsize),
-                                            value,
-                                            fontsize=fontsize,
-                                            color=(0, 0, 0),
-                                            overlay=True
-                                        )
-                                    except:
-                                        pass
+            # Abrir el archivo PDF y escribir los valores en las posiciones precalculadas
+            pdf_document = open_fitz_template(template_file)
+            DocumentsClass._write_tag_replacements(pdf_document, template_file, tag_replacements)
             
             # Guardar el PDF modificado
             pdf_document.save(output_file)
@@ -548,6 +496,58 @@ class DocumentsClass:
                 "file_path": None
             }
     
+    @staticmethod
+    def _write_tag_replacements(pdf_document: Any, template_file: Path, tag_replacements: Dict[str, str]) -> None:
+        """
+        Tacha cada etiqueta de la plantilla y escribe su valor encima.
+        Las posiciones salen del mapa precalculado por versión de plantilla (pdf_tag_placements).
+        """
+        placements = tag_placement_map(template_file).placements(list(tag_replacements))
+        by_page: Dict[int, List[tuple]] = {}
+        for tag, value in tag_replacements.items():
+            for page_num, rect in placements[tag]:
+                by_page.setdefault(page_num, []).append((fitz.Rect(*rect), value))
+        
+        # Tachar todas las etiquetas de la página de una vez y luego escribir los valores
+        for page_num, items in by_page.items():
+            page = pdf_document[page_num]
+            for rect, _value in items:
+                page.add_redact_annot(rect, fill=(1, 1, 1))
+            page.apply_redactions()
+            
+            fontsize = 10
+            for rect, value in items:
+                try:
+                    rc = page.insert_textbox(
+                        rect,
+                        value,
+                        fontsize=fontsize,
+                        color=(0, 0, 0),
+                        align=0,
+                        overlay=True
+                    )
+                    
+                    # Si el texto no cabe, usar insert_text como fallback
+                    if rc < 0:
+                        page.insert_text(
+                            (rect.x0 + 2, rect.y0 + fontsize),
+                            value,
+                            fontsize=fontsize,
+                            color=(0, 0, 0),
+                            overlay=True
+                        )
+                except:
+                    try:
+                        page.insert_text(
+                            (rect.x0 + 2, rect.y0 + fontsize),
+                            value,
+                            fontsize=fontsize,
+                            color=(0, 0, 0),
+                            overlay=True
+                        )
+                    except:
+                        pass
+    
     @staticmethod
     def _generate_pdf_from_scratch(
         document_id: int,
@@ -1216,8 +1216,8 @@ class DocumentsClass:
             # Asegurar que el directorio de salida existe
             output_file.parent.mkdir(parents=True, exist_ok=True)
             
-            # Leer el PDF template
-            reader = PdfReader(template_file)
+            # Leer el PDF template (copia desde el registro de plantillas)
+            reader = open_pdf_reader_template(template_file)
             writer = PdfWriter()
             
             # Copiar las páginas
@@ -1309,44 +1309,8 @@ class DocumentsClass:
             if not age_str and evaluation_data.get("age") is not None:
                 age_str = str(evaluation_data.get("age"))  # fallback solo años
             
-            # Inspeccionar los campos del formulario en el PDF
-            form_fields = {}
-            try:
-                # Método 1: Obtener campos de texto usando get_form_text_fields()
-                text_fields = reader.get_form_text_fields()
-                if text_fields:
-                    form_fields.update(text_fields)
-                
-                # Método 2: Obtener todos los campos accediendo directamente al AcroForm
-                root = reader.trailer.get("/Root", {})
-                if "/AcroForm" in root:
-                    acro_form = root["/AcroForm"]
-                    if "/Fields" in acro_form:
-                        fields = acro_form["/Fields"]
-                        
-                        def extract_field_names(field_list):
-                            for field_ref in field_list:
-                                field = field_ref.get_object()
-                                if "/Kids" in field:
-                                    extract_field_names(field["/Kids"])
-                                if "/T" in field:
-                                    field_name = field["/T"]
-                                    if field_name:
-                                        form_fields[field_name] = None
-                        
-                        extract_field_names(fields)
-                
-                # Método 3: También buscar en las anotaciones de cada página
-                for page_num, page in enumerate(reader.pages):
-                    if "/Annots" in page:
-                        for annot in page["/Annots"]:
-                            annot_obj = annot.get_object()
-                            if "/FT" in annot_obj and "/T" in annot_obj:
-                                field_name = annot_obj.get("/T")
-                                if field_name:
-                                    form_fields[field_name] = None
-            except Exception as e:
-                pass
+            # Inspeccionar los campos del formulario en el PDF (una vez por plantilla)
+            form_fields = dict.fromkeys(pdf_form_field_names(template_file))
             
             # Obtener género (F o M)
             gender_marker = ""
@@ -1844,7 +1808,7 @@ class DocumentsClass:
             output_file = Path(output_directory) / unique_filename
             output_file.parent.mkdir(parents=True, exist_ok=True)
 
-            reader = PdfReader(template_file)
+            reader = open_pdf_reader_template(template_file)
             writer = PdfWriter()
             for page in reader.pages:
                 writer.add_page(page)
@@ -1894,29 +1858,8 @@ class DocumentsClass:
                     return ""
                 return format_date(v) if fmt_date else to_str(v)
 
-            # Obtener campos del formulario
-            form_fields = {}
-            try:
-                if reader.get_form_text_fields():
-                    form_fields.update(reader.get_form_text_fields())
-                root = reader.trailer.get("/Root", {})
-                if "/AcroForm" in root and "/Fields" in root["/AcroForm"]:
-                    def extract_names(fl):
-                        for ref in fl:
-                            obj = ref.get_object()
-                            if "/Kids" in obj:
-                                extract_names(obj["/Kids"])
-                            if "/T" in obj and obj["/T"]:
-                                form_fields[obj["/T"]] = None
-                    extract_names(root["/AcroForm"]["/Fields"])
-                for page in reader.pages:
-                    if "/Annots" in page:
-                        for annot in page["/Annots"]:
-                            a = annot.get_object()
-                            if "/FT" in a and "/T" in a and a.get("/T"):
-                                form_fields[a["/T"]] = None
-            except Exception:
-                pass
+            # Obtener campos del formulario (una vez por plantilla)
+            form_fields = dict.fromkeys(pdf_form_field_names(template_file))
 
             # Resolver género (gender_id -> texto)
             d = anamnesis_data
@@ -2916,7 +2859,7 @@ class DocumentsClass:
             output_file.parent.mkdir(parents=True, exist_ok=True)
             
             # Abrir el archivo PDF
-            pdf_document = fitz.open(template_file)
+            pdf_document = open_fitz_template(template_file)
             
             # Función auxiliar para formatear fechas
             def format_date(date_str: Optional[str]) -> str:
@@ -2959,153 +2902,8 @@ class DocumentsClass:
                 "[RESPONSIBLE_PROFESSIONALS]": get_value("responsible_professionals", ""),
             }
             
-            # Procesar cada página del PDF
-            for page_num in range(len(pdf_document)):
-                page = pdf_document[page_num]
-                
-                # Obtener todo el texto de la página en formato dict para búsqueda más precisa
-                page_dict = None
-                try:
-                    page_dict = page.get_text("dict")
-                except:
-                    pass
-                
-                # Reemplazar cada tag
-                for tag, value in tag_replacements.items():
-                    # Siempre reemplazar, incluso si el valor está vacío (dejará el campo vacío)
-                    text_instances = []
-                    
-                    # Intentar diferentes variaciones del tag
-                    tag_variations = [
-                        tag,  # Tag original con corchetes
-                        tag.upper(),  # Mayúsculas
-                        tag.lower(),  # Minúsculas
-                    ]
-                    
-                    # Buscar cada variación usando search_for
-                    for tag_variant in tag_variations:
-                        try:
-                            # Buscar con flags de case insensitive y dehyphenate
-                            found = page.search_for(tag_variant, flags=fitz.TEXT_DEHYPHENATE)
-                            if found:
-                                text_instances.extend(found)
-                                break  # Si se encuentra, no buscar más variaciones con search_for
-                        except:
-                            try:
-                                # Si falla con flags, intentar sin flags
-                                found = page.search_for(tag_variant)
-                                if found:
-                                    text_instances.extend(found)
-                                    break
-                            except:
-                                pass
-                    
-                    # Si aún no se encuentra, buscar usando get_text("dict") para posición exacta
-                    if not text_instances and page_dict:
-                        try:
-                            # Buscar en bloques de texto
-                            for block in page_dict.get("blocks", []):
-                                if "lines" in block:
-                                    for line in block["lines"]:
-                                        full_line_text = ""
-                                        line_spans = []
-                                        for span in line.get("spans", []):
-                                            span_text = span.get("text", "")
-                                            full_line_text += span_text
-                                            line_spans.append((span, span_text))
-                                        
-                                        # Buscar tag en el texto completo de la línea (case insensitive)
-                                        full_line_text_upper = full_line_text.upper()
-                                        for tag_variant in tag_variations:
-                                            tag_variant_upper = tag_variant.upper()
-                                            # Buscar con case insensitive
-                                            if tag_variant_upper in full_line_text_upper:
-                                                # Encontrar qué span(s) contiene(n) el tag
-                                                matching_spans = []
-                                                for span, span_text in line_spans:
-                                                    span_text_upper = span_text.upper()
-                                                    if tag_variant_upper in span_text_upper:
-                                                        matching_spans.append(span)
-                                                
-                                                if matching_spans:
-                                                    # Calcular el rectángulo que cubre todos los spans que contienen el tag
-                                                    x0 = min(s.get("bbox", [0, 0, 0, 0])[0] for s in matching_spans)
-                                                    y0 = min(s.get("bbox", [0, 0, 0, 0])[1] for s in matching_spans)
-                                                    x1 = max(s.get("bbox", [0, 0, 0, 0])[2] for s in matching_spans)
-                                                    y1 = max(s.get("bbox", [0, 0, 0, 0])[3] for s in matching_spans)
-                                                    rect = fitz.Rect(x0 - 2, y0 - 2, x1 + 2, y1 + 2)
-                                                    text_instances.append(rect)
-                                                break
-                        except Exception as e:
-                            pass
-                    
-                    # Reemplazar todas las instancias encontradas
-                    if text_instances:
-                        # Eliminar duplicados manteniendo el orden
-                        seen_rects = set()
-                        unique_instances = []
-                        page_width = page.rect.width
-                        page_height = page.rect.height
-                        
-                        for rect in text_instances:
-                            # Convertir a Rect si es una tupla
-                            if isinstance(rect, (list, tuple)) and len(rect) == 4:
-                                rect = fitz.Rect(rect[0], rect[1], rect[2], rect[3])
-                            
-                            # Validar que el rectángulo esté dentro de los límites de la página
-                            if (rect.x0 >= 0 and rect.y0 >= 0 and 
-                                rect.x1 <= page_width and rect.y1 <= page_height and
-                                rect.x1 > rect.x0 and rect.y1 > rect.y0):
-                                
-                                rect_key = (round(rect.x0, 1), round(rect.y0, 1), round(rect.x1, 1), round(rect.y1, 1))
-                                if rect_key not in seen_rects:
-                                    seen_rects.add(rect_key)
-                                    unique_instances.append(rect)
-                        
-                        # Reemplazar cada instancia única
-                        for rect in unique_instances:
-                            # Validar el rectángulo antes de aplicar redacción
-                            if rect.x1 > rect.x0 and rect.y1 > rect.y0:
-                                # Redactar el texto original (cubrir con blanco)
-                                page.add_redact_annot(rect, fill=(1, 1, 1))
-                                page.apply_redactions()
-                                
-                                # Insertar el nuevo texto
-                                fontsize = 10
-                                
-                                try:
-                                    # Intentar insertar el texto en un textbox
-                                    text_rect = fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y1)
-                                    rc = page.insert_textbox(
-                                        text_rect,
-                                        value,
-                                        fontsize=fontsize,
-                                        color=(0, 0, 0),
-                                        align=0,
-                                        overlay=True
-                                    )
-                                    
-                                    # Si el texto no cabe, usar insert_text como fallback
-                                    if rc < 0:
-                                        page.insert_text(
-                                            (rect.x0 + 2, rect.y0 + fontsize),
-                                            value,
-                                            fontsize=fontsize,
-                                            color=(0, 0, 0),
-                                            overlay=True
-                                        )
-                                except Exception as e:
-                                    # Si falla, intentar método alternativo
-                                    try:
-                                        page.insert_text(
-                                            (rect.x0 + 2, rect.y0 + fontsize),
-                                            value,
-                                            fontsize=fontsize,
-                                            color=(0, 0, 0),
-                                            overlay=True
-                                        )
-                                    except:
-                                        pass
+            # Siempre reemplazar, incluso si el valor está vacío (dejará el campo vacío)
+            DocumentsClass._write_tag_replacements(pdf_document, template_file, tag_replacements)
             
             # Guardar el PDF modificado
             pdf_document.save(output_file)
@@ -9794,7 +9592,7 @@ class DocumentsClass:
                     "fields": []
                 }
             
-            pdf_document = fitz.open(template_file)
+            pdf_document = open_fitz_template(template_file)
             
             form_fields = []
             text_placeholders = set()
@@ -9945,586 +9743,715 @@ class DocumentsClass:
         preserve_empty_content_controls: si True, no desenvuelve SDT vacíos (evita romper plantillas ministeriales).
         """
         try:
-            doc = Document(template_path)
+            # Plantilla distinta de la salida: copia desde el registro de plantillas.
+            # Misma ruta: se está completando un archivo ya generado, se abre tal cual.
+            if Path(template_path).resolve() != Path(output_path).resolve():
+                doc = open_docx_template(template_path)
+            else:
+                doc = Document(template_path)
+            DocumentsClass.fill_docx_document(
+                doc,
+                replacements,
+                remove_literal_strings=remove_literal_strings,
+                content_control_tag_aliases=content_control_tag_aliases,
+                preserve_empty_content_controls=preserve_empty_content_controls,
+                checkbox_unchecked_blank=checkbox_unchecked_blank,
+            )
 
-            def replace_in_text(text: str) -> str:
-                result = text
-                for tag, value in replacements.items():
-                    val = str(value) if value is not None else ""
-                    result = result.replace(f"{{{tag}}}", val)
-                    result = result.replace(f"[{tag}]", val)
-                    result = result.replace(f"<<{tag}>>", val)
-                    result = result.replace(f"{{{{{tag}}}}}", val)
-                return result
-
-            def process_paragraph(para):
-                full_text = para.text
-                new_text = replace_in_text(full_text)
-                if full_text != new_text:
-                    new_text = (new_text or "").replace("\r\n", "\n").replace("\r", "\n")
-                    para.clear()
-                    if not new_text:
-                        return
-                    # Un solo run con "\\n" suele verse "pegado" en Word; saltos explícitos (w:br).
-                    first = True
-                    for segment in new_text.split("\n"):
-                        if not first:
-                            para.add_run().add_break()
-                        first = False
-                        para.add_run(segment)
-
-            for paragraph in doc.paragraphs:
-                process_paragraph(paragraph)
-
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for para in cell.paragraphs:
-                            process_paragraph(para)
-
-            for section in doc.sections:
-                for header_footer in (section.header, section.first_page_header, section.footer, section.first_page_footer):
-                    if header_footer is not None:
-                        for para in header_footer.paragraphs:
-                            process_paragraph(para)
-                        if hasattr(header_footer, "tables"):
-                            for tbl in header_footer.tables:
-                                for row in tbl.rows:
-                                    for cell in row.cells:
-                                        for para in cell.paragraphs:
-                                            process_paragraph(para)
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            doc.save(output_path)
+            return {
+                "status": "success",
+                "message": "Documento DOCX rellenado correctamente",
+                "file_path": output_path,
+                "filename": Path(output_path).name,
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": str(e),
+                "file_path": None,
+                "filename": None,
+            }
 
-            if DOCX_EXTRA_AVAILABLE:
-                try:
-                    from docx.oxml.ns import qn
-                    from docx.oxml import OxmlElement
-                    W14_NS = "http://schemas.microsoft.com/office/word/2010/wordml"
-                    W14_CHECKED_ATTR = f"{{{W14_NS}}}val"
-                    CHK_SYMBOL_CHECKED = "\u2611"   # ☑
-                    CHK_SYMBOL_UNCHECKED = "\u2610"  # ☐
-
-                    def _set_checkbox_checked(sdt, sdtPr, checked: bool):
-                        """Activa o desactiva un checkbox content control (w14:checkbox)."""
-                        checkbox = None
-                        for child in sdtPr:
-                            if child.tag == f"{{{W14_NS}}}checkbox" or child.tag.endswith("}checkbox"):
-                                checkbox = child
-                                break
-                        if checkbox is None:
-                            return False
-                        check_el = None
-                        for child in checkbox:
-                            if child.tag == f"{{{W14_NS}}}checked" or child.tag.endswith("}checked"):
-                                check_el = child
-                                break
-                        val_str = "1" if checked else "0"
-                        if check_el is not None:
-                            check_el.set(W14_CHECKED_ATTR, val_str)
-                        else:
-                            from docx.oxml import parse_xml
-                            check_el = parse_xml(
-                                f'<w14:checked xmlns:w14="{W14_NS}" w14:val="{val_str}"/>'
-                            )
-                            checkbox.append(check_el)
-                        # Informe familia: ☐/☒ visibles en w:t además de w14 (export/PDF/vista web)
-                        if content_control_tag_aliases:
-                            symbol = "\u2612" if checked else CHK_SYMBOL_UNCHECKED
-                        elif checked:
-                            symbol = CHK_SYMBOL_CHECKED
+    @staticmethod
+    def fill_docx_document(
+        doc: Any,
+        replacements: Dict[str, str],
+        remove_literal_strings: Optional[List[str]] = None,
+        content_control_tag_aliases: Optional[Dict[str, str]] = None,
+        preserve_empty_content_controls: bool = False,
+        checkbox_unchecked_blank: bool = False,
+    ) -> None:
+        """
+        Igual que fill_docx_form pero sobre un Document ya abierto (sin leer ni guardar a disco).
+        Permite encadenar clonación de bloques y relleno sobre una sola carga de la plantilla.
+        """
+        def replace_in_text(text: str) -> str:
+            result = text
+            for tag, value in replacements.items():
+                val = str(value) if value is not None else ""
+                result = result.replace(f"{{{tag}}}", val)
+                result = result.replace(f"[{tag}]", val)
+                result = result.replace(f"<<{tag}>>", val)
+                result = result.replace(f"{{{{{tag}}}}}", val)
+            return result
+
+        def process_paragraph(para):
+            full_text = para.text
+            new_text = replace_in_text(full_text)
+            if full_text != new_text:
+                new_text = (new_text or "").replace("\r\n", "\n").replace("\r", "\n")
+                para.clear()
+                if not new_text:
+                    return
+                # Un solo run con "\\n" suele verse "pegado" en Word; saltos explícitos (w:br).
+                first = True
+                for segment in new_text.split("\n"):
+                    if not first:
+                        para.add_run().add_break()
+                    first = False
+                    para.add_run(segment)
+
+        for paragraph in doc.paragraphs:
+            process_paragraph(paragraph)
+
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    for para in cell.paragraphs:
+                        process_paragraph(para)
+
+        for section in doc.sections:
+            for header_footer in (section.header, section.first_page_header, section.footer, section.first_page_footer):
+                if header_footer is not None:
+                    for para in header_footer.paragraphs:
+                        process_paragraph(para)
+                    if hasattr(header_footer, "tables"):
+                        for tbl in header_footer.tables:
+                            for row in tbl.rows:
+                                for cell in row.cells:
+                                    for para in cell.paragraphs:
+                                        process_paragraph(para)
+
+        if DOCX_EXTRA_AVAILABLE:
+            try:
+                from docx.oxml.ns import qn
+                from docx.oxml import OxmlElement
+                W14_NS = "http://schemas.microsoft.com/office/word/2010/wordml"
+                W14_CHECKED_ATTR = f"{{{W14_NS}}}val"
+                CHK_SYMBOL_CHECKED = "\u2611"   # ☑
+                CHK_SYMBOL_UNCHECKED = "\u2610"  # ☐
+
+                def _set_checkbox_checked(sdt, sdtPr, checked: bool):
+                    """Activa o desactiva un checkbox content control (w14:checkbox)."""
+                    checkbox = None
+                    for child in sdtPr:
+                        if child.tag == f"{{{W14_NS}}}checkbox" or child.tag.endswith("}checkbox"):
+                            checkbox = child
+                            break
+                    if checkbox is None:
+                        return False
+                    check_el = None
+                    for child in checkbox:
+                        if child.tag == f"{{{W14_NS}}}checked" or child.tag.endswith("}checked"):
+                            check_el = child
+                            break
+                    val_str = "1" if checked else "0"
+                    if check_el is not None:
+                        check_el.set(W14_CHECKED_ATTR, val_str)
+                    else:
+                        from docx.oxml import parse_xml
+                        check_el = parse_xml(
+                            f'<w14:checked xmlns:w14="{W14_NS}" w14:val="{val_str}"/>'
+                        )
+                        checkbox.append(check_el)
+                    # Informe familia: ☐/☒ visibles en w:t además de w14 (export/PDF/vista web)
+                    if content_control_tag_aliases:
+                        symbol = "\u2612" if checked else CHK_SYMBOL_UNCHECKED
+                    elif checked:
+                        symbol = CHK_SYMBOL_CHECKED
+                    else:
+                        symbol = (
+                            ""
+                            if checkbox_unchecked_blank
+                            else CHK_SYMBOL_UNCHECKED
+                        )
+                    sdtContent = sdt.find(qn("w:sdtContent"))
+                    if sdtContent is not None:
+                        wt_list = list(sdtContent.iter(qn("w:t")))
+                        if wt_list:
+                            wt_list[0].text = symbol
                         else:
-                            symbol = (
-                                ""
-                                if checkbox_unchecked_blank
-                                else CHK_SYMBOL_UNCHECKED
+                            for p in sdtContent.iter(qn("w:p")):
+                                w_r = p.find(qn("w:r"))
+                                if w_r is not None:
+                                    wt = w_r.find(qn("w:t"))
+                                    if wt is not None:
+                                        wt.text = symbol
+                                    break
+                    return True
+
+                def _normalize_cc_tag(tag: str) -> str:
+                    import re
+                    import unicodedata
+
+                    t = (tag or "").strip().lower()
+                    t = unicodedata.normalize("NFKD", t)
+                    t = "".join(c for c in t if unicodedata.category(c) != "Mn")
+                    t = re.sub(r"[^a-z0-9]+", "_", t)
+                    return re.sub(r"_+", "_", t).strip("_")
+
+                def _sdt_fill_with_line_breaks(
+                    sdt_content_el,
+                    text_body: str,
+                    field_key: Optional[str] = None,
+                ) -> None:
+                    """
+                    - Cada '\\n' → un w:p (sin w:br en un solo párrafo) + justificado, salvo si el SDT
+                      contiene tabla: entonces no se borran hijos (no romper filas/celdas).
+                    - Al copiar w:pPr de la plantilla se quitan sangrías/tab (w:ind, w:tabs) que en celdas
+                      estrechas dejan solo visible la primera letra.
+                    - Con content_control_tag_aliases (doc 27): según field_key — textos largos (análisis,
+                      sugerencias, etc.) se regeneran enteros y van justificados; identificación y campos
+                      cortos van a la izquierda; solo se reemplaza el párrafo de ayuda si el SDT comparte
+                      tabla con otras celdas (sin vaciar el resto del XML).
+                    """
+                    from copy import deepcopy
+
+                    psychoped_sdt = bool(content_control_tag_aliases)
+
+                    raw = (text_body or "").replace("\r\n", "\n").replace("\r", "\n")
+                    segments = raw.split("\n")
+
+                    def _paragraph_visible_text(p_el) -> str:
+                        return "".join((t.text or "") for t in p_el.iter(qn("w:t")))
+
+                    def _ppr_set_jc_val(p_pr_el, jc_val: str) -> None:
+                        for jc in list(p_pr_el.findall(qn("w:jc"))):
+                            p_pr_el.remove(jc)
+                        jc_el = OxmlElement("w:jc")
+                        jc_el.set(qn("w:val"), jc_val)
+                        p_pr_el.append(jc_el)
+
+                    def _ppr_set_justify_both(p_pr_el) -> None:
+                        _ppr_set_jc_val(p_pr_el, "both")
+
+                    def _ppr_strip_cell_artifacts(p_pr_el) -> None:
+                        for nm in ("w:ind", "w:tabs", "w:numPr", "w:adjustRightInd"):
+                            for el in list(p_pr_el.findall(qn(nm))):
+                                p_pr_el.remove(el)
+
+                    def _is_label_like_all_caps_line(s: str) -> bool:
+                        """Etiquetas tipo 'NOMBRE DE IDENTIDAD…' (mayúsculas); no son el placeholder del valor."""
+                        s = (s or "").strip()
+                        if len(s) < 10:
+                            return False
+                        letters = [c for c in s if c.isalpha()]
+                        if len(letters) < 8:
+                            return False
+                        up = sum(1 for c in letters if c.isupper())
+                        return (up / len(letters)) > 0.82
+
+                    def _paragraph_has_placeholder(fl: str) -> bool:
+                        return any(
+                            ph in fl
+                            for ph in (
+                                "haz clic",
+                                "pulse aqu",
+                                "escribir texto",
+                                "click here",
+                                "tap here",
+                                "click or tap",
+                                "clic aqu",
                             )
-                        sdtContent = sdt.find(qn("w:sdtContent"))
-                        if sdtContent is not None:
-                            wt_list = list(sdtContent.iter(qn("w:t")))
-                            if wt_list:
-                                wt_list[0].text = symbol
-                            else:
-                                for p in sdtContent.iter(qn("w:p")):
-                                    w_r = p.find(qn("w:r"))
-                                    if w_r is not None:
-                                        wt = w_r.find(qn("w:t"))
-                                        if wt is not None:
-                                            wt.text = symbol
-                                        break
-                        return True
-
-                    def _normalize_cc_tag(tag: str) -> str:
-                        import re
-                        import unicodedata
-
-                        t = (tag or "").strip().lower()
-                        t = unicodedata.normalize("NFKD", t)
-                        t = "".join(c for c in t if unicodedata.category(c) != "Mn")
-                        t = re.sub(r"[^a-z0-9]+", "_", t)
-                        return re.sub(r"_+", "_", t).strip("_")
-
-                    def _sdt_fill_with_line_breaks(
-                        sdt_content_el,
-                        text_body: str,
-                        field_key: Optional[str] = None,
-                    ) -> None:
+                        )
+
+                    def _pick_target_paragraph_for_value() -> Optional[Any]:
                         """
-                        - Cada '\\n' → un w:p (sin w:br en un solo párrafo) + justificado, salvo si el SDT
-                          contiene tabla: entonces no se borran hijos (no romper filas/celdas).
-                        - Al copiar w:pPr de la plantilla se quitan sangrías/tab (w:ind, w:tabs) que en celdas
-                          estrechas dejan solo visible la primera letra.
-                        - Con content_control_tag_aliases (doc 27): según field_key — textos largos (análisis,
-                          sugerencias, etc.) se regeneran enteros y van justificados; identificación y campos
-                          cortos van a la izquierda; solo se reemplaza el párrafo de ayuda si el SDT comparte
-                          tabla con otras celdas (sin vaciar el resto del XML).
+                        El párrafo del valor suele tener el texto de ayuda de Word (Haz clic…).
+                        Si hay varios (etiqueta + ayuda duplicada), se elige el de menor longitud (suele ser solo el placeholder).
+                        Con tabla dentro del SDT: se prioriza la última celda de cada fila (típico etiqueta | valor).
+                        NO vaciar w:t antes de llamar a esto: si todo está vacío, max() elige el primero
+                        (casi siempre la etiqueta de la fila) y solo se ve una letra en la celda equivocada.
                         """
-                        from copy import deepcopy
-
-                        psychoped_sdt = bool(content_control_tag_aliases)
-
-                        raw = (text_body or "").replace("\r\n", "\n").replace("\r", "\n")
-                        segments = raw.split("\n")
-
-                        def _paragraph_visible_text(p_el) -> str:
-                            return "".join((t.text or "") for t in p_el.iter(qn("w:t")))
-
-                        def _ppr_set_jc_val(p_pr_el, jc_val: str) -> None:
-                            for jc in list(p_pr_el.findall(qn("w:jc"))):
-                                p_pr_el.remove(jc)
-                            jc_el = OxmlElement("w:jc")
-                            jc_el.set(qn("w:val"), jc_val)
-                            p_pr_el.append(jc_el)
-
-                        def _ppr_set_justify_both(p_pr_el) -> None:
-                            _ppr_set_jc_val(p_pr_el, "both")
-
-                        def _ppr_strip_cell_artifacts(p_pr_el) -> None:
-                            for nm in ("w:ind", "w:tabs", "w:numPr", "w:adjustRightInd"):
-                                for el in list(p_pr_el.findall(qn(nm))):
-                                    p_pr_el.remove(el)
-
-                        def _is_label_like_all_caps_line(s: str) -> bool:
-                            """Etiquetas tipo 'NOMBRE DE IDENTIDAD…' (mayúsculas); no son el placeholder del valor."""
-                            s = (s or "").strip()
-                            if len(s) < 10:
-                                return False
-                            letters = [c for c in s if c.isalpha()]
-                            if len(letters) < 8:
-                                return False
-                            up = sum(1 for c in letters if c.isupper())
-                            return (up / len(letters)) > 0.82
-
-                        def _paragraph_has_placeholder(fl: str) -> bool:
-                            return any(
-                                ph in fl
-                                for ph in (
-                                    "haz clic",
-                                    "pulse aqu",
-                                    "escribir texto",
-                                    "click here",
-                                    "tap here",
-                                    "click or tap",
-                                    "clic aqu",
-                                )
-                            )
-
-                        def _pick_target_paragraph_for_value() -> Optional[Any]:
-                            """
-                            El párrafo del valor suele tener el texto de ayuda de Word (Haz clic…).
-                            Si hay varios (etiqueta + ayuda duplicada), se elige el de menor longitud (suele ser solo el placeholder).
-                            Con tabla dentro del SDT: se prioriza la última celda de cada fila (típico etiqueta | valor).
-                            NO vaciar w:t antes de llamar a esto: si todo está vacío, max() elige el primero
-                            (casi siempre la etiqueta de la fila) y solo se ve una letra en la celda equivocada.
-                            """
-                            tbl = sdt_content_el.find(qn("w:tbl"))
-                            if tbl is not None:
-                                haz_candidates: List[Any] = []
-                                for tr in tbl.iter(qn("w:tr")):
-                                    tcs = tr.findall(qn("w:tc"))
-                                    if not tcs:
-                                        continue
-                                    cell_order = [tcs[-1]] + [c for c in tcs[:-1]]
-                                    for tc in cell_order:
-                                        for p in tc.iter(qn("w:p")):
-                                            full = _paragraph_visible_text(p)
-                                            fl = full.lower()
-                                            if _paragraph_has_placeholder(fl):
-                                                haz_candidates.append((len(full), p))
-                                if haz_candidates:
-                                    return min(haz_candidates, key=lambda x: x[0])[1]
-
-                            paras = list(sdt_content_el.iter(qn("w:p")))
-                            if not paras:
-                                return None
-                            haz_candidates = []
-                            for p in paras:
-                                full = _paragraph_visible_text(p)
-                                fl = full.lower()
-                                if _paragraph_has_placeholder(fl):
-                                    haz_candidates.append((len(full), p))
+                        tbl = sdt_content_el.find(qn("w:tbl"))
+                        if tbl is not None:
+                            haz_candidates: List[Any] = []
+                            for tr in tbl.iter(qn("w:tr")):
+                                tcs = tr.findall(qn("w:tc"))
+                                if not tcs:
+                                    continue
+                                cell_order = [tcs[-1]] + [c for c in tcs[:-1]]
+                                for tc in cell_order:
+                                    for p in tc.iter(qn("w:p")):
+                                        full = _paragraph_visible_text(p)
+                                        fl = full.lower()
+                                        if _paragraph_has_placeholder(fl):
+                                            haz_candidates.append((len(full), p))
                             if haz_candidates:
                                 return min(haz_candidates, key=lambda x: x[0])[1]
-                            for p in paras:
-                                full = _paragraph_visible_text(p).strip()
-                                if not full:
-                                    continue
-                                if _is_label_like_all_caps_line(full):
-                                    continue
-                                return p
-                            return paras[-1]
-
-                        def _rewrite_paragraph_with_segments(
-                            p_el,
-                            segs: List[str],
-                            *,
-                            justify_both: bool = False,
-                        ) -> Any:
-                            """Reemplaza el párrafo; con justificado, un w:p por bloque (sin w:br)."""
-                            parent = p_el.getparent()
-                            if parent is None:
-                                return p_el
-
-                            non_empty = [seg for seg in segs if (seg or "").strip()]
-                            if not non_empty:
-                                non_empty = [""]
-
-                            idx = parent.index(p_el)
-                            parent.remove(p_el)
-                            last_p = None
-                            for offset, seg in enumerate(non_empty):
+
+                        paras = list(sdt_content_el.iter(qn("w:p")))
+                        if not paras:
+                            return None
+                        haz_candidates = []
+                        for p in paras:
+                            full = _paragraph_visible_text(p)
+                            fl = full.lower()
+                            if _paragraph_has_placeholder(fl):
+                                haz_candidates.append((len(full), p))
+                        if haz_candidates:
+                            return min(haz_candidates, key=lambda x: x[0])[1]
+                        for p in paras:
+                            full = _paragraph_visible_text(p).strip()
+                            if not full:
+                                continue
+                            if _is_label_like_all_caps_line(full):
+                                continue
+                            return p
+                        return paras[-1]
+
+                    def _rewrite_paragraph_with_segments(
+                        p_el,
+                        segs: List[str],
+                        *,
+                        justify_both: bool = False,
+                    ) -> Any:
+                        """Reemplaza el párrafo; con justificado, un w:p por bloque (sin w:br)."""
+                        parent = p_el.getparent()
+                        if parent is None:
+                            return p_el
+
+                        non_empty = [seg for seg in segs if (seg or "").strip()]
+                        if not non_empty:
+                            non_empty = [""]
+
+                        idx = parent.index(p_el)
+                        parent.remove(p_el)
+                        last_p = None
+                        for offset, seg in enumerate(non_empty):
+                            new_p = OxmlElement("w:p")
+                            ppr = OxmlElement("w:pPr")
+                            if justify_both:
+                                _ppr_set_justify_both(ppr)
+                            else:
+                                _ppr_set_jc_val(ppr, "left")
+                            new_p.append(ppr)
+                            r = OxmlElement("w:r")
+                            t = OxmlElement("w:t")
+                            if seg:
+                                t.text = seg
+                                t.set(qn("xml:space"), "preserve")
+                            r.append(t)
+                            new_p.append(r)
+                            parent.insert(idx + offset, new_p)
+                            last_p = new_p
+                        return last_p or p_el
+
+                    # Plantillas ministeriales: w:sdtContent → w:tc (celda anidada). No quitar w:tc.
+                    direct_tc = sdt_content_el.find(qn("w:tc"))
+                    if direct_tc is not None:
+                        # Informe Familia: la plantilla ministerial usa párrafos justificados (w:jc both).
+                        justify_both = True
+                        paragraphs_here = list(direct_tc.findall(qn("w:p")))
+                        if not paragraphs_here:
+                            new_p = OxmlElement("w:p")
+                            direct_tc.append(new_p)
+                            paragraphs_here = [new_p]
+
+                        if justify_both and len(segments) > 1:
+                            for p in paragraphs_here:
+                                direct_tc.remove(p)
+                            for segment in segments:
                                 new_p = OxmlElement("w:p")
                                 ppr = OxmlElement("w:pPr")
-                                if justify_both:
-                                    _ppr_set_justify_both(ppr)
-                                else:
-                                    _ppr_set_jc_val(ppr, "left")
+                                _ppr_set_justify_both(ppr)
                                 new_p.append(ppr)
                                 r = OxmlElement("w:r")
                                 t = OxmlElement("w:t")
-                                if seg:
-                                    t.text = seg
+                                if segment:
+                                    t.text = segment
                                     t.set(qn("xml:space"), "preserve")
                                 r.append(t)
                                 new_p.append(r)
-                                parent.insert(idx + offset, new_p)
-                                last_p = new_p
-                            return last_p or p_el
-
-                        # Plantillas ministeriales: w:sdtContent → w:tc (celda anidada). No quitar w:tc.
-                        direct_tc = sdt_content_el.find(qn("w:tc"))
-                        if direct_tc is not None:
-                            # Informe Familia: la plantilla ministerial usa párrafos justificados (w:jc both).
-                            justify_both = True
-                            paragraphs_here = list(direct_tc.findall(qn("w:p")))
-                            if not paragraphs_here:
-                                new_p = OxmlElement("w:p")
                                 direct_tc.append(new_p)
-                                paragraphs_here = [new_p]
-
-                            if justify_both and len(segments) > 1:
-                                for p in paragraphs_here:
-                                    direct_tc.remove(p)
-                                for segment in segments:
-                                    new_p = OxmlElement("w:p")
-                                    ppr = OxmlElement("w:pPr")
-                                    _ppr_set_justify_both(ppr)
-                                    new_p.append(ppr)
-                                    r = OxmlElement("w:r")
-                                    t = OxmlElement("w:t")
-                                    if segment:
-                                        t.text = segment
-                                        t.set(qn("xml:space"), "preserve")
-                                    r.append(t)
-                                    new_p.append(r)
-                                    direct_tc.append(new_p)
-                                return
-
-                            target_p = None
+                            return
+
+                        target_p = None
+                        for p in paragraphs_here:
+                            full = _paragraph_visible_text(p)
+                            if _paragraph_has_placeholder(full.lower()):
+                                target_p = p
+                                break
+                        if target_p is None:
                             for p in paragraphs_here:
-                                full = _paragraph_visible_text(p)
-                                if _paragraph_has_placeholder(full.lower()):
-                                    target_p = p
-                                    break
-                            if target_p is None:
-                                for p in paragraphs_here:
-                                    full = _paragraph_visible_text(p).strip()
-                                    if not full:
-                                        target_p = p
-                                        break
-                                    if _is_label_like_all_caps_line(full):
-                                        continue
+                                full = _paragraph_visible_text(p).strip()
+                                if not full:
                                     target_p = p
                                     break
-                            if target_p is None:
-                                target_p = paragraphs_here[-1]
-
-                            target_p = _rewrite_paragraph_with_segments(
-                                target_p, segments, justify_both=justify_both
-                            )
-                            for p in paragraphs_here:
-                                if p is target_p:
+                                if _is_label_like_all_caps_line(full):
                                     continue
-                                par = p.getparent()
-                                if par is not None:
-                                    par.remove(p)
-                            for wt in direct_tc.iter(qn("w:t")):
-                                tx = (wt.text or "").strip().lower()
-                                if tx and _paragraph_has_placeholder(tx):
-                                    wt.text = ""
-                            return
+                                target_p = p
+                                break
+                        if target_p is None:
+                            target_p = paragraphs_here[-1]
 
-                        if psychoped_sdt:
-                            fk = (field_key or "").strip()
-                            PSYCHOPED_LONG_TEXT_KEYS = frozenset(
-                                {
-                                    "cognitive_analysis",
-                                    "personal_analysis",
-                                    "motor_analysis",
-                                    "conclusion",
-                                    "cognitive_synthesis",
-                                    "personal_synthesis",
-                                    "motor_synthesis",
-                                    "suggestions_to_school",
-                                    "suggestions_to_classroom_team",
-                                    "suggestions_to_family",
-                                    "suggestions_to_student",
-                                    "other_suggestions",
-                                    "instruments_applied",
-                                    "school_history_background",
-                                    "diagnostic",
-                                }
-                            )
-                            has_tbl = sdt_content_el.find(qn("w:tbl")) is not None
+                        target_p = _rewrite_paragraph_with_segments(
+                            target_p, segments, justify_both=justify_both
+                        )
+                        for p in paragraphs_here:
+                            if p is target_p:
+                                continue
+                            par = p.getparent()
+                            if par is not None:
+                                par.remove(p)
+                        for wt in direct_tc.iter(qn("w:t")):
+                            tx = (wt.text or "").strip().lower()
+                            if tx and _paragraph_has_placeholder(tx):
+                                wt.text = ""
+                        return
 
-                            def _psychoped_sweep_placeholder_wt() -> None:
-                                for wt in list(sdt_content_el.iter(qn("w:t"))):
-                                    tx = (wt.text or "").strip()
-                                    if not tx or len(tx) > 200:
-                                        continue
-                                    low = tx.lower()
-                                    if _paragraph_has_placeholder(low):
-                                        wt.text = ""
+                    if psychoped_sdt:
+                        fk = (field_key or "").strip()
+                        PSYCHOPED_LONG_TEXT_KEYS = frozenset(
+                            {
+                                "cognitive_analysis",
+                                "personal_analysis",
+                                "motor_analysis",
+                                "conclusion",
+                                "cognitive_synthesis",
+                                "personal_synthesis",
+                                "motor_synthesis",
+                                "suggestions_to_school",
+                                "suggestions_to_classroom_team",
+                                "suggestions_to_family",
+                                "suggestions_to_student",
+                                "other_suggestions",
+                                "instruments_applied",
+                                "school_history_background",
+                                "diagnostic",
+                            }
+                        )
+                        has_tbl = sdt_content_el.find(qn("w:tbl")) is not None
+
+                        def _psychoped_sweep_placeholder_wt() -> None:
+                            for wt in list(sdt_content_el.iter(qn("w:t"))):
+                                tx = (wt.text or "").strip()
+                                if not tx or len(tx) > 200:
+                                    continue
+                                low = tx.lower()
+                                if _paragraph_has_placeholder(low):
+                                    wt.text = ""
 
-                            # Textos largos sin tabla interna: vaciar el SDT y párrafos nuevos (sin "Haz clic…"),
-                            # justificado (bloques narrativos de la sección inferior del informe).
-                            if fk in PSYCHOPED_LONG_TEXT_KEYS and not has_tbl:
-                                for child in list(sdt_content_el):
-                                    sdt_content_el.remove(child)
-                                for segment in segments:
-                                    new_p = OxmlElement("w:p")
-                                    ppr = OxmlElement("w:pPr")
-                                    _ppr_set_justify_both(ppr)
-                                    new_p.append(ppr)
-                                    r_text = OxmlElement("w:r")
-                                    t_el = OxmlElement("w:t")
-                                    if segment:
-                                        t_el.text = segment
-                                        t_el.set(qn("xml:space"), "preserve")
-                                    r_text.append(t_el)
-                                    new_p.append(r_text)
-                                    sdt_content_el.append(new_p)
-                                return
-
-                            # Identificación, escalas, textos en SDT con tabla, etc.: solo el párrafo con ayuda.
-                            paragraphs_here = list(sdt_content_el.iter(qn("w:p")))
-                            if not paragraphs_here:
-                                # SDT en línea: a veces sdtContent es solo w:r (sin w:p). Si se añade w:p
-                                # sin quitar esos runs, Word sigue mostrando el placeholder y no el valor.
-                                for child in list(sdt_content_el):
-                                    sdt_content_el.remove(child)
+                        # Textos largos sin tabla interna: vaciar el SDT y párrafos nuevos (sin "Haz clic…"),
+                        # justificado (bloques narrativos de la sección inferior del informe).
+                        if fk in PSYCHOPED_LONG_TEXT_KEYS and not has_tbl:
+                            for child in list(sdt_content_el):
+                                sdt_content_el.remove(child)
+                            for segment in segments:
                                 new_p = OxmlElement("w:p")
+                                ppr = OxmlElement("w:pPr")
+                                _ppr_set_justify_both(ppr)
+                                new_p.append(ppr)
+                                r_text = OxmlElement("w:r")
+                                t_el = OxmlElement("w:t")
+                                if segment:
+                                    t_el.text = segment
+                                    t_el.set(qn("xml:space"), "preserve")
+                                r_text.append(t_el)
+                                new_p.append(r_text)
                                 sdt_content_el.append(new_p)
-                                paragraphs_here = [new_p]
-                            target_p = None
-                            if has_tbl:
-                                target_p = _pick_target_paragraph_for_value()
-                            if target_p is None:
-                                for p in paragraphs_here:
-                                    full = _paragraph_visible_text(p)
-                                    low = full.lower()
-                                    if _paragraph_has_placeholder(low):
-                                        target_p = p
-                                        break
-                            if target_p is None:
-                                for p in paragraphs_here:
-                                    full = _paragraph_visible_text(p).strip()
-                                    if not full:
-                                        target_p = p
-                                        break
-                                    if _is_label_like_all_caps_line(full):
-                                        continue
-                                    target_p = p
-                                    break
-                                if target_p is None:
-                                    target_p = paragraphs_here[-1]
-                            old_ppr = target_p.find(qn("w:pPr"))
-                            if old_ppr is not None:
-                                target_p.remove(old_ppr)
-                            ppr = OxmlElement("w:pPr")
-                            _ppr_set_justify_both(ppr)
-                            target_p.insert(0, ppr)
-                            for c in list(target_p):
-                                if c.tag == qn("w:pPr") or str(c.tag).endswith("}pPr"):
-                                    continue
-                                target_p.remove(c)
-                            first_seg = True
-                            for seg in segments:
-                                if not first_seg:
-                                    rb = OxmlElement("w:r")
-                                    rb.append(OxmlElement("w:br"))
-                                    target_p.append(rb)
-                                first_seg = False
-                                r = OxmlElement("w:r")
-                                t = OxmlElement("w:t")
-                                if seg:
-                                    t.text = seg
-                                    t.set(qn("xml:space"), "preserve")
-                                r.append(t)
-                                target_p.append(r)
-                            _psychoped_sweep_placeholder_wt()
                             return
 
-                        def _sdt_fill_flat_keep_structure() -> None:
-                            """SDT con tabla u otro XML anidado: solo rellenar el párrafo destino con w:br."""
-                            paragraphs = list(sdt_content_el.iter(qn("w:p")))
-                            if not paragraphs:
-                                return
+                        # Identificación, escalas, textos en SDT con tabla, etc.: solo el párrafo con ayuda.
+                        paragraphs_here = list(sdt_content_el.iter(qn("w:p")))
+                        if not paragraphs_here:
+                            # SDT en línea: a veces sdtContent es solo w:r (sin w:p). Si se añade w:p
+                            # sin quitar esos runs, Word sigue mostrando el placeholder y no el valor.
+                            for child in list(sdt_content_el):
+                                sdt_content_el.remove(child)
+                            new_p = OxmlElement("w:p")
+                            sdt_content_el.append(new_p)
+                            paragraphs_here = [new_p]
+                        target_p = None
+                        if has_tbl:
                             target_p = _pick_target_paragraph_for_value()
-                            if target_p is None:
-                                return
-                            for p in paragraphs:
-                                if p is not target_p:
-                                    for wt in p.iter(qn("w:t")):
-                                        wt.text = ""
-                            old_ppr = target_p.find(qn("w:pPr"))
-                            if old_ppr is not None:
-                                target_p.remove(old_ppr)
-                            ppr = OxmlElement("w:pPr")
-                            if psychoped_sdt:
-                                _ppr_set_justify_both(ppr)
-                            else:
-                                if old_ppr is not None:
-                                    ppr = deepcopy(old_ppr)
-                                    _ppr_strip_cell_artifacts(ppr)
-                                _ppr_set_justify_both(ppr)
-                            target_p.insert(0, ppr)
-                            for c in list(target_p):
-                                if c.tag == qn("w:pPr") or str(c.tag).endswith("}pPr"):
+                        if target_p is None:
+                            for p in paragraphs_here:
+                                full = _paragraph_visible_text(p)
+                                low = full.lower()
+                                if _paragraph_has_placeholder(low):
+                                    target_p = p
+                                    break
+                        if target_p is None:
+                            for p in paragraphs_here:
+                                full = _paragraph_visible_text(p).strip()
+                                if not full:
+                                    target_p = p
+                                    break
+                                if _is_label_like_all_caps_line(full):
                                     continue
-                                target_p.remove(c)
-                            first = True
-                            for seg in segments:
-                                if not first:
-                                    rb = OxmlElement("w:r")
-                                    rb.append(OxmlElement("w:br"))
-                                    target_p.append(rb)
-                                first = False
-                                r = OxmlElement("w:r")
-                                t = OxmlElement("w:t")
-                                if seg:
-                                    t.text = seg
-                                    t.set(qn("xml:space"), "preserve")
-                                r.append(t)
-                                target_p.append(r)
-
-                        if sdt_content_el.find(qn("w:tbl")) is not None:
-                            _sdt_fill_flat_keep_structure()
-                            return
+                                target_p = p
+                                break
+                            if target_p is None:
+                                target_p = paragraphs_here[-1]
+                        old_ppr = target_p.find(qn("w:pPr"))
+                        if old_ppr is not None:
+                            target_p.remove(old_ppr)
+                        ppr = OxmlElement("w:pPr")
+                        _ppr_set_justify_both(ppr)
+                        target_p.insert(0, ppr)
+                        for c in list(target_p):
+                            if c.tag == qn("w:pPr") or str(c.tag).endswith("}pPr"):
+                                continue
+                            target_p.remove(c)
+                        first_seg = True
+                        for seg in segments:
+                            if not first_seg:
+                                rb = OxmlElement("w:r")
+                                rb.append(OxmlElement("w:br"))
+                                target_p.append(rb)
+                            first_seg = False
+                            r = OxmlElement("w:r")
+                            t = OxmlElement("w:t")
+                            if seg:
+                                t.text = seg
+                                t.set(qn("xml:space"), "preserve")
+                            r.append(t)
+                            target_p.append(r)
+                        _psychoped_sweep_placeholder_wt()
+                        return
 
+                    def _sdt_fill_flat_keep_structure() -> None:
+                        """SDT con tabla u otro XML anidado: solo rellenar el párrafo destino con w:br."""
                         paragraphs = list(sdt_content_el.iter(qn("w:p")))
                         if not paragraphs:
-                            paragraphs = [OxmlElement("w:p")]
-                            sdt_content_el.append(paragraphs[0])
-                        _picked_ref = _pick_target_paragraph_for_value()
-                        ref_p = _picked_ref if _picked_ref is not None else paragraphs[0]
-
+                            return
+                        target_p = _pick_target_paragraph_for_value()
+                        if target_p is None:
+                            return
+                        for p in paragraphs:
+                            if p is not target_p:
+                                for wt in p.iter(qn("w:t")):
+                                    wt.text = ""
+                        old_ppr = target_p.find(qn("w:pPr"))
+                        if old_ppr is not None:
+                            target_p.remove(old_ppr)
+                        ppr = OxmlElement("w:pPr")
                         if psychoped_sdt:
-                            p_pr_prototype = OxmlElement("w:pPr")
-                            _ppr_set_justify_both(p_pr_prototype)
+                            _ppr_set_justify_both(ppr)
                         else:
-                            p_pr_template = ref_p.find(qn("w:pPr"))
-                            if p_pr_template is not None:
-                                p_pr_prototype = deepcopy(p_pr_template)
-                                _ppr_strip_cell_artifacts(p_pr_prototype)
-                                _ppr_set_justify_both(p_pr_prototype)
-                            else:
-                                p_pr_prototype = OxmlElement("w:pPr")
-                                _ppr_set_justify_both(p_pr_prototype)
+                            if old_ppr is not None:
+                                ppr = deepcopy(old_ppr)
+                                _ppr_strip_cell_artifacts(ppr)
+                            _ppr_set_justify_both(ppr)
+                        target_p.insert(0, ppr)
+                        for c in list(target_p):
+                            if c.tag == qn("w:pPr") or str(c.tag).endswith("}pPr"):
+                                continue
+                            target_p.remove(c)
+                        first = True
+                        for seg in segments:
+                            if not first:
+                                rb = OxmlElement("w:r")
+                                rb.append(OxmlElement("w:br"))
+                                target_p.append(rb)
+                            first = False
+                            r = OxmlElement("w:r")
+                            t = OxmlElement("w:t")
+                            if seg:
+                                t.text = seg
+                                t.set(qn("xml:space"), "preserve")
+                            r.append(t)
+                            target_p.append(r)
+
+                    if sdt_content_el.find(qn("w:tbl")) is not None:
+                        _sdt_fill_flat_keep_structure()
+                        return
 
-                        for child in list(sdt_content_el):
-                            sdt_content_el.remove(child)
+                    paragraphs = list(sdt_content_el.iter(qn("w:p")))
+                    if not paragraphs:
+                        paragraphs = [OxmlElement("w:p")]
+                        sdt_content_el.append(paragraphs[0])
+                    _picked_ref = _pick_target_paragraph_for_value()
+                    ref_p = _picked_ref if _picked_ref is not None else paragraphs[0]
 
-                        for segment in segments:
-                            new_p = OxmlElement("w:p")
-                            new_p.append(deepcopy(p_pr_prototype))
-                            r_text = OxmlElement("w:r")
-                            t_el = OxmlElement("w:t")
-                            if segment:
-                                t_el.text = segment
-                                t_el.set(qn("xml:space"), "preserve")
-                            r_text.append(t_el)
-                            new_p.append(r_text)
-                            sdt_content_el.append(new_p)
+                    if psychoped_sdt:
+                        p_pr_prototype = OxmlElement("w:pPr")
+                        _ppr_set_justify_both(p_pr_prototype)
+                    else:
+                        p_pr_template = ref_p.find(qn("w:pPr"))
+                        if p_pr_template is not None:
+                            p_pr_prototype = deepcopy(p_pr_template)
+                            _ppr_strip_cell_artifacts(p_pr_prototype)
+                            _ppr_set_justify_both(p_pr_prototype)
+                        else:
+                            p_pr_prototype = OxmlElement("w:pPr")
+                            _ppr_set_justify_both(p_pr_prototype)
 
-                    def _sdt_pr_has_w14_checkbox(sdtPr) -> bool:
+                    for child in list(sdt_content_el):
+                        sdt_content_el.remove(child)
+
+                    for segment in segments:
+                        new_p = OxmlElement("w:p")
+                        new_p.append(deepcopy(p_pr_prototype))
+                        r_text = OxmlElement("w:r")
+                        t_el = OxmlElement("w:t")
+                        if segment:
+                            t_el.text = segment
+                            t_el.set(qn("xml:space"), "preserve")
+                        r_text.append(t_el)
+                        new_p.append(r_text)
+                        sdt_content_el.append(new_p)
+
+                def _sdt_pr_has_w14_checkbox(sdtPr) -> bool:
+                    if sdtPr is None:
+                        return False
+                    return any(
+                        child.tag == f"{{{W14_NS}}}checkbox" or child.tag.endswith("}checkbox")
+                        for child in sdtPr
+                    )
+
+                def process_sdt_body(parent):
+                    for sdt in parent.iter(qn("w:sdt")):
+                        sdtPr = sdt.find(qn("w:sdtPr"))
                         if sdtPr is None:
-                            return False
-                        return any(
-                            child.tag == f"{{{W14_NS}}}checkbox" or child.tag.endswith("}checkbox")
-                            for child in sdtPr
+                            continue
+                        tag_el = sdtPr.find(qn("w:tag"))
+                        if tag_el is None:
+                            continue
+                        tag_val = (tag_el.get(qn("w:val")) or "").strip()
+                        if not tag_val:
+                            continue
+                        tag_n = _normalize_cc_tag(tag_val)
+                        rkey = next(
+                            (k for k in replacements if _normalize_cc_tag(k) == tag_n),
+                            None,
                         )
-
-                    def process_sdt_body(parent):
-                        for sdt in parent.iter(qn("w:sdt")):
-                            sdtPr = sdt.find(qn("w:sdtPr"))
-                            if sdtPr is None:
-                                continue
-                            tag_el = sdtPr.find(qn("w:tag"))
-                            if tag_el is None:
-                                continue
-                            tag_val = (tag_el.get(qn("w:val")) or "").strip()
-                            if not tag_val:
-                                continue
-                            tag_n = _normalize_cc_tag(tag_val)
-                            rkey = next(
-                                (k for k in replacements if _normalize_cc_tag(k) == tag_n),
-                                None,
+                        if rkey is None and content_control_tag_aliases:
+                            mapped = content_control_tag_aliases.get(tag_n)
+                            if mapped and mapped in replacements:
+                                rkey = mapped
+                        if rkey is None:
+                            checkbox_el = None
+                            for child in sdtPr:
+                                if child.tag == f"{{{W14_NS}}}checkbox" or child.tag.endswith("}checkbox"):
+                                    checkbox_el = child
+                                    break
+                            if checkbox_el is not None:
+                                _set_checkbox_checked(sdt, sdtPr, False)
+                            else:
+                                sdtContent = sdt.find(qn("w:sdtContent"))
+                                if sdtContent is not None:
+                                    for wt in sdtContent.iter(qn("w:t")):
+                                        tx = (wt.text or "").strip()
+                                        if tx and any(
+                                            ph in tx.lower()
+                                            for ph in (
+                                                "haz clic",
+                                                "pulse aqu",
+                                                "escribir texto",
+                                                "click here",
+                                                "tap here",
+                                                "click or tap",
+                                                "clic aqu",
+                                            )
+                                        ):
+                                            wt.text = ""
+                            continue
+                        raw_val = str(replacements.get(rkey, "") or "")
+                        raw_val = raw_val.replace("\r\n", "\n").replace("\r", "\n")
+                        val_stripped = raw_val.strip()
+
+                        # Informe familia: checkboxes solo en postprocess (no insertar texto del LLM)
+                        _familia_cb_tags = frozenset(
+                            {
+                                "evaluation",
+                                "reevaluation",
+                                "primary",
+                                "substitute",
+                                "yes",
+                                "no",
+                                "titular",
+                                "suplente",
+                                "ingreso",
+                                "admission",
+                                "revaluation",
+                                "reevaluacion",
+                            }
+                        )
+                        if content_control_tag_aliases and (
+                            tag_n in _familia_cb_tags
+                            or "apoderado" in tag_n
+                            or "guardian" in tag_n
+                            or "poder" in tag_n
+                        ):
+                            cb_val = val_stripped.lower()
+                            is_cb_checked = cb_val in (
+                                "1",
+                                "true",
+                                "yes",
+                                "si",
+                                "sí",
+                                "on",
+                                "x",
+                                "☒",
+                                "☑",
+                                "checked",
                             )
-                            if rkey is None and content_control_tag_aliases:
-                                mapped = content_control_tag_aliases.get(tag_n)
-                                if mapped and mapped in replacements:
-                                    rkey = mapped
-                            if rkey is None:
-                                checkbox_el = None
-                                for child in sdtPr:
-                                    if child.tag == f"{{{W14_NS}}}checkbox" or child.tag.endswith("}checkbox"):
-                                        checkbox_el = child
-                                        break
-                                if checkbox_el is not None:
-                                    _set_checkbox_checked(sdt, sdtPr, False)
-                                else:
-                                    sdtContent = sdt.find(qn("w:sdtContent"))
-                                    if sdtContent is not None:
-                                        for wt in sdtContent.iter(qn("w:t")):
-                                            tx = (wt.text or "").strip()
-                                            if tx and any(
-                                                ph in tx.lower()
-                                                for ph in (
-                                                    "haz clic",
-                                                    "pulse aqu",
-                                                    "escribir texto",
-                                                    "click here",
-                                                    "tap here",
-                                                    "click or tap",
-                                                    "clic aqu",
-                                                )
-                                            ):
-                                                wt.text = ""
-                                continue
-                            raw_val = str(replacements.get(rkey, "") or "")
-                            raw_val = raw_val.replace("\r\n", "\n").replace("\r", "\n")
-                            val_stripped = raw_val.strip()
+                            if not _set_checkbox_checked(sdt, sdtPr, is_cb_checked):
+                                sdtContent = sdt.find(qn("w:sdtContent"))
+                                if sdtContent is not None:
+                                    wt_list = list(sdtContent.iter(qn("w:t")))
+                                    if wt_list:
+                                        mark = (
+                                            "\u2612"
+                                            if is_cb_checked
+                                            else CHK_SYMBOL_UNCHECKED
+                                        )
+                                        wt_list[0].text = mark
+                                        for wt in wt_list[1:]:
+                                            wt.text = ""
+                            continue
 
-                            # Informe familia: checkboxes solo en postprocess (no insertar texto del LLM)
+                        # Informe familia: texto vacío → solo quitar «Haz clic…», conservar cuadro SDT
+                        if content_control_tag_aliases and not val_stripped:
+                            sdtContent = sdt.find(qn("w:sdtContent"))
+                            if sdtContent is not None:
+                                for wt in sdtContent.iter(qn("w:t")):
+                                    low = (wt.text or "").lower()
+                                    if any(
+                                        ph in low
+                                        for ph in (
+                                            "haz clic",
+                                            "pulse aqu",
+                                            "escribir texto",
+                                            "click here",
+                                            "tap here",
+                                            "click or tap",
+                                            "clic aqu",
+                                        )
+                                    ):
+                                        wt.text = ""
+                            continue
+
+                        is_checked = bool(
+                            val_stripped and val_stripped.lower() not in ("0", "false", "no", "off")
+                        )
+
+                        # Si es checkbox content control (w14:checkbox), activar/desactivar
+                        if _set_checkbox_checked(sdt, sdtPr, is_checked):
+                            continue
+
+                        # Campos de texto: si valor vacío, desenvolver el control (salvo plantillas ministeriales)
+                        sdtContent = sdt.find(qn("w:sdtContent"))
+                        if (
+                            sdtContent is not None
+                            and not val_stripped
+                            and not preserve_empty_content_controls
+                        ):
+                            # Informe familia: checkboxes SDT sin w14 — no desenvolver (rompe el diseño)
                             _familia_cb_tags = frozenset(
                                 {
                                     "evaluation",
@@ -10547,195 +10474,92 @@ class DocumentsClass:
                                 or "guardian" in tag_n
                                 or "poder" in tag_n
                             ):
-                                cb_val = val_stripped.lower()
-                                is_cb_checked = cb_val in (
-                                    "1",
-                                    "true",
-                                    "yes",
-                                    "si",
-                                    "sí",
-                                    "on",
-                                    "x",
-                                    "☒",
-                                    "☑",
-                                    "checked",
-                                )
-                                if not _set_checkbox_checked(sdt, sdtPr, is_cb_checked):
-                                    sdtContent = sdt.find(qn("w:sdtContent"))
-                                    if sdtContent is not None:
-                                        wt_list = list(sdtContent.iter(qn("w:t")))
-                                        if wt_list:
-                                            mark = (
-                                                "\u2612"
-                                                if is_cb_checked
-                                                else CHK_SYMBOL_UNCHECKED
-                                            )
-                                            wt_list[0].text = mark
-                                            for wt in wt_list[1:]:
-                                                wt.text = ""
-                                continue
-
-                            # Informe familia: texto vacío → solo quitar «Haz clic…», conservar cuadro SDT
-                            if content_control_tag_aliases and not val_stripped:
-                                sdtContent = sdt.find(qn("w:sdtContent"))
-                                if sdtContent is not None:
-                                    for wt in sdtContent.iter(qn("w:t")):
-                                        low = (wt.text or "").lower()
-                                        if any(
-                                            ph in low
-                                            for ph in (
-                                                "haz clic",
-                                                "pulse aqu",
-                                                "escribir texto",
-                                                "click here",
-                                                "tap here",
-                                                "click or tap",
-                                                "clic aqu",
-                                            )
-                                        ):
-                                            wt.text = ""
-                                continue
-
-                            is_checked = bool(
-                                val_stripped and val_stripped.lower() not in ("0", "false", "no", "off")
-                            )
-
-                            # Si es checkbox content control (w14:checkbox), activar/desactivar
-                            if _set_checkbox_checked(sdt, sdtPr, is_checked):
+                                wt_list = list(sdtContent.iter(qn("w:t")))
+                                if wt_list:
+                                    wt_list[0].text = CHK_SYMBOL_UNCHECKED
+                                    for wt in wt_list[1:]:
+                                        wt.text = ""
                                 continue
+                            for wt in sdtContent.iter(qn("w:t")):
+                                wt.text = ""
+                            parent = sdt.getparent()
+                            if parent is not None:
+                                idx = parent.index(sdt)
+                                children = list(sdtContent)
+                                parent.remove(sdt)
+                                for i, child in enumerate(children):
+                                    parent.insert(idx + i, child)
+                            continue
 
-                            # Campos de texto: si valor vacío, desenvolver el control (salvo plantillas ministeriales)
-                            sdtContent = sdt.find(qn("w:sdtContent"))
-                            if (
-                                sdtContent is not None
-                                and not val_stripped
-                                and not preserve_empty_content_controls
-                            ):
-                                # Informe familia: checkboxes SDT sin w14 — no desenvolver (rompe el diseño)
-                                _familia_cb_tags = frozenset(
-                                    {
-                                        "evaluation",
-                                        "reevaluation",
-                                        "primary",
-                                        "substitute",
-                                        "yes",
-                                        "no",
-                                        "titular",
-                                        "suplente",
-                                        "ingreso",
-                                        "admission",
-                                        "revaluation",
-                                        "reevaluacion",
-                                    }
+                        # Reemplazo de texto: saltos \\n -> w:br (un \\n en un solo w:t no se ve en Word)
+                        if sdtContent is not None:
+                            try:
+                                _sdt_fill_with_line_breaks(sdtContent, raw_val, rkey)
+                            except Exception as _sdt_fill_exc:
+                                import logging
+
+                                logging.getLogger(__name__).warning(
+                                    "fill_docx_form: SDT relleno con fallback (%s=%r…): %s",
+                                    rkey,
+                                    (raw_val or "")[:80],
+                                    _sdt_fill_exc,
+                                    exc_info=True,
                                 )
-                                if content_control_tag_aliases and (
-                                    tag_n in _familia_cb_tags
-                                    or "apoderado" in tag_n
-                                    or "guardian" in tag_n
-                                    or "poder" in tag_n
-                                ):
-                                    wt_list = list(sdtContent.iter(qn("w:t")))
-                                    if wt_list:
-                                        wt_list[0].text = CHK_SYMBOL_UNCHECKED
-                                        for wt in wt_list[1:]:
-                                            wt.text = ""
-                                    continue
                                 for wt in sdtContent.iter(qn("w:t")):
                                     wt.text = ""
-                                parent = sdt.getparent()
-                                if parent is not None:
-                                    idx = parent.index(sdt)
-                                    children = list(sdtContent)
-                                    parent.remove(sdt)
-                                    for i, child in enumerate(children):
-                                        parent.insert(idx + i, child)
-                                continue
-
-                            # Reemplazo de texto: saltos \\n -> w:br (un \\n en un solo w:t no se ve en Word)
-                            if sdtContent is not None:
-                                try:
-                                    _sdt_fill_with_line_breaks(sdtContent, raw_val, rkey)
-                                except Exception as _sdt_fill_exc:
-                                    import logging
-
-                                    logging.getLogger(__name__).warning(
-                                        "fill_docx_form: SDT relleno con fallback (%s=%r…): %s",
-                                        rkey,
-                                        (raw_val or "")[:80],
-                                        _sdt_fill_exc,
-                                        exc_info=True,
-                                    )
-                                    for wt in sdtContent.iter(qn("w:t")):
+                                wt_list = list(sdtContent.iter(qn("w:t")))
+                                if wt_list:
+                                    wt_list[0].set(qn("xml:space"), "preserve")
+                                    wt_list[0].text = raw_val
+                                    for wt in wt_list[1:]:
                                         wt.text = ""
-                                    wt_list = list(sdtContent.iter(qn("w:t")))
-                                    if wt_list:
-                                        wt_list[0].set(qn("xml:space"), "preserve")
-                                        wt_list[0].text = raw_val
-                                        for wt in wt_list[1:]:
-                                            wt.text = ""
-                    process_sdt_body(doc.element.body)
-                    for section in doc.sections:
-                        for hf in (section.header, section.footer):
-                            if hf is not None and hasattr(hf, "_element"):
-                                process_sdt_body(hf._element)
-                except Exception as _docx_extra_exc:
-                    import logging
-
-                    logging.getLogger(__name__).exception(
-                        "fill_docx_form: bloque DOCX_EXTRA (SDT/checkbox) falló: %s",
-                        _docx_extra_exc,
-                    )
-
-            # Eliminar cadenas literales (ej. placeholder) cuando Procedencia no es Otro
-            if remove_literal_strings:
-                def _strip_literal(para):
-                    text = para.text
-                    new_text = text
-                    for s in remove_literal_strings:
-                        if s:
-                            new_text = new_text.replace(s, "")
-                    if new_text != text:
-                        new_text = (new_text or "").replace("\r\n", "\n").replace("\r", "\n")
-                        para.clear()
-                        if not new_text:
-                            return
-                        first = True
-                        for segment in new_text.split("\n"):
-                            if not first:
-                                para.add_run().add_break()
-                            first = False
-                            para.add_run(segment)
-                for para in doc.paragraphs:
-                    _strip_literal(para)
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for para in cell.paragraphs:
-                                _strip_literal(para)
+                process_sdt_body(doc.element.body)
                 for section in doc.sections:
-                    for hf in (section.header, section.first_page_header, section.footer, section.first_page_footer):
-                        if hf is not None:
-                            for para in hf.paragraphs:
-                                _strip_literal(para)
-                            if hasattr(hf, "tables"):
-                                for tbl in hf.tables:
-                                    for row in tbl.rows:
-                                        for cell in row.cells:
-                                            for para in cell.paragraphs:
-                                                _strip_literal(para)
+                    for hf in (section.header, section.footer):
+                        if hf is not None and hasattr(hf, "_element"):
+                            process_sdt_body(hf._element)
+            except Exception as _docx_extra_exc:
+                import logging
+
+                logging.getLogger(__name__).exception(
+                    "fill_docx_form: bloque DOCX_EXTRA (SDT/checkbox) falló: %s",
+                    _docx_extra_exc,
+                )
 
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-            doc.save(output_path)
-            return {
-                "status": "success",
-                "message": "Documento DOCX rellenado correctamente",
-                "file_path": output_path,
-                "filename": Path(output_path).name,
-            }
-        except Exception as e:
-            return {
-                "status": "error",
-                "message": str(e),
-                "file_path": None,
-                "filename": None,
-            }
+        # Eliminar cadenas literales (ej. placeholder) cuando Procedencia no es Otro
+        if remove_literal_strings:
+            def _strip_literal(para):
+                text = para.text
+                new_text = text
+                for s in remove_literal_strings:
+                    if s:
+                        new_text = new_text.replace(s, "")
+                if new_text != text:
+                    new_text = (new_text or "").replace("\r\n", "\n").replace("\r", "\n")
+                    para.clear()
+                    if not new_text:
+                        return
+                    first = True
+                    for segment in new_text.split("\n"):
+                        if not first:
+                            para.add_run().add_break()
+                        first = False
+                        para.add_run(segment)
+            for para in doc.paragraphs:
+                _strip_literal(para)
+            for table in doc.tables:
+                for row in table.rows:
+                    for cell in row.cells:
+                        for para in cell.paragraphs:
+                            _strip_literal(para)
+            for section in doc.sections:
+                for hf in (section.header, section.first_page_header, section.footer, section.first_page_footer):
+                    if hf is not None:
+                        for para in hf.paragraphs:
+                            _strip_literal(para)
+                        if hasattr(hf, "tables"):
+                            for tbl in hf.tables:
+                                for row in tbl.rows:
+                                    for cell in row.cells:
+                                        for para in cell.paragraphs:
+                                            _strip_literal(para)
@@ -1,6 +1,9 @@
 """
 Clonación OOXML del bloque de registro por asignatura (cuadro observaciones + tabla rarpf_*).
 El párrafo largo «Registro de acciones realizadas por el profesor…» no se duplica; solo una vez en la plantilla.
+
+Cada operación existe en dos formas: ``_*_in_doc(doc, …)`` sobre un Document abierto (la usa
+RegisterBookDocxBuilder) y la función pública por ruta, que abre, aplica y guarda el archivo.
 """
 
 from __future__ import annotations
@@ -29,6 +32,24 @@ def _empty_paragraph_spacing_before(twips_before: int = 480) -> OxmlElement:
 _HEADER_SNIPPET = "Registro de acciones realizadas por el profesor"
 
 
+def _edit_docx_in_place(docx_path: str | Path, log_prefix: str, edit) -> bool:
+    """Abre el DOCX, aplica ``edit(doc)`` y lo guarda sobre la misma ruta (API por ruta, legado)."""
+    path = Path(docx_path)
+    try:
+        doc = Document(str(path))
+    except Exception as e:
+        logger.warning("%s: no se abrió %s: %s", log_prefix, path, e)
+        return False
+    if not edit(doc):
+        return False
+    try:
+        doc.save(str(path))
+    except Exception as e:
+        logger.warning("%s: save falló %s: %s", log_prefix, path, e)
+        return False
+    return True
+
+
 def _get_sdt_tag_val(sdt) -> str:
     sdt_pr = sdt.find(qn("w:sdtPr"))
     if sdt_pr is None:
@@ -130,28 +151,13 @@ def _find_clone_fragment_range(children: list) -> tuple[int | None, int | None]:
     return start, end
 
 
-def clone_register_book_section_b_blocks(
-    docx_path: str | Path,
+def _clone_register_book_section_b_blocks_in_doc(
+    doc,
     n_blocks: int,
     rows_per_register: int = 11,
 ) -> bool:
-    """
-    Duplica el bloque completo (texto b) + tabla con controles rarpo/rarp*) N veces.
-
-    El prototipo en plantilla debe incluir la tabla donde está `rarpf_1` y el párrafo
-    previo con «Registro de acciones realizadas por el profesor…».
-
-    :param n_blocks: Número de bloques finales deseados (p. ej. una asignatura por bloque).
-    """
-    path = Path(docx_path)
     if n_blocks <= 1:
         return True
-    try:
-        doc = Document(str(path))
-    except Exception as e:
-        logger.warning("clone_section_b: no se abrió %s: %s", path, e)
-        return False
-
     body = doc.element.body
     children = list(body)
     start, end = _find_clone_fragment_range(children)
@@ -174,15 +180,31 @@ def clone_register_book_section_b_blocks(
             parent.insert(idx + j, el)
         insert_after = new_els[-1]
         idx = parent.index(insert_after) + 1
-
-    try:
-        doc.save(str(path))
-    except Exception as e:
-        logger.warning("clone_section_b: save falló %s: %s", path, e)
-        return False
     return True
 
 
+def clone_register_book_section_b_blocks(
+    docx_path: str | Path,
+    n_blocks: int,
+    rows_per_register: int = 11,
+) -> bool:
+    """
+    Duplica el bloque completo (texto b) + tabla con controles rarpo/rarp*) N veces.
+
+    El prototipo en plantilla debe incluir la tabla donde está `rarpf_1` y el párrafo
+    previo con «Registro de acciones realizadas por el profesor…».
+
+    :param n_blocks: Número de bloques finales deseados (p. ej. una asignatura por bloque).
+    """
+    if n_blocks <= 1:
+        return True
+    return _edit_docx_in_place(
+        docx_path,
+        "clone_section_b",
+        lambda doc: _clone_register_book_section_b_blocks_in_doc(doc, n_blocks, rows_per_register),
+    )
+
+
 def clone_rarpo_observation_blocks_if_needed(docx_path: str | Path, n_blocks: int) -> bool:
     """Compatibilidad: usar clone_register_book_section_b_blocks."""
     return clone_register_book_section_b_blocks(docx_path, n_blocks, rows_per_register=11)
@@ -231,20 +253,9 @@ def _find_pai_table_index(children: list) -> int | None:
     return None
 
 
-def clone_pai_support_tables(docx_path: str | Path, n_blocks: int) -> bool:
-    """
-    Duplica solo la tabla del PAI (controles paih_1..5, paie_1, …), sin el párrafo
-    «4. Plan de Apoyo Individual…».
-    """
-    path = Path(docx_path)
+def _clone_pai_support_tables_in_doc(doc, n_blocks: int) -> bool:
     if n_blocks <= 1:
         return True
-    try:
-        doc = Document(str(path))
-    except Exception as e:
-        logger.warning("clone_pai: no se abrió %s: %s", path, e)
-        return False
-
     body = doc.element.body
     children = list(body)
     tbl_idx = _find_pai_table_index(children)
@@ -265,15 +276,23 @@ def clone_pai_support_tables(docx_path: str | Path, n_blocks: int) -> bool:
         parent.insert(idx, new_tbl)
         insert_after = new_tbl
         idx = parent.index(insert_after) + 1
-
-    try:
-        doc.save(str(path))
-    except Exception as e:
-        logger.warning("clone_pai: save falló %s: %s", path, e)
-        return False
     return True
 
 
+def clone_pai_support_tables(docx_path: str | Path, n_blocks: int) -> bool:
+    """
+    Duplica solo la tabla del PAI (controles paih_1..5, paie_1, …), sin el párrafo
+    «4. Plan de Apoyo Individual…».
+    """
+    if n_blocks <= 1:
+        return True
+    return _edit_docx_in_place(
+        docx_path,
+        "clone_pai",
+        lambda doc: _clone_pai_support_tables_in_doc(doc, n_blocks),
+    )
+
+
 def _map_raeg_table_clone_tag(old: str, block_index: int) -> str | None:
     """
     Prototipo bloque 1: raegee_1, raegeop_1_1, raegef_1_1, raegel_1_1, raegear_1_1, raegep_1_1 (profesional), …
@@ -418,21 +437,14 @@ def _retag_rafc_sdts_in_element(root, block_index: int) -> None:
             _strip_sdt_id(sdt)
 
 
-def _clone_iv_activity_blocks(
-    docx_path: str | Path,
+def _clone_iv_activity_blocks_in_doc(
+    doc,
     n_blocks: int,
     find_fragment,
     log_prefix: str,
 ) -> bool:
-    path = Path(docx_path)
     if n_blocks <= 1:
         return True
-    try:
-        doc = Document(str(path))
-    except Exception as e:
-        logger.warning("%s: no se abrió %s: %s", log_prefix, path, e)
-        return False
-
     body = doc.element.body
     children = list(body)
     start_idx, end_idx = find_fragment(children)
@@ -457,15 +469,24 @@ def _clone_iv_activity_blocks(
             parent.insert(idx + j, el)
         insert_after = new_els[-1]
         idx = parent.index(insert_after) + 1
-
-    try:
-        doc.save(str(path))
-    except Exception as e:
-        logger.warning("%s: save falló %s: %s", log_prefix, path, e)
-        return False
     return True
 
 
+def _clone_iv_activity_blocks(
+    docx_path: str | Path,
+    n_blocks: int,
+    find_fragment,
+    log_prefix: str,
+) -> bool:
+    if n_blocks <= 1:
+        return True
+    return _edit_docx_in_place(
+        docx_path,
+        log_prefix,
+        lambda doc: _clone_iv_activity_blocks_in_doc(doc, n_blocks, find_fragment, log_prefix),
+    )
+
+
 def clone_course_activity_record_blocks(docx_path: str | Path, n_blocks: int) -> bool:
     """
     IV familia: duplica bloque (rafcf_*_1 … rafcnir_*_1).
@@ -497,20 +518,9 @@ def _retag_raeg_duplicate_row_tag(old: str, block_1based: int, from_row: int, to
     return None
 
 
-def expand_raeg_intervention_rows(docx_path: str | Path, block_1based: int, n_rows: int) -> bool:
-    """
-    Duplica la fila de datos (tags raegef_*/raegel_*/raegear_*/raegep_* …) dentro de la tabla del bloque,
-    para varias intervenciones: raegef_1_2, raegef_1_3, … o raegef_2_2, …
-    """
-    path = Path(docx_path)
+def _expand_raeg_intervention_rows_in_doc(doc, block_1based: int, n_rows: int) -> bool:
     if n_rows <= 1:
         return True
-    try:
-        doc = Document(str(path))
-    except Exception as e:
-        logger.warning("expand_raeg: no se abrió %s: %s", path, e)
-        return False
-
     needle = "raegef_1_1" if block_1based == 1 else f"raegef_{block_1based}_1"
     body = doc.element.body
     tr_el = _find_tr_containing_sdt_tag(body, needle)
@@ -535,35 +545,32 @@ def expand_raeg_intervention_rows(docx_path: str | Path, block_1based: int, n_ro
                 _strip_sdt_id(sdt)
         tbl.insert(insert_at, new_tr)
         insert_at += 1
-
-    try:
-        doc.save(str(path))
-    except Exception as e:
-        logger.warning("expand_raeg: save falló %s: %s", path, e)
-        return False
     return True
 
 
-def expand_participant_table_rows(
-    docx_path: str | Path,
+def expand_raeg_intervention_rows(docx_path: str | Path, block_1based: int, n_rows: int) -> bool:
+    """
+    Duplica la fila de datos (tags raegef_*/raegel_*/raegear_*/raegep_* …) dentro de la tabla del bloque,
+    para varias intervenciones: raegef_1_2, raegef_1_3, … o raegef_2_2, …
+    """
+    if n_rows <= 1:
+        return True
+    return _edit_docx_in_place(
+        docx_path,
+        "expand_raeg",
+        lambda doc: _expand_raeg_intervention_rows_in_doc(doc, block_1based, n_rows),
+    )
+
+
+def _expand_participant_table_rows_in_doc(
+    doc,
     block_1based: int,
     n_rows: int,
     name_tag_prefix: str,
     log_prefix: str,
 ) -> bool:
-    """
-    Tabla de participantes: una fila por asistente. name_tag_prefix = 'rafcne' | 'tceen'
-    (columnas del mismo tr: rafcnia/rafcnit o tceeap/tceete).
-    """
-    path = Path(docx_path)
     if n_rows <= 1:
         return True
-    try:
-        doc = Document(str(path))
-    except Exception as e:
-        logger.warning("%s: no se abrió %s: %s", log_prefix, path, e)
-        return False
-
     needle = f"{name_tag_prefix}_{block_1based}_1"
     body = doc.element.body
     tr_el = _find_tr_containing_sdt_tag(body, needle)
@@ -588,15 +595,29 @@ def expand_participant_table_rows(
                 _strip_sdt_id(sdt)
         tbl.insert(insert_at, new_tr)
         insert_at += 1
-
-    try:
-        doc.save(str(path))
-    except Exception as e:
-        logger.warning("%s: save falló %s: %s", log_prefix, path, e)
-        return False
     return True
 
 
+def expand_participant_table_rows(
+    docx_path: str | Path,
+    block_1based: int,
+    n_rows: int,
+    name_tag_prefix: str,
+    log_prefix: str,
+) -> bool:
+    """
+    Tabla de participantes: una fila por asistente. name_tag_prefix = 'rafcne' | 'tceen'
+    (columnas del mismo tr: rafcnia/rafcnit o tceeap/tceete).
+    """
+    if n_rows <= 1:
+        return True
+    return _edit_docx_in_place(
+        docx_path,
+        log_prefix,
+        lambda doc: _expand_participant_table_rows_in_doc(doc, block_1based, n_rows, name_tag_prefix, log_prefix),
+    )
+
+
 def expand_rafc_participant_rows(docx_path: str | Path, block_1based: int, n_rows: int) -> bool:
     """IV familia: rafcne_*, rafcnia_*, rafcnit_*."""
     return expand_participant_table_rows(docx_path, block_1based, n_rows, "rafcne", "expand_rafc_part")
@@ -635,24 +656,13 @@ def _ensure_paragraph_spacing_before(p_el, twips_before: int) -> None:
     spacing.set(qn("w:before"), str(twips_before))
 
 
-def apply_learning_achievement_period_top_spacing(
-    docx_path: str | Path,
+def _apply_learning_achievement_period_top_spacing_in_doc(
+    doc,
     row_indices_1based: list[int],
     twips_before: int = 480,
 ) -> bool:
-    """
-    Añade espacio superior a la primera fila de cada nuevo período (sin filas vacías).
-    row_indices_1based: índices de fila del tag rlane_1_k (p. ej. primera fila del 2do y 3er período).
-    """
     if not row_indices_1based:
         return True
-    path = Path(docx_path)
-    try:
-        doc = Document(str(path))
-    except Exception as e:
-        logger.warning("rla_spacing: no se abrió %s: %s", path, e)
-        return False
-
     body = doc.element.body
     for r in row_indices_1based:
         needle = f"rlane_1_{r}"
@@ -669,29 +679,30 @@ def apply_learning_achievement_period_top_spacing(
                 break
         if first_p is not None:
             _ensure_paragraph_spacing_before(first_p, twips_before)
-
-    try:
-        doc.save(str(path))
-    except Exception as e:
-        logger.warning("rla_spacing: save falló %s: %s", path, e)
-        return False
     return True
 
 
-def expand_learning_achievement_rows(docx_path: str | Path, block_1based: int, n_rows: int) -> bool:
+def apply_learning_achievement_period_top_spacing(
+    docx_path: str | Path,
+    row_indices_1based: list[int],
+    twips_before: int = 480,
+) -> bool:
     """
-    Sección «3. Registro de logros de aprendizaje»: duplica la fila de la tabla
-    (tags rlane_*, rllr_*, rlcs_*) para varias filas de datos: rlane_1_2, rllr_1_2, …
+    Añade espacio superior a la primera fila de cada nuevo período (sin filas vacías).
+    row_indices_1based: índices de fila del tag rlane_1_k (p. ej. primera fila del 2do y 3er período).
     """
-    path = Path(docx_path)
-    if n_rows <= 1:
+    if not row_indices_1based:
         return True
-    try:
-        doc = Document(str(path))
-    except Exception as e:
-        logger.warning("expand_rla: no se abrió %s: %s", path, e)
-        return False
+    return _edit_docx_in_place(
+        docx_path,
+        "rla_spacing",
+        lambda doc: _apply_learning_achievement_period_top_spacing_in_doc(doc, row_indices_1based, twips_before),
+    )
+
 
+def _expand_learning_achievement_rows_in_doc(doc, block_1based: int, n_rows: int) -> bool:
+    if n_rows <= 1:
+        return True
     needle = "rlane_1_1" if block_1based == 1 else f"rlane_{block_1based}_1"
     body = doc.element.body
     tr_el = _find_tr_containing_sdt_tag(body, needle)
@@ -716,29 +727,26 @@ def expand_learning_achievement_rows(docx_path: str | Path, block_1based: int, n
                 _strip_sdt_id(sdt)
         tbl.insert(insert_at, new_tr)
         insert_at += 1
-
-    try:
-        doc.save(str(path))
-    except Exception as e:
-        logger.warning("expand_rla: save falló %s: %s", path, e)
-        return False
     return True
 
 
-def clone_course_record_support_tables(docx_path: str | Path, n_blocks: int) -> bool:
+def expand_learning_achievement_rows(docx_path: str | Path, block_1based: int, n_rows: int) -> bool:
     """
-    Sección «2. Registro de apoyos…»: duplica el bloque completo (párrafos con nombre/objetivos + tabla),
-    no solo la tabla, para que existan raegee_2, raegeop_2_1, etc.
+    Sección «3. Registro de logros de aprendizaje»: duplica la fila de la tabla
+    (tags rlane_*, rllr_*, rlcs_*) para varias filas de datos: rlane_1_2, rllr_1_2, …
     """
-    path = Path(docx_path)
-    if n_blocks <= 1:
+    if n_rows <= 1:
         return True
-    try:
-        doc = Document(str(path))
-    except Exception as e:
-        logger.warning("clone_raeg: no se abrió %s: %s", path, e)
-        return False
+    return _edit_docx_in_place(
+        docx_path,
+        "expand_rla",
+        lambda doc: _expand_learning_achievement_rows_in_doc(doc, block_1based, n_rows),
+    )
+
 
+def _clone_course_record_support_tables_in_doc(doc, n_blocks: int) -> bool:
+    if n_blocks <= 1:
+        return True
     body = doc.element.body
     children = list(body)
     tbl_idx = _find_raeg_table_index(children)
@@ -764,10 +772,88 @@ def clone_course_record_support_tables(docx_path: str | Path, n_blocks: int) ->
             parent.insert(idx + j, el)
         insert_after = new_els[-1]
         idx = parent.index(insert_after) + 1
-
-    try:
-        doc.save(str(path))
-    except Exception as e:
-        logger.warning("clone_raeg: save falló %s: %s", path, e)
-        return False
     return True
+
+
+def clone_course_record_support_tables(docx_path: str | Path, n_blocks: int) -> bool:
+    """
+    Sección «2. Registro de apoyos…»: duplica el bloque completo (párrafos con nombre/objetivos + tabla),
+    no solo la tabla, para que existan raegee_2, raegeop_2_1, etc.
+    """
+    if n_blocks <= 1:
+        return True
+    return _edit_docx_in_place(
+        docx_path,
+        "clone_raeg",
+        lambda doc: _clone_course_record_support_tables_in_doc(doc, n_blocks),
+    )
+
+
+class RegisterBookDocxBuilder:
+    """
+    Libro de registro en memoria: la plantilla se abre una sola vez, todas las clonaciones y
+    expansiones se aplican sobre el mismo Document y se serializa una vez con ``save``.
+
+    Cada método devuelve lo mismo que su equivalente por ruta (False si no encontró el prototipo).
+    """
+
+    def __init__(self, template_path: str | Path):
+        self.template_path = Path(template_path)
+        self.doc = Document(str(self.template_path))
+
+    def clone_section_b_blocks(self, n_blocks: int, rows_per_register: int = 11) -> bool:
+        return _clone_register_book_section_b_blocks_in_doc(self.doc, n_blocks, rows_per_register)
+
+    def clone_pai_support_tables(self, n_blocks: int) -> bool:
+        return _clone_pai_support_tables_in_doc(self.doc, n_blocks)
+
+    def clone_course_record_support_tables(self, n_blocks: int) -> bool:
+        return _clone_course_record_support_tables_in_doc(self.doc, n_blocks)
+
+    def expand_raeg_intervention_rows(self, block_1based: int, n_rows: int) -> bool:
+        return _expand_raeg_intervention_rows_in_doc(self.doc, block_1based, n_rows)
+
+    def expand_learning_achievement_rows(self, block_1based: int, n_rows: int) -> bool:
+        return _expand_learning_achievement_rows_in_doc(self.doc, block_1based, n_rows)
+
+    def apply_learning_achievement_period_top_spacing(
+        self, row_indices_1based: list[int], twips_before: int = 480
+    ) -> bool:
+        return _apply_learning_achievement_period_top_spacing_in_doc(
+            self.doc, row_indices_1based, twips_before
+        )
+
+    def clone_course_activity_record_blocks(self, n_blocks: int) -> bool:
+        return _clone_iv_activity_blocks_in_doc(
+            self.doc, n_blocks, _find_rafc_fragment_range, "clone_rafc"
+        )
+
+    def clone_course_community_activity_blocks(self, n_blocks: int) -> bool:
+        return _clone_iv_activity_blocks_in_doc(
+            self.doc, n_blocks, _find_tcee_fragment_range, "clone_tcee"
+        )
+
+    def clone_course_acta_reunion_blocks(self, n_blocks: int) -> bool:
+        return _clone_iv_activity_blocks_in_doc(
+            self.doc, n_blocks, _find_ar_fragment_range, "clone_ar"
+        )
+
+    def expand_rafc_participant_rows(self, block_1based: int, n_rows: int) -> bool:
+        return _expand_participant_table_rows_in_doc(
+            self.doc, block_1based, n_rows, "rafcne", "expand_rafc_part"
+        )
+
+    def expand_tcee_participant_rows(self, block_1based: int, n_rows: int) -> bool:
+        return _expand_participant_table_rows_in_doc(
+            self.doc, block_1based, n_rows, "tceen", "expand_tcee_part"
+        )
+
+    def expand_arn_participant_rows(self, block_1based: int, n_rows: int) -> bool:
+        return _expand_participant_table_rows_in_doc(
+            self.doc, block_1based, n_rows, "arn", "expand_arn_part"
+        )
+
+    def save(self, output_path: str | Path) -> None:
+        out = Path(output_path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        self.doc.save(str(out))
@@ -0,0 +1,400 @@
+"""Outbox de subidas a Google Drive: encolar, consultar estado y procesar con reintentos.
+
+``create_document`` / ``save_document_to_google_drive`` guardan el archivo local y llaman a
+``DriveUploadJobsClass.enqueue``; el worker (``core/drive_upload_worker.py``) toma los jobs
+vencidos con ``process_due_drive_uploads`` y los sube agrupados por curso con
+``DriveUploadQueue``.
+
+Un job por (customer, estudiante, tipo de documento): volver a generar reemplaza el payload
+y sube ``revision``. Si el worker estaba subiendo la versión anterior, al terminar no cierra
+el job y la versión nueva sale en la vuelta siguiente.
+
+Estados: pending → running → done | pending (reintento con backoff) | failed.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.backend.core.config import settings
+from app.backend.db.database import SessionLocal
+from app.backend.db.models.drive_upload_jobs import DriveUploadJobModel
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+RETRY_BASE_SECONDS = 5.0
+RETRY_MAX_SECONDS = 600.0
+
+
+def idempotency_key(customer_id: int, student_id: int, document_id: int) -> str:
+    return f"{int(customer_id)}:{int(student_id)}:{int(document_id)}"
+
+
+def retry_delay_seconds(attempts: int) -> float:
+    """Backoff exponencial tras el intento ``attempts`` (1 → 5 s, 2 → 10 s, … hasta 10 min)."""
+    return min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** max(0, int(attempts) - 1)))
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+def serialize_drive_upload_job(row: DriveUploadJobModel) -> dict[str, Any]:
+    """Estado del job; si ya subió incluye el payload de Drive (drive_path, web_view_link…)."""
+    data: dict[str, Any] = {}
+    if row.status == JOB_DONE and row.result_json:
+        try:
+            data.update(json.loads(row.result_json))
+        except ValueError:
+            pass
+    data.update(
+        {
+            "jobId": row.id,
+            "status": row.status,
+            "attempts": int(row.attempts or 0),
+            "lastError": row.last_error,
+            "nextAttemptAt": _iso(row.next_attempt_at) if row.status == JOB_PENDING else None,
+            "customerId": row.customer_id,
+            "studentId": row.student_id,
+            "documentId": row.document_id,
+            "saveId": row.save_id,
+            "createdAt": _iso(row.created_at),
+            "updatedAt": _iso(row.updated_at),
+        }
+    )
+    return data
+
+
+class DriveUploadJobsClass:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def enqueue(
+        self,
+        *,
+        customer_id: int,
+        student_id: int,
+        document_id: int,
+        payload: dict[str, Any],
+        agent_id: str | None = None,
+        save_id: int | None = None,
+    ) -> dict[str, Any]:
+        """Crea o reemplaza el job del documento y lo deja listo para el worker.
+
+        ``payload``: school_name, year, course_name, student_rut, document_type_name,
+        file_extension y file_name (archivo en ``files/system/students``).
+        """
+        key = idempotency_key(customer_id, student_id, document_id)
+        payload_json = json.dumps(payload, ensure_ascii=False)
+        for _attempt in range(2):
+            now = datetime.utcnow()
+            row = (
+                self.db.query(DriveUploadJobModel)
+                .filter(DriveUploadJobModel.idempotency_key == key)
+                .first()
+            )
+            if row is None:
+                row = DriveUploadJobModel(
+                    customer_id=int(customer_id),
+                    idempotency_key=key,
+                    student_id=int(student_id),
+                    document_id=int(document_id),
+                    revision=1,
+                    attempts=0,
+                    created_at=now,
+                )
+                self.db.add(row)
+            else:
+                row.revision = int(row.revision or 0) + 1
+                row.attempts = 0
+                row.locked_at = None
+                row.last_error = None
+                row.result_json = None
+            row.agent_id = (agent_id or "").strip() or None
+            row.save_id = int(save_id) if save_id else None
+            row.payload_json = payload_json
+            row.status = JOB_PENDING
+            row.next_attempt_at = now
+            row.updated_at = now
+            try:
+                self.db.commit()
+                break
+            except IntegrityError:
+                # Otro proceso creó el job del mismo documento entre la consulta y el insert.
+                self.db.rollback()
+        else:
+            return {
+                "status": "error",
+                "message": "No se pudo encolar la subida a Google Drive.",
+                "http_status": 409,
+            }
+        self.db.refresh(row)
+
+        from app.backend.core.drive_upload_worker import notify_drive_upload_worker
+
+        notify_drive_upload_worker()
+        return {"status": "success", "data": serialize_drive_upload_job(row)}
+
+    def get(self, *, job_id: int, customer_id: int) -> dict[str, Any]:
+        row = (
+            self.db.query(DriveUploadJobModel)
+            .filter(
+                DriveUploadJobModel.id == int(job_id),
+                DriveUploadJobModel.customer_id == int(customer_id),
+            )
+            .first()
+        )
+        if row is None:
+            return {"status": "error", "message": "Subida no encontrada.", "http_status": 404}
+        return {"status": "success", "data": serialize_drive_upload_job(row)}
+
+    def find(self, *, customer_id: int, student_id: int, document_id: int) -> dict[str, Any]:
+        """Último job del documento del estudiante (consulta por clave, sin job_id)."""
+        row = (
+            self.db.query(DriveUploadJobModel)
+            .filter(
+                DriveUploadJobModel.idempotency_key
+                == idempotency_key(customer_id, student_id, document_id)
+            )
+            .first()
+        )
+        if row is None:
+            return {"status": "error", "message": "Subida no encontrada.", "http_status": 404}
+        return {"status": "success", "data": serialize_drive_upload_job(row)}
+
+
+@dataclass
+class _ClaimedJob:
+    id: int
+    revision: int
+    customer_id: int
+    attempts: int
+    payload: dict[str, Any]
+
+
+@dataclass
+class _Outcome:
+    job: _ClaimedJob
+    ok: bool
+    retryable: bool = False
+    result: dict[str, Any] | None = None
+    error: str | None = None
+
+
+def _due_filter(now: datetime):
+    stale = now - timedelta(seconds=max(30, int(settings.drive_upload_lock_seconds or 600)))
+    return or_(
+        and_(
+            DriveUploadJobModel.status == JOB_PENDING,
+            DriveUploadJobModel.next_attempt_at <= now,
+        ),
+        and_(
+            DriveUploadJobModel.status == JOB_RUNNING,
+            DriveUploadJobModel.locked_at < stale,
+        ),
+    )
+
+
+def _claim_jobs(
+    db: Session, *, limit: int, job_ids: list[int] | None, now: datetime
+) -> list[_ClaimedJob]:
+    """Marca como running hasta ``limit`` jobs vencidos; un UPDATE condicional por job evita
+    que dos workers (hilos o procesos) tomen el mismo."""
+    query = db.query(
+        DriveUploadJobModel.id,
+        DriveUploadJobModel.revision,
+        DriveUploadJobModel.customer_id,
+        DriveUploadJobModel.attempts,
+        DriveUploadJobModel.payload_json,
+    ).filter(_due_filter(now))
+    if job_ids is not None:
+        query = query.filter(DriveUploadJobModel.id.in_([int(j) for j in job_ids]))
+    candidates = (
+        query.order_by(DriveUploadJobModel.next_attempt_at, DriveUploadJobModel.id)
+        .limit(max(1, int(limit)))
+        .all()
+    )
+    claimed: list[_ClaimedJob] = []
+    for job_id, revision, customer_id, attempts, payload_json in candidates:
+        result = db.execute(
+            update(DriveUploadJobModel)
+            .where(
+                DriveUploadJobModel.id == job_id,
+                DriveUploadJobModel.revision == revision,
+                _due_filter(now),
+            )
+            .values(
+                status=JOB_RUNNING,
+                locked_at=now,
+                attempts=DriveUploadJobModel.attempts + 1,
+                updated_at=now,
+            )
+        )
+        if result.rowcount != 1:
+            continue
+        try:
+            payload = json.loads(payload_json or "{}")
+        except ValueError:
+            payload = {}
+        claimed.append(
+            _ClaimedJob(
+                id=int(job_id),
+                revision=int(revision),
+                customer_id=int(customer_id),
+                attempts=int(attempts or 0) + 1,
+                payload=payload if isinstance(payload, dict) else {},
+            )
+        )
+    db.commit()
+    return claimed
+
+
+def _upload_customer_jobs(db: Session, customer_id: int, jobs: list[_ClaimedJob]) -> list[_Outcome]:
+    from app.backend.utils import google_drive_storage as gdrive
+
+    queue = gdrive.DriveUploadQueue(db, customer_id)
+    try:
+        queue.config
+    except ValueError as exc:
+        # Drive desconectado: no tiene sentido reintentar hasta que el cliente lo configure.
+        return [_Outcome(job=job, ok=False, error=str(exc)) for job in jobs]
+    except Exception as exc:
+        return [_Outcome(job=job, ok=False, retryable=True, error=str(exc)) for job in jobs]
+
+    outcomes: list[_Outcome] = []
+    queued: dict[int, _ClaimedJob] = {}
+    students_dir = Path(settings.files_dir) / "system" / "students"
+    for job in jobs:
+        payload = job.payload
+        local_path = students_dir / Path(str(payload.get("file_name") or "")).name
+        if not payload.get("file_name") or not local_path.is_file():
+            outcomes.append(
+                _Outcome(
+                    job=job,
+                    ok=False,
+                    error=f"No se encontró el archivo generado en el servidor: {local_path.name}",
+                )
+            )
+            continue
+        try:
+            index = queue.add(
+                school_name=str(payload.get("school_name") or ""),
+                year=int(payload.get("year") or 0),
+                course_name=str(payload.get("course_name") or ""),
+                student_rut=str(payload.get("student_rut") or ""),
+                document_type_name=str(payload.get("document_type_name") or ""),
+                data=local_path.read_bytes(),
+                file_extension=str(payload.get("file_extension") or "docx"),
+            )
+        except (TypeError, ValueError) as exc:
+            outcomes.append(_Outcome(job=job, ok=False, error=str(exc)))
+            continue
+        queued[index] = job
+
+    if queued:
+        try:
+            results = queue.flush()
+        except Exception as exc:
+            results = [{"ok": False, "error": str(exc)} for _ in range(len(queued))]
+        for index, job in queued.items():
+            result = results[index] if index < len(results) else {}
+            if result.get("ok"):
+                outcomes.append(_Outcome(job=job, ok=True, result=result))
+            else:
+                outcomes.append(
+                    _Outcome(
+                        job=job,
+                        ok=False,
+                        retryable=True,
+                        error=str(result.get("error") or "Error desconocido de Google Drive"),
+                    )
+                )
+    return outcomes
+
+
+def _finish_jobs(db: Session, outcomes: list[_Outcome], *, now: datetime) -> None:
+    max_attempts = max(1, int(settings.drive_upload_max_attempts or 1))
+    for outcome in outcomes:
+        job = outcome.job
+        if outcome.ok:
+            values: dict[str, Any] = {
+                "status": JOB_DONE,
+                "result_json": json.dumps(outcome.result or {}, ensure_ascii=False),
+                "last_error": None,
+            }
+        elif outcome.retryable and job.attempts < max_attempts:
+            values = {
+                "status": JOB_PENDING,
+                "next_attempt_at": now + timedelta(seconds=retry_delay_seconds(job.attempts)),
+                "last_error": outcome.error,
+            }
+        else:
+            values = {"status": JOB_FAILED, "last_error": outcome.error}
+            logger.warning(
+                "Subida a Drive fallida (job %s, customer %s, intento %s): %s",
+                job.id,
+                job.customer_id,
+                job.attempts,
+                outcome.error,
+            )
+        values.update(locked_at=None, updated_at=now)
+        # Si se re-encoló mientras subía (revision distinta), el job queda pending con la versión nueva.
+        db.execute(
+            update(DriveUploadJobModel)
+            .where(
+                DriveUploadJobModel.id == job.id,
+                DriveUploadJobModel.revision == job.revision,
+                DriveUploadJobModel.status == JOB_RUNNING,
+            )
+            .values(**values)
+        )
+    db.commit()
+
+
+def process_due_drive_uploads(
+    *,
+    session_factory: Callable[[], Session] | None = None,
+    limit: int | None = None,
+    job_ids: list[int] | None = None,
+) -> int:
+    """Procesa una tanda de jobs vencidos (o solo ``job_ids``). Devuelve cuántos tomó."""
+    db = (session_factory or SessionLocal)()
+    try:
+        claimed = _claim_jobs(
+            db,
+            limit=limit or settings.drive_upload_batch_size or 25,
+            job_ids=job_ids,
+            now=datetime.utcnow(),
+        )
+        if not claimed:
+            return 0
+        by_customer: OrderedDict[int, list[_ClaimedJob]] = OrderedDict()
+        for job in claimed:
+            by_customer.setdefault(job.customer_id, []).append(job)
+        for customer_id, jobs in by_customer.items():
+            try:
+                outcomes = _upload_customer_jobs(db, customer_id, jobs)
+            except Exception as exc:
+                logger.exception("Worker Drive: error subiendo jobs del customer %s", customer_id)
+                outcomes = [_Outcome(job=job, ok=False, retryable=True, error=str(exc)) for job in jobs]
+            db.rollback()
+            _finish_jobs(db, outcomes, now=datetime.utcnow())
+        return len(claimed)
+    finally:
+        db.close()
@@ -4,12 +4,19 @@ from __future__ import annotations
 
 import json
 from datetime import datetime
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import case, desc
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 
-from app.backend.classes.whatsapp_meta_class import notify_guardians_for_form
+from app.backend.classes.whatsapp_meta_class import WhatsAppMetaClass, notify_guardians_for_form
+from app.backend.classes.whatsapp_notify_jobs_class import (
+    JOB_DONE,
+    WhatsAppNotifyJobsClass,
+    process_due_whatsapp_messages,
+    whatsapp_job_summary,
+)
+from app.backend.core.config import settings
 from app.backend.db.models import (
     DynamicFormModel,
     DynamicFormSubmissionModel,
@@ -59,27 +66,38 @@ class DynamicFormClass:
             q = q.filter(DynamicFormModel.period_year == period_year)
         return q
 
-    def _guardian_cell(self, student_id: int) -> Optional[str]:
-        g = (
+    def _latest_guardians(self, student_ids) -> Dict[int, StudentGuardianModel]:
+        """Último apoderado (mayor id) de cada estudiante, en una sola consulta."""
+        ids = {int(sid) for sid in student_ids}
+        if not ids:
+            return {}
+        latest = (
+            self.db.query(func.max(StudentGuardianModel.id).label("id"))
+            .filter(StudentGuardianModel.student_id.in_(ids))
+            .group_by(StudentGuardianModel.student_id)
+            .subquery()
+        )
+        rows = (
             self.db.query(StudentGuardianModel)
-            .filter(StudentGuardianModel.student_id == student_id)
-            .order_by(desc(StudentGuardianModel.id))
-            .first()
+            .join(latest, StudentGuardianModel.id == latest.c.id)
+            .all()
         )
+        return {int(g.student_id): g for g in rows}
+
+    @staticmethod
+    def _guardian_name(g: Optional[StudentGuardianModel]) -> str:
+        if not g:
+            return ""
+        parts = [(g.names or "").strip(), (g.father_lastname or "").strip(), (g.mother_lastname or "").strip()]
+        return " ".join(x for x in parts if x).strip()
+
+    @classmethod
+    def _guardian_cell(cls, g: Optional[StudentGuardianModel]) -> Optional[str]:
         if not g:
             return None
         # Sin nombre de apoderado ni celular → no disparar
-        g_name = " ".join(
-            x
-            for x in [
-                (g.names or "").strip(),
-                (g.father_lastname or "").strip(),
-                (g.mother_lastname or "").strip(),
-            ]
-            if x
-        ).strip()
         phone = (g.celphone or "").strip()
-        if not g_name or not phone:
+        if not cls._guardian_name(g) or not phone:
             return None
         return phone
 
@@ -132,17 +150,102 @@ class DynamicFormClass:
         except (TypeError, ValueError):
             return None
 
-    def _run_whatsapp_notify(self, student_ids: List[int], form_name: str) -> Any:
+    def _run_whatsapp_notify(
+        self,
+        student_ids: List[int],
+        form_row: DynamicFormModel,
+        recipients: Dict[int, dict],
+    ) -> Tuple[Optional[dict], Optional[dict]]:
+        """Encola los avisos (outbox ``whatsapp_notify_jobs``); devuelve ``(resumen, job)``.
+
+        ``recipients``: salida de ``_course_recipients`` (nombre y celular ya cargados). El
+        resumen conserva la forma de siempre (``attempted``, ``sent``, ``failed`` por estudiante,
+        ``skipped_config``); el job (``jobId``, contadores) sirve para consultar el avance. Sin
+        WhatsApp configurado se responde el resumen inmediato, sin encolar ni job.
+        """
         if not student_ids:
-            return None
+            return None, None
+        form_name = form_row.name or "Formulario"
 
         def label(sid: int) -> str:
-            return self._student_display_name(sid) or "Estudiante"
+            return (recipients.get(sid) or {}).get("name") or "Estudiante"
 
         def phone(sid: int) -> Optional[str]:
-            return self._guardian_cell(sid)
-
-        return notify_guardians_for_form(self.db, student_ids, form_name, label, phone)
+            return (recipients.get(sid) or {}).get("notifyPhone")
+
+        if not WhatsAppMetaClass.is_configured():
+            return notify_guardians_for_form(self.db, student_ids, form_name, label, phone), None
+
+        queued = WhatsAppNotifyJobsClass(self.db).enqueue(
+            form_name=form_name,
+            recipients=[
+                {"student_id": sid, "student_name": label(sid), "phone": phone(sid)}
+                for sid in student_ids
+            ],
+            school_id=form_row.school_id,
+            dynamic_form_id=form_row.id,
+        )
+        job_id = int((queued.get("data") or {})["jobId"])
+        if not settings.whatsapp_notify_worker_enabled and queued["data"].get("status") != JOB_DONE:
+            # Sin worker: se envía dentro de la petición (lo que falle queda para reintento).
+            process_due_whatsapp_messages(job_ids=[job_id])
+            self.db.expire_all()
+        job = WhatsAppNotifyJobsClass(self.db).get(job_id=job_id).get("data") or queued["data"]
+        summary = whatsapp_job_summary(job)
+        job.pop("messages", None)
+        return summary, job
+
+    def _course_recipients(
+        self,
+        course_id: int,
+        school_id: Optional[int],
+        customer_id: Optional[int],
+        period_year: Optional[int] = None,
+    ) -> Tuple[Optional[str], Dict[int, dict]]:
+        """Estudiantes del curso con su último apoderado, por studentId (en orden del listado).
+
+        Cantidad fija de consultas (estudiantes + apoderados) sin importar el tamaño del curso;
+        la comparten ``get_course_recipients``, ``list_students_status`` y los envíos WhatsApp.
+        Devuelve ``(mensaje_de_error, recipients)``.
+        """
+        from app.backend.classes.school_class import SchoolClass
+        from app.backend.classes.student_class import StudentClass
+
+        resolved_school = school_id
+        if customer_id and not resolved_school:
+            schools_list = SchoolClass(self.db).get_all(page=0, customer_id=customer_id)
+            if isinstance(schools_list, list) and len(schools_list) > 0:
+                resolved_school = schools_list[0].get("id")
+
+        raw = StudentClass(self.db).get_all(
+            page=0,
+            items_per_page=5000,
+            school_id=resolved_school,
+            course_id=course_id,
+            period_year=period_year,
+        )
+        if isinstance(raw, dict) and raw.get("status") == "error":
+            return raw.get("message", "Error"), {}
+        students = [st for st in (raw if isinstance(raw, list) else []) if st.get("id") is not None]
+        guardians = self._latest_guardians(st["id"] for st in students)
+
+        out: Dict[int, dict] = {}
+        for st in students:
+            sid = int(st["id"])
+            pd = st.get("personal_data") or {}
+            names = (pd.get("names") or "").strip()
+            fl = (pd.get("father_lastname") or "").strip()
+            ml = (pd.get("mother_lastname") or "").strip()
+            rut = (pd.get("identification_number") or st.get("identification_number") or "").strip()
+            g = guardians.get(sid)
+            out.setdefault(sid, {
+                "name": " ".join(x for x in [names, fl, ml] if x),
+                "rut": rut,
+                "guardianName": self._guardian_name(g),
+                "guardianPhone": (g.celphone or "").strip() if g else "",
+                "notifyPhone": self._guardian_cell(g),
+            })
+        return None, out
 
     def get_course_recipients(
         self,
@@ -153,62 +256,19 @@ class DynamicFormClass:
     ) -> Any:
         """Estudiantes del curso con apoderado y celular (para UI checkboxes)."""
         try:
-            from app.backend.classes.school_class import SchoolClass
-            from app.backend.classes.student_class import StudentClass
-
-            resolved_school = school_id
-            if customer_id and not resolved_school:
-                schools_list = SchoolClass(self.db).get_all(page=0, customer_id=customer_id)
-                if isinstance(schools_list, list) and len(schools_list) > 0:
-                    resolved_school = schools_list[0].get("id")
-
-            raw = StudentClass(self.db).get_all(
-                page=0,
-                items_per_page=5000,
-                school_id=resolved_school,
-                course_id=course_id,
-                period_year=period_year,
-            )
-            if isinstance(raw, dict) and raw.get("status") == "error":
-                return {"status": "error", "message": raw.get("message", "Error"), "data": []}
-            students = raw if isinstance(raw, list) else []
-
-            out: List[dict] = []
-            for st in students:
-                sid = st.get("id")
-                if sid is None:
-                    continue
-                pd = st.get("personal_data") or {}
-                names = (pd.get("names") or "").strip()
-                fl = (pd.get("father_lastname") or "").strip()
-                ml = (pd.get("mother_lastname") or "").strip()
-                full = " ".join(x for x in [names, fl, ml] if x)
-                rut = (pd.get("identification_number") or st.get("identification_number") or "").strip()
-
-                g = (
-                    self.db.query(StudentGuardianModel)
-                    .filter(StudentGuardianModel.student_id == sid)
-                    .order_by(desc(StudentGuardianModel.id))
-                    .first()
-                )
-                g_name = ""
-                g_phone = ""
-                if g:
-                    gn = (g.names or "").strip()
-                    gf = (g.father_lastname or "").strip()
-                    gm = (g.mother_lastname or "").strip()
-                    g_name = " ".join(x for x in [gn, gf, gm] if x)
-                    g_phone = (g.celphone or "").strip()
-
-                out.append(
-                    {
-                        "studentId": sid,
-                        "studentName": full or "—",
-                        "studentRut": rut or "—",
-                        "guardianName": g_name or "—",
-                        "guardianPhone": g_phone or "—",
-                    }
-                )
+            error, recipients = self._course_recipients(course_id, school_id, customer_id, period_year)
+            if error:
+                return {"status": "error", "message": error, "data": []}
+            out: List[dict] = [
+                {
+                    "studentId": sid,
+                    "studentName": r["name"] or "—",
+                    "studentRut": r["rut"] or "—",
+                    "guardianName": r["guardianName"] or "—",
+                    "guardianPhone": r["guardianPhone"] or "—",
+                }
+                for sid, r in recipients.items()
+            ]
             return {"status": "success", "data": out}
         except Exception as e:
             return {"status": "error", "message": str(e), "data": []}
@@ -383,10 +443,10 @@ class DynamicFormClass:
                     "status": "error",
                     "message": "Seleccione al menos un estudiante con celular de apoderado.",
                 }
-            allowed = self._course_student_ids(
+            _error, recipients = self._course_recipients(
                 int(form_row.course_id), school_id, customer_id, period_year
             )
-            ids = [int(s) for s in student_ids if int(s) in allowed]
+            ids = [int(s) for s in student_ids if int(s) in recipients]
             if not ids:
                 return {
                     "status": "error",
@@ -408,13 +468,12 @@ class DynamicFormClass:
                     "status": "error",
                     "message": "Todos los seleccionados ya respondieron; no hay a quién notificar.",
                 }
-            whatsapp_summary = self._run_whatsapp_notify(
-                pending, form_row.name or "Formulario"
-            )
+            whatsapp_summary, whatsapp_job = self._run_whatsapp_notify(pending, form_row, recipients)
             return {
                 "status": "success",
-                "message": "Notificación disparada.",
+                "message": "Notificación en cola." if whatsapp_job else "Notificación disparada.",
                 "whatsapp": whatsapp_summary,
+                "whatsappJob": whatsapp_job,
             }
         except Exception as e:
             return {"status": "error", "message": str(e)}
@@ -453,20 +512,6 @@ class DynamicFormClass:
             q = q.filter(DynamicFormModel.period_year == period_year)
         return q.first()
 
-    def _course_student_ids(self, course_id: int, school_id: Optional[int], customer_id: Optional[int], period_year: Optional[int]) -> set:
-        cr = self.get_course_recipients(course_id, school_id, customer_id, period_year)
-        if cr.get("status") != "success":
-            return set()
-        out: set = set()
-        for r in cr.get("data") or []:
-            sid = r.get("studentId")
-            if sid is not None:
-                try:
-                    out.add(int(sid))
-                except (TypeError, ValueError):
-                    continue
-        return out
-
     def _validate_answers_payload(self, fields: List[dict], answers: dict) -> Optional[str]:
         if not isinstance(answers, dict):
             return "Las respuestas deben ser un objeto."
@@ -503,9 +548,9 @@ class DynamicFormClass:
                 return {"status": "error", "message": "Formulario no encontrado."}
             if not row.course_id:
                 return {"status": "error", "message": "El formulario no tiene curso asociado."}
-            cr = self.get_course_recipients(int(row.course_id), school_id, customer_id, period_year)
-            if cr.get("status") != "success":
-                return {"status": "error", "message": cr.get("message", "Error al listar estudiantes."), "data": []}
+            error, recipients = self._course_recipients(int(row.course_id), school_id, customer_id, period_year)
+            if error:
+                return {"status": "error", "message": error or "Error al listar estudiantes.", "data": []}
 
             subs = (
                 self.db.query(DynamicFormSubmissionModel)
@@ -518,14 +563,7 @@ class DynamicFormClass:
                 by_student.setdefault(int(s.student_id), []).append(s)
 
             out: List[dict] = []
-            for r in cr.get("data") or []:
-                sid = r.get("studentId")
-                if sid is None:
-                    continue
-                try:
-                    sid_int = int(sid)
-                except (TypeError, ValueError):
-                    continue
+            for sid_int, r in recipients.items():
                 student_subs = by_student.get(sid_int) or []
                 submissions = [
                     {
@@ -540,8 +578,8 @@ class DynamicFormClass:
                 out.append(
                     {
                         "studentId": sid_int,
-                        "studentName": r.get("studentName") or "—",
-                        "studentRut": r.get("studentRut") or "—",
+                        "studentName": r["name"] or "—",
+                        "studentRut": r["rut"] or "—",
                         "status": "respondido" if student_subs else "en_espera",
                         "submissionId": int(latest.id) if latest else None,
                         "submissionCount": len(student_subs),
@@ -621,8 +659,8 @@ class DynamicFormClass:
                 return {"status": "error", "message": "Formulario no encontrado."}
             if not form_row.course_id:
                 return {"status": "error", "message": "El formulario no tiene curso asociado."}
-            allowed = self._course_student_ids(int(form_row.course_id), school_id, customer_id, period_year)
-            if student_id not in allowed:
+            _error, recipients = self._course_recipients(int(form_row.course_id), school_id, customer_id, period_year)
+            if student_id not in recipients:
                 return {"status": "error", "message": "El estudiante no pertenece al curso de este formulario."}
             try:
                 fields = json.loads(form_row.fields_json) if form_row.fields_json else []
@@ -798,8 +836,8 @@ class DynamicFormClass:
                 return {"status": "error", "message": "Formulario no encontrado."}
             if not form_row.course_id:
                 return {"status": "error", "message": "El formulario no tiene curso asociado."}
-            allowed = self._course_student_ids(int(form_row.course_id), school_id, customer_id, period_year)
-            if student_id not in allowed:
+            _error, recipients = self._course_recipients(int(form_row.course_id), school_id, customer_id, period_year)
+            if student_id not in recipients:
                 return {"status": "error", "message": "El estudiante no pertenece al curso de este formulario."}
             existing = (
                 self.db.query(DynamicFormSubmissionModel)
@@ -814,11 +852,35 @@ class DynamicFormClass:
                     "status": "error",
                     "message": "Solo se puede reenviar cuando el estudiante está en espera (sin respuestas guardadas).",
                 }
-            whatsapp_summary = self._run_whatsapp_notify([student_id], form_row.name or "Formulario")
+            whatsapp_summary, whatsapp_job = self._run_whatsapp_notify([student_id], form_row, recipients)
             return {
                 "status": "success",
-                "message": "Notificación enviada al apoderado.",
+                "message": (
+                    "Notificación al apoderado en cola."
+                    if whatsapp_job
+                    else "Notificación enviada al apoderado."
+                ),
                 "whatsapp": whatsapp_summary,
+                "whatsappJob": whatsapp_job,
             }
         except Exception as e:
             return {"status": "error", "message": str(e)}
+
+    def get_whatsapp_job(
+        self,
+        form_id: int,
+        job_id: int,
+        school_id: Optional[int],
+        period_year: Optional[int] = None,
+    ) -> Any:
+        """Avance de un envío WhatsApp del formulario (enviados, fallidos y pendientes por estudiante)."""
+        try:
+            form_row = self._get_form_row(form_id, school_id, period_year)
+            if not form_row:
+                return {"status": "error", "message": "Formulario no encontrado.", "http_status": 404}
+            result = WhatsAppNotifyJobsClass(self.db).get(job_id=job_id, school_id=school_id)
+            if result.get("status") == "success" and result["data"].get("formId") != form_row.id:
+                return {"status": "error", "message": "Envío no encontrado.", "http_status": 404}
+            return result
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session
 
 from app.backend.core.config import settings
 from app.backend.db.models.evaluation_area_templates import EvaluationAreaTemplateModel
+from app.backend.utils.upload_sink import StagedUpload, upload_size, write_upload
 
 VALID_AREA_IDS = frozenset(
     {
@@ -85,7 +86,7 @@ class EvaluationAreaTemplatesClass:
         area_id: str,
         name: str,
         filename: str,
-        data: bytes,
+        data: bytes | StagedUpload,
         content_type: str | None,
         user_id: int | None,
     ) -> dict[str, Any]:
@@ -96,7 +97,7 @@ class EvaluationAreaTemplatesClass:
             return {"status": "error", "message": "Indique el nombre de la plantilla.", "http_status": 400}
         if len(label) > 255:
             return {"status": "error", "message": "El nombre es demasiado largo.", "http_status": 400}
-        if not data:
+        if not upload_size(data):
             return {"status": "error", "message": "Archivo vacío.", "http_status": 400}
         lower = (filename or "").lower()
         if not lower.endswith((".pdf", ".doc", ".docx")):
@@ -144,7 +145,7 @@ class EvaluationAreaTemplatesClass:
         folder.mkdir(parents=True, exist_ok=True)
         safe_name = _safe_filename(filename)
         target = folder / safe_name
-        target.write_bytes(data)
+        write_upload(target, data)
         row.stored_path = str(target.relative_to(Path(settings.files_dir).resolve())).replace("\\", "/")
         self.db.commit()
         self.db.refresh(row)
@@ -159,7 +160,7 @@ class EvaluationAreaTemplatesClass:
         template_id: int,
         customer_id: int | None,
         filename: str,
-        data: bytes,
+        data: bytes | StagedUpload,
         content_type: str | None,
         user_id: int | None,
     ) -> dict[str, Any]:
@@ -167,7 +168,7 @@ class EvaluationAreaTemplatesClass:
         row = self._get(template_id, cid)
         if not row:
             return {"status": "error", "message": "Plantilla no encontrada.", "http_status": 404}
-        if not data:
+        if not upload_size(data):
             return {"status": "error", "message": "Archivo vacío.", "http_status": 400}
         lower = (filename or "").lower()
         if not lower.endswith((".pdf", ".doc", ".docx")):
@@ -183,7 +184,7 @@ class EvaluationAreaTemplatesClass:
         folder.mkdir(parents=True, exist_ok=True)
         safe_name = _safe_filename(filename)
         target = folder / safe_name
-        target.write_bytes(data)
+        write_upload(target, data)
         now = datetime.now(timezone.utc).replace(tzinfo=None)
         row.original_filename = filename or safe_name
         row.stored_path = str(target.relative_to(Path(settings.files_dir).resolve())).replace("\\", "/")
@@ -1,5 +1,6 @@
 import os
 from fastapi import HTTPException, UploadFile
+from app.backend.utils.upload_sink import UploadTooLargeError, stage_upload, stage_upload_file
 
 class FileClass:
     def __init__(self, db):
@@ -17,10 +18,25 @@ class FileClass:
         try:
             remote_path = self._normalize_remote_path(remote_path)
             full_path = os.path.join(self.files_dir, remote_path)
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-            with open(full_path, "wb") as f:
-                f.write(file.file.read())
+            # Por trozos a un temporal del mismo directorio y rename atómico (no lee todo a memoria)
+            with stage_upload(file.file, os.path.dirname(full_path)) as staged:
+                staged.commit(full_path)
+            return f"Archivo subido exitosamente a {remote_path}"
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error al subir archivo: {str(e)}")
+
+    async def upload_async(self, file: UploadFile, remote_path: str) -> str:
+        """``upload`` para rutas async: la copia por trozos corre en el pool ``upload``, no en el event loop."""
+        try:
+            remote_path = self._normalize_remote_path(remote_path)
+            full_path = os.path.join(self.files_dir, remote_path)
+            with await stage_upload_file(file, os.path.dirname(full_path)) as staged:
+                staged.commit(full_path)
             return f"Archivo subido exitosamente a {remote_path}"
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error al subir archivo: {str(e)}")
 
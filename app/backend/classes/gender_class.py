@@ -1,5 +1,6 @@
 from datetime import datetime
 from app.backend.db.models import GenderModel
+from app.backend.utils.catalog_cache import bump_catalog
 
 class GenderClass:
     def __init__(self, db):
@@ -126,6 +127,7 @@ class GenderClass:
 
             self.db.add(new_item)
             self.db.commit()
+            bump_catalog("genders")
             self.db.refresh(new_item)
 
             return {
@@ -145,6 +147,7 @@ class GenderClass:
                 data.deleted_status_id = 1
                 data.updated_date = datetime.now()
                 self.db.commit()
+                bump_catalog("genders")
                 return {"status": "success", "message": "Gender deleted successfully"}
             else:
                 return {"status": "error", "message": "No data found"}
@@ -167,6 +170,7 @@ class GenderClass:
             existing_item.updated_date = datetime.now()
 
             self.db.commit()
+            bump_catalog("genders")
             self.db.refresh(existing_item)
 
             return {"status": "success", "message": "Gender updated successfully"}
@@ -16,16 +16,28 @@ Env:
   INSPECTION_API_REGIONS_PATH (default: listado/regiones) — GET catálogo regiones (import)
   INSPECTION_API_PROVINCES_PATH (default: listado/provincias) — GET catálogo provincias (import)
   INSPECTION_API_COMMUNES_PATH (default: listado/comunas) — GET catálogo comunas (import)
+  INSPECTION_API_POOL_MAXSIZE (default: 8) — conexiones keep-alive de la sesión HTTP compartida
+  INSPECTION_API_CATALOG_TTL_SECONDS (default: 600) — caché de catálogos (colegios, enseñanzas,
+    regiones, provincias, comunas, nacionalidades); 0 la desactiva
+
+Todas las instancias usan una ``requests.Session`` por proceso (TLS y conexiones reutilizadas);
+cursos y alumnos de un colegio se piden en paralelo con ``fetch_school_lists``.
 """
 
 from __future__ import annotations
 
+import copy
 import os
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from app.backend.core.config import settings
 
 
 def _env(name: str, default: Optional[str] = None) -> Optional[str]:
@@ -33,10 +45,48 @@ def _env(name: str, default: Optional[str] = None) -> Optional[str]:
     return v if v is not None and str(v).strip() != "" else default
 
 
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+_catalog_cache: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+_catalog_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Session compartida entre hilos: keep-alive hacia Inspection en vez de un handshake por llamada."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=max(1, int(settings.inspection_api_pool_maxsize or 1)),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def reset_inspection_session() -> None:
+    """Cierra la sesión compartida (la siguiente llamada abre una nueva)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def clear_inspection_catalog_cache() -> None:
+    with _catalog_lock:
+        _catalog_cache.clear()
+
+
 class InspectionApiClient:
     """Token en memoria por worker (gunicorn); se renueva al expirar o ante 401."""
 
     _lock = threading.Lock()
+    _login_lock = threading.Lock()
     _token: Optional[str] = None
     _expires_at: Optional[datetime] = None
 
@@ -92,7 +142,7 @@ class InspectionApiClient:
             "password": (None, str(self.password)),
         }
         try:
-            r = requests.post(url, files=files, timeout=self.timeout)
+            r = _get_session().post(url, files=files, timeout=self.timeout)
             try:
                 body = r.json()
             except Exception:
@@ -121,46 +171,49 @@ class InspectionApiClient:
                 return self._token
         if not self.is_configured():
             return None
-        res = self.login()
-        if not res.get("ok"):
-            return None
+        # Un solo login a la vez: los demás hilos esperan y reutilizan el token renovado.
+        with self._login_lock:
+            with self._lock:
+                if self._token_valid():
+                    return self._token
+            res = self.login()
+            if not res.get("ok"):
+                return None
         with self._lock:
             return self._token
 
-    def _post_multipart_rut(self, remote_path: str, rut: str, anio: int | None = None) -> Dict[str, Any]:
-        """
-        POST {base}/{remote_path} with form field rut (multipart). Used for getDatosAlumno, getDatosFuncionario, etc.
-        """
-        rut = (rut or "").strip()
-        if not rut:
-            return {"ok": False, "message": "RUT is required", "data": None}
+    def _drop_token(self, token: str) -> None:
+        """Olvida ``token`` tras un 401 (si otro hilo ya lo renovó, no toca el nuevo)."""
+        with self._lock:
+            if self.__class__._token == token:
+                self.__class__._token = None
+                self.__class__._expires_at = None
 
+    def _request(self, method: str, remote_path: str, files: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Request con Bearer por la sesión compartida; ante 401 renueva el token y reintenta una vez."""
         token = self.get_bearer_token()
         if not token:
             return {"ok": False, "message": "Inspection API authentication failed (check credentials)", "data": None}
 
         remote_path = remote_path.lstrip("/")
         url = f"{self.base_url}/{remote_path}"
-        headers = {"Authorization": f"Bearer {token}"}
-        files = {
-            "rut": (None, rut),
-            **({"anio": (None, str(anio))} if anio is not None else {}),
-        }
+        session = _get_session()
 
         try:
-            r = requests.post(url, headers=headers, files=files, timeout=self.timeout)
+            r = session.request(
+                method, url, headers={"Authorization": f"Bearer {token}"}, files=files, timeout=self.timeout
+            )
             try:
                 body = r.json()
             except Exception:
                 return {"ok": False, "message": f"Non-JSON response: {r.text[:200]}", "data": None}
 
             if r.status_code == 401:
-                with self._lock:
-                    self.__class__._token = None
-                    self.__class__._expires_at = None
+                self._drop_token(token)
                 token2 = self.get_bearer_token()
                 if token2:
-                    r = requests.post(
+                    r = session.request(
+                        method,
                         url,
                         headers={"Authorization": f"Bearer {token2}"},
                         files=files,
@@ -182,94 +235,41 @@ class InspectionApiClient:
         except requests.RequestException as e:
             return {"ok": False, "message": str(e), "data": None}
 
+    def _post_multipart_rut(self, remote_path: str, rut: str, anio: int | None = None) -> Dict[str, Any]:
+        """
+        POST {base}/{remote_path} with form field rut (multipart). Used for getDatosAlumno, getDatosFuncionario, etc.
+        """
+        rut = (rut or "").strip()
+        if not rut:
+            return {"ok": False, "message": "RUT is required", "data": None}
+        files = {
+            "rut": (None, rut),
+            **({"anio": (None, str(anio))} if anio is not None else {}),
+        }
+        return self._request("POST", remote_path, files=files)
+
     def _post_multipart_form(self, remote_path: str, fields: Dict[str, Any]) -> Dict[str, Any]:
         """POST multipart/form-data con campos arbitrarios (solo texto), Bearer auth."""
-        token = self.get_bearer_token()
-        if not token:
-            return {"ok": False, "message": "Inspection API authentication failed (check credentials)", "data": None}
-
-        remote_path = remote_path.lstrip("/")
-        url = f"{self.base_url}/{remote_path}"
-        headers = {"Authorization": f"Bearer {token}"}
         files = {k: (None, str(v)) for k, v in fields.items() if v is not None}
-
-        try:
-            r = requests.post(url, headers=headers, files=files, timeout=self.timeout)
-            try:
-                body = r.json()
-            except Exception:
-                return {"ok": False, "message": f"Non-JSON response: {r.text[:200]}", "data": None}
-
-            if r.status_code == 401:
-                with self._lock:
-                    self.__class__._token = None
-                    self.__class__._expires_at = None
-                token2 = self.get_bearer_token()
-                if token2:
-                    r = requests.post(
-                        url,
-                        headers={"Authorization": f"Bearer {token2}"},
-                        files=files,
-                        timeout=self.timeout,
-                    )
-                    try:
-                        body = r.json()
-                    except Exception:
-                        return {"ok": False, "message": "Retry after 401 failed", "data": None}
-
-            if r.status_code >= 400:
-                return {
-                    "ok": False,
-                    "message": body.get("message") or f"HTTP {r.status_code}",
-                    "data": body.get("data"),
-                }
-
-            return body if isinstance(body, dict) else {"ok": False, "message": "Invalid response body", "data": None}
-        except requests.RequestException as e:
-            return {"ok": False, "message": str(e), "data": None}
+        return self._request("POST", remote_path, files=files)
 
     def _get_with_bearer(self, remote_path: str) -> Dict[str, Any]:
-        token = self.get_bearer_token()
-        if not token:
-            return {"ok": False, "message": "Inspection API authentication failed (check credentials)", "data": None}
-
-        remote_path = remote_path.lstrip("/")
-        url = f"{self.base_url}/{remote_path}"
-        headers = {"Authorization": f"Bearer {token}"}
-
-        try:
-            r = requests.get(url, headers=headers, timeout=self.timeout)
-            try:
-                body = r.json()
-            except Exception:
-                return {"ok": False, "message": f"Non-JSON response: {r.text[:200]}", "data": None}
-
-            if r.status_code == 401:
-                with self._lock:
-                    self.__class__._token = None
-                    self.__class__._expires_at = None
-                token2 = self.get_bearer_token()
-                if token2:
-                    r = requests.get(
-                        url,
-                        headers={"Authorization": f"Bearer {token2}"},
-                        timeout=self.timeout,
-                    )
-                    try:
-                        body = r.json()
-                    except Exception:
-                        return {"ok": False, "message": "Retry after 401 failed", "data": None}
-
-            if r.status_code >= 400:
-                return {
-                    "ok": False,
-                    "message": body.get("message") or f"HTTP {r.status_code}",
-                    "data": body.get("data"),
-                }
-
-            return body if isinstance(body, dict) else {"ok": False, "message": "Invalid response body", "data": None}
-        except requests.RequestException as e:
-            return {"ok": False, "message": str(e), "data": None}
+        return self._request("GET", remote_path)
+
+    def _get_catalog(self, remote_path: str) -> Dict[str, Any]:
+        """GET de catálogo (cambia poco): respuestas ``ok`` se reutilizan ``INSPECTION_API_CATALOG_TTL_SECONDS``."""
+        ttl = float(settings.inspection_api_catalog_ttl_seconds or 0)
+        key = (self.base_url, remote_path.lstrip("/"))
+        if ttl > 0:
+            with _catalog_lock:
+                hit = _catalog_cache.get(key)
+                if hit is not None and hit[0] > time.monotonic():
+                    return copy.deepcopy(hit[1])
+        body = self._get_with_bearer(remote_path)
+        if ttl > 0 and body.get("ok"):
+            with _catalog_lock:
+                _catalog_cache[key] = (time.monotonic() + ttl, copy.deepcopy(body))
+        return body
 
     def fetch_student_data(self, rut: str, anio: int | None = None) -> Dict[str, Any]:
         """POST /getDatosAlumno — remote path fixed by Inspection."""
@@ -282,7 +282,7 @@ class InspectionApiClient:
     def fetch_communes_list(self) -> Dict[str, Any]:
         """GET listado/comunas — catálogo remoto de comunas (`id`, `nombre`, `provincia_id` → resolver región vía `provinces`)."""
         path = (_env("INSPECTION_API_COMMUNES_PATH") or "listado/comunas").lstrip("/")
-        return self._get_with_bearer(path)
+        return self._get_catalog(path)
 
     def fetch_regions_list(self) -> Dict[str, Any]:
         """Alias: mismo catálogo que provincias (compatibilidad con rutas `/regions/endpoint/list`)."""
@@ -291,22 +291,22 @@ class InspectionApiClient:
     def fetch_provinces_list(self) -> Dict[str, Any]:
         """GET listado/provincias — catálogo remoto de provincias."""
         path = (_env("INSPECTION_API_PROVINCES_PATH") or "listado/provincias").lstrip("/")
-        return self._get_with_bearer(path)
+        return self._get_catalog(path)
 
     def fetch_regiones_list(self) -> Dict[str, Any]:
         """GET listado/regiones — catálogo remoto de regiones (configurable por env)."""
         path = (_env("INSPECTION_API_REGIONS_PATH") or "listado/regiones").lstrip("/")
-        return self._get_with_bearer(path)
+        return self._get_catalog(path)
 
     def fetch_nationalities_list(self) -> Dict[str, Any]:
         """GET listado/nacionalidades — `{ ok, data: [{ id, gentilicio, pais, iso }, ...] }`."""
         path = (_env("INSPECTION_API_NATIONALITIES_PATH") or "listado/nacionalidades").lstrip("/")
-        return self._get_with_bearer(path)
+        return self._get_catalog(path)
 
     def fetch_teachings_list(self) -> Dict[str, Any]:
         """GET listado de tipos de enseñanzas (Inspection: /api/listado/tipos-ensenanzas)."""
         path = (_env("INSPECTION_API_TEACHINGS_PATH") or "listado/tipos-ensenanzas").lstrip("/")
-        return self._get_with_bearer(path)
+        return self._get_catalog(path)
 
     def fetch_courses_list(self, colegio_id: int, anio: int) -> Dict[str, Any]:
         """
@@ -325,15 +325,23 @@ class InspectionApiClient:
         path = (_env("INSPECTION_API_STUDENTS_PATH") or "listado/alumnos").lstrip("/")
         return self._post_multipart_form(path, {"colegio": int(colegio_id), "anio": int(anio)})
 
+    def fetch_school_lists(self, colegio_id: int, anio: int) -> Dict[str, Dict[str, Any]]:
+        """Cursos y alumnos de un colegio/año en paralelo: ``{"courses": {...}, "students": {...}}``."""
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="inspection") as pool:
+            courses = pool.submit(self.fetch_courses_list, colegio_id, anio)
+            students = pool.submit(self.fetch_students_list, colegio_id, anio)
+            return {"courses": courses.result(), "students": students.result()}
+
     def fetch_schools_list(self) -> Dict[str, Any]:
         """GET listado de colegios (Inspection: /api/listado/colegios)."""
         path = (_env("INSPECTION_API_SCHOOLS_PATH") or "listado/colegios").lstrip("/")
-        return self._get_with_bearer(path)
+        return self._get_catalog(path)
 
     def fetch_teachings_for_active_school(self, school_id: int) -> Dict[str, Any]:
         """
         GET listado/colegios y devuelve solo los tipos de enseñanza del colegio cuyo id remoto
-        coincide con school_id (mismo id que en BD / sesión).
+        coincide con school_id (mismo id que en BD / sesión). El listado sale de la caché de
+        catálogos, así que importar enseñanzas de varios colegios no repite la descarga.
 
         Formato esperado por colegio: tiposEnsenanzas | tipos_ensenanzas → [{ id, codigo, nombre }, ...]
         """
@@ -0,0 +1,179 @@
+from typing import Any, Dict, List, Optional
+
+from app.backend.classes.course_class import (
+    _course_name_from_row,
+    _extract_courses_rows,
+    _inspection_course_id_from_row,
+    _row_int_optional,
+)
+from app.backend.classes.inspection_api_client import InspectionApiClient
+from app.backend.classes.student_class import (
+    _extract_inspection_students_rows,
+    _identification_key_for_dedupe,
+    _inspection_int,
+    _row_colegio_id_for_inspection,
+)
+from app.backend.db.models import CourseModel, StudentAcademicInfoModel, StudentModel
+
+
+def _student_name_from_row(row: Dict[str, Any]) -> str:
+    parts = (row.get("nombres"), row.get("paterno"), row.get("materno"))
+    return " ".join(str(p).strip() for p in parts if p is not None and str(p).strip())
+
+
+class InspectionSchoolSyncClass:
+    """
+    Compara cursos y alumnos de Inspection (colegio + año) con las tablas locales, sin escribir.
+    Sirve para revisar qué haría un import antes de ejecutarlo; ambos listados se piden en paralelo.
+    """
+
+    def __init__(self, db, client: Optional[InspectionApiClient] = None):
+        self.db = db
+        self.client = client or InspectionApiClient()
+
+    def diff(self, school_id: int, period_year: int) -> Dict[str, Any]:
+        try:
+            sid = int(school_id)
+            anio = int(period_year)
+            remote = self.client.fetch_school_lists(sid, anio)
+            for key in ("courses", "students"):
+                if not remote[key].get("ok"):
+                    return {
+                        "status": "error",
+                        "source": key,
+                        "message": remote[key].get("message") or f"Error al obtener {key} desde Inspection",
+                    }
+
+            return {
+                "status": "success",
+                "school_id": sid,
+                "period_year": anio,
+                "courses": self._courses_diff(sid, anio, remote["courses"]),
+                "students": self._students_diff(sid, anio, remote["students"]),
+            }
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def _courses_diff(self, school_id: int, period_year: int, body: Dict[str, Any]) -> Dict[str, Any]:
+        remote: Dict[int, Dict[str, Any]] = {}
+        excluded_other_school = 0
+        for row in _extract_courses_rows(body):
+            if not isinstance(row, dict):
+                continue
+            ext_id = _inspection_course_id_from_row(row)
+            nombre = _course_name_from_row(row)
+            if ext_id is None or not nombre:
+                continue
+            remote_school = _row_int_optional(row, ("colegio_id", "colegioId", "colegio", "school_id", "schoolId"))
+            if remote_school is not None and int(remote_school) != school_id:
+                excluded_other_school += 1
+                continue
+            remote.setdefault(ext_id, {"id": ext_id, "name": nombre})
+
+        local_rows = (
+            self.db.query(CourseModel.id, CourseModel.course_name, CourseModel.period_year)
+            .filter(CourseModel.school_id == school_id, CourseModel.deleted_status_id == 0)
+            .all()
+        )
+        local = {int(r.id): r for r in local_rows}
+
+        new: List[Dict[str, Any]] = []
+        renamed: List[Dict[str, Any]] = []
+        unchanged = 0
+        for cid, item in remote.items():
+            row = local.get(cid)
+            if row is None:
+                new.append(item)
+            elif (row.course_name or "").strip().lower() != item["name"].lower():
+                renamed.append({"id": cid, "local_name": row.course_name, "remote_name": item["name"]})
+            else:
+                unchanged += 1
+
+        missing_remote = [
+            {"id": cid, "name": row.course_name}
+            for cid, row in local.items()
+            if cid not in remote and (row.period_year is None or int(row.period_year) == period_year)
+        ]
+        return {
+            "remote_total": len(remote),
+            "unchanged": unchanged,
+            "excluded_other_school": excluded_other_school,
+            "new": new,
+            "renamed": renamed,
+            "missing_remote": missing_remote,
+        }
+
+    def _students_diff(self, school_id: int, period_year: int, body: Dict[str, Any]) -> Dict[str, Any]:
+        remote: Dict[str, Dict[str, Any]] = {}
+        excluded_other_school = 0
+        for row in _extract_inspection_students_rows(body):
+            cid = _row_colegio_id_for_inspection(row)
+            if cid is not None and cid != school_id:
+                excluded_other_school += 1
+                continue
+            rut = str(row.get("rut") or row.get("identification_number") or "").strip()
+            if not rut:
+                continue
+            remote.setdefault(
+                _identification_key_for_dedupe(rut),
+                {
+                    "rut": rut,
+                    "name": _student_name_from_row(row),
+                    "course_id": _inspection_int(
+                        row.get("curso_id") if row.get("curso_id") is not None else row.get("cursoId")
+                    ),
+                },
+            )
+
+        # Una sola consulta con los alumnos activos del colegio (como el import: el RUT no se repite por año).
+        local_rows = (
+            self.db.query(
+                StudentModel.id,
+                StudentModel.identification_number,
+                StudentModel.rut_normalized,
+                StudentModel.period_year,
+                StudentAcademicInfoModel.course_id,
+            )
+            .outerjoin(StudentAcademicInfoModel, StudentAcademicInfoModel.student_id == StudentModel.id)
+            .filter(StudentModel.school_id == school_id, StudentModel.deleted_status_id == 0)
+            .order_by(StudentModel.id, StudentAcademicInfoModel.id)
+            .all()
+        )
+        local: Dict[str, Any] = {}
+        for r in local_rows:
+            key = r.rut_normalized or _identification_key_for_dedupe(r.identification_number or "")
+            if key:
+                local.setdefault(key, r)
+
+        new: List[Dict[str, Any]] = []
+        course_changed: List[Dict[str, Any]] = []
+        unchanged = 0
+        for key, item in remote.items():
+            row = local.get(key)
+            if row is None:
+                new.append(item)
+            elif item["course_id"] is not None and row.course_id != item["course_id"]:
+                course_changed.append(
+                    {
+                        "student_id": row.id,
+                        "rut": item["rut"],
+                        "local_course_id": row.course_id,
+                        "remote_course_id": item["course_id"],
+                    }
+                )
+            else:
+                unchanged += 1
+
+        missing_remote = [
+            {"student_id": row.id, "rut": row.identification_number, "course_id": row.course_id}
+            for key, row in local.items()
+            if key not in remote and str(row.period_year or "").strip() == str(period_year)
+        ]
+        return {
+            "remote_total": len(remote),
+            "unchanged": unchanged,
+            "excluded_other_school": excluded_other_school,
+            "new": new,
+            "course_changed": course_changed,
+            "missing_remote": missing_remote,
+        }
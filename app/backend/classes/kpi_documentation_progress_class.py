@@ -4,20 +4,53 @@ KPI: avance de documentación transversal (document_type_id = 1 en catálogo `do
 Por estudiante: cuenta documentos cargados vs faltantes en carpeta / tablas asociadas
 (misma lógica que FolderClass.check_document_existence para ese tipo).
 Agregado por curso: suma de cargados y faltantes de todos los estudiantes del curso en el período.
+
+El cálculo es por conjuntos: unas pocas consultas agrupadas sobre folders,
+birth_certificate_documents, health_evaluations, evalua_result_report y documents para
+todos los estudiantes del colegio y período, en vez de check_document_existence por alumno.
+`by_course_per_student` conserva el camino anterior como referencia (benchmark/verificación).
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.backend.classes.documents_class import _document_not_deleted_filter
 from app.backend.classes.student_class import StudentClass
-from app.backend.classes.student_document_file_class import FolderClass
-from app.backend.db.models import CourseModel, SchoolModel
+from app.backend.classes.student_document_file_class import FolderClass, _folder_period_str
+from app.backend.db.models import (
+    BirthCertificateDocumentModel,
+    CourseModel,
+    DocumentModel,
+    EvaluaResultReportModel,
+    FolderModel,
+    HealthEvaluationModel,
+    SchoolModel,
+    StudentAcademicInfoModel,
+    StudentModel,
+    StudentPersonalInfoModel,
+)
+from app.backend.utils.simple_upload_documents import EVALUATION_AREA_BUCKET_DOCUMENT_IDS
 
 # Misma convención que documents/list y EditStudent: sección transversal.
 DOCUMENT_SECTION_TRANSVERSAL = 1
 
+# Documentos con tabla de detalle propia (check_document_existence los resuelve aparte).
+_DOC_BIRTH_CERTIFICATE = 1
+_DOC_HEALTH_EVALUATION = 4
+_DOC_EVALUA = 42
+
+# Tamaño de lote para cláusulas IN (MySQL tolera más, pero evita paquetes enormes).
+_IN_CHUNK = 1000
+
+
+def _chunks(ids: List[int], size: int = _IN_CHUNK) -> Iterable[List[int]]:
+    for i in range(0, len(ids), size):
+        yield ids[i : i + size]
+
 
 def _student_label(row: Dict[str, Any]) -> str:
     pd = row.get("personal_data") or {}
@@ -34,6 +67,228 @@ class KpiDocumentationProgressClass:
     def __init__(self, db: Session):
         self.db = db
 
+    # ------------------------------------------------------------------
+    # Motor por conjuntos
+    # ------------------------------------------------------------------
+
+    def _nee_students_by_course(
+        self, course_ids: List[int], period_year: int
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Estudiantes con NEE por curso, en una consulta.
+        Mismos joins y filtros que StudentClass.get_all(course_id=…, period_year=…): si un
+        estudiante tiene filas duplicadas en academic/personal data, aparece igual de veces.
+        """
+        out: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        if not course_ids:
+            return out
+        py = str(period_year).strip()
+        for chunk in _chunks(course_ids):
+            rows = (
+                self.db.query(
+                    StudentModel.id,
+                    StudentAcademicInfoModel.course_id,
+                    StudentPersonalInfoModel.names,
+                    StudentPersonalInfoModel.father_lastname,
+                    StudentPersonalInfoModel.mother_lastname,
+                )
+                .outerjoin(
+                    StudentAcademicInfoModel,
+                    StudentModel.id == StudentAcademicInfoModel.student_id,
+                )
+                .outerjoin(
+                    StudentPersonalInfoModel,
+                    StudentModel.id == StudentPersonalInfoModel.student_id,
+                )
+                .filter(
+                    StudentModel.deleted_status_id == 0,
+                    StudentAcademicInfoModel.course_id.in_(chunk),
+                    StudentAcademicInfoModel.special_educational_need_id > 0,
+                    StudentModel.period_year == py,
+                )
+                .order_by(StudentModel.id.desc())
+                .all()
+            )
+            for r in rows:
+                out[int(r.course_id)].append(
+                    {
+                        "id": int(r.id),
+                        "personal_data": {
+                            "names": r.names,
+                            "father_lastname": r.father_lastname,
+                            "mother_lastname": r.mother_lastname,
+                        },
+                    }
+                )
+        return out
+
+    def _latest_detail_ids(self, model: Any, student_ids: List[int]) -> Dict[int, int]:
+        """Último id (MAX) de una tabla de detalle por estudiante."""
+        out: Dict[int, int] = {}
+        for chunk in _chunks(student_ids):
+            rows = (
+                self.db.query(model.student_id, func.max(model.id))
+                .filter(model.student_id.in_(chunk))
+                .group_by(model.student_id)
+                .all()
+            )
+            for sid, max_id in rows:
+                if sid is not None and max_id is not None:
+                    out[int(sid)] = int(max_id)
+        return out
+
+    def _transversal_counts(
+        self, student_ids: List[int], period_year: int
+    ) -> Dict[int, Tuple[int, int]]:
+        """
+        (cargados, faltantes) por estudiante para la sección transversal.
+
+        Replica check_document_existence:
+        - doc 1 / 42: cargado si hay folder con detail_id = última fila de detalle, o folder
+          vigente del propio document_id; faltante en otro caso.
+        - doc 4: sin evaluación de salud → faltante; con evaluación → cargado solo si hay
+          folder (si no, no suma a ninguno de los dos).
+        - resto: cargado si hay folder vigente y el documento del catálogo no está eliminado.
+        """
+        ids = sorted({int(s) for s in student_ids})
+        if not ids:
+            return {}
+        py = _folder_period_str(period_year)
+
+        catalog = (
+            self.db.query(DocumentModel.id)
+            .filter(DocumentModel.document_type_id == DOCUMENT_SECTION_TRANSVERSAL)
+            .all()
+        )
+        doc_ids = [
+            int(r.id)
+            for r in catalog
+            if int(r.id) not in EVALUATION_AREA_BUCKET_DOCUMENT_IDS
+        ]
+        if not doc_ids:
+            return {sid: (0, 0) for sid in ids}
+        active_doc_ids: Set[int] = {
+            int(r.id)
+            for r in self.db.query(DocumentModel.id)
+            .filter(DocumentModel.id.in_(doc_ids), _document_not_deleted_filter())
+            .all()
+        }
+
+        birth = (
+            self._latest_detail_ids(BirthCertificateDocumentModel, ids)
+            if _DOC_BIRTH_CERTIFICATE in doc_ids
+            else {}
+        )
+        health = (
+            self._latest_detail_ids(HealthEvaluationModel, ids)
+            if _DOC_HEALTH_EVALUATION in doc_ids
+            else {}
+        )
+        evalua = (
+            self._latest_detail_ids(EvaluaResultReportModel, ids)
+            if _DOC_EVALUA in doc_ids
+            else {}
+        )
+
+        live_docs: Dict[int, Set[int]] = defaultdict(set)
+        detail_ids: Dict[int, Set[int]] = defaultdict(set)
+        for chunk in _chunks(ids):
+            fq = self.db.query(
+                FolderModel.student_id,
+                FolderModel.document_id,
+                FolderModel.detail_id,
+                FolderModel.deleted_date.is_(None).label("is_live"),
+            ).filter(
+                FolderModel.student_id.in_(chunk),
+                FolderModel.file.isnot(None),
+            )
+            if py is not None:
+                fq = fq.filter(FolderModel.period_year == py)
+            for sid, doc_id, detail_id, is_live in fq.distinct().all():
+                sid = int(sid)
+                if detail_id is not None:
+                    detail_ids[sid].add(int(detail_id))
+                if is_live and doc_id is not None:
+                    live_docs[sid].add(int(doc_id))
+
+        out: Dict[int, Tuple[int, int]] = {}
+        for sid in ids:
+            loaded = 0
+            missing = 0
+            docs = live_docs.get(sid, set())
+            details = detail_ids.get(sid, set())
+            for doc_id in doc_ids:
+                if doc_id == _DOC_HEALTH_EVALUATION:
+                    he_id = health.get(sid)
+                    if he_id is None:
+                        missing += 1
+                    elif he_id in details or doc_id in docs:
+                        loaded += 1
+                    continue
+                if doc_id in (_DOC_BIRTH_CERTIFICATE, _DOC_EVALUA):
+                    detail = (birth if doc_id == _DOC_BIRTH_CERTIFICATE else evalua).get(sid)
+                    found = (detail is not None and detail in details) or doc_id in docs
+                else:
+                    found = doc_id in active_doc_ids and doc_id in docs
+                if found:
+                    loaded += 1
+                else:
+                    missing += 1
+            out[sid] = (loaded, missing)
+        return out
+
+    def _course_rows(
+        self, courses: List[Any], period_year: int
+    ) -> List[Dict[str, Any]]:
+        py = int(period_year)
+        students_by_course = self._nee_students_by_course([int(c.id) for c in courses], py)
+        all_ids = [s["id"] for rows in students_by_course.values() for s in rows]
+        counts = self._transversal_counts(all_ids, py)
+
+        out: List[Dict[str, Any]] = []
+        for c in courses:
+            cid = int(c.id)
+            students = students_by_course.get(cid, [])
+            total_loaded = 0
+            total_missing = 0
+            for row in students:
+                loaded, missing = counts.get(row["id"], (0, 0))
+                total_loaded += loaded
+                total_missing += missing
+            expected_slots = total_loaded + total_missing
+            rate = (
+                round(100.0 * total_loaded / expected_slots, 1)
+                if expected_slots > 0
+                else 0.0
+            )
+            cname = (c.course_name or "").strip() or f"Curso #{cid}"
+            out.append(
+                {
+                    "course_id": cid,
+                    "course_name": cname,
+                    "student_count": len(students),
+                    "loaded": total_loaded,
+                    "missing": total_missing,
+                    "expected_total": expected_slots,
+                    "rate_percent": rate,
+                }
+            )
+        return out
+
+    def _school_courses(self, school_ids: List[int]) -> Dict[int, List[Any]]:
+        out: Dict[int, List[Any]] = defaultdict(list)
+        if not school_ids:
+            return out
+        courses = (
+            self.db.query(CourseModel)
+            .filter(CourseModel.school_id.in_(school_ids), CourseModel.deleted_status_id == 0)
+            .order_by(CourseModel.course_name.asc())
+            .all()
+        )
+        for c in courses:
+            out[int(c.school_id)].append(c)
+        return out
+
     def _students_for_course(
         self, course_id: int, period_year: int
     ) -> List[Dict[str, Any]]:
@@ -72,6 +327,19 @@ class KpiDocumentationProgressClass:
         period_year: int,
     ) -> Dict[str, Any]:
         """Una fila por curso del colegio: totales de docs cargados / faltantes (tipo transversal)."""
+        try:
+            courses = self._school_courses([int(school_id)]).get(int(school_id), [])
+            return {"status": "success", "data": self._course_rows(courses, int(period_year))}
+        except Exception as e:
+            return {"status": "error", "message": str(e), "data": []}
+
+    def by_course_per_student(
+        self,
+        *,
+        school_id: int,
+        period_year: int,
+    ) -> Dict[str, Any]:
+        """Camino anterior (check_document_existence por alumno); referencia para benchmark."""
         try:
             py = int(period_year)
             courses = (
@@ -132,21 +400,20 @@ class KpiDocumentationProgressClass:
         try:
             py = int(period_year)
             ids = sorted({int(s) for s in school_ids if s is not None and int(s) > 0})
+            names = {
+                int(r.id): (r.school_name or "").strip()
+                for r in self.db.query(SchoolModel.id, SchoolModel.school_name)
+                .filter(SchoolModel.id.in_(ids))
+                .all()
+            } if ids else {}
+            courses_by_school = self._school_courses(ids)
+            all_courses = [c for sid in ids for c in courses_by_school.get(sid, [])]
+            rows_by_course = {r["course_id"]: r for r in self._course_rows(all_courses, py)}
             out: List[Dict[str, Any]] = []
 
             for sid in ids:
-                sch = (
-                    self.db.query(SchoolModel)
-                    .filter(SchoolModel.id == sid)
-                    .first()
-                )
-                sname = (
-                    (sch.school_name or "").strip() or f"Colegio #{sid}"
-                    if sch
-                    else f"Colegio #{sid}"
-                )
-                res = self.by_course(school_id=sid, period_year=py)
-                rows = res.get("data") or [] if res.get("status") == "success" else []
+                sname = names.get(sid) or f"Colegio #{sid}"
+                rows = [rows_by_course[int(c.id)] for c in courses_by_school.get(sid, [])]
                 if not rows:
                     out.append(
                         {
@@ -211,19 +478,13 @@ class KpiDocumentationProgressClass:
                     "data": None,
                 }
 
-            students = self._students_for_course(cid, py)
-            folder = FolderClass(self.db)
+            students = self._nee_students_by_course([cid], py).get(cid, [])
+            counts = self._transversal_counts([row["id"] for row in students], py)
             rows: List[Dict[str, Any]] = []
 
             for row in students:
                 sid = int(row["id"])
-                r = folder.check_document_existence(
-                    sid, DOCUMENT_SECTION_TRANSVERSAL, py
-                )
-                if isinstance(r, dict) and r.get("status") == "error":
-                    continue
-                loaded = int(r.get("total") or 0)
-                missing = int(r.get("total_missing") or 0)
+                loaded, missing = counts.get(sid, (0, 0))
                 expected = loaded + missing
                 pct = round(100.0 * loaded / expected, 1) if expected > 0 else 0.0
                 rows.append(
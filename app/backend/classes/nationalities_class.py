@@ -4,6 +4,7 @@ from typing import Any, Dict, List, Optional
 from sqlalchemy import func
 
 from app.backend.db.models import NationalityModel
+from app.backend.utils.catalog_cache import bump_catalog
 
 
 def _extract_inspection_nationality_rows(inspection_body: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -169,6 +170,7 @@ class NationalitiesClass:
 
             self.db.add(new_nationality)
             self.db.commit()
+            bump_catalog("nationalities")
             self.db.refresh(new_nationality)
 
             return {
@@ -211,6 +213,7 @@ class NationalitiesClass:
                         existing.deleted_status_id = 0
                         existing.updated_date = datetime.now()
                         self.db.commit()
+                        bump_catalog("nationalities")
                         imported += 1
                         continue
 
@@ -252,6 +255,7 @@ class NationalitiesClass:
                 data.deleted_status_id = 1
                 data.updated_date = datetime.now()
                 self.db.commit()
+                bump_catalog("nationalities")
                 return {"status": "success", "message": "Nationality deleted successfully"}
             else:
                 return {"status": "error", "message": "No data found"}
@@ -274,6 +278,7 @@ class NationalitiesClass:
             existing_nationality.updated_date = datetime.now()
 
             self.db.commit()
+            bump_catalog("nationalities")
             self.db.refresh(existing_nationality)
 
             return {"status": "success", "message": "Nationality updated successfully"}
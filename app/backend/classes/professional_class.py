@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Integer, String, and_, case, func, or_
+from sqlalchemy import Integer, and_, case, func, or_
 from app.backend.db.models import (
     UserModel,
     SchoolModel,
@@ -9,31 +9,23 @@ from app.backend.db.models import (
     ProfessionalTeachingCourseModel,
 )
 from app.backend.auth.auth_user import generate_bcrypt_hash
+from app.backend.utils.principal_cache import invalidate_principal
 from app.backend.utils.users_rol_period import (
     resolve_period_year_for_session,
     users_rol_period_clause,
     effective_period_year_int,
 )
-
-
-def _rut_normalized_sql(column):
-    """Expresión SQL: RUT sin puntos, guiones ni espacios (minúsculas)."""
-    c = func.lower(func.cast(column, String))
-    c = func.replace(c, ".", "")
-    c = func.replace(c, "-", "")
-    c = func.replace(c, " ", "")
-    return c
+from app.backend.utils.rut_normalize import rut_lookup_key
 
 
 def _rut_body_numeric_sort_sql(column):
     """
     Cuerpo del RUT (sin dígito verificador) como entero, para ordenar de menor a mayor.
-    Ignora formato (puntos/guiones) vía cadena normalizada.
+    ``column`` es la clave normalizada (p.ej. ``UserModel.rut_normalized``).
     """
-    norm = _rut_normalized_sql(column)
-    ln = func.char_length(norm)
+    ln = func.char_length(column)
     body_len = case((ln > 1, ln - 1), else_=1)
-    body = func.substring(norm, 1, body_len)
+    body = func.substring(column, 1, body_len)
     return func.cast(body, Integer)
 
 
@@ -310,14 +302,14 @@ class ProfessionalClass:
                 pass
 
             if identification_number and str(identification_number).strip():
-                inn = _normalize_rut(identification_number.strip())
+                inn = rut_lookup_key(identification_number)
                 if inn:
-                    query = query.filter(_rut_normalized_sql(UserModel.rut) == inn)
+                    query = query.filter(UserModel.rut_normalized == inn)
 
             if names and names.strip():
                 query = query.filter(UserModel.full_name.like(f"%{names.strip()}%"))
 
-            rut_sort = _rut_body_numeric_sort_sql(UserModel.rut)
+            rut_sort = _rut_body_numeric_sort_sql(UserModel.rut_normalized)
             query = query.order_by((rut_sort.is_(None)).asc(), rut_sort.asc(), UserModel.id.asc())
 
             if page > 0:
@@ -443,7 +435,7 @@ class ProfessionalClass:
                     users_rol_period_clause(period_year, bypass_global_rol_ids=()),
                 )
             )
-            rut_sort_coord = _rut_body_numeric_sort_sql(UserModel.rut)
+            rut_sort_coord = _rut_body_numeric_sort_sql(UserModel.rut_normalized)
             data = q.order_by((rut_sort_coord.is_(None)).asc(), rut_sort_coord.asc(), UserModel.id.asc()).all()
             out = []
             for p in data:
@@ -535,7 +527,7 @@ class ProfessionalClass:
             .join(RolModel, UsersRolModel.rol_id == RolModel.id)
             .filter(
                 UserModel.customer_id == customer_id,
-                _rut_normalized_sql(UserModel.rut) == rut_norm,
+                UserModel.rut_normalized == rut_norm,
                 RolModel.school_id == school_id,
                 _active_ur_filter(),
                 _active_user_filter(),
@@ -551,7 +543,7 @@ class ProfessionalClass:
                 return {"status": "error", "message": "school_id es requerido para crear el usuario."}
 
             rut_raw = (professional_inputs.get("identification_number") or "").strip()
-            rut_norm = _normalize_rut(rut_raw)
+            rut_norm = rut_lookup_key(rut_raw)
             if not rut_norm:
                 return {"status": "error", "message": "RUT inválido."}
 
@@ -596,7 +588,7 @@ class ProfessionalClass:
                 self.db.query(UserModel)
                 .filter(
                     UserModel.customer_id == customer_id,
-                    _rut_normalized_sql(UserModel.rut) == rut_norm,
+                    UserModel.rut_normalized == rut_norm,
                     _active_user_filter(),
                 )
                 .first()
@@ -622,6 +614,7 @@ class ProfessionalClass:
                     )
                 )
                 self.db.commit()
+                invalidate_principal(existing_user.id)
                 self.db.refresh(existing_user)
                 uid = existing_user.id
             else:
@@ -719,6 +712,7 @@ class ProfessionalClass:
                     ptc.updated_date = now
 
             self.db.commit()
+            invalidate_principal(id)
             return {"status": "success", "message": "Professional deleted successfully"}
 
         except Exception as e:
@@ -789,6 +783,7 @@ class ProfessionalClass:
                     )
 
             self.db.commit()
+            invalidate_principal(id)
             self.db.refresh(u)
             return {"status": "success", "message": "Professional updated successfully"}
 
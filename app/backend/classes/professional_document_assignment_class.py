@@ -7,7 +7,7 @@ from __future__ import annotations
 from datetime import datetime, date
 from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, case, func, or_
 from sqlalchemy.orm import Session
 
 from app.backend.classes.app_alert_class import AppAlertClass
@@ -17,6 +17,7 @@ from app.backend.db.models import (
     StudentAcademicInfoModel,
     StudentModel,
 )
+from app.backend.utils.home_stats_cache import get_home_stats_cache
 
 
 def _parse_deadline(s: Optional[str]) -> Optional[date]:
@@ -190,6 +191,7 @@ class ProfessionalDocumentAssignmentClass:
             )
 
             self.db.commit()
+            get_home_stats_cache().invalidate_professional(pid)
             return {"status": "success", "message": "Sincronizado"}
         except Exception as e:
             self.db.rollback()
@@ -265,6 +267,7 @@ class ProfessionalDocumentAssignmentClass:
             r.status_id = 1
             r.completed_at = now
             r.updated_date = now
+        professional_ids = {int(r.professional_id) for r in rows}
         r0 = rows[0]
         AppAlertClass(self.db).sync_scope_summary_from_assignments(
             period_year=int(r0.period_year),
@@ -272,6 +275,9 @@ class ProfessionalDocumentAssignmentClass:
             professional_id=int(r0.professional_id),
         )
         self.db.commit()
+        cache = get_home_stats_cache()
+        for pid in professional_ids:
+            cache.invalidate_professional(pid)
 
     def home_stats(
         self,
@@ -282,21 +288,23 @@ class ProfessionalDocumentAssignmentClass:
         """
         Resumen para home del profesional: documentos asignados/cargados (filas PDA),
         cursos en professionals_teachings_courses y suma de estudiantes por curso (puede repetir alumno entre cursos).
+        Tres consultas agregadas, con caché corta por (profesional, período) en ``home_stats_cache``.
         """
         try:
             pid = int(professional_id)
             py = _period_int(period_year)
-
-            q_pda = self.db.query(ProfessionalDocumentAssignmentModel).filter(
-                ProfessionalDocumentAssignmentModel.professional_id == pid
-            )
+            cache = get_home_stats_cache()
+            cached = cache.get(pid, py)
+            if cached is not None:
+                return {"status": "success", "data": cached}
+
+            doc_q = self.db.query(
+                func.count(ProfessionalDocumentAssignmentModel.id),
+                func.sum(case((ProfessionalDocumentAssignmentModel.status_id == 1, 1), else_=0)),
+            ).filter(ProfessionalDocumentAssignmentModel.professional_id == pid)
             if py is not None:
-                q_pda = q_pda.filter(ProfessionalDocumentAssignmentModel.period_year == py)
-
-            assigned_documents = int(q_pda.count())
-            loaded_documents = int(
-                q_pda.filter(ProfessionalDocumentAssignmentModel.status_id == 1).count()
-            )
+                doc_q = doc_q.filter(ProfessionalDocumentAssignmentModel.period_year == py)
+            assigned_documents, loaded_documents = doc_q.one()
 
             course_rows = (
                 self.db.query(ProfessionalTeachingCourseModel.course_id)
@@ -308,33 +316,36 @@ class ProfessionalDocumentAssignmentClass:
                 .all()
             )
             course_ids = [int(r.course_id) for r in course_rows if r.course_id is not None]
-            courses_assigned = len(course_ids)
 
-            students_in_courses = 0
-            for cid in course_ids:
+            students_by_course: Dict[int, int] = {}
+            if course_ids:
                 sq = (
-                    self.db.query(StudentModel)
+                    self.db.query(
+                        StudentAcademicInfoModel.course_id,
+                        func.count(StudentModel.id),
+                    )
                     .join(
                         StudentAcademicInfoModel,
                         StudentAcademicInfoModel.student_id == StudentModel.id,
                     )
                     .filter(
-                        StudentAcademicInfoModel.course_id == cid,
+                        StudentAcademicInfoModel.course_id.in_(course_ids),
                         StudentModel.deleted_status_id == 0,
                     )
                 )
                 if py is not None:
                     sq = sq.filter(StudentModel.period_year == str(py))
-                students_in_courses += int(sq.count())
-
-            return {
-                "status": "success",
-                "data": {
-                    "assigned_documents": assigned_documents,
-                    "loaded_documents": loaded_documents,
-                    "courses_assigned": courses_assigned,
-                    "students_in_courses": students_in_courses,
-                },
+                students_by_course = {
+                    int(cid): int(n) for cid, n in sq.group_by(StudentAcademicInfoModel.course_id).all()
+                }
+
+            data = {
+                "assigned_documents": int(assigned_documents or 0),
+                "loaded_documents": int(loaded_documents or 0),
+                "courses_assigned": len(course_ids),
+                "students_in_courses": sum(students_by_course.values()),
             }
+            cache.put(pid, py, course_ids, data)
+            return {"status": "success", "data": data}
         except Exception as e:
             return {"status": "error", "message": str(e), "data": None}
@@ -7,6 +7,7 @@ from app.backend.db.models import (
     CourseModel,
     UserModel,
 )
+from app.backend.utils.home_stats_cache import get_home_stats_cache
 from app.backend.utils.name_split import split_full_name
 
 
@@ -198,6 +199,7 @@ class ProfessionalTeachingCourseClass:
             ).first()
             if not row:
                 return {"status": "error", "message": "Asignaci?n no encontrada."}
+            previous_professional_id = row.professional_id
             if data.get("professional_id") is not None:
                 row.professional_id = data["professional_id"]
             if data.get("teaching_id") is not None:
@@ -233,6 +235,10 @@ class ProfessionalTeachingCourseClass:
             row.updated_date = datetime.now()
             self.db.commit()
             self.db.refresh(row)
+            cache = get_home_stats_cache()
+            for pid in {previous_professional_id, row.professional_id}:
+                if pid:
+                    cache.invalidate_professional(pid)
             return {"status": "success", "message": "Asignaci?n actualizada correctamente.", "data": {"id": row.id}}
         except Exception as e:
             self.db.rollback()
@@ -255,6 +261,8 @@ class ProfessionalTeachingCourseClass:
             self.db.add(new_ptc)
             self.db.commit()
             self.db.refresh(new_ptc)
+            if new_ptc.professional_id:
+                get_home_stats_cache().invalidate_professional(new_ptc.professional_id)
             return {
                 "status": "success",
                 "message": "Asignaci?n creada correctamente",
@@ -275,6 +283,8 @@ class ProfessionalTeachingCourseClass:
             row.deleted_status_id = 1
             row.updated_date = datetime.now()
             self.db.commit()
+            if row.professional_id:
+                get_home_stats_cache().invalidate_professional(row.professional_id)
             return {"status": "success", "message": "Asignaci?n eliminada correctamente."}
         except Exception as e:
             self.db.rollback()
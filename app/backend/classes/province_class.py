@@ -4,6 +4,7 @@ from typing import Any, Dict, List, Optional
 from sqlalchemy import func
 
 from app.backend.db.models import ProvinceModel, RegionModel
+from app.backend.utils.catalog_cache import bump_catalog
 
 
 def _extract_inspection_rows(inspection_body: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -155,6 +156,7 @@ class ProvinceClass:
             new_row = ProvinceModel(**row_kwargs)
             self.db.add(new_row)
             self.db.commit()
+            bump_catalog("provinces")
             self.db.refresh(new_row)
 
             return {
@@ -201,6 +203,7 @@ class ProvinceClass:
                     existing.region_id = rid
                     existing.updated_date = datetime.now()
                     self.db.commit()
+                    bump_catalog("provinces")
                     imported += 1
                     continue
 
@@ -225,6 +228,7 @@ class ProvinceClass:
             if data:
                 self.db.delete(data)
                 self.db.commit()
+                bump_catalog("provinces")
                 return {"status": "success", "message": "Province deleted successfully"}
             return {"status": "error", "message": "No data found"}
         except Exception as e:
@@ -242,6 +246,7 @@ class ProvinceClass:
 
             existing.updated_date = datetime.now()
             self.db.commit()
+            bump_catalog("provinces")
             self.db.refresh(existing)
 
             return {"status": "success", "message": "Province updated successfully"}
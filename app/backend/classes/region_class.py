@@ -4,6 +4,7 @@ from typing import Any, Dict, List, Optional
 from sqlalchemy import func
 
 from app.backend.db.models import RegionModel
+from app.backend.utils.catalog_cache import bump_catalog
 
 
 def _extract_inspection_rows(inspection_body: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -148,6 +149,7 @@ class RegionClass:
 
             self.db.add(new_region)
             self.db.commit()
+            bump_catalog("regions")
             self.db.refresh(new_region)
 
             return {
@@ -189,6 +191,7 @@ class RegionClass:
                     existing.region = name
                     existing.updated_date = datetime.now()
                     self.db.commit()
+                    bump_catalog("regions")
                     imported += 1
                     continue
 
@@ -218,6 +221,7 @@ class RegionClass:
             if data:
                 self.db.delete(data)
                 self.db.commit()
+                bump_catalog("regions")
                 return {"status": "success", "message": "Region deleted successfully"}
             else:
                 return {"status": "error", "message": "No data found"}
@@ -240,6 +244,7 @@ class RegionClass:
             existing_region.updated_date = datetime.now()
 
             self.db.commit()
+            bump_catalog("regions")
             self.db.refresh(existing_region)
 
             return {"status": "success", "message": "Region updated successfully"}
@@ -3,6 +3,7 @@ from datetime import datetime
 from sqlalchemy import false as sql_false
 
 from app.backend.db.models import SpecialEducationalNeedModel
+from app.backend.utils.catalog_cache import bump_catalog
 
 
 def _serialize_need(need):
@@ -119,6 +120,7 @@ class SpecialEducationalNeedClass:
 
             self.db.add(new_need)
             self.db.commit()
+            bump_catalog("special_educational_needs")
             self.db.refresh(new_need)
 
             return {
@@ -151,6 +153,7 @@ class SpecialEducationalNeedClass:
             existing_need.updated_date = datetime.now()
 
             self.db.commit()
+            bump_catalog("special_educational_needs")
             self.db.refresh(existing_need)
 
             return {"status": "success", "message": "Special educational need updated successfully"}
@@ -172,6 +175,7 @@ class SpecialEducationalNeedClass:
                 need.deleted_status_id = 1
                 need.updated_date = datetime.now()
                 self.db.commit()
+                bump_catalog("special_educational_needs")
                 return {"status": "success", "message": "Special educational need deleted successfully"}
             return {"status": "error", "message": "No data found"}
 
@@ -12,10 +12,16 @@ from app.backend.db.models import (
     SchoolModel,
     CommuneModel,
     FolderModel,
+    StudentNameTrigramModel,
 )
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, select
 from sqlalchemy.orm import aliased
 
+from app.backend.core.config import settings
+from app.backend.utils.home_stats_cache import get_home_stats_cache
+from app.backend.utils.name_search import name_trigrams, student_full_name_folded
+from app.backend.utils.rut_normalize import rut_lookup_key
+
 
 def _date_str(v, fmt="%Y-%m-%d %H:%M:%S"):
     """Convierte fecha/datetime a string; si ya es str lo devuelve tal cual."""
@@ -66,44 +72,30 @@ def _escape_like(value: str) -> str:
     )
 
 
-_SQL_ACCENT_REPLACEMENTS = (
-    ("á", "a"),
-    ("à", "a"),
-    ("ä", "a"),
-    ("â", "a"),
-    ("é", "e"),
-    ("è", "e"),
-    ("ë", "e"),
-    ("ê", "e"),
-    ("í", "i"),
-    ("ì", "i"),
-    ("ï", "i"),
-    ("î", "i"),
-    ("ó", "o"),
-    ("ò", "o"),
-    ("ö", "o"),
-    ("ô", "o"),
-    ("ú", "u"),
-    ("ù", "u"),
-    ("ü", "u"),
-    ("û", "u"),
-    ("ñ", "n"),
-    ("ç", "c"),
-)
+def trigram_personal_ids_subquery(pattern: str):
+    """Subconsulta de student_personal_data.id cuyo nombre contiene todos los trigramas de ``pattern``."""
+    grams = sorted(name_trigrams(pattern))
+    return (
+        select(StudentNameTrigramModel.student_personal_data_id)
+        .where(StudentNameTrigramModel.trigram.in_(grams))
+        .group_by(StudentNameTrigramModel.student_personal_data_id)
+        .having(func.count(func.distinct(StudentNameTrigramModel.trigram)) == len(grams))
+    )
 
 
-def _sql_fold_name(expr):
-    """LOWER + sin tildes en SQL (para LIKE contra tokens sin acento)."""
-    folded = func.lower(expr)
-    for src, dst in _SQL_ACCENT_REPLACEMENTS:
-        folded = func.replace(folded, src, dst)
-    return folded
+def _folded_name_contains(pattern: str):
+    """``full_name_folded LIKE %pattern%``, acotado antes por el índice de trigramas (3+ caracteres)."""
+    like = StudentPersonalInfoModel.full_name_folded.like(f"%{_escape_like(pattern)}%", escape="\\")
+    if len(pattern) < 3 or not name_trigrams(pattern):
+        return like
+    return and_(StudentPersonalInfoModel.id.in_(trigram_personal_ids_subquery(pattern)), like)
 
 
 def _apply_student_names_filter(query, names: str | None):
     """
     Busca por nombre completo (nombres + apellidos), tokenizado.
     Tolera acentos y letras repetidas (p. ej. diiaz → diaz, munoz → muñoz).
+    Usa la columna plegada ``full_name_folded`` y el índice ``student_name_trigrams``.
     """
     raw = (names or "").strip()
     if not raw:
@@ -113,28 +105,17 @@ def _apply_student_names_filter(query, names: str | None):
     if not tokens:
         return query
 
-    full_name = _sql_fold_name(
-        func.concat_ws(
-            " ",
-            func.coalesce(StudentPersonalInfoModel.names, ""),
-            func.coalesce(StudentPersonalInfoModel.father_lastname, ""),
-            func.coalesce(StudentPersonalInfoModel.mother_lastname, ""),
-            func.coalesce(StudentPersonalInfoModel.social_name, ""),
-        )
-    )
-
     for token in tokens:
         variants = _name_token_variants(token)
         if not variants:
             continue
-        ors = []
+        patterns: list[str] = []
         for variant in variants:
             folded = _strip_accents(variant).lower()
-            pattern = f"%{_escape_like(folded)}%"
-            ors.append(full_name.like(pattern, escape="\\"))
+            patterns.append(folded)
             if len(folded) >= 4:
-                prefix = f"%{_escape_like(folded[: max(3, len(folded) - 1)])}%"
-                ors.append(full_name.like(prefix, escape="\\"))
+                patterns.append(folded[: max(3, len(folded) - 1)])
+        ors = [_folded_name_contains(p) for p in dict.fromkeys(patterns)]
         if ors:
             query = query.filter(or_(*ors))
     return query
@@ -199,8 +180,15 @@ def _row_colegio_id_for_inspection(row: Dict[str, Any]) -> Optional[int]:
 
 def _identification_key_for_dedupe(raw: str) -> str:
     """Clave estable para detectar el mismo RUT repetido en el JSON (puntos/guiones/espacios)."""
-    s = (raw or "").strip().upper().replace(".", "").replace("-", "").replace(" ", "")
-    return s
+    return rut_lookup_key(raw) or (raw or "").strip()
+
+
+def _student_identification_filter(identification_number: str):
+    """Mismo RUT que ``identification_number`` vía ``students.rut_normalized`` (indexado)."""
+    key = rut_lookup_key(identification_number)
+    if key:
+        return StudentModel.rut_normalized == key
+    return StudentModel.identification_number == identification_number
 
 
 class StudentClass:
@@ -839,110 +827,116 @@ class StudentClass:
         except Exception as e:
             return {"status": "error", "message": str(e), "data": None}
 
+    def _detail_query(self):
+        """Consulta de detalle de ``get`` (estudiante + info académica y personal), sin filtros."""
+        return self.db.query(
+            StudentModel.id,
+            StudentModel.deleted_status_id,
+            StudentModel.school_id,
+            StudentModel.identification_number.label('student_identification_number'),
+            StudentModel.period_year,
+            StudentModel.added_date,
+            StudentModel.updated_date,
+            StudentAcademicInfoModel.id.label('academic_id'),
+            StudentAcademicInfoModel.special_educational_need_id,
+            StudentAcademicInfoModel.course_id,
+            StudentAcademicInfoModel.platform_status_id,
+            StudentAcademicInfoModel.resolution_number,
+            StudentAcademicInfoModel.sip_admission_year,
+            StudentAcademicInfoModel.diagnostic_date,
+            StudentAcademicInfoModel.psychopedagogical_evaluation_status,
+            StudentAcademicInfoModel.psychopedagogical_evaluation_year,
+            CourseModel.teaching_id.label('academic_course_teaching_id'),
+            SpecialEducationalNeedModel.special_educational_needs.label('special_educational_need_name'),
+            StudentPersonalInfoModel.id.label('personal_id'),
+            StudentPersonalInfoModel.region_id,
+            StudentPersonalInfoModel.commune_id,
+            StudentPersonalInfoModel.gender_id,
+            StudentPersonalInfoModel.proficiency_native_language_id,
+            StudentPersonalInfoModel.proficiency_language_used_id,
+            StudentPersonalInfoModel.identification_number,
+            StudentPersonalInfoModel.names,
+            StudentPersonalInfoModel.father_lastname,
+            StudentPersonalInfoModel.mother_lastname,
+            StudentPersonalInfoModel.social_name,
+            StudentPersonalInfoModel.born_date,
+            StudentPersonalInfoModel.nationality_id,
+            StudentPersonalInfoModel.address,
+            StudentPersonalInfoModel.phone,
+            StudentPersonalInfoModel.email,
+            StudentPersonalInfoModel.native_language,
+            StudentPersonalInfoModel.language_usually_used
+        ).outerjoin(
+            StudentAcademicInfoModel,
+            StudentModel.id == StudentAcademicInfoModel.student_id
+        ).outerjoin(
+            CourseModel,
+            and_(
+                StudentAcademicInfoModel.course_id == CourseModel.id,
+                CourseModel.deleted_status_id == 0,
+            ),
+        ).outerjoin(
+            SpecialEducationalNeedModel,
+            StudentAcademicInfoModel.special_educational_need_id == SpecialEducationalNeedModel.id
+        ).outerjoin(
+            StudentPersonalInfoModel,
+            StudentModel.id == StudentPersonalInfoModel.student_id
+        )
+
+    @staticmethod
+    def _detail_data(data_query) -> dict:
+        return {
+            "id": data_query.id,
+            "deleted_status_id": data_query.deleted_status_id,
+            "school_id": data_query.school_id,
+            "identification_number": data_query.student_identification_number,
+            "period_year": _period_year_int(getattr(data_query, "period_year", None)),
+            "added_date": data_query.added_date.strftime("%Y-%m-%d %H:%M:%S") if data_query.added_date else None,
+            "updated_date": data_query.updated_date.strftime("%Y-%m-%d %H:%M:%S") if data_query.updated_date else None,
+            "academic_info": {
+                "id": data_query.academic_id,
+                "special_educational_need_id": data_query.special_educational_need_id,
+                "special_educational_need_name": (getattr(data_query, "special_educational_need_name", None) or "").strip() or None,
+                "course_id": data_query.course_id,
+                "teaching_id": getattr(data_query, "academic_course_teaching_id", None),
+                "platform_status_id": getattr(data_query, "platform_status_id", None),
+                "resolution_number": getattr(data_query, "resolution_number", None),
+                "sip_admission_year": data_query.sip_admission_year,
+                "diagnostic_date": data_query.diagnostic_date.isoformat() if getattr(data_query, "diagnostic_date", None) else None,
+                "psychopedagogical_evaluation_status": getattr(data_query, "psychopedagogical_evaluation_status", None),
+                "psychopedagogical_evaluation_year": getattr(data_query, "psychopedagogical_evaluation_year", None),
+            } if data_query.academic_id else None,
+            "personal_data": {
+                "id": data_query.personal_id,
+                "region_id": data_query.region_id,
+                "commune_id": data_query.commune_id,
+                "gender_id": data_query.gender_id,
+                "proficiency_native_language_id": data_query.proficiency_native_language_id,
+                "proficiency_language_used_id": data_query.proficiency_language_used_id,
+                "identification_number": data_query.identification_number,
+                "names": data_query.names,
+                "father_lastname": data_query.father_lastname,
+                "mother_lastname": data_query.mother_lastname,
+                "social_name": data_query.social_name,
+                "born_date": data_query.born_date,
+                "nationality_id": data_query.nationality_id,
+                "address": data_query.address,
+                "phone": data_query.phone,
+                "email": data_query.email,
+                "native_language": data_query.native_language,
+                "language_usually_used": data_query.language_usually_used
+            } if data_query.personal_id else None
+        }
+
     def get(self, id):
         try:
-            data_query = self.db.query(
-                StudentModel.id,
-                StudentModel.deleted_status_id,
-                StudentModel.school_id,
-                StudentModel.identification_number.label('student_identification_number'),
-                StudentModel.period_year,
-                StudentModel.added_date,
-                StudentModel.updated_date,
-                StudentAcademicInfoModel.id.label('academic_id'),
-                StudentAcademicInfoModel.special_educational_need_id,
-                StudentAcademicInfoModel.course_id,
-                StudentAcademicInfoModel.platform_status_id,
-                StudentAcademicInfoModel.resolution_number,
-                StudentAcademicInfoModel.sip_admission_year,
-                StudentAcademicInfoModel.diagnostic_date,
-                StudentAcademicInfoModel.psychopedagogical_evaluation_status,
-                StudentAcademicInfoModel.psychopedagogical_evaluation_year,
-                CourseModel.teaching_id.label('academic_course_teaching_id'),
-                SpecialEducationalNeedModel.special_educational_needs.label('special_educational_need_name'),
-                StudentPersonalInfoModel.id.label('personal_id'),
-                StudentPersonalInfoModel.region_id,
-                StudentPersonalInfoModel.commune_id,
-                StudentPersonalInfoModel.gender_id,
-                StudentPersonalInfoModel.proficiency_native_language_id,
-                StudentPersonalInfoModel.proficiency_language_used_id,
-                StudentPersonalInfoModel.identification_number,
-                StudentPersonalInfoModel.names,
-                StudentPersonalInfoModel.father_lastname,
-                StudentPersonalInfoModel.mother_lastname,
-                StudentPersonalInfoModel.social_name,
-                StudentPersonalInfoModel.born_date,
-                StudentPersonalInfoModel.nationality_id,
-                StudentPersonalInfoModel.address,
-                StudentPersonalInfoModel.phone,
-                StudentPersonalInfoModel.email,
-                StudentPersonalInfoModel.native_language,
-                StudentPersonalInfoModel.language_usually_used
-            ).outerjoin(
-                StudentAcademicInfoModel,
-                StudentModel.id == StudentAcademicInfoModel.student_id
-            ).outerjoin(
-                CourseModel,
-                and_(
-                    StudentAcademicInfoModel.course_id == CourseModel.id,
-                    CourseModel.deleted_status_id == 0,
-                ),
-            ).outerjoin(
-                SpecialEducationalNeedModel,
-                StudentAcademicInfoModel.special_educational_need_id == SpecialEducationalNeedModel.id
-            ).outerjoin(
-                StudentPersonalInfoModel,
-                StudentModel.id == StudentPersonalInfoModel.student_id
-            ).filter(
+            data_query = self._detail_query().filter(
                 StudentModel.id == id,
                 StudentModel.deleted_status_id == 0
             ).first()
 
             if data_query:
-                student_data = {
-                    "id": data_query.id,
-                    "deleted_status_id": data_query.deleted_status_id,
-                    "school_id": data_query.school_id,
-                    "identification_number": data_query.student_identification_number,
-                    "period_year": _period_year_int(getattr(data_query, "period_year", None)),
-                    "added_date": data_query.added_date.strftime("%Y-%m-%d %H:%M:%S") if data_query.added_date else None,
-                    "updated_date": data_query.updated_date.strftime("%Y-%m-%d %H:%M:%S") if data_query.updated_date else None,
-                    "academic_info": {
-                        "id": data_query.academic_id,
-                        "special_educational_need_id": data_query.special_educational_need_id,
-                        "special_educational_need_name": (getattr(data_query, "special_educational_need_name", None) or "").strip() or None,
-                        "course_id": data_query.course_id,
-                        "teaching_id": getattr(data_query, "academic_course_teaching_id", None),
-                        "platform_status_id": getattr(data_query, "platform_status_id", None),
-                        "resolution_number": getattr(data_query, "resolution_number", None),
-                        "sip_admission_year": data_query.sip_admission_year,
-                        "diagnostic_date": data_query.diagnostic_date.isoformat() if getattr(data_query, "diagnostic_date", None) else None,
-                        "psychopedagogical_evaluation_status": getattr(data_query, "psychopedagogical_evaluation_status", None),
-                        "psychopedagogical_evaluation_year": getattr(data_query, "psychopedagogical_evaluation_year", None),
-                    } if data_query.academic_id else None,
-                    "personal_data": {
-                        "id": data_query.personal_id,
-                        "region_id": data_query.region_id,
-                        "commune_id": data_query.commune_id,
-                        "gender_id": data_query.gender_id,
-                        "proficiency_native_language_id": data_query.proficiency_native_language_id,
-                        "proficiency_language_used_id": data_query.proficiency_language_used_id,
-                        "identification_number": data_query.identification_number,
-                        "names": data_query.names,
-                        "father_lastname": data_query.father_lastname,
-                        "mother_lastname": data_query.mother_lastname,
-                        "social_name": data_query.social_name,
-                        "born_date": data_query.born_date,
-                        "nationality_id": data_query.nationality_id,
-                        "address": data_query.address,
-                        "phone": data_query.phone,
-                        "email": data_query.email,
-                        "native_language": data_query.native_language,
-                        "language_usually_used": data_query.language_usually_used
-                    } if data_query.personal_id else None
-                }
-
-                return {"student_data": student_data}
+                return {"student_data": self._detail_data(data_query)}
 
             else:
                 return {"error": "No se encontraron datos para el estudiante especificado."}
@@ -950,6 +944,28 @@ class StudentClass:
         except Exception as e:
             error_message = str(e)
             return {"status": "error", "message": error_message}
+
+    def get_by_course(self, course_id) -> list:
+        """Lo mismo que ``get`` para todos los estudiantes activos del curso, en una sola consulta.
+
+        Devuelve ``[{"student_data": ...}, ...]`` ordenado por apellido y nombre.
+        """
+        rows = self._detail_query().filter(
+            StudentAcademicInfoModel.course_id == course_id,
+            StudentModel.deleted_status_id == 0
+        ).order_by(
+            StudentPersonalInfoModel.father_lastname.asc(),
+            StudentPersonalInfoModel.names.asc(),
+            StudentModel.id.asc()
+        ).all()
+        seen = set()
+        results = []
+        for row in rows:
+            if row.id in seen:
+                continue
+            seen.add(row.id)
+            results.append({"student_data": self._detail_data(row)})
+        return results
         
     def store(self, student_inputs):
         try:
@@ -976,7 +992,7 @@ class StudentClass:
             # Validar que no exista ya un estudiante con el mismo RUT, curso y periodo en el mismo colegio
             duplicate_query = self.db.query(StudentModel).filter(
                 StudentModel.school_id == school_id,
-                StudentModel.identification_number == identification_number,
+                _student_identification_filter(identification_number),
                 StudentModel.deleted_status_id == 0,
             )
             if period_year is not None and str(period_year):
@@ -1089,6 +1105,7 @@ class StudentClass:
                 self.db.add(new_academic)
 
             self.db.commit()
+            get_home_stats_cache().invalidate_courses([course_id])
 
             return {
                 "status": "success",
@@ -1100,13 +1117,24 @@ class StudentClass:
             self.db.rollback()
             return {"status": "error", "message": str(e)}
     
+    def _enrolled_course_ids(self, student_id) -> set:
+        """Cursos de la matrícula actual del estudiante (para invalidar ``home_stats_cache``)."""
+        rows = (
+            self.db.query(StudentAcademicInfoModel.course_id)
+            .filter(StudentAcademicInfoModel.student_id == student_id)
+            .all()
+        )
+        return {int(r.course_id) for r in rows if r.course_id}
+
     def delete(self, id):
         try:
             data = self.db.query(StudentModel).filter(StudentModel.id == id).first()
             if data and data.deleted_status_id == 0:
                 data.deleted_status_id = 1
                 data.updated_date = datetime.now()
+                course_ids = self._enrolled_course_ids(id)
                 self.db.commit()
+                get_home_stats_cache().invalidate_courses(course_ids)
                 return {"status": "success", "message": "Student deleted successfully"}
             elif data:
                 return {"status": "error", "message": "No data found"}
@@ -1126,6 +1154,7 @@ class StudentClass:
 
             if not existing_student:
                 return {"status": "error", "message": "No data found"}
+            course_ids = self._enrolled_course_ids(id)
 
             # Valores efectivos tras la actualización (para validar duplicado)
             eff_rut = (student_inputs.get('identification_number') or existing_student.identification_number or '').strip()
@@ -1149,7 +1178,7 @@ class StudentClass:
                 dup_query = self.db.query(StudentModel).filter(
                     StudentModel.id != id,
                     StudentModel.school_id == eff_school,
-                    StudentModel.identification_number == eff_rut,
+                    _student_identification_filter(eff_rut),
                     StudentModel.deleted_status_id == 0,
                 )
                 if eff_period:
@@ -1301,6 +1330,7 @@ class StudentClass:
 
             self.db.commit()
             self.db.refresh(existing_student)
+            get_home_stats_cache().invalidate_courses(course_ids | {eff_course_id})
 
             return {"status": "success", "message": "Student updated successfully"}
 
@@ -1312,6 +1342,312 @@ class StudentClass:
         self, school_id: int, inspection_body: Dict[str, Any], default_period_year: int
     ) -> Dict[str, Any]:
         """
+        Import desde Inspection por conjuntos; mismas reglas y mismo reporte que ``import_from_inspection_per_row``.
+        Cursos activos del colegio y RUT ya matriculados se leen en dos consultas y las filas se validan
+        en memoria. Los inserts (students, datos personales y académicos, trigramas, evaluación de salud
+        y carpeta doc 4) van con executemany, en una transacción por bloque de
+        ``INSPECTION_IMPORT_CHUNK_ROWS`` alumnos.
+        """
+        try:
+            raw_rows = _extract_inspection_students_rows(inspection_body)
+            session_school_id = int(school_id)
+
+            course_ids = {
+                int(r.id)
+                for r in self.db.query(CourseModel.id).filter(
+                    CourseModel.school_id == school_id,
+                    CourseModel.deleted_status_id == 0,
+                )
+            }
+            enrolled_keys: set = set()
+            enrolled_plain: set = set()
+            for r in self.db.query(StudentModel.rut_normalized, StudentModel.identification_number).filter(
+                StudentModel.school_id == session_school_id,
+                StudentModel.deleted_status_id == 0,
+            ):
+                if r.rut_normalized:
+                    enrolled_keys.add(r.rut_normalized)
+                else:
+                    enrolled_plain.add(r.identification_number)
+
+            excluded_other_school = 0
+            skipped = 0
+            errors: List[Dict[str, str]] = []
+            seen_identification_keys: set = set()
+            pending: List[Dict[str, Any]] = []
+
+            for row in raw_rows:
+                cid = _row_colegio_id_for_inspection(row)
+                if cid is not None and cid != session_school_id:
+                    excluded_other_school += 1
+                    continue
+
+                rut_raw = (row.get("rut") or row.get("identification_number") or "").strip()
+                if not rut_raw:
+                    errors.append({"name": "(no RUT)", "message": "Row missing RUT"})
+                    continue
+
+                course_remote = _inspection_int(
+                    row.get("curso_id") if row.get("curso_id") is not None else row.get("cursoId")
+                )
+                if course_remote is None:
+                    errors.append({"name": rut_raw, "message": "Row missing curso_id"})
+                    continue
+                if course_remote not in course_ids:
+                    errors.append(
+                        {
+                            "name": rut_raw,
+                            "message": f"No course id={course_remote} for this school; import courses first",
+                        }
+                    )
+                    continue
+
+                py_raw = row.get("anio")
+                if py_raw is not None and str(py_raw).strip() != "":
+                    period_year = _inspection_int(py_raw)
+                    if period_year is None:
+                        period_year = default_period_year
+                else:
+                    period_year = default_period_year
+
+                nombres = str(row.get("nombres") or "").strip()
+                paterno = str(row.get("paterno") or "").strip()
+                materno = str(row.get("materno") or "").strip()
+                if not nombres and not paterno and not materno:
+                    errors.append({"name": rut_raw, "message": "Row missing name fields"})
+                    continue
+
+                id_key = _identification_key_for_dedupe(rut_raw)
+                if id_key in seen_identification_keys:
+                    skipped += 1
+                    continue
+                seen_identification_keys.add(id_key)
+
+                rut_key = rut_lookup_key(rut_raw)
+                if (rut_key in enrolled_keys) if rut_key else (rut_raw in enrolled_plain):
+                    skipped += 1
+                    continue
+
+                born = row.get("fecha_nacimiento")
+                pending.append(
+                    {
+                        "school_id": school_id,
+                        "identification_number": rut_raw,
+                        "period_year": period_year,
+                        "course_id": course_remote,
+                        "names": nombres or "—",
+                        "father_lastname": paterno or "",
+                        "mother_lastname": materno or "",
+                        "born_date": str(born).strip()[:10] if born is not None and str(born).strip() else None,
+                        "email": (str(row.get("email")).strip() if row.get("email") else None) or None,
+                        "phone": (str(row.get("telefono")).strip() if row.get("telefono") else None) or None,
+                        "address": (str(row.get("direccion")).strip() if row.get("direccion") else None) or None,
+                        "nationality_id": _inspection_int(row.get("nacionalidad_id")),
+                        "gender_id": _inspection_int(row.get("sexo")),
+                        "commune_id": _inspection_int(row.get("comuna_id")),
+                    }
+                )
+
+            commune_ids = {p["commune_id"] for p in pending if p["commune_id"] is not None}
+            region_by_commune: Dict[int, Any] = {}
+            if commune_ids:
+                for r in self.db.query(CommuneModel.id, CommuneModel.region_id).filter(CommuneModel.id.in_(commune_ids)):
+                    if r.region_id is not None:
+                        region_by_commune[int(r.id)] = int(r.region_id)
+
+            imported = 0
+            chunk_rows = max(1, int(settings.inspection_import_chunk_rows or 1))
+            for start in range(0, len(pending), chunk_rows):
+                chunk = pending[start : start + chunk_rows]
+                try:
+                    self._bulk_insert_inspection_chunk(chunk, region_by_commune)
+                    self.db.commit()
+                except Exception as ce:
+                    self.db.rollback()
+                    for item in chunk:
+                        errors.append({"name": item["identification_number"], "message": str(ce)})
+                    continue
+                imported += len(chunk)
+                get_home_stats_cache().invalidate_courses({item["course_id"] for item in chunk})
+
+            return {
+                "status": "success",
+                "imported": imported,
+                "skipped": skipped,
+                "excluded_other_school": excluded_other_school,
+                "errors": errors,
+            }
+        except Exception as e:
+            self.db.rollback()
+            return {"status": "error", "message": str(e)}
+
+    def _bulk_insert_inspection_chunk(self, chunk: List[Dict[str, Any]], region_by_commune: Dict[int, Any]) -> None:
+        """
+        Inserta un bloque ya validado con executemany (sin commit). Los ids generados se recuperan con una
+        consulta por tabla (MySQL no tiene RETURNING). Replica lo que hacen, fila a fila, ``store`` (incluidos
+        ``rut_normalized``, ``full_name_folded`` y trigramas) y ``_provision_inspection_import_extras``.
+        """
+        from app.backend.db.models import HealthEvaluationModel
+
+        now = datetime.now()
+        students_table = StudentModel.__table__
+        self.db.execute(
+            students_table.insert(),
+            [
+                {
+                    "deleted_status_id": 0,
+                    "school_id": item["school_id"],
+                    "identification_number": item["identification_number"],
+                    "rut_normalized": rut_lookup_key(item["identification_number"]),
+                    "period_year": str(item["period_year"]).strip(),
+                    "added_date": now,
+                    "updated_date": now,
+                }
+                for item in chunk
+            ],
+        )
+
+        # Sin alumnos activos previos con estos RUT (validado), así que la consulta solo trae los recién insertados.
+        keys = [k for k in (rut_lookup_key(item["identification_number"]) for item in chunk) if k]
+        plain = [item["identification_number"] for item in chunk if not rut_lookup_key(item["identification_number"])]
+        conditions = []
+        if keys:
+            conditions.append(StudentModel.rut_normalized.in_(keys))
+        if plain:
+            conditions.append(StudentModel.identification_number.in_(plain))
+        id_by_key: Dict[str, int] = {}
+        for r in self.db.query(StudentModel.id, StudentModel.rut_normalized, StudentModel.identification_number).filter(
+            StudentModel.school_id == chunk[0]["school_id"],
+            StudentModel.deleted_status_id == 0,
+            or_(*conditions),
+        ):
+            id_by_key[r.rut_normalized or r.identification_number] = int(r.id)
+        for item in chunk:
+            item["student_id"] = id_by_key[rut_lookup_key(item["identification_number"]) or item["identification_number"]]
+        student_ids = [item["student_id"] for item in chunk]
+
+        personal_rows = []
+        for item in chunk:
+            commune_id = item["commune_id"]
+            personal_rows.append(
+                {
+                    "student_id": item["student_id"],
+                    "region_id": region_by_commune.get(commune_id) if commune_id is not None else None,
+                    "identification_number": item["identification_number"],
+                    "rut_normalized": rut_lookup_key(item["identification_number"]),
+                    "names": item["names"],
+                    "father_lastname": item["father_lastname"],
+                    "mother_lastname": item["mother_lastname"],
+                    "full_name_folded": student_full_name_folded(
+                        item["names"], item["father_lastname"], item["mother_lastname"], None
+                    ),
+                    "nationality_id": item["nationality_id"],
+                    "gender_id": item["gender_id"],
+                    "commune_id": commune_id,
+                    "address": item["address"],
+                    "email": item["email"],
+                    "phone": item["phone"],
+                    "born_date": item["born_date"],
+                    "added_date": now,
+                    "updated_date": now,
+                }
+            )
+        self.db.execute(StudentPersonalInfoModel.__table__.insert(), personal_rows)
+        personal_id_by_student = {
+            int(r.student_id): int(r.id)
+            for r in self.db.query(StudentPersonalInfoModel.id, StudentPersonalInfoModel.student_id)
+            .filter(StudentPersonalInfoModel.student_id.in_(student_ids))
+            .order_by(StudentPersonalInfoModel.id)
+        }
+        trigram_rows = [
+            {"student_personal_data_id": personal_id_by_student[p["student_id"]], "student_id": p["student_id"], "trigram": gram}
+            for p in personal_rows
+            for gram in sorted(name_trigrams(p["full_name_folded"]))
+        ]
+        if trigram_rows:
+            self.db.execute(StudentNameTrigramModel.__table__.insert(), trigram_rows)
+
+        self.db.execute(
+            StudentAcademicInfoModel.__table__.insert(),
+            [
+                {"student_id": item["student_id"], "course_id": item["course_id"], "added_date": now, "updated_date": now}
+                for item in chunk
+            ],
+        )
+
+        # Carpeta de salud (doc 4): si ya existe se alinea; si no, evaluación mínima + carpeta versión 1.
+        existing_folders: Dict[int, Any] = {}
+        for fld in (
+            self.db.query(FolderModel)
+            .filter(FolderModel.student_id.in_(student_ids), FolderModel.document_id == 4)
+            .order_by(FolderModel.id)
+        ):
+            existing_folders[int(fld.student_id)] = fld
+        for item in chunk:
+            fld = existing_folders.get(item["student_id"])
+            if fld is not None:
+                fld.school_id = item["school_id"]
+                fld.course_id = item["course_id"]
+                fld.period_year = str(int(item["period_year"]))
+                fld.updated_date = now
+        stubs = [item for item in chunk if item["student_id"] not in existing_folders]
+        if not stubs:
+            return
+
+        health_rows = []
+        for item in stubs:
+            full_name = " ".join(
+                p for p in (item["names"].strip(), item["father_lastname"].strip(), item["mother_lastname"].strip()) if p
+            ).strip()
+            try:
+                born = datetime.strptime(item["born_date"], "%Y-%m-%d").date() if item["born_date"] else None
+            except ValueError:
+                born = None
+            health_rows.append(
+                {
+                    "student_id": item["student_id"],
+                    "gender_id": item["gender_id"],
+                    "nationality_id": item["nationality_id"],
+                    "full_name": full_name or None,
+                    "identification_number": item["identification_number"],
+                    "born_date": born,
+                    "added_date": now,
+                    "updated_date": now,
+                }
+            )
+        self.db.execute(HealthEvaluationModel.__table__.insert(), health_rows)
+        health_id_by_student = {
+            int(r.student_id): int(r.id)
+            for r in self.db.query(HealthEvaluationModel.id, HealthEvaluationModel.student_id)
+            .filter(HealthEvaluationModel.student_id.in_([item["student_id"] for item in stubs]))
+            .order_by(HealthEvaluationModel.id)
+        }
+        self.db.execute(
+            FolderModel.__table__.insert(),
+            [
+                {
+                    "school_id": item["school_id"],
+                    "course_id": item["course_id"],
+                    "student_id": item["student_id"],
+                    "document_id": 4,
+                    "version_id": 1,
+                    "detail_id": health_id_by_student[item["student_id"]],
+                    "professional_id": 0,
+                    "file": None,
+                    "period_year": str(int(item["period_year"])),
+                    "added_date": now,
+                    "updated_date": now,
+                    "deleted_date": None,
+                }
+                for item in stubs
+            ],
+        )
+
+    def import_from_inspection_per_row(
+        self, school_id: int, inspection_body: Dict[str, Any], default_period_year: int
+    ) -> Dict[str, Any]:
+        """
+        Camino anterior (``store`` + provisión por fila); referencia para benchmark.
         Import desde Inspection (POST listado/alumnos con colegio + anio en remoto; payload data[]).
         1) Se excluyen filas con colegio_id distinto al school_id de sesión (si viene en JSON).
         2) Si la fila no trae colegio_id, se asume el colegio de sesión.
@@ -1398,7 +1734,7 @@ class StudentClass:
                     self.db.query(StudentModel.id)
                     .filter(
                         StudentModel.school_id == session_school_id,
-                        StudentModel.identification_number == rut_raw,
+                        _student_identification_filter(rut_raw),
                         StudentModel.deleted_status_id == 0,
                     )
                     .first()
@@ -1,6 +1,7 @@
 from typing import Optional, Any, List, Dict, Union
 from sqlalchemy.orm import Session
 from datetime import datetime
+from pathlib import Path
 from app.backend.db.models import (
     FolderModel,
     DocumentModel,
@@ -10,6 +11,7 @@ from app.backend.db.models import (
 )
 from app.backend.classes.documents_class import _document_not_deleted_filter
 from app.backend.utils.simple_upload_documents import EVALUATION_AREA_BUCKET_DOCUMENT_IDS
+from app.backend.utils.upload_sink import StagedUpload, sha256_of_file
 
 
 def _folder_period_str(period_year: Optional[Union[int, str]]) -> Optional[str]:
@@ -143,6 +145,42 @@ class FolderClass:
                 "message": str(e)
             }
 
+    def find_identical_upload(
+        self,
+        student_id: int,
+        document_id: int,
+        period_year: Optional[Union[int, str]],
+        staged: StagedUpload,
+        directory: Union[str, Path],
+    ) -> Optional[FolderModel]:
+        """
+        Última versión vigente del mismo estudiante/documento/período si su archivo (en
+        ``directory``) tiene el mismo SHA-256 que ``staged``. El hash guardado descarta rápido;
+        una coincidencia se confirma contra el disco, porque los PDF generados reescriben la
+        ruta canónica sin actualizar la fila. Filas sin hash (anteriores a la columna) lo guardan.
+        """
+        py = _folder_period_str(period_year)
+        q = self.db.query(FolderModel).filter(
+            FolderModel.student_id == student_id,
+            FolderModel.document_id == document_id,
+            FolderModel.deleted_date.is_(None),
+        )
+        if py is not None:
+            q = q.filter(FolderModel.period_year == py)
+        last = q.order_by(FolderModel.version_id.desc()).first()
+        if last is None or not (last.file or "").strip():
+            return None
+        stored = Path(directory) / last.file.strip()
+        if not stored.is_file() or stored.stat().st_size != staged.size:
+            return None
+        if last.content_sha256 and last.content_sha256 != staged.sha256:
+            return None
+        digest = sha256_of_file(stored)
+        if digest and digest != last.content_sha256:
+            last.content_sha256 = digest
+            self.db.commit()
+        return last if digest == staged.sha256 else None
+
     def store(
         self,
         student_id: int,
@@ -152,6 +190,7 @@ class FolderClass:
         course_id: Optional[int] = None,
         professional_id: Optional[int] = None,
         period_year: Optional[Union[int, str]] = None,
+        content_sha256: Optional[str] = None,
     ) -> Any:
         """
         Almacena un archivo de documento con control de versiones.
@@ -177,6 +216,7 @@ class FolderClass:
                 if folder_without_file:
                     # Actualizar el registro existente con file vacío
                     folder_without_file.file = file_path
+                    folder_without_file.content_sha256 = content_sha256
                     if py is not None:
                         folder_without_file.period_year = py
                     folder_without_file.updated_date = datetime.now()
@@ -203,6 +243,7 @@ class FolderClass:
                     if last_version:
                         # Actualizar el registro más reciente
                         last_version.file = file_path
+                        last_version.content_sha256 = content_sha256
                         if py is not None:
                             last_version.period_year = py
                         last_version.updated_date = datetime.now()
@@ -227,6 +268,7 @@ class FolderClass:
                             detail_id=None,
                             professional_id=pro_id,
                             file=file_path,
+                            content_sha256=content_sha256,
                             period_year=py,
                             added_date=datetime.now(),
                             updated_date=datetime.now(),
@@ -270,6 +312,7 @@ class FolderClass:
                     detail_id=None,
                     professional_id=pro_id,
                     file=file_path,
+                    content_sha256=content_sha256,
                     period_year=py,
                     added_date=datetime.now(),
                     updated_date=datetime.now(),
@@ -4,6 +4,7 @@ from typing import Any, Dict, List, Optional
 from sqlalchemy import func
 
 from app.backend.db.models import TeachingModel, ProfessionalTeachingCourseModel
+from app.backend.utils.catalog_cache import bump_catalog
 
 
 def _extract_teachings_rows(inspection_body: Dict[str, Any]) -> List[Any]:
@@ -254,6 +255,7 @@ class TeachingClass:
 
             self.db.add(new_teaching)
             self.db.commit()
+            bump_catalog("teachings")
             self.db.refresh(new_teaching)
 
             return {
@@ -281,6 +283,7 @@ class TeachingClass:
                 data.deleted_status_id = 1
                 data.updated_date = datetime.now()
                 self.db.commit()
+                bump_catalog("teachings")
                 return {"status": "success", "message": "Teaching deleted successfully"}
             else:
                 return {"status": "error", "message": "No data found"}
@@ -303,6 +306,7 @@ class TeachingClass:
             existing_teaching.updated_date = datetime.now()
 
             self.db.commit()
+            bump_catalog("teachings")
             self.db.refresh(existing_teaching)
 
             return {"status": "success", "message": "Teaching updated successfully"}
@@ -357,6 +361,7 @@ class TeachingClass:
                         existing.deleted_status_id = 0
                         existing.updated_date = datetime.now()
                         self.db.commit()
+                        bump_catalog("teachings")
                         imported += 1
                         continue
 
@@ -2,6 +2,7 @@ import json
 from sqlalchemy import or_
 from app.backend.db.models import UserModel, ProfessionalModel
 from app.backend.auth.auth_user import generate_bcrypt_hash, pwd_context
+from app.backend.utils.principal_cache import invalidate_principal
 from datetime import datetime
 from werkzeug.security import generate_password_hash
 
@@ -177,6 +178,7 @@ class UserClass:
             if data:
                 self.db.delete(data)
                 self.db.commit()
+                invalidate_principal(id)
                 return 'success'
             else:
                 return "No data found"
@@ -194,6 +196,7 @@ class UserClass:
         
         try:
             self.db.commit()
+            invalidate_principal(user.id)
 
             return 1
         except Exception as e:
@@ -237,6 +240,7 @@ class UserClass:
 
         try:
             self.db.commit()
+            invalidate_principal(id)
             return {"status": "success", "message": "User updated successfully"}
         except Exception as e:
             return {"status": "error", "message": str(e)}
\ No newline at end of file
@@ -0,0 +1,458 @@
+"""Outbox de avisos WhatsApp a apoderados: encolar, consultar progreso y enviar con reintentos.
+
+``DynamicFormClass.notify_whatsapp_bulk`` / ``resend_whatsapp_to_guardian`` crean un job con
+un mensaje por estudiante y responden de inmediato con el jobId. El worker
+(``core/whatsapp_notify_worker.py``) toma los mensajes vencidos con
+``process_due_whatsapp_messages`` y los envía con hasta ``WHATSAPP_SEND_CONCURRENCY``
+peticiones a la vez, a no más de ``WHATSAPP_RATE_PER_SECOND`` por segundo (token bucket).
+
+Mensajes: pending → running → sent | pending (reintento con backoff) | failed.
+El job pasa a done cuando no le quedan mensajes pending/running.
+
+La entrega es "al menos una vez": el envío se marca ``sent`` después de que Meta responde.
+Si el proceso muere entre el envío y ese UPDATE, el mensaje queda ``running`` y, vencido
+``WHATSAPP_NOTIFY_LOCK_SECONDS``, otro worker lo vuelve a tomar y el apoderado lo recibe dos
+veces. Se prefiere un aviso repetido a uno perdido.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+
+from app.backend.classes.whatsapp_meta_class import WhatsAppMetaClass, normalize_whatsapp_e164
+from app.backend.core.config import settings
+from app.backend.db.database import SessionLocal
+from app.backend.db.models.whatsapp_notify_jobs import (
+    WhatsAppNotifyJobModel,
+    WhatsAppNotifyMessageModel,
+)
+from app.backend.utils.token_bucket import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+
+MSG_PENDING = "pending"
+MSG_RUNNING = "running"
+MSG_SENT = "sent"
+MSG_FAILED = "failed"
+
+RETRY_BASE_SECONDS = 5.0
+RETRY_MAX_SECONDS = 300.0
+
+# Códigos de error de la Cloud API por límite de tasa / throughput: se reintentan.
+RETRYABLE_META_CODES = frozenset({4, 80007, 130429, 131048, 131056})
+
+_limiter: Optional[TokenBucket] = None
+_limiter_lock = threading.Lock()
+
+
+def get_whatsapp_rate_limiter() -> TokenBucket:
+    """Token bucket del proceso (``WHATSAPP_RATE_PER_SECOND``, ráfaga ``WHATSAPP_RATE_BURST``)."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = TokenBucket(
+                settings.whatsapp_rate_per_second,
+                settings.whatsapp_rate_burst or None,
+            )
+        return _limiter
+
+
+def set_whatsapp_rate_limiter(limiter: Optional[TokenBucket]) -> None:
+    """Reemplaza el limitador (None = se vuelve a crear desde settings)."""
+    global _limiter
+    with _limiter_lock:
+        _limiter = limiter
+
+
+def retry_delay_seconds(attempts: int) -> float:
+    """Backoff exponencial tras el intento ``attempts`` (1 → 5 s, 2 → 10 s, … hasta 5 min)."""
+    return min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** max(0, int(attempts) - 1)))
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+def _job_counts(db: Session, job_ids: list[int]) -> dict[int, dict[str, int]]:
+    counts: dict[int, dict[str, int]] = {int(j): {} for j in job_ids}
+    if not job_ids:
+        return counts
+    rows = (
+        db.query(
+            WhatsAppNotifyMessageModel.job_id,
+            WhatsAppNotifyMessageModel.status,
+            func.count(WhatsAppNotifyMessageModel.id),
+        )
+        .filter(WhatsAppNotifyMessageModel.job_id.in_([int(j) for j in job_ids]))
+        .group_by(WhatsAppNotifyMessageModel.job_id, WhatsAppNotifyMessageModel.status)
+        .all()
+    )
+    for job_id, status, n in rows:
+        counts.setdefault(int(job_id), {})[status] = int(n)
+    return counts
+
+
+def serialize_whatsapp_notify_job(
+    row: WhatsAppNotifyJobModel,
+    counts: dict[str, int],
+    messages: list[WhatsAppNotifyMessageModel] | None = None,
+) -> dict[str, Any]:
+    data: dict[str, Any] = {
+        "jobId": row.id,
+        "status": row.status,
+        "formId": row.dynamic_form_id,
+        "formName": row.form_name,
+        "total": int(row.total or 0),
+        "sent": counts.get(MSG_SENT, 0),
+        "failed": counts.get(MSG_FAILED, 0),
+        "pending": counts.get(MSG_PENDING, 0) + counts.get(MSG_RUNNING, 0),
+        "createdAt": _iso(row.created_at),
+        "updatedAt": _iso(row.updated_at),
+    }
+    if messages is not None:
+        data["messages"] = [
+            {
+                "studentId": m.student_id,
+                "studentName": m.student_name,
+                "status": m.status,
+                "attempts": int(m.attempts or 0),
+                "lastError": m.last_error,
+                "nextAttemptAt": _iso(m.next_attempt_at) if m.status == MSG_PENDING else None,
+                "providerMessageId": m.provider_message_id,
+            }
+            for m in messages
+        ]
+    return data
+
+
+def whatsapp_job_summary(job: dict[str, Any]) -> dict[str, Any]:
+    """Resumen con la forma de ``notify_guardians_for_form`` (``attempted``, ``sent``, ``failed``
+    por estudiante, ``skipped_config``) a partir de un job serializado con ``messages``."""
+    failed = [
+        {
+            "student_id": m["studentId"],
+            "reason": (
+                "invalid_or_missing_phone"
+                if m["lastError"] == "invalid_or_missing_phone"
+                else "send_failed"
+            ),
+            "detail": m["lastError"],
+        }
+        for m in job.get("messages") or []
+        if m["status"] == MSG_FAILED
+    ]
+    return {
+        "attempted": int(job.get("total") or 0),
+        "sent": int(job.get("sent") or 0),
+        "failed": failed,
+        "skipped_config": False,
+    }
+
+
+class WhatsAppNotifyJobsClass:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def enqueue(
+        self,
+        *,
+        form_name: str,
+        recipients: list[dict[str, Any]],
+        school_id: int | None = None,
+        dynamic_form_id: int | None = None,
+    ) -> dict[str, Any]:
+        """Crea el job y un mensaje por destinatario y despierta al worker.
+
+        ``recipients``: ``{"student_id", "student_name", "phone"}``. Sin celular válido el
+        mensaje nace ``failed`` (no se dispara), como hacía el envío directo.
+        """
+        now = datetime.utcnow()
+        job = WhatsAppNotifyJobModel(
+            school_id=school_id,
+            dynamic_form_id=dynamic_form_id,
+            form_name=(form_name or "Formulario")[:200],
+            status=JOB_PENDING,
+            total=len(recipients),
+            created_at=now,
+            updated_at=now,
+        )
+        self.db.add(job)
+        self.db.flush()
+        messages = []
+        for r in recipients:
+            to = normalize_whatsapp_e164(r.get("phone"))
+            messages.append(
+                WhatsAppNotifyMessageModel(
+                    job_id=job.id,
+                    student_id=int(r["student_id"]),
+                    student_name=(r.get("student_name") or "Estudiante")[:255],
+                    phone=to,
+                    status=MSG_PENDING if to else MSG_FAILED,
+                    attempts=0,
+                    next_attempt_at=now,
+                    last_error=None if to else "invalid_or_missing_phone",
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+        self.db.add_all(messages)
+        if not any(m.status == MSG_PENDING for m in messages):
+            job.status = JOB_DONE
+        self.db.commit()
+        self.db.refresh(job)
+
+        if job.status != JOB_DONE:
+            from app.backend.core.whatsapp_notify_worker import notify_whatsapp_notify_worker
+
+            notify_whatsapp_notify_worker()
+        counts = _job_counts(self.db, [job.id])[job.id]
+        return {"status": "success", "data": serialize_whatsapp_notify_job(job, counts)}
+
+    def get(self, *, job_id: int, school_id: int | None = None, include_messages: bool = True) -> dict[str, Any]:
+        q = self.db.query(WhatsAppNotifyJobModel).filter(WhatsAppNotifyJobModel.id == int(job_id))
+        if school_id is not None:
+            q = q.filter(WhatsAppNotifyJobModel.school_id == int(school_id))
+        row = q.first()
+        if row is None:
+            return {"status": "error", "message": "Envío no encontrado.", "http_status": 404}
+        messages = None
+        if include_messages:
+            messages = (
+                self.db.query(WhatsAppNotifyMessageModel)
+                .filter(WhatsAppNotifyMessageModel.job_id == row.id)
+                .order_by(WhatsAppNotifyMessageModel.id.asc())
+                .all()
+            )
+        counts = _job_counts(self.db, [row.id])[row.id]
+        return {"status": "success", "data": serialize_whatsapp_notify_job(row, counts, messages)}
+
+
+@dataclass
+class _ClaimedMessage:
+    id: int
+    job_id: int
+    claim_token: str
+    phone: str
+    student_name: str
+    form_name: str
+    attempts: int
+
+
+@dataclass
+class _Outcome:
+    message: _ClaimedMessage
+    ok: bool
+    retryable: bool = False
+    provider_message_id: str | None = None
+    error: str | None = None
+
+
+def _due_filter(now: datetime):
+    stale = now - timedelta(seconds=max(30, int(settings.whatsapp_notify_lock_seconds or 300)))
+    return or_(
+        and_(
+            WhatsAppNotifyMessageModel.status == MSG_PENDING,
+            WhatsAppNotifyMessageModel.next_attempt_at <= now,
+        ),
+        and_(
+            WhatsAppNotifyMessageModel.status == MSG_RUNNING,
+            WhatsAppNotifyMessageModel.locked_at < stale,
+        ),
+    )
+
+
+def _claim_messages(
+    db: Session, *, limit: int, job_ids: list[int] | None, now: datetime
+) -> list[_ClaimedMessage]:
+    """Marca como running hasta ``limit`` mensajes vencidos con un solo UPDATE condicional;
+    el ``claim_token`` identifica los que tomó esta tanda (otro worker no los ve vencidos)."""
+    query = db.query(WhatsAppNotifyMessageModel.id).filter(_due_filter(now))
+    if job_ids is not None:
+        query = query.filter(WhatsAppNotifyMessageModel.job_id.in_([int(j) for j in job_ids]))
+    ids = [
+        int(r.id)
+        for r in query.order_by(
+            WhatsAppNotifyMessageModel.next_attempt_at, WhatsAppNotifyMessageModel.id
+        )
+        .limit(max(1, int(limit)))
+        .all()
+    ]
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    db.execute(
+        update(WhatsAppNotifyMessageModel)
+        .where(WhatsAppNotifyMessageModel.id.in_(ids), _due_filter(now))
+        .values(
+            status=MSG_RUNNING,
+            locked_at=now,
+            claim_token=token,
+            attempts=WhatsAppNotifyMessageModel.attempts + 1,
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    rows = (
+        db.query(WhatsAppNotifyMessageModel, WhatsAppNotifyJobModel.form_name)
+        .join(WhatsAppNotifyJobModel, WhatsAppNotifyJobModel.id == WhatsAppNotifyMessageModel.job_id)
+        .filter(WhatsAppNotifyMessageModel.claim_token == token)
+        .order_by(WhatsAppNotifyMessageModel.id)
+        .all()
+    )
+    claimed = [
+        _ClaimedMessage(
+            id=int(m.id),
+            job_id=int(m.job_id),
+            claim_token=token,
+            phone=m.phone or "",
+            student_name=m.student_name or "Estudiante",
+            form_name=form_name or "Formulario",
+            attempts=int(m.attempts or 0),
+        )
+        for m, form_name in rows
+    ]
+    job_ids_claimed = sorted({c.job_id for c in claimed})
+    if job_ids_claimed:
+        db.execute(
+            update(WhatsAppNotifyJobModel)
+            .where(
+                WhatsAppNotifyJobModel.id.in_(job_ids_claimed),
+                WhatsAppNotifyJobModel.status == JOB_PENDING,
+            )
+            .values(status=JOB_RUNNING, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    return claimed
+
+
+def _is_retryable(result: dict[str, Any]) -> bool:
+    if result.get("skipped"):
+        return False
+    if result.get("error"):
+        return True  # red / timeout
+    code = int(result.get("status_code") or 0)
+    if code == 429 or code >= 500:
+        return True
+    error = (result.get("response") or {}).get("error") or {}
+    return error.get("code") in RETRYABLE_META_CODES
+
+
+def _error_text(result: dict[str, Any]) -> str:
+    if result.get("error"):
+        return str(result["error"])[:1000]
+    error = (result.get("response") or {}).get("error") or {}
+    if error:
+        return f"{error.get('code')}: {error.get('message')}"[:1000]
+    return str(result.get("reason") or result.get("detail") or f"HTTP {result.get('status_code')}")[:1000]
+
+
+def _send_message(message: _ClaimedMessage, limiter: TokenBucket) -> _Outcome:
+    try:
+        limiter.acquire()
+        result = WhatsAppMetaClass.send_template(
+            message.phone, body_texts=[message.student_name, message.form_name[:200]]
+        )
+    except Exception as exc:
+        logger.exception("WhatsApp: error enviando mensaje %s", message.id)
+        return _Outcome(message=message, ok=False, retryable=True, error=str(exc))
+    if result.get("ok"):
+        sent = ((result.get("response") or {}).get("messages") or [{}])[0]
+        return _Outcome(message=message, ok=True, provider_message_id=sent.get("id"))
+    return _Outcome(
+        message=message, ok=False, retryable=_is_retryable(result), error=_error_text(result)
+    )
+
+
+def _finish_messages(db: Session, outcomes: list[_Outcome], *, now: datetime) -> None:
+    max_attempts = max(1, int(settings.whatsapp_notify_max_attempts or 1))
+    for outcome in outcomes:
+        message = outcome.message
+        if outcome.ok:
+            values: dict[str, Any] = {
+                "status": MSG_SENT,
+                "provider_message_id": outcome.provider_message_id,
+                "last_error": None,
+            }
+        elif outcome.retryable and message.attempts < max_attempts:
+            values = {
+                "status": MSG_PENDING,
+                "next_attempt_at": now + timedelta(seconds=retry_delay_seconds(message.attempts)),
+                "last_error": outcome.error,
+            }
+        else:
+            values = {"status": MSG_FAILED, "last_error": outcome.error}
+            logger.warning(
+                "Aviso WhatsApp fallido (mensaje %s, job %s, intento %s): %s",
+                message.id,
+                message.job_id,
+                message.attempts,
+                outcome.error,
+            )
+        values.update(locked_at=None, claim_token=None, updated_at=now)
+        # Si otro worker lo retomó (lock vencido), el token ya no coincide y gana el suyo.
+        db.execute(
+            update(WhatsAppNotifyMessageModel)
+            .where(
+                WhatsAppNotifyMessageModel.id == message.id,
+                WhatsAppNotifyMessageModel.claim_token == message.claim_token,
+                WhatsAppNotifyMessageModel.status == MSG_RUNNING,
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+    job_ids = sorted({o.message.job_id for o in outcomes})
+    finished = [
+        job_id
+        for job_id, counts in _job_counts(db, job_ids).items()
+        if not counts.get(MSG_PENDING) and not counts.get(MSG_RUNNING)
+    ]
+    if finished:
+        db.execute(
+            update(WhatsAppNotifyJobModel)
+            .where(WhatsAppNotifyJobModel.id.in_(finished))
+            .values(status=JOB_DONE, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+
+
+def process_due_whatsapp_messages(
+    *,
+    session_factory: Callable[[], Session] | None = None,
+    limit: int | None = None,
+    job_ids: list[int] | None = None,
+) -> int:
+    """Envía una tanda de mensajes vencidos (o solo de ``job_ids``). Devuelve cuántos tomó."""
+    db = (session_factory or SessionLocal)()
+    try:
+        claimed = _claim_messages(
+            db,
+            limit=limit or settings.whatsapp_notify_batch_size or 200,
+            job_ids=job_ids,
+            now=datetime.utcnow(),
+        )
+        if not claimed:
+            return 0
+        limiter = get_whatsapp_rate_limiter()
+        workers = min(len(claimed), max(1, int(settings.whatsapp_send_concurrency or 1)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pie360-whatsapp-send") as pool:
+            outcomes = list(pool.map(lambda m: _send_message(m, limiter), claimed))
+        _finish_messages(db, outcomes, now=datetime.utcnow())
+        return len(claimed)
+    finally:
+        db.close()
@@ -174,6 +174,124 @@ class Settings:
             os.getenv("AGENTS_RATE_TOKENS_PER_DAY_CUSTOMER", "2000000") or "2000000"
         )
     )
+    agents_rate_reconcile_seconds: int = field(
+        default_factory=lambda: int(os.getenv("AGENTS_RATE_RECONCILE_SECONDS", "60") or "60")
+    )
+    agents_bulk_concurrency_per_customer: int = field(
+        default_factory=lambda: int(
+            os.getenv("AGENTS_BULK_CONCURRENCY_PER_CUSTOMER", "4") or "4"
+        )
+    )
+    agents_bulk_retries: int = field(
+        default_factory=lambda: int(os.getenv("AGENTS_BULK_RETRIES", "2") or "2")
+    )
+    drive_upload_worker_enabled: bool = field(
+        default_factory=lambda: os.getenv("DRIVE_UPLOAD_WORKER_ENABLED", "1").strip().lower()
+        in ("1", "true", "yes")
+    )
+    drive_upload_workers: int = field(
+        default_factory=lambda: int(os.getenv("DRIVE_UPLOAD_WORKERS", "2") or "2")
+    )
+    drive_upload_poll_seconds: float = field(
+        default_factory=lambda: float(os.getenv("DRIVE_UPLOAD_POLL_SECONDS", "2") or "2")
+    )
+    drive_upload_batch_size: int = field(
+        default_factory=lambda: int(os.getenv("DRIVE_UPLOAD_BATCH_SIZE", "25") or "25")
+    )
+    drive_upload_max_attempts: int = field(
+        default_factory=lambda: int(os.getenv("DRIVE_UPLOAD_MAX_ATTEMPTS", "6") or "6")
+    )
+    drive_upload_lock_seconds: int = field(
+        default_factory=lambda: int(os.getenv("DRIVE_UPLOAD_LOCK_SECONDS", "600") or "600")
+    )
+    generated_cache_enabled: bool = field(
+        default_factory=lambda: os.getenv("GENERATED_CACHE_ENABLED", "1").strip().lower()
+        in ("1", "true", "yes")
+    )
+    generated_cache_max_mb: int = field(
+        default_factory=lambda: int(os.getenv("GENERATED_CACHE_MAX_MB", "512") or "512")
+    )
+    generated_cache_max_age_hours: int = field(
+        default_factory=lambda: int(os.getenv("GENERATED_CACHE_MAX_AGE_HOURS", "72") or "72")
+    )
+    db_executor_workers: int = field(
+        default_factory=lambda: int(os.getenv("DB_EXECUTOR_WORKERS", "16") or "16")
+    )
+    render_executor_workers: int = field(
+        default_factory=lambda: int(os.getenv("RENDER_EXECUTOR_WORKERS", "4") or "4")
+    )
+    render_pool_enabled: bool = field(
+        default_factory=lambda: os.getenv("RENDER_POOL_ENABLED", "1").strip().lower()
+        in ("1", "true", "yes")
+    )
+    render_pool_workers: int = field(
+        default_factory=lambda: int(os.getenv("RENDER_POOL_WORKERS", "0") or "0")
+        or min(4, os.cpu_count() or 1)
+    )
+    render_pool_timeout_seconds: float = field(
+        default_factory=lambda: float(os.getenv("RENDER_POOL_TIMEOUT_SECONDS", "120") or "120")
+    )
+    render_pool_max_tasks_per_child: int = field(
+        default_factory=lambda: int(os.getenv("RENDER_POOL_MAX_TASKS_PER_CHILD", "50") or "50")
+    )
+    render_pool_type_limits: str = field(
+        default_factory=lambda: os.getenv("RENDER_POOL_TYPE_LIMITS", "")
+    )
+    whatsapp_notify_worker_enabled: bool = field(
+        default_factory=lambda: os.getenv("WHATSAPP_NOTIFY_WORKER_ENABLED", "1").strip().lower()
+        in ("1", "true", "yes")
+    )
+    whatsapp_notify_poll_seconds: float = field(
+        default_factory=lambda: float(os.getenv("WHATSAPP_NOTIFY_POLL_SECONDS", "2") or "2")
+    )
+    whatsapp_notify_batch_size: int = field(
+        default_factory=lambda: int(os.getenv("WHATSAPP_NOTIFY_BATCH_SIZE", "200") or "200")
+    )
+    whatsapp_notify_max_attempts: int = field(
+        default_factory=lambda: int(os.getenv("WHATSAPP_NOTIFY_MAX_ATTEMPTS", "5") or "5")
+    )
+    whatsapp_notify_lock_seconds: int = field(
+        default_factory=lambda: int(os.getenv("WHATSAPP_NOTIFY_LOCK_SECONDS", "300") or "300")
+    )
+    whatsapp_send_concurrency: int = field(
+        default_factory=lambda: int(os.getenv("WHATSAPP_SEND_CONCURRENCY", "8") or "8")
+    )
+    whatsapp_rate_per_second: float = field(
+        default_factory=lambda: float(os.getenv("WHATSAPP_RATE_PER_SECOND", "80") or "80")
+    )
+    whatsapp_rate_burst: int = field(
+        default_factory=lambda: int(os.getenv("WHATSAPP_RATE_BURST", "0") or "0")
+    )
+    upload_max_mb: int = field(
+        default_factory=lambda: int(os.getenv("UPLOAD_MAX_MB", "50") or "50")
+    )
+    upload_chunk_kb: int = field(
+        default_factory=lambda: int(os.getenv("UPLOAD_CHUNK_KB", "1024") or "1024")
+    )
+    upload_workers: int = field(
+        default_factory=lambda: int(os.getenv("UPLOAD_WORKERS", "4") or "4")
+    )
+    home_stats_cache_ttl_seconds: float = field(
+        default_factory=lambda: float(os.getenv("HOME_STATS_CACHE_TTL_SECONDS", "30") or "30")
+    )
+    course_export_workers: int = field(
+        default_factory=lambda: int(os.getenv("COURSE_EXPORT_WORKERS", "4") or "4")
+    )
+    catalog_cache_ttl_seconds: float = field(
+        default_factory=lambda: float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300") or "300")
+    )
+    principal_cache_ttl_seconds: float = field(
+        default_factory=lambda: float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60") or "60")
+    )
+    inspection_api_pool_maxsize: int = field(
+        default_factory=lambda: int(os.getenv("INSPECTION_API_POOL_MAXSIZE", "8") or "8")
+    )
+    inspection_api_catalog_ttl_seconds: float = field(
+        default_factory=lambda: float(os.getenv("INSPECTION_API_CATALOG_TTL_SECONDS", "600") or "600")
+    )
+    inspection_import_chunk_rows: int = field(
+        default_factory=lambda: int(os.getenv("INSPECTION_IMPORT_CHUNK_ROWS", "500") or "500")
+    )
     agents_llm_api_key: str = field(
         default_factory=lambda: os.getenv("AGENTS_LLM_API_KEY", "")
     )
@@ -182,6 +300,16 @@ class Settings:
             "AGENTS_LLM_API_BASE", "https://api.deepseek.com"
         )
     )
+    agents_llm_pool_max_connections: int = field(
+        default_factory=lambda: int(os.getenv("AGENTS_LLM_POOL_MAX_CONNECTIONS", "64") or "64")
+    )
+    agents_llm_pool_max_keepalive: int = field(
+        default_factory=lambda: int(os.getenv("AGENTS_LLM_POOL_MAX_KEEPALIVE", "16") or "16")
+    )
+    agents_llm_http2: bool = field(
+        default_factory=lambda: os.getenv("AGENTS_LLM_HTTP2", "0").strip().lower()
+        in ("1", "true", "yes")
+    )
 
 
 settings = Settings()
@@ -0,0 +1,33 @@
+"""Worker en proceso que vacía la tabla drive_upload_jobs (subidas a Google Drive).
+
+Arranca en el lifespan de la app (``DRIVE_UPLOAD_WORKER_ENABLED``) con
+``DRIVE_UPLOAD_WORKERS`` tareas; cada vuelta toma una tanda con
+``process_due_drive_uploads`` en el pool ``drive``. Encolar despierta al worker sin esperar
+el sondeo. Con varios procesos uvicorn cada uno corre su worker: el UPDATE condicional de
+``_claim_jobs`` reparte los jobs sin duplicarlos.
+"""
+
+from __future__ import annotations
+
+from app.backend.core.config import settings
+from app.backend.core.executors import run_drive
+from app.backend.core.outbox_worker import OutboxWorker
+
+
+def _process():
+    from app.backend.classes.drive_upload_jobs_class import process_due_drive_uploads
+
+    return process_due_drive_uploads
+
+
+drive_upload_worker = OutboxWorker(
+    "drive-upload",
+    process=_process,
+    runner=run_drive,
+    workers=lambda: settings.drive_upload_workers,
+    poll_seconds=lambda: settings.drive_upload_poll_seconds,
+)
+
+
+def notify_drive_upload_worker() -> None:
+    drive_upload_worker.notify()
@@ -0,0 +1,198 @@
+"""Pools acotados para sacar trabajo bloqueante del event loop.
+
+Las rutas ``async def`` que usan la ``Session`` síncrona de SQLAlchemy o que renderizan
+PDF/DOCX (PyMuPDF, python-docx, ReportLab) deben despachar ese trabajo aquí:
+
+- ``run_db``: consultas y escrituras en BD (pool ``db``).
+- ``run_render``: generación de documentos, pesada en CPU (pool ``render``).
+- ``run_drive``: subidas a Google Drive del worker de ``drive_upload_jobs`` (pool ``drive``).
+- ``run_whatsapp``: envíos del worker de avisos WhatsApp (pool ``whatsapp``).
+- ``run_upload``: copia por trozos de archivos subidos a disco (pool ``upload``).
+
+Los PDF ReportLab desde cero además salen del GIL en el pool de procesos de
+``core/render_pool`` (sus métricas van en ``executor_metrics()["render_pool"]``).
+
+Pools separados evitan que un libro de registro grande agote los hilos que atienden logins
+y listados. ``executor_metrics()`` expone profundidad de cola y actividad por pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.backend.core.config import settings
+from app.backend.core.render_pool import render_pool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Sobre este umbral (segundos en cola) se registra un warning: indica pool saturado.
+SLOW_QUEUE_WAIT_SECONDS = 2.0
+
+
+class BoundedExecutor:
+    """ThreadPoolExecutor con número fijo de hilos y contadores de cola/actividad."""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(1, int(max_workers or 1))
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._max_queued = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+
+    def _ensure_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"pie360-{self.name}",
+                )
+            return self._pool
+
+    def _wrap(self, fn: Callable[..., T], enqueued_at: float) -> Callable[[], T]:
+        def runner() -> T:
+            started = time.perf_counter()
+            wait = started - enqueued_at
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._total_wait += wait
+            if wait >= SLOW_QUEUE_WAIT_SECONDS:
+                logger.warning(
+                    "Pool %s: tarea esperó %.2fs en cola (activos=%s/%s)",
+                    self.name,
+                    wait,
+                    self._active,
+                    self.max_workers,
+                )
+            ok = False
+            try:
+                result = fn()
+                ok = True
+                return result
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self._active -= 1
+                    self._total_run += elapsed
+                    if ok:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+
+        return runner
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Ejecuta ``fn(*args, **kwargs)`` en el pool y espera el resultado sin bloquear el loop."""
+        ctx = contextvars.copy_context()
+        return await asyncio.wrap_future(self.submit(ctx.run, fn, *args, **kwargs))
+
+    def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        """Versión síncrona de ``run`` para código que ya corre en un hilo (p. ej. un generador
+        de ``StreamingResponse``): encola en el mismo pool y con los mismos contadores."""
+        pool = self._ensure_pool()
+        call = functools.partial(fn, *args, **kwargs)
+        with self._lock:
+            self._queued += 1
+            self._submitted += 1
+            if self._queued > self._max_queued:
+                self._max_queued = self._queued
+        try:
+            future = pool.submit(self._wrap(call, time.perf_counter()))
+        except RuntimeError:
+            # Pool cerrado durante el apagado: no dejar el contador de cola inflado.
+            with self._lock:
+                self._queued -= 1
+            raise
+        future.add_done_callback(self._forget_cancelled)
+        return future
+
+    def _forget_cancelled(self, future: Future) -> None:
+        # Cancelada en cola (cliente desconectado, tarea async cancelada, apagado): ``runner``
+        # nunca corre, así que se descuenta aquí. Una vez iniciada ya no se puede cancelar.
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "active": self._active,
+                "max_queued": self._max_queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": round(self._total_wait / finished * 1000, 2) if finished else 0.0,
+                "avg_run_ms": round(self._total_run / finished * 1000, 2) if finished else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+db_executor = BoundedExecutor("db", settings.db_executor_workers)
+render_executor = BoundedExecutor("render", settings.render_executor_workers)
+drive_executor = BoundedExecutor("drive", settings.drive_upload_workers)
+# Un hilo por tarea del worker; los envíos concurrentes van en el pool propio de la tanda.
+whatsapp_executor = BoundedExecutor("whatsapp", 1)
+upload_executor = BoundedExecutor("upload", settings.upload_workers)
+_EXECUTORS = (db_executor, render_executor, drive_executor, whatsapp_executor, upload_executor)
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Trabajo de BD síncrono (Session SQLAlchemy) fuera del event loop."""
+    return await db_executor.run(fn, *args, **kwargs)
+
+
+async def run_render(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Render PDF/DOCX (CPU) fuera del event loop, en su propio pool acotado."""
+    return await render_executor.run(fn, *args, **kwargs)
+
+
+async def run_drive(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Llamadas a la API de Drive (red, segundos) sin ocupar los hilos de BD de las rutas."""
+    return await drive_executor.run(fn, *args, **kwargs)
+
+
+async def run_whatsapp(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Tandas de envíos a la Cloud API de WhatsApp (red) fuera de los pools de las rutas."""
+    return await whatsapp_executor.run(fn, *args, **kwargs)
+
+
+async def run_upload(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Copia de subidas a disco (I/O) sin ocupar los hilos de BD mientras llega un PDF grande."""
+    return await upload_executor.run(fn, *args, **kwargs)
+
+
+def executor_metrics() -> dict[str, dict[str, Any]]:
+    metrics = {ex.name: ex.metrics() for ex in _EXECUTORS}
+    metrics["render_pool"] = render_pool.metrics()
+    return metrics
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    for ex in _EXECUTORS:
+        ex.shutdown(wait=wait)
+    render_pool.shutdown(wait=wait)
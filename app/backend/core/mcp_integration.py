@@ -7,7 +7,12 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from starlette.routing import Route
 
+from app.backend.core.config import settings
+from app.backend.core.drive_upload_worker import drive_upload_worker
+from app.backend.core.executors import shutdown_executors
+from app.backend.core.whatsapp_notify_worker import whatsapp_notify_worker
 from app.backend.mcp import MCP_HTTP_PATH, agents_mcp, get_mcp_asgi_app
+from app.backend.utils.agents_llm_client import aclose_llm_client
 
 # Ruta interna (con root_path=/api la URL pública es /api/mcp)
 MCP_PUBLIC_PATH = MCP_HTTP_PATH
@@ -22,7 +27,17 @@ def workspace_mcp_lifespan():
 @asynccontextmanager
 async def combined_app_lifespan(app: FastAPI):
     async with workspace_mcp_lifespan():
-        yield
+        if settings.drive_upload_worker_enabled:
+            await drive_upload_worker.start()
+        if settings.whatsapp_notify_worker_enabled:
+            await whatsapp_notify_worker.start()
+        try:
+            yield
+        finally:
+            await drive_upload_worker.stop()
+            await whatsapp_notify_worker.stop()
+            await aclose_llm_client()
+            shutdown_executors(wait=False)
 
 
 def mount_workspace_mcp(app: FastAPI) -> None:
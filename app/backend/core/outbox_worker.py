@@ -0,0 +1,95 @@
+"""Worker en proceso para tablas outbox (subidas a Drive, avisos WhatsApp...).
+
+Arranca en el lifespan de la app con N tareas asyncio; cada vuelta llama a ``process`` (una
+tanda de trabajo vencido, devuelve cuántos tomó) en su pool acotado de ``executors``. Si no
+hubo trabajo espera ``poll_seconds`` o hasta que ``notify()`` lo despierte (encolar lo
+llama desde cualquier hilo). Con varios procesos uvicorn cada uno corre su worker: el claim
+condicional de cada outbox reparte el trabajo sin duplicarlo.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        name: str,
+        process: Callable[[], Callable[[], int]],
+        runner: Callable[[Callable[[], int]], Awaitable[int]],
+        workers: Callable[[], int],
+        poll_seconds: Callable[[], float],
+    ) -> None:
+        # ``process`` devuelve la función de la tanda (import diferido, evita ciclos).
+        self.name = name
+        self._process = process
+        self._runner = runner
+        self._workers = workers
+        self._poll_seconds = poll_seconds
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self, workers: int | None = None) -> None:
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        count = max(1, int(workers or self._workers() or 1))
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"{self.name}-{i}") for i in range(count)
+        ]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Termina la vuelta en curso; lo que quede 'running' se retoma cuando vence su lock."""
+        if not self._tasks:
+            return
+        self._stopping = True
+        if self._wake is not None:
+            self._wake.set()
+        tasks, self._tasks = self._tasks, []
+        _done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        self._loop = None
+
+    def notify(self) -> None:
+        """Despierta al worker (seguro desde cualquier hilo)."""
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass
+
+    async def _run(self) -> None:
+        process = self._process()
+        poll = max(0.1, float(self._poll_seconds() or 2))
+        while not self._stopping:
+            try:
+                processed = await self._runner(process)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Worker %s: error procesando la tanda", self.name)
+                processed = 0
+            if processed or self._stopping:
+                continue
+            assert self._wake is not None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=poll)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
@@ -0,0 +1,409 @@
+"""Pool de procesos para los PDF ReportLab "desde cero" de ``DocumentsClass``.
+
+Armar la story de ReportLab (PACI, CESP, PAI, evaluaciones de aula, certificados...) es
+Python puro que retiene el GIL: en el pool de hilos ``render`` dos documentos pesados se
+turnan en un solo núcleo. Aquí el render corre en procesos aparte:
+
+- El trabajo es un ``RenderJob`` serializable (document_id + document_data + carpeta de
+  salida); el proceso hijo llama a ``DocumentsClass._generate_document_pdf_uncached`` y
+  devuelve el mismo dict (status, filename, file_path) que el render en línea.
+- ``DocumentsClass.generate_document_pdf`` lo usa solo para ``POOL_DOCUMENT_IDS`` sin
+  plantilla (no tocan la BD); la caché de generados y el ETag siguen en el proceso padre.
+- Límite de concurrencia por document_id (``RENDER_POOL_TYPE_LIMITS``) y reciclaje de
+  procesos cada ``RENDER_POOL_MAX_TASKS_PER_CHILD`` documentos.
+- Timeout por documento (``RENDER_POOL_TIMEOUT_SECONDS``) contado desde que el hijo empieza
+  el render (el hijo lo avisa por una cola), no desde que se encoló. Un render colgado
+  retira ese pool: lo nuevo va a un pool nuevo, los demás renders del viejo terminan y
+  recién entonces se matan sus procesos. Un hijo caído sí rompe el pool entero; los
+  renders que no alcanzaron a empezar se reenvían al pool nuevo.
+- Si el trabajo no se puede serializar se renderiza en línea, como antes.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from app.backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# ReportLab desde cero y sin consultas a BD (el 9 - IDTEL - sí consulta, queda en línea).
+POOL_DOCUMENT_IDS = frozenset({8, 18, 19, 20, 21, 22, 23, 25, 29, *range(31, 41)})
+
+# Cada cuánto revisa el hilo que espera si su render empezó y si ya superó el timeout.
+POLL_SECONDS = 0.25
+
+_in_worker = False
+_started_queue: Any = None
+
+
+@dataclass(frozen=True)
+class RenderJob:
+    document_id: int
+    document_data: dict[str, Any]
+    output_directory: str = "files/system/students"
+
+
+def parse_type_limits(raw: str | None) -> dict[int, int]:
+    """``"21:1,22:2"`` -> ``{21: 1, 22: 2}``; entradas inválidas se ignoran."""
+    limits: dict[int, int] = {}
+    for part in str(raw or "").split(","):
+        doc_id, sep, value = part.partition(":")
+        if not sep:
+            continue
+        try:
+            limits[int(doc_id.strip())] = max(1, int(value.strip()))
+        except ValueError:
+            logger.warning("RENDER_POOL_TYPE_LIMITS: entrada inválida %r", part)
+    return limits
+
+
+def _worker_init(started: Any = None) -> None:
+    global _in_worker, _started_queue
+    _in_worker = True
+    _started_queue = started
+
+
+def _run_job(target: Callable[[RenderJob], dict[str, Any]], token: str, job: RenderJob) -> dict[str, Any]:
+    """Corre en el hijo: avisa al padre que ``token`` empezó (inicio del timeout) y renderiza."""
+    if _started_queue is not None:
+        _started_queue.put((token, time.time()))
+    return target(job)
+
+
+def _render_job(job: RenderJob) -> dict[str, Any]:
+    from app.backend.classes.documents_class import DocumentsClass
+
+    result = DocumentsClass._generate_document_pdf_uncached(
+        document_id=job.document_id,
+        document_data=job.document_data,
+        db=None,
+        output_directory=job.output_directory,
+    )
+    result["render_pid"] = os.getpid()
+    return result
+
+
+def _error(message: str) -> dict[str, Any]:
+    return {"status": "error", "message": message, "filename": None, "file_path": None}
+
+
+class _Hung(Exception):
+    pass
+
+
+@dataclass
+class _Generation:
+    """Un ``ProcessPoolExecutor`` con su cola de inicios y los renders enviados a él."""
+
+    executor: ProcessPoolExecutor
+    started: Any  # multiprocessing.Queue de (token, time.time()) al empezar cada render
+    futures: dict[str, Future] = field(default_factory=dict)
+    hung: set[str] = field(default_factory=set)
+    retired: bool = False
+
+
+@dataclass
+class _Stats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    timeouts: int = 0
+    rejected: int = 0
+    inline_fallbacks: int = 0
+    recycled: int = 0
+    total_run: float = 0.0
+    active_by_type: dict[int, int] = field(default_factory=dict)
+
+
+class RenderPool:
+    def __init__(
+        self,
+        *,
+        workers: int,
+        timeout_seconds: float,
+        max_tasks_per_child: int,
+        type_limits: dict[int, int] | None = None,
+        target: Callable[[RenderJob], dict[str, Any]] = _render_job,
+    ) -> None:
+        # ``target`` debe ser importable a nivel de módulo (el hijo se crea con spawn).
+        self.target = target
+        self.workers = max(1, int(workers))
+        self.timeout_seconds = max(1.0, float(timeout_seconds))
+        self.max_tasks_per_child = max(1, int(max_tasks_per_child))
+        self.type_limits = dict(type_limits or {})
+        self._pool: Optional[_Generation] = None
+        self._lock = threading.Lock()
+        self._started_at: dict[str, float] = {}
+        self._semaphores: dict[int, threading.BoundedSemaphore] = {}
+        self._stats = _Stats()
+
+    @classmethod
+    def from_settings(cls) -> "RenderPool":
+        return cls(
+            workers=settings.render_pool_workers,
+            timeout_seconds=settings.render_pool_timeout_seconds,
+            max_tasks_per_child=settings.render_pool_max_tasks_per_child,
+            type_limits=parse_type_limits(settings.render_pool_type_limits),
+        )
+
+    def handles(self, document_id: int, template_path: Optional[str]) -> bool:
+        """True si ``generate_document_pdf`` debe mandar este documento al pool."""
+        return (
+            settings.render_pool_enabled
+            and not _in_worker
+            and not template_path
+            and int(document_id) in POOL_DOCUMENT_IDS
+        )
+
+    def _ensure_pool(self) -> _Generation:
+        with self._lock:
+            if self._pool is None:
+                # spawn: el hijo no hereda el engine SQLAlchemy ni hilos del proceso padre.
+                ctx = multiprocessing.get_context("spawn")
+                started = ctx.Queue()
+                kwargs: dict[str, Any] = {
+                    "max_workers": self.workers,
+                    "mp_context": ctx,
+                    "initializer": _worker_init,
+                    "initargs": (started,),
+                }
+                try:
+                    executor = ProcessPoolExecutor(
+                        max_tasks_per_child=self.max_tasks_per_child, **kwargs
+                    )
+                except TypeError:
+                    # Python < 3.11: sin reciclaje por cantidad de tareas.
+                    executor = ProcessPoolExecutor(**kwargs)
+                self._pool = _Generation(executor=executor, started=started)
+            return self._pool
+
+    def _semaphore(self, document_id: int) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._semaphores.get(document_id)
+            if sem is None:
+                limit = min(self.type_limits.get(document_id, self.workers), self.workers)
+                sem = self._semaphores[document_id] = threading.BoundedSemaphore(limit)
+            return sem
+
+    def _drain_started(self, gen: _Generation) -> None:
+        """Pasa los avisos de inicio de los hijos a ``_started_at`` (solo renders aún en curso)."""
+        while True:
+            try:
+                token, at = gen.started.get_nowait()
+            except (queue.Empty, OSError, ValueError):
+                return
+            with self._lock:
+                if token in gen.futures:
+                    self._started_at[token] = at
+
+    def _job_started(self, gen: _Generation, token: str) -> Optional[float]:
+        self._drain_started(gen)
+        with self._lock:
+            return self._started_at.get(token)
+
+    def _submit(self, job: RenderJob, token: str) -> tuple[_Generation, Future]:
+        gen = self._ensure_pool()
+        try:
+            future = gen.executor.submit(_run_job, self.target, token, job)
+        except (BrokenProcessPool, RuntimeError):
+            self._recycle(gen, "pool no disponible")
+            gen = self._ensure_pool()
+            future = gen.executor.submit(_run_job, self.target, token, job)
+        with self._lock:
+            gen.futures[token] = future
+        return gen, future
+
+    def _wait(self, gen: _Generation, future: Future, token: str) -> dict[str, Any]:
+        """Resultado de ``future``; lanza ``_Hung`` si lleva más de ``timeout_seconds`` corriendo."""
+        while True:
+            try:
+                return future.result(timeout=POLL_SECONDS)
+            except FuturesTimeoutError:
+                pass
+            began = self._job_started(gen, token)
+            if began is not None and time.time() - began > self.timeout_seconds:
+                raise _Hung()
+
+    def _terminate(self, gen: _Generation) -> None:
+        with self._lock:
+            for token in gen.hung:
+                self._started_at.pop(token, None)
+        processes = list((getattr(gen.executor, "_processes", None) or {}).values())
+        gen.executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            try:
+                process.terminate()
+            except Exception:
+                pass
+        try:
+            gen.started.close()
+            gen.started.cancel_join_thread()
+        except Exception:
+            pass
+
+    def _recycle(self, gen: _Generation, reason: str) -> None:
+        """Descarta ``gen`` ya roto (hijo caído) y termina sus procesos; el próximo render crea otro."""
+        with self._lock:
+            if self._pool is gen:
+                self._pool = None
+            if not gen.retired:
+                gen.retired = True
+                self._stats.recycled += 1
+        logger.warning("Pool de render reiniciado: %s", reason)
+        self._terminate(gen)
+
+    def _retire(self, gen: _Generation, token: str, reason: str) -> None:
+        """Render colgado: lo nuevo va a otro pool y ``gen`` se termina cuando solo le queden
+        renders colgados (o cuando estos ocupen todos sus procesos)."""
+        with self._lock:
+            gen.hung.add(token)
+            first = not gen.retired
+            gen.retired = True
+            if self._pool is gen:
+                self._pool = None
+            if first:
+                self._stats.recycled += 1
+        if first:
+            logger.warning("Pool de render retirado: %s", reason)
+            threading.Thread(
+                target=self._reap, args=(gen,), name="pie360-render-reaper", daemon=True
+            ).start()
+
+    def _reap(self, gen: _Generation) -> None:
+        while True:
+            with self._lock:
+                live = [t for t, f in gen.futures.items() if not f.done()]
+                hung = [t for t in live if t in gen.hung]
+            if len(hung) == len(live) or len(hung) >= self.workers:
+                break
+            time.sleep(POLL_SECONDS)
+        self._terminate(gen)
+
+    def render(self, job: RenderJob) -> Optional[dict[str, Any]]:
+        """Renderiza ``job`` en un proceso hijo (bloquea el hilo llamador, no el GIL).
+
+        Devuelve ``None`` si el trabajo no es serializable: el llamador renderiza en línea.
+        """
+        try:
+            pickle.dumps(job, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            with self._lock:
+                self._stats.inline_fallbacks += 1
+            return None
+
+        doc_id = int(job.document_id)
+        sem = self._semaphore(doc_id)
+        if not sem.acquire(timeout=self.timeout_seconds):
+            with self._lock:
+                self._stats.rejected += 1
+            return _error("Hay demasiados documentos de este tipo generándose; intente nuevamente.")
+        started = time.perf_counter()
+        with self._lock:
+            self._stats.submitted += 1
+            self._stats.active_by_type[doc_id] = self._stats.active_by_type.get(doc_id, 0) + 1
+        ok = False
+        token = uuid.uuid4().hex
+        gen: Optional[_Generation] = None
+        hung = False
+        try:
+            for attempt in range(2):
+                gen, future = self._submit(job, token)
+                try:
+                    result = self._wait(gen, future, token)
+                except _Hung:
+                    hung = True
+                    with self._lock:
+                        self._stats.timeouts += 1
+                    self._retire(gen, token, f"documento {doc_id} superó {self.timeout_seconds:.0f}s")
+                    return _error("La generación del documento superó el tiempo máximo.")
+                except (BrokenProcessPool, CancelledError):
+                    if attempt == 0 and self._job_started(gen, token) is None:
+                        # No alcanzó a empezar en un pool que se cayó o se retiró: va al nuevo.
+                        self._forget(gen, token)
+                        if not gen.retired:
+                            self._recycle(gen, f"proceso caído (documento {doc_id} reenviado)")
+                        continue
+                    self._recycle(gen, f"proceso caído renderizando documento {doc_id}")
+                    return _error("El proceso de generación de documentos terminó inesperadamente.")
+                except Exception as exc:
+                    logger.exception("Render en pool falló (documento %s)", doc_id)
+                    return _error(f"Error generando PDF: {exc}")
+                ok = result.get("status") != "error"
+                return result
+            return _error("El proceso de generación de documentos terminó inesperadamente.")
+        finally:
+            if gen is not None and not hung:
+                self._forget(gen, token)
+            sem.release()
+            with self._lock:
+                self._stats.active_by_type[doc_id] -= 1
+                self._stats.total_run += time.perf_counter() - started
+                if ok:
+                    self._stats.completed += 1
+                else:
+                    self._stats.failed += 1
+
+    def _forget(self, gen: _Generation, token: str) -> None:
+        # Vaciar la cola también evita que el hijo se trabe al salir con el pipe lleno.
+        self._drain_started(gen)
+        with self._lock:
+            gen.futures.pop(token, None)
+            self._started_at.pop(token, None)
+
+    async def render_async(self, job: RenderJob) -> Optional[dict[str, Any]]:
+        """Versión para rutas async: espera en el pool de hilos ``render`` sin bloquear el loop."""
+        from app.backend.core.executors import run_render
+
+        return await run_render(self.render, job)
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            stats = self._stats
+            finished = stats.completed + stats.failed
+            return {
+                "name": "render_pool",
+                "enabled": bool(settings.render_pool_enabled),
+                "max_workers": self.workers,
+                "running": self._pool is not None,
+                "type_limits": {str(k): v for k, v in sorted(self.type_limits.items())},
+                "active_by_type": {str(k): v for k, v in sorted(stats.active_by_type.items()) if v},
+                "submitted": stats.submitted,
+                "completed": stats.completed,
+                "failed": stats.failed,
+                "timeouts": stats.timeouts,
+                "rejected": stats.rejected,
+                "inline_fallbacks": stats.inline_fallbacks,
+                "recycled": stats.recycled,
+                "avg_run_ms": round(stats.total_run / finished * 1000, 2) if finished else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            gen, self._pool = self._pool, None
+        if gen is not None:
+            gen.executor.shutdown(wait=wait, cancel_futures=not wait)
+            try:
+                gen.started.close()
+            except Exception:
+                pass
+
+
+render_pool = RenderPool.from_settings()
+
+
+async def render_document(job: RenderJob) -> Optional[dict[str, Any]]:
+    """Envía ``job`` al pool de procesos y espera el dict del PDF generado."""
+    return await render_pool.render_async(job)
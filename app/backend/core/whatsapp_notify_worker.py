@@ -0,0 +1,31 @@
+"""Worker en proceso que envía los avisos WhatsApp encolados (whatsapp_notify_messages).
+
+Arranca en el lifespan de la app (``WHATSAPP_NOTIFY_WORKER_ENABLED``) con una tarea: la
+concurrencia está dentro de ``process_due_whatsapp_messages`` (``WHATSAPP_SEND_CONCURRENCY``
+envíos a la vez bajo el token bucket), que corre en el pool ``whatsapp``.
+"""
+
+from __future__ import annotations
+
+from app.backend.core.config import settings
+from app.backend.core.executors import run_whatsapp
+from app.backend.core.outbox_worker import OutboxWorker
+
+
+def _process():
+    from app.backend.classes.whatsapp_notify_jobs_class import process_due_whatsapp_messages
+
+    return process_due_whatsapp_messages
+
+
+whatsapp_notify_worker = OutboxWorker(
+    "whatsapp-notify",
+    process=_process,
+    runner=run_whatsapp,
+    workers=lambda: 1,
+    poll_seconds=lambda: settings.whatsapp_notify_poll_seconds,
+)
+
+
+def notify_whatsapp_notify_worker() -> None:
+    whatsapp_notify_worker.notify()
@@ -16,4 +16,12 @@ from app.backend.db.models.agents_usage import (  # noqa: F401
 )
 from app.backend.db.models.document_format_models import DocumentFormatModel  # noqa: F401
 from app.backend.db.models.evaluation_area_templates import EvaluationAreaTemplateModel  # noqa: F401
-from app.backend.db.models.customer_drive_settings import CustomerDriveSettingModel  # noqa: F401
+from app.backend.db.models.customer_drive_settings import (  # noqa: F401
+    CustomerDriveFolderModel,
+    CustomerDriveSettingModel,
+)
+from app.backend.db.models.drive_upload_jobs import DriveUploadJobModel  # noqa: F401
+from app.backend.db.models.whatsapp_notify_jobs import (  # noqa: F401
+    WhatsAppNotifyJobModel,
+    WhatsAppNotifyMessageModel,
+)
@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, UniqueConstraint
 
 from app.backend.db.database import Base
 
@@ -17,3 +17,21 @@ class CustomerDriveSettingModel(Base):
     enabled = Column(Boolean, nullable=False, default=True)
     created_at = Column(DateTime(), nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime(), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CustomerDriveFolderModel(Base):
+    """Caché ruta lógica → folder_id de Drive por customer (evita files.list por segmento)."""
+
+    __tablename__ = "customer_drive_folders"
+    __table_args__ = (
+        UniqueConstraint("customer_id", "path_hash", name="uq_customer_drive_folders_path"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    customer_id = Column(Integer, nullable=False)
+    # sha1(root_folder_id + "\0" + path): la ruta puede superar el largo de un índice MySQL.
+    path_hash = Column(String(40), nullable=False)
+    root_folder_id = Column(String(255), nullable=False)
+    path = Column(Text, nullable=False)
+    folder_id = Column(String(255), nullable=False)
+    created_at = Column(DateTime(), nullable=False, default=datetime.utcnow)
@@ -0,0 +1,40 @@
+"""Outbox de subidas a Google Drive (un job por customer + estudiante + tipo de documento)."""
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, UniqueConstraint
+
+from app.backend.db.database import Base
+
+
+class DriveUploadJobModel(Base):
+    __tablename__ = "drive_upload_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    customer_id = Column(Integer, nullable=False)
+    # "{customer_id}:{student_id}:{document_id}": volver a generar reemplaza el job pendiente.
+    idempotency_key = Column(String(64), nullable=False)
+    student_id = Column(Integer, nullable=False)
+    document_id = Column(Integer, nullable=False)
+    agent_id = Column(String(64), nullable=True)
+    save_id = Column(Integer, nullable=True)
+    # Liceo/año/curso/RUT/tipo/extensión y archivo local (resueltos al encolar).
+    payload_json = Column(Text, nullable=False)
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    # Sube en cada re-encolado; el worker solo cierra el job si no cambió mientras subía.
+    revision = Column(Integer, nullable=False, default=1)
+    next_attempt_at = Column(DateTime(), nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime(), nullable=True)
+    last_error = Column(Text, nullable=True)
+    result_json = Column(Text, nullable=True)
+    created_at = Column(DateTime(), nullable=False, default=datetime.utcnow)
+    updated_at = Column(
+        DateTime(), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    __table_args__ = (
+        UniqueConstraint("idempotency_key", name="uq_drive_upload_jobs_key"),
+        Index("ix_drive_upload_jobs_status_next", "status", "next_attempt_at"),
+        Index("ix_drive_upload_jobs_customer_student", "customer_id", "student_id"),
+    )
@@ -1,7 +1,10 @@
 from app.backend.db.database import Base
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Date, Time, ForeignKey, Float, Boolean, Text, Numeric, Enum, UniqueConstraint, select
-from sqlalchemy.orm import column_property
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Date, Time, ForeignKey, Float, Boolean, Text, Numeric, Enum, UniqueConstraint, Index, event, select
+from sqlalchemy.orm import column_property, validates
+from sqlalchemy.orm.attributes import get_history
 from datetime import datetime
+from app.backend.utils.name_search import FULL_NAME_FOLDED_MAX_LENGTH, name_trigrams, student_full_name_folded
+from app.backend.utils.rut_normalize import RUT_NORMALIZED_MAX_LENGTH, rut_lookup_key
 
 class CustomerModel(Base):
     __tablename__ = 'customers'
@@ -51,6 +54,8 @@ class UserModel(Base):
     customer_id = Column(Integer)
     deleted_status_id = Column(Integer)
     rut = Column(String(255))
+    # Clave de búsqueda indexada de `rut` (ver utils/rut_normalize.py); se sincroniza sola.
+    rut_normalized = Column(String(RUT_NORMALIZED_MAX_LENGTH), index=True)
     full_name = Column(String(255))
     email = Column(String(255))
     phone = Column(String(255))
@@ -58,6 +63,11 @@ class UserModel(Base):
     added_date = Column(DateTime())
     updated_date = Column(DateTime())
 
+    @validates("rut")
+    def _sync_rut_normalized(self, _key, value):
+        self.rut_normalized = rut_lookup_key(value)
+        return value
+
 class UsersRolModel(Base):
     __tablename__ = 'users_rols'
 
@@ -198,10 +208,17 @@ class StudentModel(Base):
     deleted_status_id = Column(Integer)
     school_id = Column(Integer)
     identification_number = Column(String(255))
+    # Clave de búsqueda indexada de `identification_number`; se sincroniza sola.
+    rut_normalized = Column(String(RUT_NORMALIZED_MAX_LENGTH), index=True)
     period_year = Column(String(10), nullable=True)
     added_date = Column(DateTime())
     updated_date = Column(DateTime())
 
+    @validates("identification_number")
+    def _sync_rut_normalized(self, _key, value):
+        self.rut_normalized = rut_lookup_key(value)
+        return value
+
 class StudentAcademicInfoModel(Base):
     __tablename__ = 'student_academic_data'
 
@@ -235,10 +252,14 @@ class StudentPersonalInfoModel(Base):
     proficiency_native_language_id = Column(Integer)
     proficiency_language_used_id = Column(Integer)
     identification_number = Column(String(255))
+    # Clave de búsqueda indexada de `identification_number`; se sincroniza sola.
+    rut_normalized = Column(String(RUT_NORMALIZED_MAX_LENGTH), index=True)
     names = Column(String(255))
     father_lastname = Column(String(255))
     mother_lastname = Column(String(255))
     social_name = Column(String(255))
+    # Nombre completo plegado (ver utils/name_search.py) + trigramas en student_name_trigrams.
+    full_name_folded = Column(String(FULL_NAME_FOLDED_MAX_LENGTH))
     born_date = Column(String(255))
     nationality_id = Column(Integer, nullable=True)
     address = Column(String(255))
@@ -249,6 +270,60 @@ class StudentPersonalInfoModel(Base):
     added_date = Column(DateTime)
     updated_date = Column(DateTime)
 
+    @validates("identification_number")
+    def _sync_rut_normalized(self, _key, value):
+        self.rut_normalized = rut_lookup_key(value)
+        return value
+
+    @validates("names", "father_lastname", "mother_lastname", "social_name")
+    def _sync_full_name_folded(self, key, value):
+        parts = {
+            "names": self.names,
+            "father_lastname": self.father_lastname,
+            "mother_lastname": self.mother_lastname,
+            "social_name": self.social_name,
+        }
+        parts[key] = value
+        self.full_name_folded = student_full_name_folded(**parts)
+        return value
+
+class StudentNameTrigramModel(Base):
+    """Trigramas de student_personal_data.full_name_folded (búsqueda por nombre con índice)."""
+    __tablename__ = 'student_name_trigrams'
+    __table_args__ = (
+        UniqueConstraint('student_personal_data_id', 'trigram', name='uq_student_name_trigrams_row_trigram'),
+        Index('ix_student_name_trigrams_trigram_row', 'trigram', 'student_personal_data_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    student_personal_data_id = Column(Integer, nullable=False)
+    student_id = Column(Integer, index=True)
+    trigram = Column(String(3), nullable=False)
+
+def _replace_student_name_trigrams(connection, personal) -> None:
+    table = StudentNameTrigramModel.__table__
+    connection.execute(table.delete().where(table.c.student_personal_data_id == personal.id))
+    rows = [
+        {"student_personal_data_id": personal.id, "student_id": personal.student_id, "trigram": gram}
+        for gram in sorted(name_trigrams(personal.full_name_folded))
+    ]
+    if rows:
+        connection.execute(table.insert(), rows)
+
+@event.listens_for(StudentPersonalInfoModel, "after_insert")
+def _student_name_trigrams_after_insert(_mapper, connection, target):
+    _replace_student_name_trigrams(connection, target)
+
+@event.listens_for(StudentPersonalInfoModel, "after_update")
+def _student_name_trigrams_after_update(_mapper, connection, target):
+    if get_history(target, "full_name_folded").has_changes() or get_history(target, "student_id").has_changes():
+        _replace_student_name_trigrams(connection, target)
+
+@event.listens_for(StudentPersonalInfoModel, "after_delete")
+def _student_name_trigrams_after_delete(_mapper, connection, target):
+    table = StudentNameTrigramModel.__table__
+    connection.execute(table.delete().where(table.c.student_personal_data_id == target.id))
+
 class StudentDocumentModel(Base):
     __tablename__ = 'birth_certificates'
 
@@ -293,6 +368,9 @@ class ProfessionalModel(Base):
     identification_number = column_property(
         select(UserModel.rut).where(UserModel.id == user_id).correlate_except(UserModel).scalar_subquery()
     )
+    rut_normalized = column_property(
+        select(UserModel.rut_normalized).where(UserModel.id == user_id).correlate_except(UserModel).scalar_subquery()
+    )
 
 class ProfessionalTeachingCourseModel(Base):
     __tablename__ = 'professionals_teachings_courses'
@@ -1101,6 +1179,7 @@ class FolderModel(Base):
     detail_id = Column(Integer, nullable=True)
     professional_id = Column(Integer, nullable=True)  # 0 cuando no viene del frontend
     file = Column(String(255), nullable=True)
+    content_sha256 = Column(String(64), nullable=True)  # SHA-256 del archivo subido (deduplicación)
     period_year = Column(String(255), nullable=True)
     added_date = Column(DateTime, nullable=True)
     updated_date = Column(DateTime, nullable=True)
@@ -0,0 +1,56 @@
+"""Outbox de avisos WhatsApp a apoderados (un job por envío, un mensaje por estudiante)."""
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+
+from app.backend.db.database import Base
+
+
+class WhatsAppNotifyJobModel(Base):
+    __tablename__ = "whatsapp_notify_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    school_id = Column(Integer, nullable=True)
+    dynamic_form_id = Column(Integer, nullable=True)
+    form_name = Column(String(255), nullable=False)
+    # pending → running → done (todos los mensajes en sent/failed).
+    status = Column(String(16), nullable=False, default="pending")
+    total = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(), nullable=False, default=datetime.utcnow)
+    updated_at = Column(
+        DateTime(), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    __table_args__ = (
+        Index("ix_whatsapp_notify_jobs_form", "dynamic_form_id"),
+    )
+
+
+class WhatsAppNotifyMessageModel(Base):
+    __tablename__ = "whatsapp_notify_messages"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(Integer, nullable=False)
+    student_id = Column(Integer, nullable=False)
+    student_name = Column(String(255), nullable=True)
+    # Dígitos E.164 ya normalizados; NULL si el apoderado no tiene celular válido.
+    phone = Column(String(32), nullable=True)
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(), nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime(), nullable=True)
+    # Tanda del worker que tomó el mensaje (UPDATE ... WHERE claim_token IS NULL).
+    claim_token = Column(String(32), nullable=True)
+    provider_message_id = Column(String(128), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(), nullable=False, default=datetime.utcnow)
+    updated_at = Column(
+        DateTime(), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    __table_args__ = (
+        Index("ix_whatsapp_notify_messages_job", "job_id"),
+        Index("ix_whatsapp_notify_messages_status_next", "status", "next_attempt_at"),
+        Index("ix_whatsapp_notify_messages_claim", "claim_token"),
+    )
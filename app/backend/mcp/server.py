@@ -18,7 +18,7 @@ agents_mcp = FastMCP(
     instructions=(
         "PIE360 Agents MCP tools:\n"
         "1) create_document — genera Word/PDF, guarda en estudiante, rellena ficha y "
-        "sube a Google Drive (Liceo/Año/Curso/RUT/RUT_TipoDocumento).\n"
+        "encola la subida a Google Drive (Liceo/Año/Curso/RUT/RUT_TipoDocumento).\n"
         "2) store_data — solo guarda campos pending (sin generar aún).\n"
         "3) search_agent_files — busca texto en archivos del agente (_derived/).\n"
         "4) get_student_psychopedagogical_evaluation — lee el psicopedagógico "
@@ -27,6 +27,7 @@ agents_mcp = FastMCP(
         "formulario de observación (Formularios PIE360) si el cuestionario/Excel "
         "de Files no trae al estudiante.\n"
         "6) save_document_to_google_drive — re-sube un documento ya generado al árbol Drive.\n"
+        "7) get_drive_upload_status — estado de una subida en cola (pending/running/done/failed).\n"
         "Auth: parámetro secret = MCP_SECRET.\n"
         "Agregar tools en app/backend/mcp/tools/ (una por archivo)."
     ),
@@ -18,6 +18,7 @@ def register_tools(mcp: "FastMCP") -> None:
 
     from app.backend.mcp.tools import (
         create_document,
+        get_drive_upload_status,
         get_student_psychopedagogical_evaluation,
         get_student_psychopedagogical_form_answers,
         save_document_to_google_drive,
@@ -31,5 +32,6 @@ def register_tools(mcp: "FastMCP") -> None:
     get_student_psychopedagogical_evaluation.register(mcp)
     get_student_psychopedagogical_form_answers.register(mcp)
     save_document_to_google_drive.register(mcp)
+    get_drive_upload_status.register(mcp)
 
     _registered = True
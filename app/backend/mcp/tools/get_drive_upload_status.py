@@ -0,0 +1,59 @@
+"""Tool MCP: get_drive_upload_status — estado de una subida a Google Drive en cola."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from app.backend.classes.drive_upload_jobs_class import DriveUploadJobsClass
+from app.backend.db.database import SessionLocal
+from app.backend.mcp.auth import check_mcp_secret
+
+if TYPE_CHECKING:
+    from mcp.server.fastmcp import FastMCP
+
+
+def register(mcp: "FastMCP") -> None:
+    @mcp.tool()
+    def get_drive_upload_status(
+        customer_id: int,
+        job_id: int = 0,
+        student_id: int = 0,
+        document_id: int = 0,
+        secret: str = "",
+    ) -> dict:
+        """Estado de la subida a Google Drive de un documento generado.
+
+        create_document y save_document_to_google_drive encolan la subida y devuelven
+        jobId. Consulta por job_id, o por student_id + document_id (última subida de
+        ese documento del estudiante).
+
+        status: pending (en cola o esperando reintento), running, done (trae drive_path
+        y web_view_link) o failed (lastError explica el motivo).
+
+        Args:
+            customer_id: Cliente dueño del Drive.
+            job_id: ID devuelto al encolar (recomendado).
+            student_id: Estudiante (si no hay job_id).
+            document_id: Tipo de documento del catálogo (si no hay job_id).
+            secret: MCP_SECRET.
+        """
+        check_mcp_secret(secret)
+        db = SessionLocal()
+        try:
+            jobs = DriveUploadJobsClass(db)
+            if int(job_id or 0) > 0:
+                result = jobs.get(job_id=int(job_id), customer_id=int(customer_id))
+            elif int(student_id or 0) > 0 and int(document_id or 0) > 0:
+                result = jobs.find(
+                    customer_id=int(customer_id),
+                    student_id=int(student_id),
+                    document_id=int(document_id),
+                )
+            else:
+                raise ValueError("Indica job_id, o student_id y document_id.")
+        finally:
+            db.close()
+
+        if result.get("status") == "error":
+            raise ValueError(result.get("message") or "Subida no encontrada")
+        return {"ok": True, **(result.get("data") or {})}
@@ -32,7 +32,9 @@ def register(mcp: "FastMCP") -> None:
           {RUT_numerico}_{Tipo de documento}.{ext}
           Ejemplo: 274309032_Informe a la Familia.docx
 
-        Normalmente create_document ya sube a Drive al generar. Usa esta tool
+        La subida va a una cola en segundo plano: la respuesta trae jobId y status
+        (pending/running/done/failed); consulta el avance con get_drive_upload_status.
+        Normalmente create_document ya encola la subida al generar. Usa esta tool
         para reintentar o subir de nuevo un save_id concreto.
 
         Args:
@@ -68,5 +70,7 @@ def register(mcp: "FastMCP") -> None:
             "web_view_link": data.get("web_view_link"),
             "filename": data.get("filename"),
             "replaced": data.get("replaced"),
+            "jobId": data.get("jobId"),
+            "status": data.get("status"),
             "googleDrive": data,
         }
@@ -13,7 +13,9 @@ from app.backend.classes.agents_rate_limit_class import (
     AgentsRateLimitClass,
     can_use_agents_chat,
 )
+from app.backend.classes.drive_upload_jobs_class import DriveUploadJobsClass
 from app.backend.core.config import settings
+from app.backend.core.executors import run_db
 from app.backend.core.responses import api_error, api_response
 from app.backend.db.database import get_db
 from app.backend.db.models import UserModel
@@ -29,6 +31,8 @@ from app.backend.schemas.agents import (
     AgentsMcpStoreDataRequest,
     AgentsSettingsUpdateRequest,
 )
+from app.backend.utils.agents_llm_client import llm_pool_metrics
+from app.backend.utils.upload_sink import StagedUpload, UploadTooLargeError, stage_upload_file, staging_dir
 
 agents = APIRouter(
     prefix="/agents",
@@ -273,6 +277,29 @@ def mcp_save_document_to_google_drive_rest(
     return api_response(message=result.get("message"), data=result.get("data"))
 
 
+@agents.get("/mcp/drive_uploads/{job_id}")
+def mcp_drive_upload_status_rest(
+    job_id: int,
+    customer_id: int = Query(...),
+    db: Session = Depends(get_db),
+    authorization: str | None = Header(default=None),
+    x_mcp_secret: str | None = Header(default=None, alias="X-MCP-Secret"),
+):
+    """REST gemelo de get_drive_upload_status: estado de una subida a Drive en cola."""
+    if not _mcp_secret_ok(authorization, x_mcp_secret):
+        return api_error(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            message="MCP secret inválido.",
+        )
+    result = DriveUploadJobsClass(db).get(job_id=job_id, customer_id=customer_id)
+    if result.get("status") == "error":
+        return api_error(
+            status_code=result.get("http_status", status.HTTP_400_BAD_REQUEST),
+            message=result.get("message") or "Error",
+        )
+    return api_response(data=result.get("data"))
+
+
 @agents.get("/documents/catalog")
 def list_catalog_documents(
     db: Session = Depends(get_db),
@@ -302,6 +329,19 @@ def get_agents_settings(
     return api_response(data=data)
 
 
+@agents.get("/llm/metrics")
+async def get_llm_pool_metrics(
+    session_user: UserModel = Depends(get_current_active_user),
+):
+    """Pool HTTP del proveedor LLM: streams activos, conexiones nuevas vs reutilizadas."""
+    if int(getattr(session_user, "rol_id", 0) or 0) != 1:
+        return api_error(
+            status_code=status.HTTP_403_FORBIDDEN,
+            message="Only the superadministrator can view LLM metrics.",
+        )
+    return api_response(data=llm_pool_metrics())
+
+
 @agents.get("/reports")
 def agents_usage_reports(
     customer_id: int | None = Query(None),
@@ -513,15 +553,19 @@ async def upload_agent_document_template(
             status_code=status.HTTP_400_BAD_REQUEST,
             message=err or "customer_id is required",
         )
-    data = await file.read()
-    result = AgentsClass(db).save_document_template(
-        agent_id,
-        cid,
-        document_id,
-        document_name,
-        data,
-        file.filename or "template.docx",
-    )
+    try:
+        staged = await stage_upload_file(file, staging_dir())
+    except UploadTooLargeError as exc:
+        return api_error(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, message=str(exc))
+    with staged:
+        result = AgentsClass(db).save_document_template(
+            agent_id,
+            cid,
+            document_id,
+            document_name,
+            staged,
+            file.filename or "template.docx",
+        )
     if result.get("status") == "error":
         return api_error(
             status_code=result.get("http_status", status.HTTP_400_BAD_REQUEST),
@@ -531,14 +575,14 @@ async def upload_agent_document_template(
 
 
 @agents.post("/{agent_id}/chat")
-def chat_agent(
+async def chat_agent(
     agent_id: str,
     body: AgentChatRequest,
     customer_id: int | None = Query(None),
     db: Session = Depends(get_db),
     session_user: UserModel = Depends(get_current_active_user),
 ):
-    denied = _forbid_agents_access(session_user, db)
+    denied = await run_db(_forbid_agents_access, session_user, db)
     if denied:
         return denied
     cid, err = _resolve_customer_id(session_user, customer_id)
@@ -552,7 +596,8 @@ def chat_agent(
     user_id = getattr(session_user, "id", None)
     period_year = getattr(session_user, "period_year", None)
 
-    rate = AgentsRateLimitClass(db).check_and_register_chat(
+    rate = await run_db(
+        AgentsRateLimitClass(db).check_and_register_chat,
         user_id=int(user_id) if user_id else None,
         customer_id=int(cid),
         school_id=int(school_id) if school_id else None,
@@ -563,7 +608,7 @@ def chat_agent(
             message=rate.get("message") or "Rate limit exceeded",
         )
 
-    def event_stream():
+    async def event_stream():
         chat = AgentsChatClass(
             db,
             customer_id=cid,
@@ -571,7 +616,7 @@ def chat_agent(
             user_id=int(user_id) if user_id else None,
             period_year=_period_year_or_none(period_year),
         )
-        for event in chat.stream_chat(
+        async for event in chat.astream_chat(
             agent_id,
             body.message,
             student_id=body.student_id,
@@ -772,13 +817,18 @@ async def upload_agent_files(
             message="relative_paths must be a JSON array.",
         )
 
-    payload: list[tuple[str, bytes]] = []
-    for index, upload in enumerate(files):
-        data = await upload.read()
-        rel = str(paths[index] if index < len(paths) else upload.filename or "file")
-        payload.append((rel, data))
-
-    result = AgentsClass(db).upload_files(agent_id, cid, payload)
+    payload: list[tuple[str, StagedUpload]] = []
+    try:
+        for index, upload in enumerate(files):
+            staged = await stage_upload_file(upload, staging_dir())
+            rel = str(paths[index] if index < len(paths) else upload.filename or "file")
+            payload.append((rel, staged))
+        result = AgentsClass(db).upload_files(agent_id, cid, payload)
+    except UploadTooLargeError as exc:
+        return api_error(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, message=str(exc))
+    finally:
+        for _rel, staged in payload:
+            staged.discard()
     if result.get("status") == "error":
         return api_error(
             status_code=result.get("http_status", status.HTTP_400_BAD_REQUEST),
@@ -10,6 +10,7 @@ from app.backend.classes.audit_class import AuditClass
 from app.backend.classes.email_class import EmailServiceClass
 from app.backend.auth.auth_user import get_current_active_user
 from app.backend.utils.users_rol_period import users_rol_period_clause
+from app.backend.utils.principal_cache import invalidate_principal
 from app.backend.db.models import (
     RolModel,
     ProfessionalModel,
@@ -270,6 +271,7 @@ def reset_password(body: ResetPasswordBody, db: Session = Depends(get_db)):
         user.hashed_password = auth.generate_bcrypt_hash(body.new_password)
         user.updated_date = datetime.utcnow()
         db.commit()
+        invalidate_principal(user.id)
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
@@ -488,6 +490,7 @@ def select_role(rol_id: int, session_user: UserLogin = Depends(get_current_activ
             },
             token_expires,
         )
+        invalidate_principal(user_row.id)
         data = {
             "access_token": token,
             "user_id": user_row.id,
@@ -612,6 +615,7 @@ def select_school(school_id: int, session_user: UserLogin = Depends(get_current_
             'period_year': py_tok,
         }
         token = AuthenticationClass(db).create_token(token_data, token_expires)
+        invalidate_principal(user_row.id)
         expires_in_seconds = token_expires.total_seconds()
         
         data = {
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Body, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Body, Depends, Header
 from app.backend.db.database import get_db
 from sqlalchemy.orm import Session
 from app.backend.classes.career_type_class import CareerTypeClass
 from app.backend.schemas import CareerTypeList, StoreCareerType, UpdateCareerType
+from app.backend.utils.catalog_cache import cached_catalog, catalog_response
 
 career_types = APIRouter(
     prefix="/career_types",
@@ -121,14 +124,17 @@ async def delete_career_type(
 # Listar todos los tipos de carrera sin paginación
 @career_types.get("/list")
 async def list_all_career_types(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Session = Depends(get_db)
 ):
     try:
-        # Obtener todos los tipos de carrera sin paginación
+        # Obtener todos los tipos de carrera sin paginación (desde la caché de catálogos)
         career_type_class = CareerTypeClass(db)
-        result = career_type_class.get_all(page=0, items_per_page=None)
+        entry = cached_catalog("career_types", "list", lambda: career_type_class.get_all(page=0, items_per_page=None))
 
-        return result
+        if entry.etag is None:
+            return entry.data
+        return catalog_response(entry, if_none_match, content=entry.data)
 
     except Exception as e:
         return {
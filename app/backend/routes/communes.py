@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
@@ -7,6 +9,7 @@ from app.backend.classes.commune_class import CommuneClass
 from app.backend.classes.inspection_api_client import InspectionApiClient
 from app.backend.db.database import get_db
 from app.backend.schemas import CommuneList, StoreCommune, UpdateCommune, UserLogin
+from app.backend.utils.catalog_cache import cached_catalog, catalog_response
 
 communes = APIRouter(prefix="/communes", tags=["Communes"])
 
@@ -238,10 +241,12 @@ def import_from_inspection(
 
 @communes.get("/list")
 def list_all(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     session_user: UserLogin = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    result = CommuneClass(db).get_all(page=0, items_per_page=0)
+    entry = cached_catalog("communes", "list", lambda: CommuneClass(db).get_all(page=0, items_per_page=0))
+    result = entry.data
 
     if isinstance(result, dict) and result.get("status") == "error":
         return JSONResponse(
@@ -253,8 +258,9 @@ def list_all(
             },
         )
 
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
+    return catalog_response(
+        entry,
+        if_none_match,
         content={
             "status": 200,
             "message": "Communes list retrieved successfully",
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from app.backend.schemas import UserLogin, CourseList, StoreCourse, UpdateCourse
 from app.backend.classes.course_class import CourseClass
 from app.backend.classes.inspection_api_client import InspectionApiClient
+from app.backend.classes.inspection_school_sync_class import InspectionSchoolSyncClass
 from app.backend.classes.school_class import SchoolClass
 from app.backend.classes.teaching_class import _normalize_school_id
 from sqlalchemy import or_
@@ -305,6 +306,63 @@ def import_from_inspection(
     )
 
 
+@courses.get("/inspection_sync_diff")
+def inspection_sync_diff(
+    period_year: Optional[int] = Query(None, ge=2000, le=2100, description="Año escolar para Inspection y period_year"),
+    session_user: UserLogin = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Cursos y alumnos del colegio en Inspection vs. tablas locales (nuevos, cambios, ausentes); no importa nada."""
+    school_id = _resolve_session_school_id(session_user, db)
+    if school_id is None:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "status": 400,
+                "message": "No se pudo determinar el colegio (school_id) de la sesión",
+                "data": None,
+            },
+        )
+
+    client = InspectionApiClient()
+    if not client.is_configured():
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={
+                "status": 503,
+                "message": "Inspection API not configured (INSPECTION_API_USERNAME / INSPECTION_API_PASSWORD)",
+                "data": None,
+            },
+        )
+
+    anio = int(period_year) if period_year is not None else datetime.now().year
+    result = InspectionSchoolSyncClass(db, client).diff(school_id, anio)
+    if result.get("status") == "error":
+        status_code = status.HTTP_502_BAD_GATEWAY if result.get("source") else status.HTTP_500_INTERNAL_SERVER_ERROR
+        return JSONResponse(
+            status_code=status_code,
+            content={
+                "status": int(status_code),
+                "message": result.get("message", "Error al comparar con Inspection"),
+                "data": None,
+            },
+        )
+
+    c, s = result["courses"], result["students"]
+    msg = (
+        f"Cursos: {len(c['new'])} nuevos, {len(c['renamed'])} con otro nombre, {len(c['missing_remote'])} sin par remoto. "
+        f"Alumnos: {len(s['new'])} nuevos, {len(s['course_changed'])} con otro curso, {len(s['missing_remote'])} sin par remoto."
+    )
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "status": 200,
+            "message": msg,
+            "data": result,
+        },
+    )
+
+
 @courses.post("/store")
 def store(
     course: StoreCourse,
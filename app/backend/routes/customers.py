@@ -20,6 +20,7 @@ from app.backend.classes.teaching_class import TeachingClass
 from app.backend.classes.customer_drive_class import CustomerDriveClass
 from app.backend.db.models import RolModel, SchoolModel, UserModel, UsersRolModel
 from app.backend.auth.auth_user import get_current_active_user
+from app.backend.utils.principal_cache import invalidate_principal
 from app.backend.utils.users_rol_period import resolve_period_year_for_session, users_rol_period_clause
 from datetime import datetime as dt
 from pydantic import BaseModel, Field
@@ -686,6 +687,7 @@ def add_user_to_customer_rol(
         )
         db.add(rel)
     db.commit()
+    invalidate_principal(user_id)
 
     return JSONResponse(status_code=status.HTTP_201_CREATED, content={"status": 201, "message": "Usuario asignado al rol", "data": {"user_id": int(user_id), "rol_id": rol_id}})
 
@@ -779,6 +781,7 @@ def remove_user_from_customer_rol(
         rel.deleted_status_id = 1
         rel.updated_date = now
     db.commit()
+    invalidate_principal(user_id)
 
     return JSONResponse(
         status_code=status.HTTP_200_OK,
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, status
 from fastapi.responses import JSONResponse
 from app.backend.db.database import get_db
 from app.backend.auth.auth_user import get_current_active_user
 from app.backend.schemas import UserLogin
 from app.backend.classes.diversity_criterion_class import DiversityCriterionClass
 from sqlalchemy.orm import Session
+from app.backend.utils.catalog_cache import cached_catalog, catalog_response
 
 diversity_criteria = APIRouter(
     prefix="/diversity_criteria",
@@ -14,19 +17,22 @@ diversity_criteria = APIRouter(
 
 @diversity_criteria.get("")
 def get_list(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     session_user: UserLogin = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Lista criterios de diversidad activos (catálogo), ordenados por sort_order."""
     try:
-        result = DiversityCriterionClass(db).get()
+        entry = cached_catalog("diversity_criteria", "list", lambda: DiversityCriterionClass(db).get())
+        result = entry.data
         if result.get("status") == "error":
             return JSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"status": 500, "message": result.get("message", "Error al listar"), "data": []},
             )
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
+        return catalog_response(
+            entry,
+            if_none_match,
             content={"status": 200, "message": "OK", "data": result.get("data", [])},
         )
     except Exception as e:
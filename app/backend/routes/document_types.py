@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
 from app.backend.db.database import get_db
 from app.backend.classes.document_type_class import DocumentTypeClass
 from app.backend.schemas import UserLogin, DocumentTypeList, StoreDocumentType, UpdateDocumentType
 from app.backend.auth.auth_user import get_current_active_user
+from app.backend.utils.catalog_cache import cached_catalog, catalog_response
 
 document_types = APIRouter(
     prefix="/document_types",
@@ -38,12 +41,16 @@ def index(
 
 @document_types.get("/list")
 def get_list(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     session_user: UserLogin = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     doc_type_class = DocumentTypeClass(db=db)
 
-    result = doc_type_class.get_all(page=0, items_per_page=0, document=None)
+    entry = cached_catalog(
+        "document_types", "list", lambda: doc_type_class.get_all(page=0, items_per_page=0, document=None)
+    )
+    result = entry.data
 
     if isinstance(result, dict) and result.get("status") == "error":
         raise HTTPException(
@@ -51,11 +58,15 @@ def get_list(
             detail=result.get("message")
         )
 
-    return {
-        "status": 200,
-        "message": "success",
-        "data": result
-    }
+    return catalog_response(
+        entry,
+        if_none_match,
+        content={
+            "status": 200,
+            "message": "success",
+            "data": result
+        },
+    )
 
 @document_types.post("/store")
 def store(
@@ -1,22 +1,9 @@
 from typing import Optional, Any
 import unicodedata
-from fastapi import APIRouter, status, UploadFile, File, Form, Depends, Body, Query
-from fastapi.responses import JSONResponse, FileResponse, Response
+from fastapi import APIRouter, status, UploadFile, File, Form, Depends, Body, Header, Query
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from app.backend.classes.documents_class import DocumentsClass
-from app.backend.classes.docx_register_book_layout import (
-    clone_register_book_section_b_blocks,
-    clone_course_record_support_tables,
-    clone_pai_support_tables,
-    expand_raeg_intervention_rows,
-    expand_learning_achievement_rows,
-    apply_learning_achievement_period_top_spacing,
-    clone_course_activity_record_blocks,
-    clone_course_community_activity_blocks,
-    clone_course_acta_reunion_blocks,
-    expand_rafc_participant_rows,
-    expand_tcee_participant_rows,
-    expand_arn_participant_rows,
-)
+from app.backend.classes.docx_register_book_layout import RegisterBookDocxBuilder
 from app.backend.classes.course_activity_record_class import (
     _load_attendees,
     _row_to_dict,
@@ -26,6 +13,7 @@ from app.backend.classes.course_activity_record_class import (
     attendees_rafcnit_line,
 )
 from app.backend.classes.student_class import StudentClass
+from app.backend.classes.student_document_file_class import FolderClass
 from app.backend.classes.health_evaluation_class import HealthEvaluationClass
 from app.backend.classes.progress_status_student_class import ProgressStatusStudentClass
 from app.backend.classes.progress_status_individual_support_class import ProgressStatusIndividualSupportClass
@@ -67,13 +55,11 @@ from app.backend.classes.pedagogical_evaluation_classroom_eighth_grade_class imp
 from app.backend.classes.pedagogical_evaluation_classroom_first_grade_secondary_class import PedagogicalEvaluationClassroomFirstGradeSecondaryClass
 from app.backend.classes.pedagogical_evaluation_classroom_second_grade_secondary_class import PedagogicalEvaluationClassroomSecondGradeSecondaryClass
 from app.backend.classes.professional_document_assignment_class import ProfessionalDocumentAssignmentClass
-from app.backend.db.database import get_db
+from app.backend.db.database import SessionLocal, get_db
 from app.backend.db.models import (
     BirthCertificateDocumentModel,
     FolderModel,
     DocumentModel,
-    GenderModel,
-    NationalityModel,
     ProfessionalModel,
     UserModel,
     StudentModel,
@@ -121,8 +107,6 @@ from app.backend.db.models import (
     SchoolModel,
     StudentAcademicInfoModel,
     StudentPersonalInfoModel,
-    CommuneModel,
-    RegionModel,
     SpecialEducationalNeedModel,
     StudentGuardianModel,
     InterconsultationModel,
@@ -130,6 +114,7 @@ from app.backend.db.models import (
     PsychopedagogicalEvaluationInfoModel,
 )
 from app.backend.auth.auth_user import get_current_active_user
+from app.backend.core.executors import executor_metrics, run_db, run_render
 from app.backend.schemas import (
     UserLogin,
     CreateDocumentRequest,
@@ -150,6 +135,15 @@ import logging
 from datetime import datetime, date
 from collections import defaultdict
 from app.backend.utils.professional_display import professional_display_fields, map_professional_id_to_display_name
+from app.backend.core.config import settings
+from app.backend.utils.course_document_zip import CourseExportEntry, iter_rendered, stream_course_zip
+from app.backend.utils.upload_sink import StagedUpload, UploadTooLargeError, stage_upload_file
+from app.backend.utils.catalog_cache import cached_catalog, catalog_name
+from app.backend.utils.generated_document_cache import (
+    etag_matches,
+    response_etag,
+    track_generation_etags,
+)
 from app.backend.utils.evaluation_area_documents import (
     EVALUATION_AREA_DOCUMENT_IDS,
     ensure_evaluation_area_catalog_document,
@@ -219,6 +213,7 @@ def _upsert_folder_student_document(
     professional_id: Optional[int],
     detail_id: Optional[int] = None,
     always_new_version: bool = False,
+    content_sha256: Optional[str] = None,
 ) -> FolderModel:
     """
     Por defecto: actualiza la última fila folders del mismo estudiante/documento/período
@@ -260,6 +255,7 @@ def _upsert_folder_student_document(
             detail_id=detail_id,
             professional_id=professional_id or 0,
             file=canonical_filename,
+            content_sha256=content_sha256,
             period_year=period_str,
             added_date=datetime.now(),
             updated_date=datetime.now(),
@@ -280,6 +276,7 @@ def _upsert_folder_student_document(
             except OSError:
                 pass
         last.file = canonical_filename
+        last.content_sha256 = content_sha256
         last.school_id = school_id
         last.course_id = course_id
         last.professional_id = professional_id or 0
@@ -300,6 +297,7 @@ def _upsert_folder_student_document(
         detail_id=detail_id,
         professional_id=professional_id or 0,
         file=canonical_filename,
+        content_sha256=content_sha256,
         period_year=period_str,
         added_date=datetime.now(),
         updated_date=datetime.now(),
@@ -311,6 +309,36 @@ def _upsert_folder_student_document(
     return rec
 
 
+def _mark_assignments_after_upload(
+    db: Session,
+    student_data: dict,
+    student_id: int,
+    catalog_document_id: int,
+    document_type_id: int,
+    period_year: Optional[int],
+    professional_id: Optional[int],
+    course_id: Optional[int],
+) -> None:
+    """Marca asignaciones profesionales como completadas (status 1) si aplica."""
+    try:
+        ai = (student_data.get("academic_info") or {}) if isinstance(student_data, dict) else {}
+        resolved_course = int(course_id) if course_id and int(course_id) > 0 else None
+        if resolved_course is None and isinstance(ai, dict):
+            c = ai.get("course_id")
+            if c is not None and int(c) > 0:
+                resolved_course = int(c)
+        ProfessionalDocumentAssignmentClass(db).mark_completed_after_folder_upload(
+            period_year=period_year,
+            student_id=student_id,
+            document_catalog_id=int(catalog_document_id),
+            document_type_id=int(document_type_id),
+            professional_id=int(professional_id) if professional_id is not None else None,
+            course_id=resolved_course,
+        )
+    except Exception:
+        pass
+
+
 def _catalog_row_is_informe_evaluacion_psicomotriz(document_id: int, db: Session) -> bool:
     """True si `document_id` es la fila del catálogo `documents` para Informe de evaluación psicomotriz."""
     row = (
@@ -368,7 +396,7 @@ def _psychoped_doc27_cognitive_image_path(db: Session, student_id: int) -> Optio
 
 
 import uuid
-from shutil import copy as shutil_copy, move
+from shutil import move
 
 documents = APIRouter(
     prefix="/documents",
@@ -382,6 +410,10 @@ async def debug_doc19_data(
     db: Session = Depends(get_db),
 ):
     """Devuelve los datos que se enviarían al PDF del documento 19 (para depurar)."""
+    return await run_db(_debug_doc19_data_sync, student_id, db)
+
+
+def _debug_doc19_data_sync(student_id: int, db: Session):
     try:
         student_service = StudentClass(db)
         student_result = student_service.get(student_id)
@@ -495,10 +527,15 @@ async def create_document(
     Crea un documento procesado a partir de un PDF subido.
     Reemplaza [STUDENT_NAMES] con el nombre del estudiante proporcionado.
     """
+    content = await file.read()
+    return await run_render(_create_document_sync, content, file.filename or "", document_data)
+
+
+def _create_document_sync(file_content: bytes, filename: str, document_data: CreateDocumentRequest):
     temp_file_path = None
     try:
         # Validar que el archivo sea PDF
-        if not file.filename.endswith('.pdf'):
+        if not filename.endswith('.pdf'):
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={
@@ -510,8 +547,7 @@ async def create_document(
         
         # Guardar el archivo temporalmente
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            content = await file.read()
-            temp_file.write(content)
+            temp_file.write(file_content)
             temp_file_path = temp_file.name
         
         # Procesar el documento usando el método parent_authorization
@@ -592,8 +628,46 @@ async def upload_document(
     db: Session = Depends(get_db),
 ):
     """
-    Sube un documento (PDF o imagen).
+    Sube un documento (PDF o imagen). El archivo se copia por trozos a disco (sin leerlo
+    entero en memoria); si es idéntico a la última versión guardada no se vuelve a escribir.
     """
+    try:
+        staged = await stage_upload_file(file, "files/system/students")
+    except UploadTooLargeError as e:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"status": 413, "message": str(e), "data": None},
+        )
+    try:
+        return await run_db(
+            _upload_document_sync,
+            student_id,
+            document_id,
+            staged,
+            file.filename,
+            title,
+            period_year,
+            professional_id,
+            course_id,
+            session_user,
+            db,
+        )
+    finally:
+        staged.discard()
+
+
+def _upload_document_sync(
+    student_id: int,
+    document_id: int,
+    staged: StagedUpload,
+    original_filename: Optional[str],
+    title: Optional[str],
+    period_year: Optional[int],
+    professional_id: Optional[int],
+    course_id: Optional[int],
+    session_user: UserLogin,
+    db: Session,
+):
     try:
         # Obtener el estudiante usando la clase
         student_service = StudentClass(db)
@@ -647,7 +721,7 @@ async def upload_document(
                 )
         
         # Obtener la extensión del archivo original
-        file_extension = Path(file.filename).suffix.lower() if file.filename else ''
+        file_extension = Path(original_filename).suffix.lower() if original_filename else ''
 
         # Nombre canónico (misma ruta al resubir el mismo documento → sobrescribe en disco)
         unique_filename = _canonical_student_document_filename(
@@ -658,10 +732,6 @@ async def upload_document(
         upload_dir.mkdir(parents=True, exist_ok=True)
         file_path = upload_dir / unique_filename
 
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
-
         student_school_id = int(student_data.get("school_id") or 0) if isinstance(student_data, dict) else 0
         academic_info = (student_data.get("academic_info") or {}) if isinstance(student_data, dict) else {}
         student_course_id = int(academic_info.get("course_id") or 0) if isinstance(academic_info, dict) else 0
@@ -680,6 +750,41 @@ async def upload_document(
             else str(getattr(session_user, "period_year", "") or "").strip() or str(datetime.now().year)
         )
 
+        # Catálogo 42 guarda título por versión: siempre se registra la subida.
+        duplicate = (
+            None
+            if int(document_id) == 42
+            else FolderClass(db).find_identical_upload(
+                student_id, catalog_document_id, resolved_period_year, staged, upload_dir
+            )
+        )
+        if duplicate is not None:
+            _mark_assignments_after_upload(
+                db, student_data, student_id, catalog_document_id, document_type_id,
+                period_year, professional_id, course_id,
+            )
+            return JSONResponse(
+                status_code=status.HTTP_200_OK,
+                content={
+                    "status": 200,
+                    "message": "El documento ya estaba cargado (mismo contenido)",
+                    "data": {
+                        "id": duplicate.id,
+                        "document_id": catalog_document_id,
+                        "version_id": duplicate.version_id,
+                        "student_id": student_id,
+                        "document_type_id": document_type_id,
+                        "filename": duplicate.file,
+                        "file_path": str(upload_dir / duplicate.file),
+                        "original_filename": original_filename,
+                        "sha256": staged.sha256,
+                        "deduplicated": True,
+                    },
+                },
+            )
+
+        staged.commit(file_path)
+
         detail_id_value: Optional[int] = None
         if document_id == 1:
             birth_row = (
@@ -734,6 +839,7 @@ async def upload_document(
                 int(catalog_document_id) == 42
                 or int(catalog_document_id) in EVALUATION_AREA_DOCUMENT_IDS
             ),
+            content_sha256=staged.sha256,
         )
         new_version_id = new_folder.version_id
 
@@ -752,24 +858,10 @@ async def upload_document(
             except Exception:
                 db.rollback()
 
-        # Marcar asignaciones profesionales como completadas (status 1) si aplica
-        try:
-            ai = (student_data.get("academic_info") or {}) if isinstance(student_data, dict) else {}
-            resolved_course = int(course_id) if course_id and int(course_id) > 0 else None
-            if resolved_course is None and isinstance(ai, dict):
-                c = ai.get("course_id")
-                if c is not None and int(c) > 0:
-                    resolved_course = int(c)
-            ProfessionalDocumentAssignmentClass(db).mark_completed_after_folder_upload(
-                period_year=period_year,
-                student_id=student_id,
-                document_catalog_id=int(catalog_document_id),
-                document_type_id=int(document_type_id),
-                professional_id=int(professional_id) if professional_id is not None else None,
-                course_id=resolved_course,
-            )
-        except Exception:
-            pass
+        _mark_assignments_after_upload(
+            db, student_data, student_id, catalog_document_id, document_type_id,
+            period_year, professional_id, course_id,
+        )
 
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
@@ -784,7 +876,9 @@ async def upload_document(
                     "document_type_id": document_type_id,
                     "filename": unique_filename,
                     "file_path": str(file_path),
-                    "original_filename": file.filename
+                    "original_filename": original_filename,
+                    "sha256": staged.sha256,
+                    "deduplicated": False,
                 }
             }
         )
@@ -809,9 +903,17 @@ async def list_documents(
     """
     Lista los documentos configurados, devolviendo solo document_type_id y document.
     """
+    return await run_db(_list_documents_sync, filters, db)
+
+
+def _list_documents_sync(filters: DocumentListRequest, db: Session):
     try:
         documents = DocumentsClass(db)
-        data = documents.get_all(filters.document_type_id, filters.career_type_id)
+        data = cached_catalog(
+            "documents",
+            ("list", filters.document_type_id, filters.career_type_id),
+            lambda: documents.get_all(filters.document_type_id, filters.career_type_id),
+        ).data
 
         if isinstance(data, dict) and data.get("status") == "error":
             return JSONResponse(
@@ -888,8 +990,7 @@ def _generate_anamnesis_docx_internal(student_id: int, db: Session) -> dict:
         male = "0"
         gender_id = personal.get("gender_id")
         if gender_id and db:
-            g = db.query(GenderModel).filter(GenderModel.id == gender_id).first()
-            gn = str(g.gender).lower().strip() if g and g.gender else ""
+            gn = str(catalog_name(db, "genders", gender_id) or "").lower().strip()
             if gn:
                 if "femenino" in gn or gn == "f" or "female" in gn or "mujer" in gn:
                     female, male = "1", "0"
@@ -897,9 +998,9 @@ def _generate_anamnesis_docx_internal(student_id: int, db: Session) -> dict:
                     female, male = "0", "1"
         birth_country = ""
         if personal.get("nationality_id") and db:
-            nat = db.query(NationalityModel).filter(NationalityModel.id == personal.get("nationality_id")).first()
-            if nat and nat.nationality:
-                birth_country = str(nat.nationality).strip()
+            nat = catalog_name(db, "nationalities", personal.get("nationality_id"))
+            if nat:
+                birth_country = str(nat).strip()
         address = str(personal.get("address") or "").strip()
         phone = str(personal.get("phone") or "").strip()
         mother_language = str(personal.get("native_language") or "").strip()
@@ -2935,49 +3036,45 @@ def _generate_register_book_impl(course_id: int, db: Session):
     course_name = (course.course_name or f"curso_{course_id}").replace(" ", "_")
     safe_name = re.sub(r"[^\w\-]", "", course_name)[:50]
     out_file = out_dir / f"libro_registro_{safe_name}_{uuid.uuid4().hex[:8]}.docx"
-    # Clonar cuadros rarpo_* (un bloque por asignatura con datos en la UI)
-    work_docx = out_dir / f"_rb_work_{uuid.uuid4().hex[:8]}.docx"
+    # Plantilla abierta una sola vez: clonación de bloques, expansión de filas y relleno en memoria.
     result = {"status": "error", "message": "Error generando libro de registro"}
     try:
-        shutil_copy(template_path, work_docx)
+        book = RegisterBookDocxBuilder(template_path)
+        # Clonar cuadros rarpo_* (un bloque por asignatura con datos en la UI)
         _n_rarpo_blocks = min(len(_rb_subject_blocks), _RB_MAX_REGISTERS)
-        clone_register_book_section_b_blocks(work_docx, _n_rarpo_blocks, _RB_ROWS_PER_REGISTER)
-        clone_pai_support_tables(work_docx, _n_pai_blocks)
-        clone_course_record_support_tables(work_docx, _n_raeg_blocks)
+        book.clone_section_b_blocks(_n_rarpo_blocks, _RB_ROWS_PER_REGISTER)
+        book.clone_pai_support_tables(_n_pai_blocks)
+        book.clone_course_record_support_tables(_n_raeg_blocks)
         for _ix, _blk in enumerate(_raeg_blocks, start=1):
             _nri = len(_blk["interventions"])
             if _nri > 1:
-                expand_raeg_intervention_rows(
-                    work_docx,
-                    _ix,
-                    min(_nri, _RAEG_MAX_ROWS),
-                )
-        expand_learning_achievement_rows(work_docx, 1, _n_rla_rows)
-        apply_learning_achievement_period_top_spacing(work_docx, _rla_margin_top_rows)
-        clone_course_activity_record_blocks(work_docx, _n_rafc_blocks)
-        clone_course_community_activity_blocks(work_docx, _n_tcee_blocks)
-        clone_course_acta_reunion_blocks(work_docx, _n_ar_blocks)
+                book.expand_raeg_intervention_rows(_ix, min(_nri, _RAEG_MAX_ROWS))
+        book.expand_learning_achievement_rows(1, _n_rla_rows)
+        book.apply_learning_achievement_period_top_spacing(_rla_margin_top_rows)
+        book.clone_course_activity_record_blocks(_n_rafc_blocks)
+        book.clone_course_community_activity_blocks(_n_tcee_blocks)
+        book.clone_course_acta_reunion_blocks(_n_ar_blocks)
         for _ix, _rec in enumerate(_rafc_rows, start=1):
             _n_att = len(_load_attendees(_rec.attendees))
             _npr = max(1, min(_n_att, _RAFC_MAX_PARTICIPANT_ROWS) if _n_att else 1)
             if _npr > 1:
-                expand_rafc_participant_rows(work_docx, _ix, _npr)
+                book.expand_rafc_participant_rows(_ix, _npr)
         for _ix, _rec in enumerate(_tcee_rows, start=1):
             _n_att = len(_load_attendees(_rec.attendees))
             _npr = max(1, min(_n_att, _RAFC_MAX_PARTICIPANT_ROWS) if _n_att else 1)
             if _npr > 1:
-                expand_tcee_participant_rows(work_docx, _ix, _npr)
+                book.expand_tcee_participant_rows(_ix, _npr)
         for _ix, _rec in enumerate(_ar_rows, start=1):
             _n_att = len(_load_attendees(_rec.attendees))
             _npr = max(1, min(_n_att, _RAFC_MAX_PARTICIPANT_ROWS) if _n_att else 1)
             if _npr > 1:
-                expand_arn_participant_rows(work_docx, _ix, _npr)
-        result = DocumentsClass.fill_docx_form(str(work_docx), replacements, str(out_file))
-    finally:
-        try:
-            work_docx.unlink(missing_ok=True)
-        except OSError:
-            pass
+                book.expand_arn_participant_rows(_ix, _npr)
+        DocumentsClass.fill_docx_document(book.doc, replacements)
+        book.save(out_file)
+        result = {"status": "success", "file_path": str(out_file), "filename": out_file.name}
+    except Exception as e:
+        logger.warning("Libro de registro curso %s: generación falló", course_id, exc_info=True)
+        result = {"status": "error", "message": str(e)}
     if result.get("status") == "error":
         return None, result.get("message", "Error generando libro de registro")
     return str(out_file), None
@@ -2993,6 +3090,10 @@ async def get_register_book(
     Genera y descarga el documento 27 (Libro de registro) para un curso.
     URL: GET /api/documents/register_book/{course_id}
     """
+    return await run_render(_get_register_book_sync, course_id, db)
+
+
+def _get_register_book_sync(course_id: int, db: Session):
     try:
         file_path, err = _generate_register_book_impl(course_id, db)
         if err:
@@ -3022,6 +3123,10 @@ async def generate_register_book(
     Genera el documento 27 (Libro de registro) en DOCX para un curso.
     Rellena regular_professional_* (teacher_type_id=1) y specialist_professional_* (teacher_type_id=2).
     """
+    return await run_render(_generate_register_book_sync, course_id, db)
+
+
+def _generate_register_book_sync(course_id: int, db: Session):
     try:
         file_path, err = _generate_register_book_impl(course_id, db)
         if err:
@@ -3052,6 +3157,10 @@ async def register_book_car_preview(
     (family / community / other) y qué tags DOCX usa cada una. No genera DOCX.
     GET /api/documents/register_book_car_preview/{course_id}
     """
+    return await run_db(_register_book_car_preview_sync, course_id, db)
+
+
+def _register_book_car_preview_sync(course_id: int, db: Session):
     _car_all, _rafc_rows, _tcee_rows, _ar_rows = _split_course_activity_records_for_register_book(
         db, course_id
     )
@@ -3139,6 +3248,10 @@ async def generate_paci_full_pdf(
     db: Session = Depends(get_db),
 ):
     """Genera PDF completo del Plan de Adecuación Curricular Individual (PACI)."""
+    return await run_render(_generate_paci_full_pdf_sync, student_id, body, db)
+
+
+def _generate_paci_full_pdf_sync(student_id: int, body: PaciFullPdfRequest, db: Session):
     MSG_ERROR_GEN = "Error generando documento."
     try:
         student_service = StudentClass(db)
@@ -3295,6 +3408,14 @@ async def generate_paci_progress_state_pdf(
     db: Session = Depends(get_db),
 ):
     """Genera PDF de estado de avance PACI para una asignatura y período (EA)."""
+    return await run_render(_generate_paci_progress_state_pdf_sync, student_id, body, db)
+
+
+def _generate_paci_progress_state_pdf_sync(
+    student_id: int,
+    body: PaciProgressStatePdfRequest,
+    db: Session,
+):
     MSG_ERROR_GEN = "Error generando documento."
     try:
         student_service = StudentClass(db)
@@ -3413,6 +3534,14 @@ async def generate_paci_integral_progress_state_pdf(
     db: Session = Depends(get_db),
 ):
     """Genera PDF integral de estados de avance PACI (varias asignaturas / EA)."""
+    return await run_render(_generate_paci_integral_progress_state_pdf_sync, student_id, body, db)
+
+
+def _generate_paci_integral_progress_state_pdf_sync(
+    student_id: int,
+    body: PaciIntegralProgressStatePdfRequest,
+    db: Session,
+):
     MSG_ERROR_GEN = "Error generando documento."
     try:
         if not body.sections:
@@ -3564,21 +3693,65 @@ async def generate_document(
         None,
         description="Tipo de FUR a exportar (document_id=6). Sin valor se usa el último guardado.",
     ),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Session = Depends(get_db),
 ):
     """
     Genera un documento para un estudiante específico.
     Cuando document_id = 4, genera el documento de evaluación de salud desde health_evaluations.
     Cuando document_id = 6, genera el FUR en Word sobre la plantilla oficial de la variante.
+    Los PDF que pasan por ``generate_document_pdf`` salen con ETag (clave de caché de los
+    datos); si coincide con If-None-Match se responde 304.
     """
+    return await run_render(
+        _generate_document_with_etag,
+        student_id,
+        document_id,
+        informal_test_template_id,
+        fur_variant,
+        if_none_match,
+        db,
+    )
+
+
+def _generate_document_with_etag(
+    student_id: int,
+    document_id: int,
+    informal_test_template_id: Optional[int],
+    fur_variant: Optional[str],
+    if_none_match: Optional[str],
+    db: Session,
+):
+    with track_generation_etags() as keys:
+        response = _generate_document_sync(
+            student_id, document_id, informal_test_template_id, fur_variant, db
+        )
+    etag = response_etag(keys)
+    if etag is None or not isinstance(response, FileResponse):
+        return response
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return response
+
+
+def _generate_document_sync(
+    student_id: int,
+    document_id: int,
+    informal_test_template_id: Optional[int],
+    fur_variant: Optional[str],
+    db: Session,
+    student_result: Optional[dict] = None,
+):
     try:
         # Definir primero: si falla algo antes (p. ej. get estudiante), el except no debe usar variables no definidas
         MSG_NO_DOC = "No se encontró documento para este estudiante."
         MSG_ERROR_GEN = "Error generando documento."
 
-        # Obtener el estudiante usando la clase
+        # Obtener el estudiante usando la clase (la exportación por curso ya lo trae precargado)
         student_service = StudentClass(db)
-        student_result = student_service.get(student_id)
+        if student_result is None:
+            student_result = student_service.get(student_id)
         
         if isinstance(student_result, dict) and (student_result.get("error") or student_result.get("status") == "error"):
             return JSONResponse(
@@ -3815,16 +3988,12 @@ async def generate_document(
             # Obtener género
             gender_name = ""
             if evaluation_data.get("gender_id"):
-                gender = db.query(GenderModel).filter(GenderModel.id == evaluation_data.get("gender_id")).first()
-                if gender:
-                    gender_name = gender.gender or ""
+                gender_name = catalog_name(db, "genders", evaluation_data.get("gender_id")) or ""
             
             # Obtener nacionalidad
             nationality_name = ""
             if evaluation_data.get("nationality_id"):
-                nationality = db.query(NationalityModel).filter(NationalityModel.id == evaluation_data.get("nationality_id")).first()
-                if nationality:
-                    nationality_name = nationality.nationality or ""
+                nationality_name = catalog_name(db, "nationalities", evaluation_data.get("nationality_id")) or ""
             
             # Obtener datos del profesional
             professional_fullname = ""
@@ -4454,25 +4623,18 @@ async def generate_document(
                 region_id = _int_or_none(personal.get("region_id"))
             student_nationality = ""
             if nationality_id and db:
-                nat = db.query(NationalityModel).filter(NationalityModel.id == nationality_id).first()
-                if nat:
-                    student_nationality = str(nat.nationality or "").strip()
+                student_nationality = str(catalog_name(db, "nationalities", nationality_id) or "").strip()
             student_commune = ""
             if commune_id and db:
-                comm = db.query(CommuneModel).filter(CommuneModel.id == commune_id).first()
-                if comm:
-                    student_commune = str(comm.commune or "").strip()
+                student_commune = str(catalog_name(db, "communes", commune_id) or "").strip()
             student_region = ""
             if region_id and db:
-                reg = db.query(RegionModel).filter(RegionModel.id == region_id).first()
-                if reg:
-                    student_region = str(reg.region or "").strip()
+                student_region = str(catalog_name(db, "regions", region_id) or "").strip()
             # Checkboxes sexo: "1" = marcado, "" = desmarcado (igual que program_type_id_1/2/3, additional_information_1/2/3, document_1..10)
             sex_f = ""
             sex_m = ""
             if gender_id and db:
-                g = db.query(GenderModel).filter(GenderModel.id == gender_id).first()
-                gn = str(g.gender).lower().strip() if g and g.gender else ""
+                gn = str(catalog_name(db, "genders", gender_id) or "").lower().strip()
                 if gn:
                     if "femenino" in gn or gn == "f" or "female" in gn or "mujer" in gn:
                         sex_f, sex_m = str("1"), str("")
@@ -6494,9 +6656,7 @@ async def generate_document(
                 personal_data = student_data.get("personal_data", {})
                 commune_id = personal_data.get("commune_id")
                 if commune_id:
-                    commune = db.query(CommuneModel).filter(CommuneModel.id == commune_id).first()
-                    if commune:
-                        city = commune.commune or ""
+                    city = catalog_name(db, "communes", commune_id) or ""
             
             # Obtener día, mes y año actual
             now = datetime.now()
@@ -6653,6 +6813,113 @@ async def generate_document(
             }
         )
 
+@documents.post("/generate/course/{course_id}/{document_id}")
+async def generate_course_documents(
+    course_id: int,
+    document_id: int,
+    informal_test_template_id: Optional[int] = Query(
+        None,
+        description="ID de plantilla de prueba informal (obligatorio cuando document_id=43).",
+    ),
+    fur_variant: Optional[str] = Query(
+        None,
+        description="Tipo de FUR a exportar (document_id=6). Sin valor se usa el último guardado.",
+    ),
+    db: Session = Depends(get_db),
+    session_user: UserLogin = Depends(get_current_active_user),
+):
+    """
+    Genera el documento ``document_id`` para todos los estudiantes activos del curso y lo
+    devuelve como ZIP en streaming (cada archivo se envía apenas termina de generarse).
+    Los estudiantes se cargan en una sola consulta y se generan en paralelo
+    (COURSE_EXPORT_WORKERS por exportación, en el pool render compartido); ``manifest.json`` al final del ZIP indica qué estudiantes
+    fallaron y por qué.
+    URL: POST /api/documents/generate/course/{course_id}/{document_id}
+    """
+    try:
+        students = await run_db(StudentClass(db).get_by_course, course_id)
+    except Exception as e:
+        logger.exception("generate_course_documents")
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"status": 500, "message": str(e), "data": None},
+        )
+    if not students:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"status": 404, "message": "El curso no tiene estudiantes activos.", "data": None},
+        )
+
+    def render_one(student_result: dict) -> dict:
+        return _generate_course_student_document(
+            student_result, document_id, informal_test_template_id, fur_variant
+        )
+
+    def entries():
+        for student_result, result in iter_rendered(students, render_one, settings.course_export_workers):
+            student_data = student_result["student_data"]
+            yield CourseExportEntry(
+                student_id=int(student_data["id"]),
+                student_name=_course_student_name(student_data),
+                status="ok" if result.get("status") == "success" else "error",
+                file_path=result.get("file_path"),
+                message=result.get("message"),
+            )
+
+    zip_name = f"curso_{course_id}_documento_{document_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        stream_course_zip(entries(), {"course_id": course_id, "document_id": document_id}),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{zip_name}"'},
+    )
+
+
+def _course_student_name(student_data: dict) -> str:
+    personal = student_data.get("personal_data") or {}
+    parts = (personal.get("names"), personal.get("father_lastname"), personal.get("mother_lastname"))
+    return " ".join(str(p).strip() for p in parts if p and str(p).strip()) or f"Estudiante {student_data.get('id')}"
+
+
+def _generate_course_student_document(
+    student_result: dict,
+    document_id: int,
+    informal_test_template_id: Optional[int],
+    fur_variant: Optional[str],
+) -> dict:
+    """Genera el documento de un estudiante del curso con su propia sesión (corre en un hilo)."""
+    db = SessionLocal()
+    try:
+        response = _generate_document_sync(
+            int(student_result["student_data"]["id"]),
+            document_id,
+            informal_test_template_id,
+            fur_variant,
+            db,
+            student_result=student_result,
+        )
+    finally:
+        db.close()
+    if isinstance(response, FileResponse):
+        return {"status": "success", "file_path": response.path, "filename": response.filename}
+    message = "Error generando documento."
+    try:
+        message = json.loads(bytes(response.body)).get("message") or message
+    except Exception:
+        pass
+    return {"status": "error", "message": message}
+
+
+@documents.get("/executors/metrics")
+async def get_executor_metrics(
+    session_user: UserLogin = Depends(get_current_active_user),
+):
+    """Profundidad de cola y actividad de los pools db/render/drive y del pool de procesos de render."""
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"status": 200, "message": "OK", "data": executor_metrics()},
+    )
+
+
 @documents.get("/download/{filename}")
 async def download_document(
     filename: str
@@ -6693,6 +6960,10 @@ async def inspect_pdf_template(
     Inspecciona un template PDF para identificar qué campos de formulario contiene.
     Útil para entender cómo están estructurados los campos en el template PDF.
     """
+    return await run_render(_inspect_pdf_template_sync, template_name)
+
+
+def _inspect_pdf_template_sync(template_name: str):
     try:
         # Buscar el template PDF
         template_path = Path("files/original_student_files") / template_name
@@ -6757,6 +7028,10 @@ async def fill_docx_form(
     Body: {"template_name": "am.docx", "replacements": {"nombre": "Juan", "fecha": "28/01/2026"}}
     Formatos soportados en DOCX: {etiqueta}, [etiqueta], <<etiqueta>>
     """
+    return await run_render(_fill_docx_form_sync, body)
+
+
+def _fill_docx_form_sync(body: dict):
     try:
         template_name = body.get("template_name", "am.docx")
         replacements = body.get("replacements", {"nombre": "Prueba"})
@@ -248,7 +248,7 @@ def resend_whatsapp(
             content={
                 "status": 200,
                 "message": result.get("message", "OK"),
-                "data": {"whatsapp": result.get("whatsapp")},
+                "data": {"whatsapp": result.get("whatsapp"), "whatsappJob": result.get("whatsappJob")},
             },
         )
     except Exception as e:
@@ -266,7 +266,12 @@ def notify_whatsapp(
     session_user: UserLogin = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    """Dispara WhatsApp a varios apoderados (acción separada de crear/guardar el formulario)."""
+    """Dispara WhatsApp a varios apoderados (acción separada de crear/guardar el formulario).
+
+    Los envíos quedan en cola y la respuesta trae ``whatsappJob.jobId`` de inmediato (``whatsapp``
+    mantiene el resumen de siempre); el avance se consulta en
+    GET /dynamic_forms/{form_id}/whatsapp_jobs/{job_id}.
+    """
     try:
         payload = body.model_dump(by_alias=True) if hasattr(body, "model_dump") else body.dict()
         raw_ids = payload.get("studentIds") or payload.get("student_ids") or []
@@ -292,7 +297,7 @@ def notify_whatsapp(
             content={
                 "status": 200,
                 "message": result.get("message", "OK"),
-                "data": {"whatsapp": result.get("whatsapp")},
+                "data": {"whatsapp": result.get("whatsapp"), "whatsappJob": result.get("whatsappJob")},
             },
         )
     except Exception as e:
@@ -302,6 +307,39 @@ def notify_whatsapp(
         )
 
 
+@dynamic_forms.get("/{form_id}/whatsapp_jobs/{job_id}")
+def get_whatsapp_job(
+    form_id: int,
+    job_id: int,
+    period_year: Optional[int] = Query(None, ge=2000, le=2100, description="Año del período escolar"),
+    session_user: UserLogin = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Avance del envío WhatsApp (jobId devuelto por notify_whatsapp / resend_whatsapp)."""
+    try:
+        result = DynamicFormClass(db).get_whatsapp_job(
+            form_id,
+            job_id,
+            _school_id(session_user),
+            period_year,
+        )
+        if result.get("status") == "error":
+            code = int(result.get("http_status") or 400)
+            return JSONResponse(
+                status_code=code,
+                content={"status": code, "message": result.get("message", "Error"), "data": None},
+            )
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={"status": 200, "message": "OK", "data": result.get("data")},
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"status": 500, "message": str(e), "data": None},
+        )
+
+
 @dynamic_forms.get("/{form_id}/student_submission")
 def student_submission_lookup(
     form_id: int,
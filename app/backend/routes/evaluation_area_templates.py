@@ -9,6 +9,7 @@ from app.backend.classes.evaluation_area_templates_class import EvaluationAreaTe
 from app.backend.core.responses import api_error, api_response
 from app.backend.db.database import get_db
 from app.backend.db.models import RolModel, UserModel
+from app.backend.utils.upload_sink import UploadTooLargeError, stage_upload_file, staging_dir
 
 evaluation_area_templates = APIRouter(
     prefix="/evaluation-area-templates",
@@ -60,16 +61,20 @@ async def create_template(
             status_code=status.HTTP_403_FORBIDDEN,
             message="No tienes permiso para crear plantillas.",
         )
-    data = await file.read()
-    result = EvaluationAreaTemplatesClass(db).create(
-        customer_id=_customer_id(session_user),
-        area_id=(area_id or "").strip(),
-        name=name,
-        filename=file.filename or "plantilla.docx",
-        data=data,
-        content_type=file.content_type,
-        user_id=int(session_user.id) if getattr(session_user, "id", None) else None,
-    )
+    try:
+        staged = await stage_upload_file(file, staging_dir())
+    except UploadTooLargeError as exc:
+        return api_error(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, message=str(exc))
+    with staged:
+        result = EvaluationAreaTemplatesClass(db).create(
+            customer_id=_customer_id(session_user),
+            area_id=(area_id or "").strip(),
+            name=name,
+            filename=file.filename or "plantilla.docx",
+            data=staged,
+            content_type=file.content_type,
+            user_id=int(session_user.id) if getattr(session_user, "id", None) else None,
+        )
     if result.get("status") == "error":
         return api_error(
             status_code=result.get("http_status", status.HTTP_400_BAD_REQUEST),
@@ -90,15 +95,19 @@ async def replace_template_file(
             status_code=status.HTTP_403_FORBIDDEN,
             message="No tienes permiso para actualizar plantillas.",
         )
-    data = await file.read()
-    result = EvaluationAreaTemplatesClass(db).replace_file(
-        template_id,
-        _customer_id(session_user),
-        file.filename or "plantilla.docx",
-        data,
-        file.content_type,
-        int(session_user.id) if getattr(session_user, "id", None) else None,
-    )
+    try:
+        staged = await stage_upload_file(file, staging_dir())
+    except UploadTooLargeError as exc:
+        return api_error(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, message=str(exc))
+    with staged:
+        result = EvaluationAreaTemplatesClass(db).replace_file(
+            template_id,
+            _customer_id(session_user),
+            file.filename or "plantilla.docx",
+            staged,
+            file.content_type,
+            int(session_user.id) if getattr(session_user, "id", None) else None,
+        )
     if result.get("status") == "error":
         return api_error(
             status_code=result.get("http_status", status.HTTP_400_BAD_REQUEST),
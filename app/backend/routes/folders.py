@@ -1,4 +1,4 @@
-from fastapi import APIRouter, status, Depends, Query, UploadFile, File
+from fastapi import APIRouter, HTTPException, status, Depends, Query, UploadFile, File
 from fastapi.responses import JSONResponse, FileResponse
 from app.backend.classes.student_document_file_class import FolderClass
 from app.backend.classes.student_class import StudentClass
@@ -7,6 +7,8 @@ from app.backend.db.database import get_db
 from app.backend.auth.auth_user import get_current_active_user
 from app.backend.schemas import UserLogin
 from app.backend.core.responses import api_response, api_error
+from app.backend.core.executors import run_db
+from app.backend.utils.upload_sink import StagedUpload, UploadTooLargeError, stage_upload_file
 from typing import Optional
 from sqlalchemy.orm import Session
 from pathlib import Path
@@ -112,8 +114,62 @@ async def upload_document(
 ):
     """
     Sube un archivo de documento para un estudiante y documento específico en la tabla folders.
-    Maneja el control de versiones automáticamente.
+    Maneja el control de versiones automáticamente; si el contenido es idéntico a la última
+    versión no se crea otra.
     """
+    file_service = FileClass(db)
+    upload_dir = Path(file_service.files_dir) / "system" / "folders"
+    try:
+        # Copia por trozos con SHA-256 en el pool ``upload``; rename atómico al final
+        staged = await stage_upload_file(file, upload_dir)
+    except UploadTooLargeError as e:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={
+                "status": 413,
+                "message": f"Error subiendo archivo: {str(e)}",
+                "data": None
+            }
+        )
+    except Exception as upload_error:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={
+                "status": 500,
+                "message": f"Error subiendo archivo: {str(upload_error)}",
+                "data": None
+            }
+        )
+    try:
+        return await run_db(
+            _upload_document_sync,
+            student_id,
+            document_id,
+            staged,
+            upload_dir,
+            file.filename,
+            school_id,
+            course_id,
+            professional_id,
+            period_year,
+            db,
+        )
+    finally:
+        staged.discard()
+
+
+def _upload_document_sync(
+    student_id: int,
+    document_id: int,
+    staged: StagedUpload,
+    upload_dir: Path,
+    original_filename: Optional[str],
+    school_id: Optional[int],
+    course_id: Optional[int],
+    professional_id: Optional[int],
+    period_year: Optional[int],
+    db: Session,
+):
     try:
         # Obtener el estudiante usando la clase
         student_service = StudentClass(db)
@@ -153,22 +209,47 @@ async def upload_document(
         
         document_type_id = document_info.document_type_id
         
+        file_service = FileClass(db)
+        period_str = str(period_year) if period_year is not None else None
+        folder_service = FolderClass(db)
+
+        # Mismo contenido que la última versión: no se escribe otro archivo ni otra versión
+        duplicate = folder_service.find_identical_upload(
+            student_id, document_id, period_str, staged, upload_dir
+        )
+        if duplicate is not None:
+            duplicate_path = f"system/folders/{duplicate.file}"
+            return JSONResponse(
+                status_code=status.HTTP_200_OK,
+                content={
+                    "status": 200,
+                    "message": "El archivo ya estaba cargado (mismo contenido)",
+                    "data": {
+                        "id": duplicate.id,
+                        "version_id": duplicate.version_id,
+                        "student_id": student_id,
+                        "document_id": document_id,
+                        "filename": duplicate.file,
+                        "file_path": duplicate_path,
+                        "file_url": file_service.get(duplicate_path),
+                        "original_filename": original_filename,
+                        "deduplicated": True,
+                    }
+                }
+            )
+
         # Obtener la extensión del archivo original
-        file_extension = Path(file.filename).suffix.lower() if file.filename else ''
+        file_extension = Path(original_filename).suffix.lower() if original_filename else ''
         
         # Generar fecha y hora en formato YYYYMMDDHHMMSS
         date_hour = datetime.now().strftime("%Y%m%d%H%M%S")
         
         # Generar nombre del archivo: {student_id}_{document_id}_{document_type_id}_{date_hour}
         unique_filename = f"{student_id}_{document_id}_{document_type_id}_{date_hour}{file_extension}"
-        
-        # Usar FileClass para subir el archivo
-        file_service = FileClass(db)
         remote_path = f"system/folders/{unique_filename}"
         
         try:
-            # Subir el archivo usando FileClass
-            file_service.upload(file, remote_path)
+            staged.commit(upload_dir / unique_filename)
         except Exception as upload_error:
             return JSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -180,7 +261,6 @@ async def upload_document(
             )
         
         # Guardar el registro en la base de datos usando el método store (professional_id=0 si no viene)
-        folder_service = FolderClass(db)
         store_result = folder_service.store(
             student_id=student_id,
             document_id=document_id,
@@ -188,7 +268,8 @@ async def upload_document(
             school_id=school_id,
             course_id=course_id,
             professional_id=professional_id,
-            period_year=str(period_year) if period_year is not None else None,
+            period_year=period_str,
+            content_sha256=staged.sha256,
         )
         
         if isinstance(store_result, dict) and store_result.get("status") == "error":
@@ -219,7 +300,8 @@ async def upload_document(
                     "filename": unique_filename,
                     "file_path": remote_path,
                     "file_url": file_service.get(remote_path),
-                    "original_filename": file.filename
+                    "original_filename": original_filename,
+                    "deduplicated": False,
                 }
             }
         )
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, status
 from fastapi.responses import JSONResponse
 from app.backend.db.database import get_db
 from sqlalchemy.orm import Session
 from app.backend.schemas import UserLogin, GenderList, StoreGender, UpdateGender
 from app.backend.classes.gender_class import GenderClass
 from app.backend.auth.auth_user import get_current_active_user
+from app.backend.utils.catalog_cache import cached_catalog, catalog_response
 
 genders = APIRouter(
     prefix="/genders",
@@ -145,8 +148,13 @@ def delete(id: int, session_user: UserLogin = Depends(get_current_active_user),
     )
 
 @genders.get("/list")
-def list_all(session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    result = GenderClass(db).get_all(page=0, items_per_page=None)
+def list_all(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    session_user: UserLogin = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    entry = cached_catalog("genders", "list", lambda: GenderClass(db).get_all(page=0, items_per_page=None))
+    result = entry.data
 
     if isinstance(result, dict) and result.get("status") == "error":
         return JSONResponse(
@@ -158,8 +166,9 @@ def list_all(session_user: UserLogin = Depends(get_current_active_user), db: Ses
             }
         )
 
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
+    return catalog_response(
+        entry,
+        if_none_match,
         content={
             "status": 200,
             "message": "Genders list retrieved successfully",
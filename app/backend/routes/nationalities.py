@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, status
 from fastapi.responses import JSONResponse
 from app.backend.db.database import get_db
 from sqlalchemy.orm import Session
@@ -6,6 +8,7 @@ from app.backend.schemas import UserLogin, NationalityList, StoreNationality, Up
 from app.backend.classes.nationalities_class import NationalitiesClass
 from app.backend.classes.inspection_api_client import InspectionApiClient
 from app.backend.auth.auth_user import get_current_active_user
+from app.backend.utils.catalog_cache import cached_catalog, catalog_response
 
 nationalities = APIRouter(
     prefix="/nationalities",
@@ -198,8 +201,13 @@ def import_from_inspection(
 
 
 @nationalities.get("/list")
-def list_all(session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    result = NationalitiesClass(db).get_all(page=0, items_per_page=None)
+def list_all(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    session_user: UserLogin = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    entry = cached_catalog("nationalities", "list", lambda: NationalitiesClass(db).get_all(page=0, items_per_page=None))
+    result = entry.data
 
     if isinstance(result, dict) and result.get("status") == "error":
         return JSONResponse(
@@ -211,8 +219,9 @@ def list_all(session_user: UserLogin = Depends(get_current_active_user), db: Ses
             }
         )
 
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
+    return catalog_response(
+        entry,
+        if_none_match,
         content={
             "status": 200,
             "message": "Nationalities list retrieved successfully",
@@ -72,7 +72,7 @@ async def store(
         unique_filename = f"{timestamp}_{unique_id}.{file_extension}" if file_extension else f"{timestamp}_{unique_id}"
         remote_path = f"system/news/{unique_filename}"
 
-        file_service.upload(image, remote_path)
+        await file_service.upload_async(image, remote_path)
         news_inputs["image"] = file_service.get(remote_path)
 
     result = NewsClass(db).store(news_inputs)
@@ -138,7 +138,7 @@ async def update(
         unique_filename = f"{timestamp}_{unique_id}.{file_extension}" if file_extension else f"{timestamp}_{unique_id}"
         remote_path = f"system/news/{unique_filename}"
 
-        file_service.upload(image, remote_path)
+        await file_service.upload_async(image, remote_path)
         news_inputs["image"] = file_service.get(remote_path)
 
     result = NewsClass(db).update(id, news_inputs)
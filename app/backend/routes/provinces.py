@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
@@ -7,6 +9,7 @@ from app.backend.classes.inspection_api_client import InspectionApiClient
 from app.backend.classes.province_class import ProvinceClass
 from app.backend.db.database import get_db
 from app.backend.schemas import ProvinceList, StoreProvince, UpdateProvince, UserLogin
+from app.backend.utils.catalog_cache import cached_catalog, catalog_response
 
 provinces = APIRouter(prefix="/provinces", tags=["Provinces"])
 
@@ -211,10 +214,12 @@ def import_from_inspection(
 
 @provinces.get("/list")
 def list_all(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     session_user: UserLogin = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    result = ProvinceClass(db).get_all(page=0, items_per_page=0)
+    entry = cached_catalog("provinces", "list", lambda: ProvinceClass(db).get_all(page=0, items_per_page=0))
+    result = entry.data
 
     if isinstance(result, dict) and result.get("status") == "error":
         return JSONResponse(
@@ -226,8 +231,9 @@ def list_all(
             },
         )
 
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
+    return catalog_response(
+        entry,
+        if_none_match,
         content={
             "status": 200,
             "message": "Provinces list retrieved successfully",
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
@@ -7,6 +9,7 @@ from app.backend.classes.inspection_api_client import InspectionApiClient
 from app.backend.classes.region_class import RegionClass
 from app.backend.db.database import get_db
 from app.backend.schemas import RegionList, StoreRegion, UpdateRegion, UserLogin
+from app.backend.utils.catalog_cache import cached_catalog, catalog_response
 
 regions = APIRouter(prefix="/regions", tags=["Regions"])
 
@@ -239,10 +242,12 @@ def import_from_inspection(
 
 @regions.get("/list")
 def list_all(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     session_user: UserLogin = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    result = RegionClass(db).get_all(page=0, items_per_page=0)
+    entry = cached_catalog("regions", "list", lambda: RegionClass(db).get_all(page=0, items_per_page=0))
+    result = entry.data
 
     if isinstance(result, dict) and result.get("status") == "error":
         return JSONResponse(
@@ -254,8 +259,9 @@ def list_all(
             },
         )
 
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
+    return catalog_response(
+        entry,
+        if_none_match,
         content={
             "status": 200,
             "message": "Regions list retrieved successfully",
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from fastapi.responses import JSONResponse
 from app.backend.db.database import get_db
 from sqlalchemy.orm import Session
@@ -8,6 +8,7 @@ from app.backend.schemas import SpecialEducationalNeedList, StoreSpecialEducatio
 from app.backend.classes.special_educational_need_class import SpecialEducationalNeedClass
 from app.backend.auth.auth_user import get_current_active_user
 from app.backend.db.models import UserModel, RolModel
+from app.backend.utils.catalog_cache import cached_catalog, catalog_response
 
 special_educational_needs = APIRouter(
     prefix="/special_educational_needs",
@@ -221,10 +222,19 @@ def delete(id: int, session_user: UserModel = Depends(get_current_active_user),
     )
 
 @special_educational_needs.get("/list")
-def list_all(session_user: UserModel = Depends(get_current_active_user), db: Session = Depends(get_db)):
+def list_all(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    session_user: UserModel = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
     # Lectura para selects (profesor, etc.): solo autenticación; filtro por school_id de sesión.
     sid = _school_id_from_user(session_user)
-    result = SpecialEducationalNeedClass(db).get_all(page=0, items_per_page=None, school_id=sid)
+    entry = cached_catalog(
+        "special_educational_needs",
+        ("list", sid),
+        lambda: SpecialEducationalNeedClass(db).get_all(page=0, items_per_page=None, school_id=sid),
+    )
+    result = entry.data
 
     if isinstance(result, dict) and result.get("status") == "error":
         return JSONResponse(
@@ -236,8 +246,9 @@ def list_all(session_user: UserModel = Depends(get_current_active_user), db: Ses
             }
         )
 
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
+    return catalog_response(
+        entry,
+        if_none_match,
         content={
             "status": 200,
             "message": "Special educational needs list retrieved successfully",
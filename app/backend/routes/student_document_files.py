@@ -5,6 +5,8 @@ from app.backend.classes.student_class import StudentClass
 from app.backend.db.database import get_db
 from app.backend.auth.auth_user import get_current_active_user
 from app.backend.schemas import UserLogin
+from app.backend.core.executors import run_db
+from app.backend.utils.upload_sink import StagedUpload, UploadTooLargeError, stage_upload_file
 from typing import Optional
 from sqlalchemy.orm import Session
 from pathlib import Path
@@ -31,8 +33,44 @@ async def upload_document_file(
 ):
     """
     Sube un archivo de documento para un estudiante y documento específico.
-    Maneja el control de versiones automáticamente.
+    Maneja el control de versiones automáticamente; si el contenido es idéntico a la última
+    versión no se crea otra.
     """
+    # Crear directorio si no existe
+    upload_dir = Path("files/system/student_document_files")
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        # Guardar el archivo (copia por trozos con SHA-256; rename atómico al final)
+        staged = await stage_upload_file(file, upload_dir)
+    except UploadTooLargeError as e:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"status": 413, "message": str(e), "data": None},
+        )
+    try:
+        return await run_db(
+            _upload_document_file_sync,
+            student_id,
+            document_id,
+            staged,
+            upload_dir,
+            file.filename,
+            period_year,
+            db,
+        )
+    finally:
+        staged.discard()
+
+
+def _upload_document_file_sync(
+    student_id: int,
+    document_id: int,
+    staged: StagedUpload,
+    upload_dir: Path,
+    original_filename: Optional[str],
+    period_year: Optional[int],
+    db: Session,
+):
     try:
         # Obtener el estudiante usando la clase
         student_service = StudentClass(db)
@@ -49,30 +87,46 @@ async def upload_document_file(
             )
 
         # Obtener la extensión del archivo original
-        file_extension = Path(file.filename).suffix.lower() if file.filename else ''
+        file_extension = Path(original_filename).suffix.lower() if original_filename else ''
         
         # Generar nombre único para el archivo
         unique_id = uuid.uuid4().hex[:8]
         unique_filename = f"student_{student_id}_doc_{document_id}_{unique_id}{file_extension}"
         
-        # Crear directorio si no existe
-        upload_dir = Path("files/system/student_document_files")
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        
         file_path = upload_dir / unique_filename
+        period_str = str(period_year) if period_year is not None else None
+        document_file_service = FolderClass(db)
         
-        # Guardar el archivo
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        duplicate = document_file_service.find_identical_upload(
+            student_id, document_id, period_str, staged, upload_dir
+        )
+        if duplicate is not None:
+            return JSONResponse(
+                status_code=status.HTTP_200_OK,
+                content={
+                    "status": 200,
+                    "message": "El archivo ya estaba cargado (mismo contenido)",
+                    "data": {
+                        "id": duplicate.id,
+                        "version_id": duplicate.version_id,
+                        "student_id": student_id,
+                        "document_id": document_id,
+                        "filename": duplicate.file,
+                        "file_path": str(upload_dir / duplicate.file),
+                        "original_filename": original_filename,
+                        "deduplicated": True,
+                    }
+                }
+            )
+        staged.commit(file_path)
         
         # Guardar el registro en la base de datos usando el método store
-        document_file_service = FolderClass(db)
         store_result = document_file_service.store(
             student_id=student_id,
             document_id=document_id,
             file_path=unique_filename,
-            period_year=str(period_year) if period_year is not None else None,
+            period_year=period_str,
+            content_sha256=staged.sha256,
         )
         
         if isinstance(store_result, dict) and store_result.get("status") == "error":
@@ -103,7 +157,8 @@ async def upload_document_file(
                     "document_id": document_id,
                     "filename": unique_filename,
                     "file_path": str(file_path),
-                    "original_filename": file.filename
+                    "original_filename": original_filename,
+                    "deduplicated": False,
                 }
             }
         )
@@ -12,6 +12,7 @@ from app.backend.classes.teaching_class import _normalize_school_id
 from app.backend.db.models import CourseModel, SchoolModel, PlatformStatusModel, RolModel
 from pathlib import Path
 from datetime import datetime
+from app.backend.utils.upload_sink import UploadTooLargeError, stage_upload_file
 
 students = APIRouter(
     prefix="/students",
@@ -673,10 +674,9 @@ async def upload_photo(
         
         file_path = upload_dir / unique_filename
         
-        # Guardar el archivo
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Guardar el archivo (copia por trozos + rename atómico)
+        with await stage_upload_file(file, upload_dir) as staged:
+            staged.commit(file_path)
         
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
@@ -687,11 +687,16 @@ async def upload_photo(
                     "student_id": student_id,
                     "filename": unique_filename,
                     "file_path": str(file_path),
-                    "file_size": len(content)
+                    "file_size": staged.size
                 }
             }
         )
         
+    except UploadTooLargeError as e:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"status": 413, "message": str(e), "data": None},
+        )
     except Exception as e:
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
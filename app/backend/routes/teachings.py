@@ -1,6 +1,6 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, status
 from fastapi.responses import JSONResponse
 from app.backend.db.database import get_db
 from sqlalchemy.orm import Session
@@ -9,6 +9,7 @@ from app.backend.classes.teaching_class import TeachingClass, _normalize_school_
 from app.backend.auth.auth_user import get_current_active_user
 from app.backend.classes.inspection_api_client import InspectionApiClient
 from app.backend.classes.school_class import SchoolClass
+from app.backend.utils.catalog_cache import cached_catalog, catalog_response
 
 teachings = APIRouter(
     prefix="/teachings",
@@ -78,7 +79,12 @@ def index(teaching: TeachingList, session_user: UserLogin = Depends(get_current_
     )
 
 @teachings.get("/list")
-def get_all_list(school_id: int = None, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
+def get_all_list(
+    school_id: int = None,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    session_user: UserLogin = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
     # Listado del colegio de la sesión (normalizado). Query ?school_id solo si coincide (compat. frontend).
     session_sid = _resolve_session_school_id(session_user, db)
     requested = _normalize_school_id(school_id)
@@ -104,7 +110,8 @@ def get_all_list(school_id: int = None, session_user: UserLogin = Depends(get_cu
             }
         )
     
-    result = TeachingClass(db).get_all_list(school_id=school_id)
+    entry = cached_catalog("teachings", ("list", school_id), lambda: TeachingClass(db).get_all_list(school_id=school_id))
+    result = entry.data
 
     if isinstance(result, dict) and result.get("status") == "error":
         return JSONResponse(
@@ -116,8 +123,9 @@ def get_all_list(school_id: int = None, session_user: UserLogin = Depends(get_cu
             }
         )
     
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
+    return catalog_response(
+        entry,
+        if_none_match,
         content={
             "status": 200,
             "message": "Teachings list retrieved successfully",
@@ -7,6 +7,7 @@ from typing import Any
 
 from sqlalchemy.orm import Session
 
+from app.backend.classes.student_class import trigram_personal_ids_subquery
 from app.backend.db.models.agents_documents import AgentDocumentTemplateModel
 from app.backend.db.models.pie_core import SchoolModel, StudentModel, StudentPersonalInfoModel
 from app.backend.utils.agents_familia_pie360 import (
@@ -14,6 +15,7 @@ from app.backend.utils.agents_familia_pie360 import (
     build_familia_pie360_context,
     familia_pie360_hint_lines,
 )
+from app.backend.utils.rut_normalize import rut_lookup_key
 
 _RUT_RE = re.compile(
     r"\b(\d{1,2}[.\s]?\d{3}[.\s]?\d{3}[-\s]?[\dkK]|\d{7,8}[-\s]?[\dkK])\b",
@@ -222,28 +224,27 @@ def wants_document_generation(message: str, history: list[dict[str, str]] | None
 
 
 def lookup_student_id_by_rut(db: Session, rut: str) -> int | None:
-    """Coincidencia exacta del RUT normalizado. No completa ni recorta dígitos."""
+    """Coincidencia exacta del RUT normalizado (columna indexada). No completa ni recorta dígitos."""
     target = normalize_rut(rut)
     if len(target) < 8:
         return None
-    rows = (
-        db.query(StudentPersonalInfoModel.student_id, StudentPersonalInfoModel.identification_number)
-        .filter(StudentPersonalInfoModel.identification_number.isnot(None))
-        .filter(StudentPersonalInfoModel.identification_number != "")
-        .all()
+    key = rut_lookup_key(target)
+    row = (
+        db.query(StudentPersonalInfoModel.student_id)
+        .filter(StudentPersonalInfoModel.rut_normalized == key)
+        .order_by(StudentPersonalInfoModel.id.asc())
+        .first()
     )
-    for student_id, identification in rows:
-        if normalize_rut(identification or "") == target:
-            return int(student_id)
-    student_rows = (
-        db.query(StudentModel.id, StudentModel.identification_number)
-        .filter(StudentModel.identification_number.isnot(None))
-        .filter(StudentModel.identification_number != "")
-        .all()
+    if row is not None and row[0] is not None:
+        return int(row[0])
+    row = (
+        db.query(StudentModel.id)
+        .filter(StudentModel.rut_normalized == key)
+        .order_by(StudentModel.id.asc())
+        .first()
     )
-    for student_id, identification in student_rows:
-        if normalize_rut(identification or "") == target:
-            return int(student_id)
+    if row is not None:
+        return int(row[0])
     return None
 
 
@@ -363,6 +364,10 @@ def _score_students_by_name(
         q = q.join(SchoolModel, SchoolModel.id == StudentModel.school_id).filter(
             SchoolModel.customer_id == int(customer_id)
         )
+    # Solo filas que contienen los trigramas de cada token (índice); el match exacto sigue abajo.
+    for t in tokens:
+        if len(t) >= 3:
+            q = q.filter(StudentPersonalInfoModel.id.in_(trigram_personal_ids_subquery(t)))
 
     scored: list[tuple[int, int]] = []
     year_s = str(int(period_year)) if period_year else None
@@ -1,13 +1,32 @@
-"""Derivados de archivos del agente: texto plano + meta para retrieval barato en tokens."""
+"""Derivados de archivos del agente: texto plano + meta para retrieval barato en tokens.
+
+Además de los sidecars ``.txt`` / ``.meta.json``, cada agente (por customer) mantiene un índice
+invertido en ``_derived/_index.json``: offsets de chunks, postings de tokens y de RUT por chunk.
+``write_derived_for_file`` y ``delete_derived`` lo actualizan; ``retrieve_relevant_chunks`` solo
+consulta postings y lee del disco los chunks que efectivamente entran al prompt.
+
+Las escrituras del índice (leer, mezclar, reemplazar) van bajo un lock de hilo y, donde hay
+``fcntl``, un ``flock`` sobre ``_derived/_index.json.lock``: varios workers uvicorn no se pisan
+los upserts.
+"""
 
 from __future__ import annotations
 
 import json
+import logging
+import os
 import re
 import shutil
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
+
+try:  # Solo POSIX; en Windows queda el lock por proceso.
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
 
 from app.backend.utils import agents_file_context as file_ctx
 from app.backend.utils import agents_storage as storage
@@ -20,6 +39,28 @@ CHAT_INDEX_MAX_FILES = 80
 CHUNK_SIZE = 900
 CHUNK_OVERLAP = 100
 MAX_CHUNKS_RETURNED = 16
+INDEX_FILE_NAME = "_index.json"
+INDEX_LOCK_FILE_NAME = "_index.json.lock"
+INDEX_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[0-9A-Za-zÁÉÍÓÚÜÑáéíóúüñ]{3,}")
+# RUT con o sin puntos/guion (12.345.678-5, 12345678-K, 123456785).
+_RUT_RE = re.compile(r"(?<![0-9])\d{1,2}\.?\d{3}\.?\d{3}\s*-?\s*[0-9kK](?![0-9A-Za-z])")
+
+_GENERIC_PATH_MARKERS = (
+    "ejemplo_",
+    "ejemplo-",
+    "formato_",
+    "formato-",
+    "glosario",
+    "decreto",
+    "orientaciones",
+    "cartilla",
+    "normativa",
+    "base_institucional",
+)
 
 _STOPWORDS = {
     "a",
@@ -109,8 +150,10 @@ def write_derived_for_file(
     agent_name: str,
     relative_path: str,
     customer_id: int | None = None,
+    *,
+    update_index: bool = True,
 ) -> dict[str, Any]:
-    """Extrae texto del original y escribe .txt + .meta.json bajo _derived/."""
+    """Extrae texto del original y escribe .txt + .meta.json bajo _derived/ (e índice invertido)."""
     rel = storage._safe_relative_path(relative_path)
     original = storage.resolve_target(agent_name, rel, customer_id)
     txt_path, meta_path = _derived_paths(agent_name, rel, customer_id)
@@ -130,6 +173,8 @@ def write_derived_for_file(
     if not original.is_file():
         meta["error"] = "Original not found."
         meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+        if update_index:
+            _index_apply(derived_root(agent_name, customer_id), remove=[rel])
         return meta
 
     try:
@@ -141,6 +186,8 @@ def write_derived_for_file(
             )
             if txt_path.exists():
                 txt_path.unlink()
+            if update_index:
+                _index_apply(derived_root(agent_name, customer_id), remove=[rel])
             return meta
         txt_path.write_text(text, encoding="utf-8")
         meta["ok"] = True
@@ -153,6 +200,12 @@ def write_derived_for_file(
             txt_path.unlink()
 
     meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    if update_index:
+        root = derived_root(agent_name, customer_id)
+        if meta["ok"]:
+            _index_apply(root, upsert={rel: _index_record(text)})
+        else:
+            _index_apply(root, remove=[rel])
     return meta
 
 
@@ -193,6 +246,8 @@ def delete_derived(
         except Exception:
             continue
 
+    _index_apply(root, remove_prefix=rel)
+
 
 def list_derived_metas(
     agent_name: str, customer_id: int | None = None
@@ -212,77 +267,423 @@ def list_derived_metas(
 
 
 def _tokenize(text: str) -> set[str]:
-    raw = re.findall(r"[0-9A-Za-zÁÉÍÓÚÜÑáéíóúüñ]{3,}", (text or "").lower())
+    raw = _WORD_RE.findall((text or "").lower())
     return {t for t in raw if t not in _STOPWORDS}
 
 
-def _chunk_text(text: str) -> list[str]:
-    text = (text or "").strip()
-    if not text:
-        return []
-    paragraphs = [p.strip() for p in re.split(r"\n{2,}", text) if p.strip()]
-    chunks: list[str] = []
-    for para in paragraphs:
+def _chunk_spans(text: str) -> list[tuple[int, int]]:
+    """Offsets [inicio, fin) de cada chunk dentro de ``text`` (ya sin espacios en los extremos)."""
+    spans: list[tuple[int, int]] = []
+    pos = 0
+    bounds = [(m.start(), m.end()) for m in re.finditer(r"\n{2,}", text)]
+    bounds.append((len(text), len(text)))
+    for sep_start, sep_end in bounds:
+        segment = text[pos:sep_start]
+        seg_pos, pos = pos, sep_end
+        para = segment.strip()
+        if not para:
+            continue
+        base = seg_pos + (len(segment) - len(segment.lstrip()))
         if len(para) <= CHUNK_SIZE:
-            chunks.append(para)
+            spans.append((base, base + len(para)))
             continue
         start = 0
         while start < len(para):
             end = min(len(para), start + CHUNK_SIZE)
-            chunks.append(para[start:end])
+            spans.append((base + start, base + end))
             if end >= len(para):
                 break
             start = max(end - CHUNK_OVERLAP, start + 1)
-    return chunks
+    return spans
 
 
-def retrieve_relevant_chunks(
-    agent_name: str,
-    *,
-    query: str = "",
-    student_rut: str | None = None,
-    student_name: str | None = None,
-    customer_id: int | None = None,
-    budget_chars: int = CHAT_BUDGET_CHARS,
-) -> dict[str, Any]:
-    """Índice corto + top chunks por overlap de keywords / RUT / nombre (sin embeddings)."""
-    metas = list_derived_metas(agent_name, customer_id)
-    ok_metas = [m for m in metas if m.get("ok")]
-    index_paths = [str(m.get("path") or "") for m in ok_metas[:CHAT_INDEX_MAX_FILES]]
+def _chunk_text(text: str) -> list[str]:
+    text = (text or "").strip()
+    if not text:
+        return []
+    return [text[start:end] for start, end in _chunk_spans(text)]
 
-    query_tokens = _tokenize(query)
-    name_tokens = _tokenize(student_name or "")
-    # Nombre de ficha + posibles apellidos/nombres en el mensaje («isabella diaz»).
-    query_tokens |= name_tokens
-    person_tokens = {
-        t for t in (name_tokens | query_tokens) if t not in _QUERY_NOISE and len(t) >= 3
+
+def _rut_keys(text: str) -> set[str]:
+    """RUT normalizados presentes en el texto, con y sin dígito verificador."""
+    keys: set[str] = set()
+    for raw in _RUT_RE.findall(text or ""):
+        rut = file_ctx._normalize_rut(raw)
+        keys.add(rut)
+        keys.add(rut[:-1])
+    return keys
+
+
+# --- Índice invertido persistente (_derived/_index.json) ---------------------------------
+
+_index_locks: dict[str, threading.Lock] = {}
+_index_locks_guard = threading.Lock()
+# ruta índice -> (mtime_ns, size, datos crudos, postings en memoria o None)
+_index_cache: dict[str, tuple[int, int, dict[str, Any], dict[str, Any] | None]] = {}
+
+
+def _index_path(root: Path) -> Path:
+    return root / INDEX_FILE_NAME
+
+
+def _index_lock(root: Path) -> threading.Lock:
+    key = str(_index_path(root))
+    with _index_locks_guard:
+        lock = _index_locks.get(key)
+        if lock is None:
+            lock = _index_locks[key] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def _index_guard(root: Path) -> Iterator[None]:
+    """Exclusión para leer-mezclar-reemplazar el índice: entre hilos y entre procesos."""
+    with _index_lock(root):
+        if fcntl is None or not root.is_dir():
+            yield
+            return
+        with open(root / INDEX_LOCK_FILE_NAME, "a+b") as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def _index_record(text: str) -> dict[str, Any]:
+    """Entrada de un archivo: offsets de chunks + postings token/RUT → índices de chunk.
+
+    Los tokens incluyen stopwords (las consultas nunca las contienen) para que el vocabulario
+    también sirva al bonus de nombre por archivo (``token in texto``).
+    """
+    text = (text or "").strip()
+    spans = _chunk_spans(text)
+    tokens: dict[str, list[int]] = {}
+    ruts: dict[str, list[int]] = {}
+    for i, (start, end) in enumerate(spans):
+        chunk = text[start:end]
+        for tok in set(_WORD_RE.findall(chunk.lower())):
+            tokens.setdefault(tok, []).append(i)
+        for rut in _rut_keys(chunk):
+            ruts.setdefault(rut, []).append(i)
+    return {
+        "chunks": [list(span) for span in spans],
+        "tokens": tokens,
+        "ruts": ruts,
+        "file_ruts": sorted(_rut_keys(text)),
     }
 
-    rut_norm = file_ctx._normalize_rut(student_rut or "")
-    if len(rut_norm) >= 8:
-        query_tokens.add(rut_norm.lower())
-        if len(rut_norm) > 1:
-            query_tokens.add(rut_norm[:-1].lower())
 
-    scored: list[tuple[float, str, str]] = []
+def _empty_index() -> dict[str, Any]:
+    return {"version": INDEX_VERSION, "files": {}}
+
+
+def _read_index_file(root: Path, *, fresh: bool = False) -> dict[str, Any] | None:
+    """Índice en disco (o su copia en memoria si no cambió). ``fresh`` ignora la copia."""
+    path = _index_path(root)
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    key = str(path)
+    cached = _index_cache.get(key)
+    if not fresh and cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except Exception as exc:
+        logger.warning("Índice derivado ilegible %s: %s", path, exc)
+        return None
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return None
+    if not isinstance(data.get("files"), dict):
+        return None
+    _index_cache[key] = (stat.st_mtime_ns, stat.st_size, data, None)
+    return data
+
+
+def _write_index_file(root: Path, data: dict[str, Any]) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    path = _index_path(root)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+    stat = path.stat()
+    _index_cache[str(path)] = (stat.st_mtime_ns, stat.st_size, data, None)
+
+
+def _index_apply(
+    root: Path,
+    *,
+    upsert: dict[str, dict[str, Any]] | None = None,
+    remove: Iterable[str] = (),
+    remove_prefix: str | None = None,
+) -> None:
+    """Actualiza el índice de forma incremental. Sin índice previo lo reconstruye desde disco."""
+    with _index_guard(root):
+        try:
+            # Releer bajo el lock: otro worker pudo escribir desde nuestra última lectura.
+            data = _read_index_file(root, fresh=True)
+            if data is None:
+                if not root.exists():
+                    return
+                _build_index_locked(root)
+                return
+            files = dict(data["files"])
+            for rel in remove:
+                files.pop(rel, None)
+            if remove_prefix:
+                prefix = f"{remove_prefix}/"
+                for rel in [r for r in files if r == remove_prefix or r.startswith(prefix)]:
+                    files.pop(rel, None)
+            files.update(upsert or {})
+            _write_index_file(root, {"version": INDEX_VERSION, "files": files})
+        except Exception as exc:
+            # El índice es derivable: si falla, retrieval lo reconstruye en la próxima consulta.
+            logger.warning("No se pudo actualizar el índice derivado %s: %s", root, exc)
+            try:
+                _index_path(root).unlink()
+            except OSError:
+                pass
+
+
+def _build_index_locked(root: Path) -> dict[str, Any]:
+    data = _empty_index()
+    if root.exists():
+        for meta_path in sorted(root.rglob("*.meta.json")):
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except Exception:
+                continue
+            rel = str(meta.get("path") or "") if isinstance(meta, dict) else ""
+            if not rel or not meta.get("ok"):
+                continue
+            txt_path = (root / f"{rel}.txt").resolve()
+            try:
+                text = txt_path.read_text(encoding="utf-8", errors="replace")
+            except Exception:
+                continue
+            data["files"][rel] = _index_record(text)
+    _write_index_file(root, data)
+    return data
+
+
+def rebuild_derived_index(agent_name: str, customer_id: int | None = None) -> dict[str, Any]:
+    """Reconstruye _derived/_index.json desde los .txt/.meta.json existentes."""
     root = derived_root(agent_name, customer_id)
+    with _index_guard(root):
+        data = _build_index_locked(root)
+    files = data["files"]
+    return {
+        "ok": True,
+        "files": len(files),
+        "chunks": sum(len(rec.get("chunks") or []) for rec in files.values()),
+    }
 
-    _GENERIC_PATH_MARKERS = (
-        "ejemplo_",
-        "ejemplo-",
-        "formato_",
-        "formato-",
-        "glosario",
-        "decreto",
-        "orientaciones",
-        "cartilla",
-        "normativa",
-        "base_institucional",
-    )
 
-    for meta in ok_metas:
-        rel = str(meta.get("path") or "")
-        rel_l = rel.lower()
+def _load_index(root: Path) -> tuple[dict[str, Any], dict[str, Any]]:
+    """(datos del índice, postings globales en memoria). Construye el índice si falta."""
+    data = _read_index_file(root)
+    if data is None:
+        with _index_guard(root):
+            data = _read_index_file(root) or _build_index_locked(root)
+    key = str(_index_path(root))
+    cached = _index_cache.get(key)
+    if cached and cached[2] is data and cached[3] is not None:
+        return data, cached[3]
+
+    files: dict[str, dict[str, Any]] = data["files"]
+    postings: dict[str, dict[str, list[int]]] = {}
+    rut_chunks: dict[str, dict[str, list[int]]] = {}
+    rut_files: dict[str, set[str]] = {}
+    for rel, rec in files.items():
+        for tok, idxs in (rec.get("tokens") or {}).items():
+            postings.setdefault(tok, {})[rel] = idxs
+        for rut, idxs in (rec.get("ruts") or {}).items():
+            rut_chunks.setdefault(rut, {})[rel] = idxs
+        for rut in rec.get("file_ruts") or ():
+            rut_files.setdefault(rut, set()).add(rel)
+    # Mismo orden que sorted(rglob("*.meta.json")) del escaneo original.
+    order = sorted(files, key=lambda rel: root / f"{rel}.meta.json")
+    # Trigramas del vocabulario → palabras: «token contenido en una palabra» sin recorrerlo entero.
+    vocab_trigrams: dict[str, set[str]] = {}
+    for word in postings:
+        for i in range(len(word) - 2):
+            vocab_trigrams.setdefault(word[i : i + 3], set()).add(word)
+    derived = {
+        "order": order,
+        "postings": postings,
+        "vocab_trigrams": vocab_trigrams,
+        "rut_chunks": rut_chunks,
+        "rut_files": rut_files,
+        "path_tokens": {
+            rel: _tokenize(rel.replace("/", " ").replace("_", " ").replace("-", " "))
+            for rel in order
+        },
+    }
+    if cached and cached[2] is data:
+        _index_cache[key] = (cached[0], cached[1], data, derived)
+    return data, derived
+
+
+def _file_bonus(
+    rel: str,
+    *,
+    person_tokens: set[str],
+    path_tokens: set[str],
+    person_hits: int,
+    rut_norm: str,
+    rut_in_text: bool,
+) -> float | None:
+    """Bonus por archivo (nombre en ruta/texto, RUT). None = archivo descartado."""
+    rel_l = rel.lower()
+    file_bonus = 0.0
+    if person_tokens and (person_tokens & path_tokens):
+        # p.ej. mensaje «isabella diaz» → 2__E_ISABELLA_DIAZ.docx
+        file_bonus += 120.0
+    if person_hits:
+        file_bonus += 40.0 + (10.0 * person_hits)
+    if rut_norm and rut_in_text:
+        file_bonus += 80.0
+    elif any(marker in rel_l for marker in file_ctx._INTERACTIVE_REPORT_MARKERS):
+        file_bonus += 5.0
+
+    if any(marker in rel_l for marker in _GENERIC_PATH_MARKERS):
+        if person_tokens or rut_norm:
+            # Plantillas/ejemplos/decretos no son el expediente del estudiante.
+            return None
+        file_bonus -= 25.0
+    return file_bonus
+
+
+def _words_containing(idx: dict[str, Any], tok: str) -> Iterable[str]:
+    """Palabras del vocabulario que contienen ``tok`` (intersección de sus trigramas)."""
+    if len(tok) < 3:
+        return [word for word in idx["postings"] if tok in word]
+    grams = idx["vocab_trigrams"]
+    sets = [grams.get(tok[i : i + 3]) for i in range(len(tok) - 2)]
+    if not all(sets):
+        return []
+    sets.sort(key=len)
+    words = set(sets[0]).intersection(*sets[1:])
+    return [word for word in words if tok in word]
+
+
+def _scored_chunks_from_index(
+    root: Path,
+    *,
+    query_tokens: set[str],
+    person_tokens: set[str],
+    rut_norm: str,
+) -> tuple[list[str], Iterator[tuple[str, str]]]:
+    """(rutas indexadas, (rel, chunk) en orden de score) usando solo postings."""
+    data, idx = _load_index(root)
+    files: dict[str, dict[str, Any]] = data["files"]
+    order: list[str] = idx["order"]
+    postings = idx["postings"]
+
+    # Bonus de nombre en el texto: «token in texto» equivale a token contenido en alguna
+    # palabra del vocabulario del archivo (los tokens de persona son alfanuméricos).
+    person_hits: dict[str, int] = {}
+    if person_tokens:
+        for tok in person_tokens:
+            hit_files: set[str] = set()
+            for word in _words_containing(idx, tok):
+                hit_files.update(postings[word])
+            for rel in hit_files:
+                person_hits[rel] = person_hits.get(rel, 0) + 1
+    rut_files = idx["rut_files"].get(rut_norm, set()) if rut_norm else set()
+
+    bonuses: dict[str, float] = {}
+    for rel in order:
+        bonus = _file_bonus(
+            rel,
+            person_tokens=person_tokens,
+            path_tokens=idx["path_tokens"][rel],
+            person_hits=person_hits.get(rel, 0),
+            rut_norm=rut_norm,
+            rut_in_text=rel in rut_files,
+        )
+        if bonus is not None:
+            bonuses[rel] = bonus
+
+    scored: list[tuple[float, str, int]] = []
+    if not query_tokens:
+        for rel, bonus in bonuses.items():
+            score = bonus + (3.0 if bonus else 1.0)
+            if score > 0:
+                scored.extend((score, rel, i) for i in range(len(files[rel]["chunks"])))
+    else:
+        overlap: dict[tuple[str, int], int] = {}
+        person_chunk: set[tuple[str, int]] = set()
+        for tok in query_tokens:
+            for rel, idxs in postings.get(tok, {}).items():
+                for i in idxs:
+                    overlap[(rel, i)] = overlap.get((rel, i), 0) + 1
+                    if tok in person_tokens:
+                        person_chunk.add((rel, i))
+        rut_chunk: set[tuple[str, int]] = set()
+        if rut_norm:
+            for rel, idxs in idx["rut_chunks"].get(rut_norm, {}).items():
+                rut_chunk.update((rel, i) for i in idxs)
+
+        candidates = set(overlap) | rut_chunk
+        for rel, bonus in bonuses.items():
+            if bonus > 0:
+                candidates.update((rel, i) for i in range(len(files[rel]["chunks"])))
+        for key in candidates:
+            rel, i = key
+            bonus = bonuses.get(rel)
+            if bonus is None:
+                continue
+            score = float(overlap.get(key, 0)) + bonus
+            if key in rut_chunk:
+                score += 30.0
+            if key in person_chunk:
+                score += 20.0
+            if score > 0:
+                scored.append((score, rel, i))
+
+    scored.sort(key=lambda x: (-x[0], x[1], x[2]))
+
+    def _chunks() -> Iterator[tuple[str, str]]:
+        texts: dict[str, str | None] = {}
+        for _score, rel, i in scored:
+            if rel not in texts:
+                try:
+                    text = (root / f"{rel}.txt").resolve().read_text(encoding="utf-8", errors="replace")
+                    texts[rel] = text.strip()
+                except Exception:
+                    texts[rel] = None
+            text = texts[rel]
+            if text is None:
+                continue
+            start, end = files[rel]["chunks"][i]
+            yield rel, text[start:end]
+
+    return order, _chunks()
+
+
+def _scored_chunks_scan(
+    root: Path,
+    *,
+    query_tokens: set[str],
+    person_tokens: set[str],
+    rut_norm: str,
+) -> tuple[list[str], Iterator[tuple[str, str]]]:
+    """Camino sin índice: relee y tokeniza todos los .txt (referencia para benchmarks)."""
+    ok_paths: list[str] = []
+    if root.exists():
+        for meta_path in sorted(root.rglob("*.meta.json")):
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except Exception:
+                continue
+            if isinstance(meta, dict) and meta.get("path") and meta.get("ok"):
+                ok_paths.append(str(meta["path"]))
+
+    scored: list[tuple[float, str, str]] = []
+    for rel in ok_paths:
         txt_path = (root / f"{rel}.txt").resolve()
         if not txt_path.is_file():
             continue
@@ -291,26 +692,17 @@ def retrieve_relevant_chunks(
         except Exception:
             continue
 
-        file_bonus = 0.0
-        path_tokens = _tokenize(rel.replace("/", " ").replace("_", " ").replace("-", " "))
-        if person_tokens and (person_tokens & path_tokens):
-            # p.ej. mensaje «isabella diaz» → 2__E_ISABELLA_DIAZ.docx
-            file_bonus += 120.0
-        if person_tokens:
-            text_l = text.lower()
-            hits = sum(1 for t in person_tokens if t in text_l)
-            if hits:
-                file_bonus += 40.0 + (10.0 * hits)
-        if rut_norm and rut_norm in file_ctx._normalize_rut(text):
-            file_bonus += 80.0
-        elif any(marker in rel_l for marker in file_ctx._INTERACTIVE_REPORT_MARKERS):
-            file_bonus += 5.0
-
-        if any(marker in rel_l for marker in _GENERIC_PATH_MARKERS):
-            if person_tokens or rut_norm:
-                # Plantillas/ejemplos/decretos no son el expediente del estudiante.
-                continue
-            file_bonus -= 25.0
+        text_l = text.lower()
+        file_bonus = _file_bonus(
+            rel,
+            person_tokens=person_tokens,
+            path_tokens=_tokenize(rel.replace("/", " ").replace("_", " ").replace("-", " ")),
+            person_hits=sum(1 for t in person_tokens if t in text_l),
+            rut_norm=rut_norm,
+            rut_in_text=bool(rut_norm) and rut_norm in _rut_keys(text),
+        )
+        if file_bonus is None:
+            continue
 
         for chunk in _chunk_text(text):
             chunk_tokens = _tokenize(chunk)
@@ -319,25 +711,55 @@ def retrieve_relevant_chunks(
                 score = file_bonus + (3.0 if file_bonus else 1.0)
             else:
                 score = float(overlap) + file_bonus
-                if rut_norm and rut_norm in file_ctx._normalize_rut(chunk):
+                if rut_norm and rut_norm in _rut_keys(chunk):
                     score += 30.0
                 if person_tokens and (person_tokens & chunk_tokens):
                     score += 20.0
-            # Con estudiante identificado, no descartar chunks del archivo del estudiante
-            # aunque el mensaje sea genérico («genera el informe»).
-            if score <= 0 and query_tokens and file_bonus < 50:
-                continue
             if score <= 0:
                 continue
             scored.append((score, rel, chunk))
 
     scored.sort(key=lambda x: (-x[0], x[1]))
+    return ok_paths, ((rel, chunk) for _score, rel, chunk in scored)
+
+
+def retrieve_relevant_chunks(
+    agent_name: str,
+    *,
+    query: str = "",
+    student_rut: str | None = None,
+    student_name: str | None = None,
+    customer_id: int | None = None,
+    budget_chars: int = CHAT_BUDGET_CHARS,
+    use_index: bool = True,
+) -> dict[str, Any]:
+    """Índice corto + top chunks por overlap de keywords / RUT / nombre (sin embeddings)."""
+    query_tokens = _tokenize(query)
+    name_tokens = _tokenize(student_name or "")
+    # Nombre de ficha + posibles apellidos/nombres en el mensaje («isabella diaz»).
+    query_tokens |= name_tokens
+    person_tokens = {
+        t for t in (name_tokens | query_tokens) if t not in _QUERY_NOISE and len(t) >= 3
+    }
+
+    rut_norm = file_ctx._normalize_rut(student_rut or "")
+    if len(rut_norm) >= 8:
+        query_tokens.add(rut_norm.lower())
+        if len(rut_norm) > 1:
+            query_tokens.add(rut_norm[:-1].lower())
+
+    root = derived_root(agent_name, customer_id)
+    scorer = _scored_chunks_from_index if use_index else _scored_chunks_scan
+    ok_paths, ranked = scorer(
+        root, query_tokens=query_tokens, person_tokens=person_tokens, rut_norm=rut_norm
+    )
+    index_paths = ok_paths[:CHAT_INDEX_MAX_FILES]
 
     sections: list[str] = []
     used = 0
     used_chunks = 0
     seen: set[str] = set()
-    for _score, rel, chunk in scored:
+    for rel, chunk in ranked:
         key = f"{rel}:{chunk[:80]}"
         if key in seen:
             continue
@@ -358,7 +780,7 @@ def retrieve_relevant_chunks(
     index_line = ", ".join(index_paths) if index_paths else "(sin textos derivados)"
     header = (
         "ARCHIVOS DEL AGENTE (índice + trozos relevantes; presupuesto bajo de tokens).\n"
-        f"Índice ({len(ok_metas)} con texto): {index_line}\n"
+        f"Índice ({len(ok_paths)} con texto): {index_line}\n"
         f"Trozos incluidos: {used_chunks} (~{used} caracteres).\n"
         "Usa SOLO estos datos como fuente documental; no inventes contenido de archivos no listados.\n"
         "Si hay un archivo del estudiante (nombre/RUT en el nombre o en el texto), "
@@ -371,7 +793,7 @@ def retrieve_relevant_chunks(
     )
     return {
         "text": header + "\n" + body,
-        "file_count": len(ok_metas),
+        "file_count": len(ok_paths),
         "chunk_count": used_chunks,
         "chars": used,
         "index": index_paths,
@@ -422,14 +844,18 @@ def rebuild_all_derived(
     errors: list[str] = []
     for path in paths:
         rel = path.relative_to(root).as_posix()
-        meta = write_derived_for_file(agent_name, rel, customer_id)
+        # El índice se escribe una sola vez al final (no una reescritura por archivo).
+        meta = write_derived_for_file(agent_name, rel, customer_id, update_index=False)
         if meta.get("ok"):
             ok += 1
         else:
             errors.append(f"{rel}: {meta.get('error') or 'failed'}")
+    index = rebuild_derived_index(agent_name, customer_id)
     return {
         "ok": True,
         "processed": len(paths),
         "derivedOk": ok,
         "derivedErrors": errors,
+        "indexedFiles": index["files"],
+        "indexedChunks": index["chunks"],
     }
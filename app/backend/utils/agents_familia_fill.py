@@ -2,9 +2,9 @@
 
 from __future__ import annotations
 
+import io
 import logging
 import re
-import shutil
 import unicodedata
 import zipfile
 from pathlib import Path
@@ -16,6 +16,7 @@ from app.backend.utils.familia_report_prefill import (
     FAMILIA_IDENTIFICATION_SDT_TAGS,
     _NARRATIVE_KEYS,
 )
+from app.backend.utils.template_registry import template_entry, write_template_copy
 
 logger = logging.getLogger(__name__)
 
@@ -195,6 +196,20 @@ def _fill_tabla_ministerial(output_path: Path, replacements: dict[str, str]) ->
     return {"status": "success", "filled_keys": filled}
 
 
+def _familia_template_layout(data: bytes) -> str:
+    """'formtext', 'tabla' (ministerial sin controles) o 'sdt' (content controls Word)."""
+    try:
+        from app.backend.utils.familia_report_formtext import docx_has_legacy_formtext
+        from app.backend.utils.familia_report_tabla_fill import docx_is_familia_ministerial_tabla
+    except ImportError:
+        return "sdt"
+    if docx_has_legacy_formtext(io.BytesIO(data)):
+        return "formtext"
+    if docx_is_familia_ministerial_tabla(io.BytesIO(data)):
+        return "tabla"
+    return "sdt"
+
+
 def fill_familia_template(
     template_path: Path,
     output_path: Path,
@@ -207,34 +222,22 @@ def fill_familia_template(
     if not template_path.is_file():
         return {"status": "error", "message": "Template not found."}
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copy2(template_path, output_path)
+    # Copia desde el registro de plantillas; el layout se detecta una vez por versión.
+    entry = template_entry(template_path)
+    write_template_copy(template_path, output_path)
+    layout = entry.derived("familia_layout", _familia_template_layout)
 
     merged = ensure_familia_replacement_defaults(
         merge_familia_replacements(replacements, student_context or {})
     )
 
-    try:
-        from app.backend.utils.familia_report_formtext import (
-            docx_has_legacy_formtext,
-            fill_familia_formtext_fields,
-        )
-        from app.backend.utils.familia_report_tabla_fill import (
-            FAMILIA_TABLA_SLOTS,
-            _fill_tabla_slot_rows,
-            docx_is_familia_ministerial_tabla,
-        )
-    except ImportError:
-        docx_has_legacy_formtext = None  # type: ignore
-        fill_familia_formtext_fields = None  # type: ignore
-        docx_is_familia_ministerial_tabla = None  # type: ignore
-        fill_familia_tabla_fields = None  # type: ignore
-
     result: dict[str, Any]
 
-    if docx_has_legacy_formtext and docx_has_legacy_formtext(output_path):
-        result = fill_familia_formtext_fields(template_path, merged, output_path)
-    elif docx_is_familia_ministerial_tabla and docx_is_familia_ministerial_tabla(output_path):
+    if layout == "formtext":
+        from app.backend.utils.familia_report_formtext import fill_familia_formtext_fields
+
+        result = fill_familia_formtext_fields(output_path, merged, output_path)
+    elif layout == "tabla":
         result = _fill_tabla_ministerial(output_path, merged)
     else:
         cc_aliases = dict(FAMILIA_CONTENT_CONTROL_ALIASES)
@@ -2,7 +2,11 @@
 
 from __future__ import annotations
 
+import bisect
 import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from app.backend.utils import agents_storage as storage
@@ -34,6 +38,9 @@ _INTERACTIVE_REPORT_MARKERS = (
     "reporte-interactivo",
 )
 
+# Libros Excel parseados que se mantienen en memoria (LRU) para pistas por estudiante.
+SHEET_CACHE_MAX_WORKBOOKS = 32
+
 
 def _normalize_rut(value: str) -> str:
     return re.sub(r"[^0-9kK]", "", (value or "").strip()).upper()
@@ -215,21 +222,6 @@ def _name_tokens(student_name: str | None) -> list[str]:
     return [t for t in _fold_sheet_text(student_name or "").split() if len(t) >= 3]
 
 
-def _row_matches_student(
-    row_values: list[str],
-    *,
-    target_rut: str,
-    name_tokens: list[str],
-) -> bool:
-    if target_rut and any(_cell_matches_rut(v, target_rut) for v in row_values if v):
-        return True
-    if len(name_tokens) >= 2:
-        blob = _fold_sheet_text(" ".join(row_values))
-        hits = sum(1 for t in name_tokens if t in blob)
-        return hits >= min(2, len(name_tokens))
-    return False
-
-
 def _excel_row_area_label(
     header_vals: list[str],
     row_values: list[str],
@@ -263,7 +255,7 @@ def _excel_row_area_label(
 def _format_excel_hit_row(
     *,
     sheet_name: str,
-    df,
+    rows: list[tuple[str, ...]],
     row_idx: int,
     row_values: list[str],
     label: str,
@@ -271,8 +263,8 @@ def _format_excel_hit_row(
     header_vals: list[str] = []
     # Fila 0 suele ser encabezado de Google Forms / cuestionario.
     if int(row_idx) > 0:
-        header_vals = [str(v).strip() for v in df.iloc[0].fillna("").tolist()]
-        prev = [str(v).strip() for v in df.iloc[int(row_idx) - 1].fillna("").tolist()]
+        header_vals = list(rows[0])
+        prev = list(rows[int(row_idx) - 1])
         # Si la fila anterior parece más un encabezado corto, úsala.
         if prev and sum(1 for v in prev if v) <= max(3, len(header_vals) // 4):
             header_vals = prev
@@ -298,6 +290,133 @@ def _format_excel_hit_row(
     return "\n".join(lines)
 
 
+@dataclass
+class _SheetIndex:
+    """Hoja parseada (celdas como texto, sin NaN) + índices RUT / tokens de nombre → filas."""
+
+    name: str
+    rows: list[tuple[str, ...]]
+    # (RUT normalizado de la celda, fila) ordenado: búsqueda por prefijo con bisect.
+    rut_cells: list[tuple[str, int]] = field(default_factory=list)
+    # Cuerpo (sin DV) de celdas con 8+ caracteres normalizados → filas.
+    rut_bodies: dict[str, set[int]] = field(default_factory=dict)
+    # Palabra del texto plegado de la fila → filas.
+    words: dict[str, set[int]] = field(default_factory=dict)
+    # Trigrama → palabras que lo contienen: «token contenido en una palabra» sin recorrer ``words``.
+    word_trigrams: dict[str, set[str]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, name: str, df) -> "_SheetIndex":
+        df = df.fillna("")
+        rows = [tuple(str(v).strip() for v in values) for values in df.itertuples(index=False, name=None)]
+        sheet = cls(name=name, rows=rows)
+        rut_cells: list[tuple[str, int]] = []
+        # Fila 0 suele ser el enunciado del cuestionario, no un alumno.
+        for row_idx in range(1, len(rows)):
+            row_values = rows[row_idx]
+            if not any(row_values):
+                continue
+            for value in row_values:
+                norm = _normalize_rut(value) if value else ""
+                if not norm:
+                    continue
+                rut_cells.append((norm, row_idx))
+                if len(norm) >= 8:
+                    sheet.rut_bodies.setdefault(norm[:-1], set()).add(row_idx)
+            for word in _fold_sheet_text(" ".join(row_values)).split():
+                sheet.words.setdefault(word, set()).add(row_idx)
+        rut_cells.sort()
+        sheet.rut_cells = rut_cells
+        for word in sheet.words:
+            for i in range(len(word) - 2):
+                sheet.word_trigrams.setdefault(word[i : i + 3], set()).add(word)
+        return sheet
+
+    def rows_for_rut(self, target_rut: str) -> set[int]:
+        """Filas con alguna celda que cumple ``_cell_matches_rut(celda, target_rut)``."""
+        found: set[int] = set()
+        if not target_rut:
+            return found
+        prefix = target_rut[:-1] if len(target_rut) >= 8 else target_rut
+        start = bisect.bisect_left(self.rut_cells, (prefix, -1))
+        for norm, row_idx in self.rut_cells[start:]:
+            if not norm.startswith(prefix):
+                break
+            if norm == target_rut or len(target_rut) >= 8:
+                found.add(row_idx)
+        for end in range(7, len(target_rut) + 1):
+            found.update(self.rut_bodies.get(target_rut[:end], ()))
+        return found
+
+    def _words_containing(self, token: str) -> list[str]:
+        """Palabras de la hoja que contienen ``token`` (intersección de sus trigramas)."""
+        if len(token) < 3:
+            return [word for word in self.words if token in word]
+        sets = [self.word_trigrams.get(token[i : i + 3]) for i in range(len(token) - 2)]
+        if not all(sets):
+            return []
+        sets.sort(key=len)
+        candidates = set(sets[0]).intersection(*sets[1:])
+        return [word for word in candidates if token in word]
+
+    def rows_for_name(self, name_tokens: list[str]) -> set[int]:
+        """Filas cuyo texto plegado contiene al menos 2 de los tokens (substring, como antes)."""
+        if len(name_tokens) < 2:
+            return set()
+        hits: dict[int, int] = {}
+        for token in name_tokens:
+            rows: set[int] = set()
+            for word in self._words_containing(token):
+                rows |= self.words[word]
+            for row_idx in rows:
+                hits[row_idx] = hits.get(row_idx, 0) + 1
+        need = min(2, len(name_tokens))
+        return {row_idx for row_idx, count in hits.items() if count >= need}
+
+
+_sheet_cache: "OrderedDict[str, tuple[tuple[int, int], list[_SheetIndex] | str]]" = OrderedDict()
+_sheet_cache_lock = threading.Lock()
+
+
+def _load_workbook_sheets(path: Path) -> list[_SheetIndex] | str:
+    """Hojas indexadas del Excel (cache por ruta + mtime + tamaño) o el mensaje de error al leer."""
+    try:
+        stat = path.stat()
+    except OSError as exc:
+        return str(exc)
+    key = str(path.resolve())
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _sheet_cache_lock:
+        cached = _sheet_cache.get(key)
+        if cached and cached[0] == version:
+            _sheet_cache.move_to_end(key)
+            return cached[1]
+
+    import pandas as pd
+
+    try:
+        ext = path.suffix.lower()
+        engine = "xlrd" if ext == ".xls" else ("openpyxl" if ext in {".xlsx", ".xlsm"} else None)
+        read_kwargs: dict = {"sheet_name": None, "header": None, "dtype": str}
+        if engine:
+            read_kwargs["engine"] = engine
+        sheets = pd.read_excel(path, **read_kwargs)
+        if not isinstance(sheets, dict):
+            sheets = {"Hoja1": sheets}
+        entry: list[_SheetIndex] | str = [
+            _SheetIndex.build(str(sheet_name), df) for sheet_name, df in sheets.items()
+        ]
+    except Exception as exc:
+        entry = str(exc)
+
+    with _sheet_cache_lock:
+        _sheet_cache[key] = (version, entry)
+        _sheet_cache.move_to_end(key)
+        while len(_sheet_cache) > SHEET_CACHE_MAX_WORKBOOKS:
+            _sheet_cache.popitem(last=False)
+    return entry
+
+
 def extract_spreadsheet_hint_for_student(
     agent_name: str,
     *,
@@ -321,44 +440,23 @@ def extract_spreadsheet_hint_for_student(
     if not paths:
         return "", []
 
-    import pandas as pd
-
     sections: list[str] = []
     matched_files: list[str] = []
 
     for path in paths:
         rel = path.relative_to(root).as_posix()
-        try:
-            ext = path.suffix.lower()
-            engine = "xlrd" if ext == ".xls" else ("openpyxl" if ext in {".xlsx", ".xlsm"} else None)
-            read_kwargs: dict = {"sheet_name": None, "header": None, "dtype": str}
-            if engine:
-                read_kwargs["engine"] = engine
-            sheets = pd.read_excel(path, **read_kwargs)
-            if not isinstance(sheets, dict):
-                sheets = {"Hoja1": sheets}
-        except Exception as exc:
+        sheets = _load_workbook_sheets(path)
+        if isinstance(sheets, str):
             sections.append(
-                f"### Excel: {rel}\n[Error al leer: {exc}. "
+                f"### Excel: {rel}\n[Error al leer: {sheets}. "
                 "Verifique openpyxl (xlsx) y xlrd (xls) en el servidor.]"
             )
             continue
 
         file_hits: list[str] = []
-        for sheet_name, df in sheets.items():
-            df = df.fillna("")
-            hits_in_sheet = 0
-            for row_idx, row in df.iterrows():
-                row_values = [str(v).strip() for v in row.tolist()]
-                if not any(row_values):
-                    continue
-                # Fila 0 suele ser el enunciado del cuestionario, no un alumno.
-                if int(row_idx) == 0:
-                    continue
-                if not _row_matches_student(
-                    row_values, target_rut=target, name_tokens=tokens
-                ):
-                    continue
+        for sheet in sheets:
+            matched_rows = sheet.rows_for_rut(target) | sheet.rows_for_name(tokens)
+            for row_idx in sorted(matched_rows)[:12]:
                 who = (
                     f"fila del estudiante {student_name or student_rut}"
                     if student_name
@@ -366,16 +464,13 @@ def extract_spreadsheet_hint_for_student(
                 )
                 file_hits.append(
                     _format_excel_hit_row(
-                        sheet_name=str(sheet_name),
-                        df=df,
-                        row_idx=int(row_idx),
-                        row_values=row_values,
+                        sheet_name=sheet.name,
+                        rows=sheet.rows,
+                        row_idx=row_idx,
+                        row_values=list(sheet.rows[row_idx]),
                         label=who,
                     )
                 )
-                hits_in_sheet += 1
-                if hits_in_sheet >= 12:
-                    break
 
         if file_hits:
             matched_files.append(rel)
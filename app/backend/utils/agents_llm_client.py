@@ -1,12 +1,26 @@
-"""Cliente LLM genérico (chat completions estilo OpenAI, streaming)."""
+"""Cliente LLM genérico (chat completions estilo OpenAI, streaming).
+
+Dos caminos con el mismo protocolo de eventos (``text_delta`` / ``done`` / ``error``):
+
+- ``astream_chat_completion``: asyncio + httpx con pool keep-alive compartido (HTTP/2 si
+  ``AGENTS_LLM_HTTP2=1`` y ``h2`` está instalado). Lo usa el chat SSE: el stream no ocupa
+  un hilo y se cancela cuando el navegador se desconecta.
+- ``stream_chat_completion``: síncrono (``requests.Session`` compartida), para hilos como
+  los informes masivos.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import json
-from collections.abc import Iterator
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
 from typing import Any
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from sqlalchemy.orm import Session
 
 from app.backend.core.config import settings
@@ -94,6 +108,101 @@ def estimate_tokens_from_text(text: str) -> int:
     return max(0, (len(text or "") + 3) // 4)
 
 
+def _missing_key_event() -> dict[str, Any]:
+    return {
+        "type": "error",
+        "message": (
+            "Falta AGENTS_LLM_API_KEY en el .env del servidor. "
+            "La API key ya no se configura desde la web."
+        ),
+        "code": "missing_api_key",
+    }
+
+
+def _request_payload(
+    messages: list[dict[str, str]], model: str | None, max_tokens: int | None
+) -> dict[str, Any]:
+    model_code = (model or DEFAULT_MODEL_CODE).strip() or DEFAULT_MODEL_CODE
+    payload: dict[str, Any] = {
+        "model": model_code,
+        "messages": messages,
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+    if max_tokens is not None and int(max_tokens) > 0:
+        payload["max_tokens"] = int(max_tokens)
+    return payload
+
+
+def _request_headers(key: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {key}", "Content-Type": "application/json"}
+
+
+def _http_error_event(status_code: int, text: str) -> dict[str, Any]:
+    detail = (text or "")[:400]
+    try:
+        body = json.loads(text)
+        detail = body.get("error", {}).get("message") or body.get("message") or detail
+    except Exception:
+        pass
+    return {
+        "type": "error",
+        "message": f"Error del proveedor LLM ({status_code}): {detail}",
+        "code": "llm_http",
+        "status": int(status_code),
+    }
+
+
+def _parse_sse_line(raw_line: str | None) -> tuple[bool, str, dict[str, Any] | None]:
+    """Una línea SSE → (terminó, delta de texto, usage crudo si vino en el chunk)."""
+    line = (raw_line or "").strip()
+    if not line.startswith("data:"):
+        return False, "", None
+    data = line[5:].strip()
+    if not data:
+        return False, "", None
+    if data == "[DONE]":
+        return True, "", None
+    try:
+        chunk = json.loads(data)
+    except json.JSONDecodeError:
+        return False, "", None
+    chunk_usage = chunk.get("usage")
+    usage = chunk_usage if isinstance(chunk_usage, dict) and chunk_usage else None
+    choices = chunk.get("choices") or []
+    if not choices:
+        return False, "", usage
+    return False, (choices[0].get("delta") or {}).get("content") or "", usage
+
+
+def _done_event(full_reply: str, usage_raw: dict[str, Any] | None) -> dict[str, Any]:
+    done_payload: dict[str, Any] = {"reply": full_reply}
+    normalized = normalize_usage(usage_raw)
+    if normalized:
+        done_payload["usage"] = normalized
+    return {"type": "done", "data": done_payload}
+
+
+_sync_session: requests.Session | None = None
+_sync_session_lock = threading.Lock()
+
+
+def _get_sync_session() -> requests.Session:
+    """Session compartida entre hilos: reutiliza conexiones TLS al proveedor."""
+    global _sync_session
+    with _sync_session_lock:
+        if _sync_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=max(1, int(settings.agents_llm_pool_max_keepalive or 1)),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sync_session = session
+        return _sync_session
+
+
 def stream_chat_completion(
     messages: list[dict[str, str]],
     *,
@@ -111,33 +220,14 @@ def stream_chat_completion(
     """
     key = (api_key or "").strip() or resolve_llm_api_key(db)
     if not key:
-        yield {
-            "type": "error",
-            "message": (
-                "Falta AGENTS_LLM_API_KEY en el .env del servidor. "
-                "La API key ya no se configura desde la web."
-            ),
-            "code": "missing_api_key",
-        }
+        yield _missing_key_event()
         return
 
-    model_code = (model or DEFAULT_MODEL_CODE).strip() or DEFAULT_MODEL_CODE
-    payload: dict[str, Any] = {
-        "model": model_code,
-        "messages": messages,
-        "stream": True,
-        "stream_options": {"include_usage": True},
-    }
-    if max_tokens is not None and int(max_tokens) > 0:
-        payload["max_tokens"] = int(max_tokens)
     try:
-        response = requests.post(
+        response = _get_sync_session().post(
             llm_chat_completions_url(),
-            headers={
-                "Authorization": f"Bearer {key}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
+            headers=_request_headers(key),
+            json=_request_payload(messages, model, max_tokens),
             stream=True,
             timeout=timeout,
         )
@@ -149,63 +239,214 @@ def stream_chat_completion(
         }
         return
 
-    if response.status_code >= 400:
-        detail = response.text[:400]
+    with response:
+        if response.status_code >= 400:
+            yield _http_error_event(response.status_code, response.text)
+            return
+
+        full_reply = ""
+        usage_raw: dict[str, Any] | None = None
         try:
-            payload = response.json()
-            detail = (
-                payload.get("error", {}).get("message")
-                or payload.get("message")
-                or detail
-            )
+            finished = False
+            for raw_line in response.iter_lines(decode_unicode=True):
+                # Tras [DONE] se lee hasta el final: así la conexión vuelve al pool.
+                if finished:
+                    continue
+                finished, delta, chunk_usage = _parse_sse_line(raw_line)
+                if chunk_usage:
+                    usage_raw = chunk_usage
+                if not delta:
+                    continue
+                full_reply += delta
+                yield {"type": "text_delta", "delta": delta}
+        except requests.RequestException as exc:
+            yield {
+                "type": "error",
+                "message": f"Error leyendo stream del LLM: {exc}",
+                "code": "llm_stream",
+            }
+            return
+
+    yield _done_event(full_reply, usage_raw)
+
+
+class _AsyncPoolStats:
+    """Contadores del pool async (un solo event loop: sin lock)."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.active = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.new_connections = 0
+        self.total_first_byte = 0.0
+        self.first_bytes = 0
+
+    def trace(self, event_name: str, _info: dict[str, Any]) -> None:
+        # Cada conexión TCP nueva pasa por aquí; las reutilizadas (keep-alive) no.
+        if event_name == "connection.connect_tcp.complete":
+            self.new_connections += 1
+
+
+_async_client: httpx.AsyncClient | None = None
+_async_client_loop: asyncio.AbstractEventLoop | None = None
+_async_stats = _AsyncPoolStats()
+
+
+def _http2_enabled() -> bool:
+    if not settings.agents_llm_http2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """AsyncClient del event loop actual (uvicorn tiene uno por proceso)."""
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            http2=_http2_enabled(),
+            limits=httpx.Limits(
+                max_connections=max(1, int(settings.agents_llm_pool_max_connections or 1)),
+                max_keepalive_connections=max(
+                    1, int(settings.agents_llm_pool_max_keepalive or 1)
+                ),
+                keepalive_expiry=30.0,
+            ),
+        )
+        _async_client_loop = loop
+    return _async_client
+
+
+async def aclose_llm_client() -> None:
+    """Cierra el pool async (apagado de la app)."""
+    global _async_client, _async_client_loop
+    client, _async_client, _async_client_loop = _async_client, None, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def llm_pool_metrics() -> dict[str, Any]:
+    stats = _async_stats
+    data: dict[str, Any] = {
+        "http2": _http2_enabled(),
+        "max_connections": int(settings.agents_llm_pool_max_connections or 0),
+        "max_keepalive": int(settings.agents_llm_pool_max_keepalive or 0),
+        "requests": stats.requests,
+        "active_streams": stats.active,
+        "failed": stats.failed,
+        "cancelled": stats.cancelled,
+        "new_connections": stats.new_connections,
+        "avg_first_byte_ms": (
+            round(stats.total_first_byte / stats.first_bytes * 1000, 2)
+            if stats.first_bytes
+            else 0.0
+        ),
+        "open_connections": None,
+        "idle_connections": None,
+    }
+    client = _async_client
+    if client is not None and not client.is_closed:
+        # httpcore no expone el pool en API pública: solo diagnóstico, tolerante a cambios.
+        try:
+            connections = list(client._transport._pool.connections)  # type: ignore[attr-defined]
+            data["open_connections"] = len(connections)
+            data["idle_connections"] = sum(1 for c in connections if c.is_idle())
         except Exception:
             pass
-        yield {
-            "type": "error",
-            "message": f"Error del proveedor LLM ({response.status_code}): {detail}",
-            "code": "llm_http",
-        }
+    return data
+
+
+async def astream_chat_completion(
+    messages: list[dict[str, str]],
+    *,
+    api_key: str,
+    model: str | None = None,
+    timeout: int = 120,
+    max_tokens: int | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Versión asyncio de ``stream_chat_completion``; la clave se resuelve antes (sin BD aquí)."""
+    key = (api_key or "").strip()
+    if not key:
+        yield _missing_key_event()
         return
 
-    full_reply = ""
-    usage_raw: dict[str, Any] | None = None
+    stats = _async_stats
+    stats.requests += 1
+    stats.active += 1
+    started = time.perf_counter()
+    ok = False
+    delivered = False
     try:
-        for raw_line in response.iter_lines(decode_unicode=True):
-            if raw_line is None:
-                continue
-            line = raw_line.strip()
-            if not line or not line.startswith("data:"):
-                continue
-            data = line[5:].strip()
-            if not data:
-                continue
-            if data == "[DONE]":
-                break
+        client = _get_async_client()
+        try:
+            request = client.build_request(
+                "POST",
+                llm_chat_completions_url(),
+                headers=_request_headers(key),
+                json=_request_payload(messages, model, max_tokens),
+                timeout=httpx.Timeout(float(timeout)),
+                extensions={"trace": _trace_hook},
+            )
+            response = await client.send(request, stream=True)
+        except httpx.HTTPError as exc:
+            yield {
+                "type": "error",
+                "message": f"No se pudo conectar con el proveedor LLM: {exc}",
+                "code": "llm_network",
+            }
+            return
+
+        try:
+            stats.first_bytes += 1
+            stats.total_first_byte += time.perf_counter() - started
+            if response.status_code >= 400:
+                await response.aread()
+                yield _http_error_event(response.status_code, response.text)
+                return
+
+            full_reply = ""
+            usage_raw: dict[str, Any] | None = None
             try:
-                chunk = json.loads(data)
-            except json.JSONDecodeError:
-                continue
-            chunk_usage = chunk.get("usage")
-            if isinstance(chunk_usage, dict) and chunk_usage:
-                usage_raw = chunk_usage
-            choices = chunk.get("choices") or []
-            if not choices:
-                continue
-            delta = (choices[0].get("delta") or {}).get("content") or ""
-            if not delta:
-                continue
-            full_reply += delta
-            yield {"type": "text_delta", "delta": delta}
-    except requests.RequestException as exc:
-        yield {
-            "type": "error",
-            "message": f"Error leyendo stream del LLM: {exc}",
-            "code": "llm_stream",
-        }
-        return
+                finished = False
+                async for raw_line in response.aiter_lines():
+                    # Tras [DONE] se lee hasta el final: así la conexión vuelve al pool.
+                    if finished:
+                        continue
+                    finished, delta, chunk_usage = _parse_sse_line(raw_line)
+                    if chunk_usage:
+                        usage_raw = chunk_usage
+                    if not delta:
+                        continue
+                    full_reply += delta
+                    yield {"type": "text_delta", "delta": delta}
+            except httpx.HTTPError as exc:
+                yield {
+                    "type": "error",
+                    "message": f"Error leyendo stream del LLM: {exc}",
+                    "code": "llm_stream",
+                }
+                return
+        finally:
+            await response.aclose()
 
-    done_payload: dict[str, Any] = {"reply": full_reply}
-    normalized = normalize_usage(usage_raw)
-    if normalized:
-        done_payload["usage"] = normalized
-    yield {"type": "done", "data": done_payload}
+        ok = delivered = True
+        yield _done_event(full_reply, usage_raw)
+    except (asyncio.CancelledError, GeneratorExit):
+        # Navegador desconectado: la respuesta ya se cerró y la conexión vuelve al pool.
+        if not delivered:
+            stats.cancelled += 1
+        ok = True
+        raise
+    finally:
+        stats.active -= 1
+        if not ok:
+            stats.failed += 1
+
+
+async def _trace_hook(event_name: str, info: dict[str, Any]) -> None:
+    _async_stats.trace(event_name, info)
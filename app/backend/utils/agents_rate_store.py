@@ -0,0 +1,162 @@
+"""Contadores del rate limit de Agentes en memoria del proceso.
+
+- Ventana deslizante de solicitudes por minuto (usuario / cliente / colegio).
+- Totales corrientes: tokens del día (usuario / cliente) y gasto USD acumulado del cliente.
+
+Los totales se siembran desde BD y se reconcilian cada ``AGENTS_RATE_RECONCILE_SECONDS``;
+entre medio se suman en memoria al registrar consumo (``AgentsUsageClass.record_chat``).
+Lo que se suma mientras se consulta la BD no se pierde: ``add_mark`` antes de la consulta y
+``set_total(..., mark=...)`` después vuelve a aplicar esas sumas sobre el valor leído.
+Ventanas y totales sin uso se descartan cada ``SWEEP_SECONDS``.
+Con varios workers cada proceso tiene su propia ventana de solicitudes; el consumo de los
+demás procesos se ve en la siguiente reconciliación.
+
+Un store compartido (p. ej. Redis) puede reemplazar a ``MemoryRateLimitStore`` implementando
+los mismos métodos y asignándolo con ``set_rate_limit_store``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Hashable
+from dataclasses import dataclass
+from datetime import date
+
+SWEEP_SECONDS = 60.0
+# Un total (o contador de sumas) sin lecturas ni sumas en este tiempo se descarta.
+IDLE_TOTAL_SECONDS = 3600.0
+
+
+@dataclass
+class RunningTotal:
+    value: float
+    day: date | None
+    reconciled_at: float
+
+
+@dataclass
+class _Added:
+    amount: float
+    touched_at: float
+
+
+class MemoryRateLimitStore:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._windows: dict[Hashable, deque[float]] = {}
+        self._totals: dict[Hashable, RunningTotal] = {}
+        self._added: dict[tuple[Hashable, date | None], _Added] = {}
+        self._swept_at: float | None = None
+
+    def _sweep(self, now: float, window_seconds: float) -> None:
+        """Descarta ventanas sin solicitudes vigentes y totales/sumas sin uso (con el lock tomado)."""
+        if self._swept_at is not None and now - self._swept_at < SWEEP_SECONDS:
+            return
+        self._swept_at = now
+        cutoff = now - window_seconds
+        for key in [k for k, hits in self._windows.items() if not hits or hits[-1] <= cutoff]:
+            del self._windows[key]
+        idle = now - IDLE_TOTAL_SECONDS
+        for key in [k for k, e in self._totals.items() if e.reconciled_at <= idle]:
+            del self._totals[key]
+        for key in [k for k, a in self._added.items() if a.touched_at <= idle]:
+            del self._added[key]
+
+    def acquire(
+        self,
+        checks: list[tuple[Hashable, int]],
+        *,
+        window_seconds: float = 60.0,
+        now: float | None = None,
+    ) -> Hashable | None:
+        """Registra una solicitud en todas las ventanas si ninguna está llena.
+
+        Devuelve la primera clave que excede su límite (y no registra nada) o ``None``.
+        """
+        now = time.monotonic() if now is None else now
+        cutoff = now - window_seconds
+        with self._lock:
+            self._sweep(now, window_seconds)
+            for key, limit in checks:
+                hits = self._windows.get(key)
+                if hits is None:
+                    continue
+                while hits and hits[0] <= cutoff:
+                    hits.popleft()
+                if len(hits) >= limit:
+                    return key
+            for key, _limit in checks:
+                self._windows.setdefault(key, deque()).append(now)
+            return None
+
+    def total(
+        self, key: Hashable, *, day: date | None, max_age_seconds: float, now: float | None = None
+    ) -> float | None:
+        """Total vigente o ``None`` si hay que reconciliar con BD (ausente, viejo u otro día)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._totals.get(key)
+            if entry is None or entry.day != day or now - entry.reconciled_at > max_age_seconds:
+                return None
+            return entry.value
+
+    def add_mark(self, key: Hashable, *, day: date | None, now: float | None = None) -> float:
+        """Marca previa a leer el total desde BD; se pasa luego a ``set_total``."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            added = self._added.setdefault((key, day), _Added(0.0, now))
+            added.touched_at = now
+            return added.amount
+
+    def set_total(
+        self,
+        key: Hashable,
+        value: float,
+        *,
+        day: date | None,
+        now: float | None = None,
+        mark: float | None = None,
+    ) -> None:
+        """Siembra el total leído de BD. Con ``mark`` (de ``add_mark``) suma lo registrado con
+        ``add_total`` mientras se consultaba: puede contarlo dos veces hasta la siguiente
+        reconciliación, pero no perderlo."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if mark is not None:
+                added = self._added.get((key, day))
+                if added is not None:
+                    value += max(0.0, added.amount - mark)
+            self._totals[key] = RunningTotal(value=value, day=day, reconciled_at=now)
+
+    def add_total(
+        self, key: Hashable, amount: float, *, day: date | None, now: float | None = None
+    ) -> None:
+        """Suma al total ya sembrado; si no existe (o es de otro día) lo siembra la próxima lectura."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            added = self._added.setdefault((key, day), _Added(0.0, now))
+            added.amount += amount
+            added.touched_at = now
+            entry = self._totals.get(key)
+            if entry is not None and entry.day == day:
+                entry.value += amount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+            self._totals.clear()
+            self._added.clear()
+
+
+_store: MemoryRateLimitStore = MemoryRateLimitStore()
+
+
+def get_rate_limit_store() -> MemoryRateLimitStore:
+    return _store
+
+
+def set_rate_limit_store(store: MemoryRateLimitStore) -> None:
+    global _store
+    _store = store
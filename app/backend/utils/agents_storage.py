@@ -9,6 +9,7 @@ from pathlib import Path
 from typing import Any
 
 from app.backend.core.config import settings
+from app.backend.utils.upload_sink import StagedUpload, upload_size, write_upload
 
 
 def _safe_segment(value: str) -> str:
@@ -80,17 +81,17 @@ def create_folder(
 def save_file(
     agent_name: str,
     relative_path: str,
-    data: bytes,
+    data: bytes | StagedUpload,
     customer_id: int | None = None,
 ) -> dict[str, Any]:
-    if not data:
+    if not upload_size(data):
         raise ValueError("File is empty.")
     rel = _safe_relative_path(relative_path)
     if not rel:
         raise ValueError("relative_path is required.")
     target = resolve_target(agent_name, rel, customer_id)
     target.parent.mkdir(parents=True, exist_ok=True)
-    target.write_bytes(data)
+    write_upload(target, data)
     return {
         "ok": True,
         "name": target.name,
@@ -221,11 +222,11 @@ def document_template_dir(
 def save_document_template(
     agent_name: str,
     document_id: int,
-    data: bytes,
+    data: bytes | StagedUpload,
     format_type: str,
     customer_id: int | None = None,
 ) -> dict[str, Any]:
-    if not data:
+    if not upload_size(data):
         raise ValueError("File is empty.")
     fmt = format_type.lower()
     if fmt not in {"docx", "pdf"}:
@@ -235,7 +236,7 @@ def save_document_template(
     target = (folder / filename).resolve()
     if not str(target).startswith(str(agent_folder(agent_name, customer_id))):
         raise ValueError("Path not allowed.")
-    target.write_bytes(data)
+    write_upload(target, data)
     rel = str(target.relative_to(files_dir())).replace("\\", "/")
     return {
         "ok": True,
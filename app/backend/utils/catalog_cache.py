@@ -0,0 +1,168 @@
+"""Caché de lectura de catálogos de referencia (regiones, comunas, géneros, tipos de documento…).
+
+Cada tabla tiene un número de versión por proceso. ``cached_catalog(tabla, clave, loader)``
+devuelve la entrada guardada si su versión sigue vigente y no venció el TTL; si no, llama
+``loader()`` (la consulta de siempre), calcula el ETag (SHA-256 del JSON) y la guarda. Los
+errores (``{"status": "error", ...}``) no se guardan.
+
+Los ``store``/``update``/``delete``/``import_from_inspection`` de cada clase llaman
+``bump_catalog(tabla)`` tras el commit: sube la versión y las entradas viejas dejan de servirse.
+Con varios workers uvicorn cada proceso tiene su copia; ``CATALOG_CACHE_TTL_SECONDS`` acota lo
+que puede quedar desfasado en los demás (0 la desactiva). El ETag depende solo del contenido,
+así que es el mismo en todos los workers y ``catalog_response`` responde 304 si coincide con
+``If-None-Match``.
+
+``catalog_name(db, tabla, id)`` resuelve nombres (género, nacionalidad, comuna, región) desde
+un mapa id → nombre cacheado, para los generadores de documentos que antes consultaban fila a fila.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from fastapi import Response, status
+from fastapi.responses import JSONResponse
+
+from app.backend.utils.generated_document_cache import etag_matches
+
+CATALOG_TABLES = (
+    "regions",
+    "provinces",
+    "communes",
+    "nationalities",
+    "genders",
+    "teachings",
+    "document_types",
+    "documents",
+    "special_educational_needs",
+    "career_types",
+    "diversity_criteria",
+)
+
+CACHE_CONTROL = "private, no-cache"
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    data: Any
+    etag: Optional[str]
+
+
+def _is_error(data: Any) -> bool:
+    return isinstance(data, dict) and data.get("status") == "error"
+
+
+def catalog_etag(data: Any) -> str:
+    raw = json.dumps(data, sort_keys=True, default=str, ensure_ascii=False, separators=(",", ":"))
+    return f'"{hashlib.sha256(raw.encode()).hexdigest()[:32]}"'
+
+
+class CatalogCache:
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl_seconds = float(ttl_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._versions: dict[str, int] = {}
+        self._entries: dict[tuple[str, Hashable], tuple[int, float, CatalogEntry]] = {}
+        self.loads = 0
+
+    def version(self, table: str) -> int:
+        with self._lock:
+            return self._versions.get(table, 0)
+
+    def get_or_load(self, table: str, key: Hashable, loader: Callable[[], Any]) -> CatalogEntry:
+        if self.ttl_seconds <= 0:
+            data = loader()
+            return CatalogEntry(data, None if _is_error(data) else catalog_etag(data))
+        with self._lock:
+            version = self._versions.get(table, 0)
+            hit = self._entries.get((table, key))
+            if hit is not None and hit[0] == version and hit[1] > self._clock():
+                return hit[2]
+        data = loader()
+        self.loads += 1
+        if _is_error(data):
+            return CatalogEntry(data, None)
+        entry = CatalogEntry(data, catalog_etag(data))
+        with self._lock:
+            # Si hubo un bump mientras se consultaba, no se guarda (podría ser el dato anterior).
+            if self._versions.get(table, 0) == version:
+                self._entries[(table, key)] = (version, self._clock() + self.ttl_seconds, entry)
+        return entry
+
+    def bump(self, *tables: str) -> None:
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                for k in [k for k in self._entries if k[0] == table]:
+                    del self._entries[k]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache: Optional[CatalogCache] = None
+
+
+def get_catalog_cache() -> CatalogCache:
+    global _cache
+    if _cache is None:
+        from app.backend.core.config import settings
+
+        _cache = CatalogCache(settings.catalog_cache_ttl_seconds)
+    return _cache
+
+
+def set_catalog_cache(cache: Optional[CatalogCache]) -> None:
+    global _cache
+    _cache = cache
+
+
+def cached_catalog(table: str, key: Hashable, loader: Callable[[], Any]) -> CatalogEntry:
+    return get_catalog_cache().get_or_load(table, key, loader)
+
+
+def bump_catalog(*tables: str) -> None:
+    get_catalog_cache().bump(*tables)
+
+
+def catalog_response(entry: CatalogEntry, if_none_match: Optional[str], content: Any) -> Response:
+    """JSONResponse con ``ETag`` de la entrada, o 304 sin cuerpo si el cliente ya la tiene."""
+    if entry.etag is None:
+        return JSONResponse(status_code=status.HTTP_200_OK, content=content)
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=content, headers=headers)
+
+
+_NAME_COLUMNS = {
+    "genders": ("GenderModel", "gender"),
+    "nationalities": ("NationalityModel", "nationality"),
+    "communes": ("CommuneModel", "commune"),
+    "regions": ("RegionModel", "region"),
+}
+
+
+def catalog_name(db, table: str, row_id: Any) -> Optional[str]:
+    """Nombre de ``row_id`` en ``table`` (incluye filas dadas de baja, como la consulta por id)."""
+    try:
+        rid = int(row_id)
+    except (TypeError, ValueError):
+        return None
+    model_name, column = _NAME_COLUMNS[table]
+
+    def _load() -> dict[int, Optional[str]]:
+        from app.backend.db import models
+
+        model = getattr(models, model_name)
+        return {int(r[0]): r[1] for r in db.query(model.id, getattr(model, column)).all()}
+
+    return cached_catalog(table, "names", _load).data.get(rid)
@@ -0,0 +1,154 @@
+"""Exportación por curso: un documento por estudiante, empaquetado como ZIP en streaming.
+
+``POST /documents/generate/course/{course_id}/{document_id}`` precarga a todos los
+estudiantes del curso en una consulta (``StudentClass.get_by_course``), genera el documento
+de cada uno en paralelo (``iter_rendered``, en el pool ``render`` compartido con el resto de
+los documentos) y va escribiendo el ZIP a medida que terminan (``stream_course_zip``). El ZIP se arma sobre un flujo no seekable (descriptores de datos
+después de cada entrada), así que en memoria solo queda el trozo pendiente de enviar,
+nunca el archivo completo. Al final va ``manifest.json`` con el resultado por estudiante.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import unicodedata
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from app.backend.core.executors import BoundedExecutor, render_executor
+
+MANIFEST_NAME = "manifest.json"
+CHUNK_SIZE = 64 * 1024
+
+# PDF y DOCX ya vienen comprimidos: se guardan tal cual (deflate solo gasta CPU).
+_STORED_SUFFIXES = {".pdf", ".docx", ".xlsx", ".zip"}
+
+
+@dataclass
+class CourseExportEntry:
+    student_id: int
+    student_name: str
+    status: str  # "ok" | "error"
+    filename: Optional[str] = None
+    file_path: Optional[str] = None
+    message: Optional[str] = None
+
+
+class _ChunkSink:
+    """Destino de escritura sin ``seek``/``tell``: ``zipfile`` escribe en modo streaming."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _slug(value: str) -> str:
+    normalized = unicodedata.normalize("NFKD", value or "").encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^A-Za-z0-9]+", "_", normalized).strip("_")[:60] or "estudiante"
+
+
+def iter_rendered(
+    items: Iterable[Any],
+    render_one: Callable[[Any], dict[str, Any]],
+    workers: int,
+    executor: Optional[BoundedExecutor] = None,
+) -> Iterator[tuple[Any, dict[str, Any]]]:
+    """``(item, render_one(item))`` en orden de término, con hasta ``workers`` en vuelo.
+
+    Los renders van al pool ``render`` compartido (``RENDER_EXECUTOR_WORKERS``), así que
+    varias exportaciones simultáneas no suman hilos: ``workers`` solo acota cuánto del pool
+    toma esta. Si el consumidor deja de iterar (cliente desconectado) no se lanzan más renders.
+    """
+    pool = executor or render_executor
+    limit = max(1, int(workers))
+    pending_items = list(items)
+    running: dict = {}
+    try:
+        while pending_items or running:
+            while pending_items and len(running) < limit:
+                item = pending_items.pop(0)
+                running[pool.submit(render_one, item)] = item
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    result = {"status": "error", "message": str(exc)}
+                yield item, result
+    finally:
+        for future in running:
+            future.cancel()
+
+
+def stream_course_zip(
+    entries: Iterable[CourseExportEntry],
+    manifest: dict[str, Any],
+) -> Iterator[bytes]:
+    """Bytes del ZIP a medida que llegan ``entries``; ``manifest.json`` va al final."""
+    sink = _ChunkSink()
+    used_names: set[str] = set()
+    results: list[CourseExportEntry] = []
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for entry in entries:
+            results.append(entry)
+            source = Path(entry.file_path) if entry.file_path else None
+            if entry.status != "ok" or source is None or not source.is_file():
+                if entry.status == "ok":
+                    entry.status, entry.message = "error", "El archivo generado no existe."
+                continue
+            suffix = source.suffix.lower()
+            arcname = f"{_slug(entry.student_name)}_{entry.student_id}{suffix}"
+            n = 2
+            while arcname in used_names:
+                arcname = f"{_slug(entry.student_name)}_{entry.student_id}_{n}{suffix}"
+                n += 1
+            used_names.add(arcname)
+            entry.filename = arcname
+            info = zipfile.ZipInfo(arcname, date_time=datetime.now().timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED if suffix in _STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+            with source.open("rb") as src, zf.open(info, "w") as dst:
+                while True:
+                    chunk = src.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+
+        ok = sum(1 for e in results if e.status == "ok")
+        summary = {
+            **manifest,
+            "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "total": len(results),
+            "ok": ok,
+            "failed": len(results) - ok,
+            "students": [
+                {k: v for k, v in asdict(e).items() if k != "file_path"}
+                for e in results
+            ],
+        }
+        zf.writestr(MANIFEST_NAME, json.dumps(summary, ensure_ascii=False, indent=2, default=str))
+    data = sink.drain()
+    if data:
+        yield data
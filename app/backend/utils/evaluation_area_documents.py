@@ -8,6 +8,7 @@ from typing import Optional
 from sqlalchemy.orm import Session
 
 from app.backend.db.models import DocumentModel
+from app.backend.utils.catalog_cache import bump_catalog
 
 # (id, career_type_id, nombre) — sincronizar con admin-frontend/src/constants/evaluationAreas.ts
 EVALUATION_AREA_CATALOG: tuple[tuple[int, int, str], ...] = (
@@ -43,6 +44,7 @@ def ensure_evaluation_area_catalog_document(db: Session, document_id: int) -> Op
             row.deleted_date = None
             row.updated_date = now
             db.commit()
+            bump_catalog("documents")
             db.refresh(row)
             return row
 
@@ -64,6 +66,7 @@ def ensure_evaluation_area_catalog_document(db: Session, document_id: int) -> Op
         )
         db.add(created)
         db.commit()
+        bump_catalog("documents")
         db.refresh(created)
         return created
 
@@ -78,5 +81,6 @@ def ensure_evaluation_area_catalog_document(db: Session, document_id: int) -> Op
     )
     db.add(row)
     db.commit()
+    bump_catalog("documents")
     db.refresh(row)
     return row
@@ -6,7 +6,7 @@ import logging
 import re
 from copy import deepcopy
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
 logger = logging.getLogger(__name__)
 
@@ -78,13 +78,13 @@ _NARRATIVE_SLOT_KEYS = frozenset(
 )
 
 
-def docx_has_legacy_formtext(path: Path) -> bool:
-    """True si el .docx usa campos Word FORMTEXT (cuadros grises)."""
+def docx_has_legacy_formtext(path: Path | BinaryIO) -> bool:
+    """True si el .docx usa campos Word FORMTEXT (cuadros grises). Acepta ruta o stream."""
     try:
         from docx import Document
         from docx.oxml.ns import qn
 
-        doc = Document(str(path))
+        doc = Document(path if hasattr(path, "read") else str(path))
         count = 0
         for instr in doc.element.body.iter(qn("w:instrText")):
             if instr.text and "FORMTEXT" in instr.text:
@@ -6,7 +6,7 @@ import logging
 import re
 from copy import deepcopy
 from pathlib import Path
-from typing import Any, Literal
+from typing import Any, BinaryIO, Literal
 
 from app.backend.utils.familia_report_formtext import (
     _KEY_ALIASES,
@@ -60,13 +60,13 @@ FAMILIA_TABLA_IDENTIFICATION_SLOTS = tuple(s for s in FAMILIA_TABLA_SLOTS if s[0
 FAMILIA_TABLA_NARRATIVE_SLOTS = tuple(s for s in FAMILIA_TABLA_SLOTS if s[0] == 3)
 
 
-def docx_is_familia_ministerial_tabla(path: Path) -> bool:
-    """Plantilla ministerial actual: 5 tablas, sin SDT ni FORMTEXT."""
+def docx_is_familia_ministerial_tabla(path: Path | BinaryIO) -> bool:
+    """Plantilla ministerial actual: 5 tablas, sin SDT ni FORMTEXT. Acepta ruta o stream."""
     try:
         from docx import Document
         from docx.oxml.ns import qn
 
-        doc = Document(str(path))
+        doc = Document(path if hasattr(path, "read") else str(path))
         if any(doc.element.body.iter(qn("w:sdt"))):
             return False
         for instr in doc.element.body.iter(qn("w:instrText")):
@@ -34,6 +34,7 @@ from app.backend.db.models import (
     StudentPersonalInfoModel,
 )
 from app.backend.utils.professional_display import map_professional_id_to_display_name
+from app.backend.utils.template_registry import open_docx_template
 
 W14_NS = "http://schemas.microsoft.com/office/word/2010/wordml"
 
@@ -665,8 +666,8 @@ def resolve_template_path(fur_variant: Optional[str], base_directory: Optional[P
 
 
 def fill_fur_docx(template_path: Path, data: Mapping[str, Any], output_path: Path) -> dict[str, Any]:
-    """Escribe `data` en los content controls de la plantilla FUR."""
-    document = Document(str(template_path))
+    """Escribe `data` en los content controls de una copia (en memoria) de la plantilla FUR."""
+    document = open_docx_template(template_path)
     filled: list[str] = []
     empty: list[str] = []
     checked: list[str] = []
@@ -0,0 +1,273 @@
+"""Caché por contenido de los PDF generados con ``DocumentsClass.generate_document_pdf``.
+
+Clave = sha256 de lo que recibe el generador (document_id, document_data, tag_replacements,
+plantilla: ruta + tamaño + mtime), el día (varios informes imprimen la fecha de hoy) y
+``GENERATOR_VERSION``. Un acierto copia el PDF guardado al directorio de salida en vez de
+volver a renderizar; la clave viaja al cliente como ``ETag``.
+
+Los blobs viven junto a la salida: ``files/system/generated_cache/<clave>.blob`` más
+``<clave>.json`` (nombre original). Se podan por edad (``GENERATED_CACHE_MAX_AGE_HOURS``)
+y, sobre ``GENERATED_CACHE_MAX_MB``, los menos usados primero.
+
+Subir ``GENERATOR_VERSION`` al cambiar el diseño de un documento invalida todo lo guardado.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Iterator
+
+from app.backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+GENERATOR_VERSION = "1"
+CACHE_DIR_NAME = "generated_cache"
+EVICT_INTERVAL_SECONDS = 60.0
+# Temporales/huérfanos de una escritura interrumpida.
+ORPHAN_MAX_AGE_SECONDS = 3600.0
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(str(v) for v in value)
+    if isinstance(value, bytes):
+        return hashlib.sha256(value).hexdigest()
+    return str(value)
+
+
+def _template_fingerprint(template_path: str | None) -> list[Any] | None:
+    if not template_path:
+        return None
+    path = Path(template_path)
+    try:
+        st = path.stat()
+    except OSError:
+        return [str(path), None, None]
+    return [str(path.resolve()), st.st_size, st.st_mtime_ns]
+
+
+def generation_key(
+    document_id: int,
+    document_data: dict[str, Any],
+    *,
+    tag_replacements: dict[str, str] | None = None,
+    template_path: str | None = None,
+    today: date | None = None,
+) -> str:
+    payload = {
+        "v": GENERATOR_VERSION,
+        "day": (today or date.today()).isoformat(),
+        "document_id": int(document_id),
+        "data": document_data,
+        "tags": tag_replacements,
+        "template": _template_fingerprint(template_path),
+    }
+    raw = json.dumps(
+        payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=_json_default
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class GeneratedDocumentCache:
+    def __init__(self, cache_dir: Path, *, max_bytes: int, max_age_seconds: float) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_age_seconds = max(60.0, float(max_age_seconds))
+        self._lock = threading.Lock()
+        self._last_evict = 0.0
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.blob"
+
+    def lookup(self, key: str, output_directory: str) -> dict[str, Any] | None:
+        """Si ``key`` está guardada, deja el PDF en ``output_directory`` y devuelve el resultado."""
+        meta_path, blob_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            blob_size = blob_path.stat().st_size
+            if time.time() - meta_path.stat().st_mtime > self.max_age_seconds:
+                return None
+        except (OSError, ValueError):
+            return None
+        filename = Path(str(meta.get("filename") or f"{key[:16]}.pdf")).name
+        target = Path(output_directory) / filename
+        try:
+            # Mismo nombre y tamaño: es la copia de un acierto anterior (el nombre lleva sufijo
+            # único); no volver a copiar para que la salida no crezca en cada acierto.
+            if not (target.is_file() and target.stat().st_size == blob_size):
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                shutil.copyfile(blob_path, tmp)
+                os.replace(tmp, target)
+            os.utime(meta_path)
+        except OSError:
+            logger.warning("Caché de documentos: no se pudo copiar %s", blob_path, exc_info=True)
+            return None
+        return {
+            "status": "success",
+            "message": "PDF generado exitosamente (caché)",
+            "filename": filename,
+            "file_path": str(target),
+            "etag": key,
+            "cache_hit": True,
+        }
+
+    def store(self, key: str, result: dict[str, Any]) -> None:
+        src = Path(str(result.get("file_path") or ""))
+        if not src.is_file():
+            return
+        meta_path, blob_path = self._paths(key)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            blob_tmp = blob_path.with_name(blob_path.name + suffix)
+            shutil.copyfile(src, blob_tmp)
+            os.replace(blob_tmp, blob_path)
+            meta_tmp = meta_path.with_name(meta_path.name + suffix)
+            meta_tmp.write_text(
+                json.dumps({"filename": result.get("filename") or src.name}, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            os.replace(meta_tmp, meta_path)
+        except OSError:
+            logger.warning("Caché de documentos: no se pudo guardar %s", src, exc_info=True)
+            return
+        self.maybe_evict()
+
+    def maybe_evict(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_evict < EVICT_INTERVAL_SECONDS:
+                return
+            self._last_evict = now
+        self.evict()
+
+    def evict(self, now: float | None = None) -> dict[str, int]:
+        """Borra entradas vencidas y, sobre el tope de tamaño, las de uso más antiguo."""
+        now = time.time() if now is None else now
+        removed = 0
+        entries: list[tuple[float, int, str]] = []
+        total = 0
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return {"removed": 0, "bytes": 0}
+        keys_with_meta = {n[: -len(".json")] for n in names if n.endswith(".json")}
+        for name in names:
+            path = self.cache_dir / name
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            orphan = name.endswith(".tmp") or (
+                name.endswith(".blob") and name[: -len(".blob")] not in keys_with_meta
+            )
+            if orphan:
+                if now - st.st_mtime > ORPHAN_MAX_AGE_SECONDS:
+                    self._remove(name[: -len(".blob")] if name.endswith(".blob") else None, path)
+                continue
+            if not name.endswith(".json"):
+                continue
+            key = name[: -len(".json")]
+            blob = self.cache_dir / f"{key}.blob"
+            try:
+                size = blob.stat().st_size
+            except OSError:
+                size = 0
+            if now - st.st_mtime > self.max_age_seconds:
+                self._remove(key)
+                removed += 1
+                continue
+            entries.append((st.st_mtime, size, key))
+            total += size
+        if self.max_bytes and total > self.max_bytes:
+            for _used, size, key in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(key)
+                total -= size
+                removed += 1
+        return {"removed": removed, "bytes": total}
+
+    def _remove(self, key: str | None, path: Path | None = None) -> None:
+        targets = [path] if path is not None else []
+        if key:
+            targets.extend(self._paths(key))
+        for target in targets:
+            try:
+                target.unlink()
+            except OSError:
+                pass
+
+
+_caches: dict[str, GeneratedDocumentCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_generated_document_cache(output_directory: str) -> GeneratedDocumentCache | None:
+    """Caché hermana de ``output_directory`` (mismo disco), o ``None`` si está desactivada."""
+    if not settings.generated_cache_enabled:
+        return None
+    cache_dir = Path(output_directory).parent / CACHE_DIR_NAME
+    key = str(cache_dir)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = GeneratedDocumentCache(
+                cache_dir,
+                max_bytes=int(settings.generated_cache_max_mb) * 1024 * 1024,
+                max_age_seconds=float(settings.generated_cache_max_age_hours) * 3600,
+            )
+        return cache
+
+
+_etags: contextvars.ContextVar[list[str] | None] = contextvars.ContextVar(
+    "generated_document_etags", default=None
+)
+
+
+@contextmanager
+def track_generation_etags() -> Iterator[list[str]]:
+    """Junta las claves de caché de lo generado dentro del bloque (para el ETag de la ruta)."""
+    keys: list[str] = []
+    token = _etags.set(keys)
+    try:
+        yield keys
+    finally:
+        _etags.reset(token)
+
+
+def note_generation_etag(key: str) -> None:
+    keys = _etags.get()
+    if keys is not None:
+        keys.append(key)
+
+
+def response_etag(keys: list[str]) -> str | None:
+    if not keys:
+        return None
+    digest = keys[0] if len(keys) == 1 else hashlib.sha256("|".join(keys).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {c.strip().removeprefix("W/") for c in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
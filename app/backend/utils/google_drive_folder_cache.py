@@ -0,0 +1,262 @@
+"""Caché ruta lógica → folder_id de Google Drive (memoria del proceso + tabla customer_drive_folders).
+
+Una ruta es relativa a la raíz del customer, con segmentos unidos por "/"
+(p. ej. ``Liceo A/2026/1° Medio A/123456789``). Si Drive responde 404 para una carpeta
+cacheada (la borraron a mano), el llamador invalida el subárbol y se resuelve de nuevo.
+Cada entrada guarda cuándo se comprobó en Drive que existe y no está en la papelera; pasado
+``FOLDER_VERIFY_SECONDS`` el llamador la vuelve a comprobar (``is_verified`` / ``mark_verified``).
+
+``folder_lock`` serializa la creación de la misma carpeta entre hilos: dos subidas
+concurrentes del mismo curso no crean dos carpetas «1° Medio A». Los locks se descartan
+cuando nadie los usa.
+
+Si otro worker guardó la misma ruta antes (``uq_customer_drive_folders_path``), ``put``
+devuelve el folder_id ya guardado. Solo una tabla inexistente (migración pendiente) deja la
+caché en memoria; los demás errores de BD se registran y la siguiente operación reintenta.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.backend.db.database import SessionLocal
+from app.backend.db.models.customer_drive_settings import CustomerDriveFolderModel
+
+logger = logging.getLogger(__name__)
+
+MEMORY_MAX_ENTRIES = 20_000
+# Segundos que se confía en una carpeta comprobada en Drive (existe y no está en la papelera).
+FOLDER_VERIFY_SECONDS = 300
+
+_Key = tuple[int, str, str]
+
+
+def _path_hash(root_folder_id: str, path: str) -> str:
+    return hashlib.sha1(f"{root_folder_id}\0{path}".encode("utf-8")).hexdigest()
+
+
+def _is_missing_table(exc: BaseException) -> bool:
+    text = str(getattr(exc, "orig", None) or exc).lower()
+    return "no such table" in text or "doesn't exist" in text or "1146" in text
+
+
+class DriveFolderCache:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.session_factory = session_factory
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (folder_id, momento de la última comprobación en Drive; 0 = sin comprobar).
+        self._memory: OrderedDict[_Key, tuple[str, float]] = OrderedDict()
+        # Lock de creación y cantidad de hilos que lo usan.
+        self._folder_locks: dict[_Key, list] = {}
+        self._db_available = True
+
+    def _remember(self, key: _Key, folder_id: str, verified_at: float = 0.0) -> None:
+        self._memory[key] = (folder_id, verified_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > MEMORY_MAX_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def lookup(self, customer_id: int, root_folder_id: str, paths: Iterable[str]) -> dict[str, str]:
+        """folder_id conocidos para ``paths`` (memoria y luego una sola consulta a BD)."""
+        found: dict[str, str] = {}
+        missing: list[str] = []
+        with self._lock:
+            for path in paths:
+                key = (int(customer_id), root_folder_id, path)
+                entry = self._memory.get(key)
+                if entry:
+                    self._memory.move_to_end(key)
+                    found[path] = entry[0]
+                else:
+                    missing.append(path)
+        if not missing or not self._db_available:
+            return found
+
+        by_hash = {_path_hash(root_folder_id, p): p for p in missing}
+        try:
+            db = self.session_factory()
+            try:
+                rows = (
+                    db.query(CustomerDriveFolderModel.path_hash, CustomerDriveFolderModel.folder_id)
+                    .filter(
+                        CustomerDriveFolderModel.customer_id == int(customer_id),
+                        CustomerDriveFolderModel.path_hash.in_(list(by_hash)),
+                    )
+                    .all()
+                )
+            finally:
+                db.close()
+        except Exception as exc:
+            self._db_error(exc, "leer")
+            return found
+        with self._lock:
+            for path_hash, folder_id in rows:
+                path = by_hash.get(path_hash)
+                if path and folder_id:
+                    found[path] = folder_id
+                    self._remember((int(customer_id), root_folder_id, path), folder_id)
+        return found
+
+    def is_verified(self, customer_id: int, root_folder_id: str, path: str) -> bool:
+        """True si la carpeta se comprobó en Drive hace menos de ``FOLDER_VERIFY_SECONDS``."""
+        with self._lock:
+            entry = self._memory.get((int(customer_id), root_folder_id, path))
+        return bool(entry and entry[1] and self._clock() - entry[1] < FOLDER_VERIFY_SECONDS)
+
+    def mark_verified(self, customer_id: int, root_folder_id: str, path: str) -> None:
+        key = (int(customer_id), root_folder_id, path)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                self._memory[key] = (entry[0], self._clock())
+
+    def put(self, customer_id: int, root_folder_id: str, path: str, folder_id: str) -> str:
+        """Guarda ``folder_id`` (recién creado o hallado en Drive) y devuelve el que queda vigente.
+
+        Si otro worker ya guardó esa ruta, gana su folder_id para que todos suban a la misma carpeta.
+        """
+        key = (int(customer_id), root_folder_id, path)
+        with self._lock:
+            self._remember(key, folder_id, self._clock())
+        if not self._db_available:
+            return folder_id
+        path_hash = _path_hash(root_folder_id, path)
+
+        def _stored(db: Session):
+            return (
+                db.query(CustomerDriveFolderModel)
+                .filter(
+                    CustomerDriveFolderModel.customer_id == int(customer_id),
+                    CustomerDriveFolderModel.path_hash == path_hash,
+                )
+                .first()
+            )
+
+        try:
+            db = self.session_factory()
+            try:
+                row = _stored(db)
+                if row is None:
+                    db.add(
+                        CustomerDriveFolderModel(
+                            customer_id=int(customer_id),
+                            path_hash=path_hash,
+                            root_folder_id=root_folder_id,
+                            path=path,
+                            folder_id=folder_id,
+                            created_at=datetime.utcnow(),
+                        )
+                    )
+                else:
+                    row.folder_id = folder_id
+                db.commit()
+            except IntegrityError:
+                # Otro worker insertó la misma ruta entre la consulta y el commit.
+                db.rollback()
+                row = _stored(db)
+                if row is not None and row.folder_id:
+                    with self._lock:
+                        self._remember(key, row.folder_id, self._clock())
+                    return row.folder_id
+                raise
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+        except Exception as exc:
+            self._db_error(exc, "guardar")
+        return folder_id
+
+    def invalidate(self, customer_id: int, root_folder_id: str, path: str) -> None:
+        """Olvida ``path`` y todo lo que cuelga de él (memoria y BD)."""
+        prefix = f"{path}/"
+        with self._lock:
+            for key in [
+                k
+                for k in self._memory
+                if k[0] == int(customer_id)
+                and k[1] == root_folder_id
+                and (k[2] == path or k[2].startswith(prefix))
+            ]:
+                del self._memory[key]
+        if not self._db_available:
+            return
+        try:
+            db = self.session_factory()
+            try:
+                (
+                    db.query(CustomerDriveFolderModel)
+                    .filter(
+                        CustomerDriveFolderModel.customer_id == int(customer_id),
+                        CustomerDriveFolderModel.root_folder_id == root_folder_id,
+                        (CustomerDriveFolderModel.path == path)
+                        | CustomerDriveFolderModel.path.startswith(prefix, autoescape=True),
+                    )
+                    .delete(synchronize_session=False)
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+        except Exception as exc:
+            self._db_error(exc, "invalidar")
+
+    @contextmanager
+    def folder_lock(self, customer_id: int, root_folder_id: str, path: str) -> Iterator[None]:
+        key = (int(customer_id), root_folder_id, path)
+        with self._lock:
+            slot = self._folder_locks.get(key)
+            if slot is None:
+                slot = self._folder_locks[key] = [threading.Lock(), 0]
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._folder_locks[key]
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def _db_error(self, exc: BaseException, action: str) -> None:
+        # Sin la tabla (migración pendiente) la caché sigue en memoria; no romper subidas.
+        if _is_missing_table(exc):
+            if self._db_available:
+                logger.warning("Caché de carpetas Drive sin BD (solo memoria): %s", exc)
+            self._db_available = False
+            return
+        logger.warning("Caché de carpetas Drive: no se pudo %s en BD: %s", action, exc)
+
+
+_cache = DriveFolderCache()
+
+
+def get_drive_folder_cache() -> DriveFolderCache:
+    return _cache
+
+
+def set_drive_folder_cache(cache: DriveFolderCache) -> None:
+    global _cache
+    _cache = cache
@@ -4,12 +4,16 @@ from __future__ import annotations
 
 import io
 import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from functools import lru_cache
 from pathlib import Path
 from typing import Any, Literal
 
 from app.backend.utils.customer_drive_config import DriveCustomerConfig
+from app.backend.utils.google_drive_folder_cache import get_drive_folder_cache
 
 # Alias compat
 DriveSchoolConfig = DriveCustomerConfig
@@ -45,8 +49,8 @@ def _normalize_year(year: int | None) -> int:
     return int(value)
 
 
-@lru_cache(maxsize=32)
-def _drive_service(cache_key: str, service_account_json: str):
+@lru_cache(maxsize=128)
+def _drive_service(cache_key: str, service_account_json: str, thread_key: int = 0):
     try:
         from google.oauth2 import service_account
         from googleapiclient.discovery import build
@@ -66,8 +70,8 @@ def _drive_service(cache_key: str, service_account_json: str):
     return build("drive", "v3", credentials=creds, cache_discovery=False)
 
 
-@lru_cache(maxsize=32)
-def _drive_service_oauth(cache_key: str, oauth_json: str):
+@lru_cache(maxsize=128)
+def _drive_service_oauth(cache_key: str, oauth_json: str, thread_key: int = 0):
     try:
         from google.auth.transport.requests import Request
         from google.oauth2.credentials import Credentials
@@ -103,16 +107,90 @@ def _drive_service_oauth(cache_key: str, oauth_json: str):
 def _service_for_config(config: DriveSchoolConfig):
     import json
 
+    # Un cliente por hilo: httplib2 (transporte de googleapiclient) no es thread-safe y
+    # las subidas de informes masivos corren en paralelo.
+    thread_key = threading.get_ident()
     if getattr(config, "oauth_info", None):
         return _drive_service_oauth(
             config.cache_key,
             json.dumps(config.oauth_info, sort_keys=True),
+            thread_key,
         )
     if not config.service_account_info:
         raise ValueError("Drive sin credenciales (OAuth o service account).")
     return _drive_service(
         config.cache_key,
         json.dumps(config.service_account_info, sort_keys=True),
+        thread_key,
+    )
+
+
+def _is_not_found(exc: BaseException) -> bool:
+    """HttpError 404 de googleapiclient (carpeta/archivo ya no existe)."""
+    resp = getattr(exc, "resp", None)
+    status = getattr(resp, "status", None) if resp is not None else getattr(exc, "status_code", None)
+    try:
+        return int(status) == 404
+    except (TypeError, ValueError):
+        return False
+
+
+def _resolve_folder_path(config: DriveSchoolConfig, segments: list[str]) -> str:
+    """{root}/seg1/…/segN → folder_id, usando la caché y creando solo lo que falte.
+
+    La carpeta cacheada más profunda se comprueba en Drive (``trashed = false``) si no se
+    comprobó hace poco; si está en la papelera o ya no existe se olvida su rama y se prueba
+    un nivel más arriba. Cada carpeta se crea bajo su lock: hilos concurrentes no la duplican.
+    """
+    if not segments:
+        return config.root_folder_id.strip()
+    cache = get_drive_folder_cache()
+    cid = int(config.customer_id)
+    root_id = config.root_folder_id.strip()
+    paths = ["/".join(segments[: i + 1]) for i in range(len(segments))]
+    known = cache.lookup(cid, root_id, paths)
+
+    parent = root_id
+    start = 0
+    for depth in range(len(paths), 0, -1):
+        path = paths[depth - 1]
+        folder_id = known.get(path)
+        if not folder_id:
+            continue
+        if cache.is_verified(cid, root_id, path) or _folder_is_live(config, folder_id):
+            cache.mark_verified(cid, root_id, path)
+            parent, start = folder_id, depth
+            break
+        cache.invalidate(cid, root_id, path)
+    for i in range(start, len(paths)):
+        with cache.folder_lock(cid, root_id, paths[i]):
+            # Otro hilo pudo crearla mientras esperábamos el lock.
+            folder_id = cache.lookup(cid, root_id, [paths[i]]).get(paths[i])
+            if not folder_id:
+                folder_id = cache.put(cid, root_id, paths[i], _ensure_folder(config, parent, segments[i]))
+        parent = folder_id
+    return parent
+
+
+def _folder_is_live(config: DriveSchoolConfig, folder_id: str) -> bool:
+    """True si la carpeta existe y no está en la papelera (ni ella ni un ancestro)."""
+    service = _service_for_config(config)
+    try:
+        meta = (
+            service.files()
+            .get(fileId=folder_id, fields="id,trashed", supportsAllDrives=True)
+            .execute()
+        )
+    except Exception as exc:
+        if _is_not_found(exc):
+            return False
+        raise
+    return not meta.get("trashed")
+
+
+def _invalidate_folder_path(config: DriveSchoolConfig, path: str) -> None:
+    get_drive_folder_cache().invalidate(
+        int(config.customer_id), config.root_folder_id.strip(), path
     )
 
 
@@ -303,6 +381,8 @@ def delete_from_agent_folder(
         _trash_folder(config, target["id"])
     except Exception as exc:
         raise ValueError(_drive_api_error_message(exc)) from exc
+    if target["mimeType"] == _FOLDER_MIME:
+        _invalidate_folder_path(config, f"{agent_label}/{posix}")
 
     return {
         "ok": True,
@@ -389,6 +469,7 @@ def sync_customer_agent_folders(db, customer_id: int | None = None) -> dict[str,
             if name not in wanted_names and name:
                 try:
                     _trash_folder(config, child["id"])
+                    _invalidate_folder_path(config, name)
                     summary["agent_folders_deleted"] += 1
                 except Exception:
                     pass
@@ -453,7 +534,6 @@ def resolve_target_folder(
     if student_id < 1:
         raise ValueError("student_id debe ser >= 1.")
 
-    root_id = config.root_folder_id.strip()
     y = _normalize_year(year)
     flow_key = _normalize_flow(flow)
 
@@ -462,11 +542,17 @@ def resolve_target_folder(
     doc_seg = _safe_segment(str(document_id))
     student_seg = _safe_segment(str(student_id))
 
-    parent = root_id
-    for segment in (school_seg, year_seg, flow_key, doc_seg, student_seg):
-        parent = _ensure_folder(config, parent, segment)
+    segments = [school_seg, year_seg, flow_key, doc_seg, student_seg]
+    try:
+        parent = _resolve_folder_path(config, segments)
+    except Exception as exc:
+        if not _is_not_found(exc):
+            raise
+        # Una carpeta cacheada desapareció en Drive: olvidar la rama y resolver de nuevo.
+        _invalidate_folder_path(config, school_seg)
+        parent = _resolve_folder_path(config, segments)
 
-    logical = f"{school_seg}/{year_seg}/{flow_key}/{doc_seg}/{student_seg}"
+    logical = "/".join(segments)
     return parent, logical
 
 
@@ -517,6 +603,254 @@ def _find_child_file(config: DriveSchoolConfig, parent_id: str, name: str) -> st
     return files[0]["id"] if files else None
 
 
+def _student_upload_mime(ext: str, mime_type: str | None) -> str:
+    return mime_type or (
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        if ext == "docx"
+        else "application/pdf"
+        if ext == "pdf"
+        else "application/octet-stream"
+    )
+
+
+@dataclass
+class _StudentUpload:
+    index: int
+    liceo: str
+    year: int
+    curso: str
+    rut_num: str
+    doc_type: str
+    filename: str
+    mime: str
+    data: bytes
+
+    @property
+    def course_segments(self) -> list[str]:
+        return [self.liceo, str(self.year), self.curso]
+
+
+# Drive acepta varias cláusulas "in parents" unidas por or; se acota el largo de la query.
+_PARENTS_PER_LIST = 40
+
+
+class DriveUploadQueue:
+    """Cola de subidas al árbol {root}/{Liceo}/{Año}/{Curso}/{RUT}/ de un customer.
+
+    ``flush`` agrupa por carpeta de curso: resuelve Liceo/Año/Curso una vez (caché de
+    carpetas), crea las carpetas de RUT que falten y busca los archivos existentes de
+    todo el curso con un solo ``files.list`` por tanda de carpetas.
+    """
+
+    def __init__(self, db: Any, customer_id: int, *, config: DriveSchoolConfig | None = None):
+        if int(customer_id) < 1:
+            raise ValueError("customer_id inválido.")
+        self.db = db
+        self.customer_id = int(customer_id)
+        self._config = config
+        self._items: list[_StudentUpload] = []
+
+    @property
+    def config(self) -> DriveSchoolConfig:
+        if self._config is None:
+            from app.backend.utils.customer_drive_config import (
+                customer_drive_configured,
+                load_customer_drive_config,
+            )
+
+            if not customer_drive_configured(self.db, self.customer_id):
+                raise ValueError(
+                    "Google Drive no está configurado para este cliente. "
+                    "Conéctalo en Configuración → Google Drive."
+                )
+            self._config = load_customer_drive_config(self.db, self.customer_id)
+        return self._config
+
+    def add(
+        self,
+        *,
+        school_name: str,
+        year: int,
+        course_name: str,
+        student_rut: str,
+        document_type_name: str,
+        data: bytes,
+        file_extension: str,
+        mime_type: str | None = None,
+    ) -> int:
+        """Valida y encola; devuelve la posición del resultado en ``flush``."""
+        if not data:
+            raise ValueError("El archivo está vacío.")
+        rut_num = _numeric_rut(student_rut)
+        if int(year) < 2000 or int(year) > 2100:
+            raise ValueError("Año inválido.")
+        doc_type = _drive_folder_label(document_type_name, fallback="Documento")
+        ext = (file_extension or "docx").lower().lstrip(".")
+        if ext not in {"docx", "pdf", "doc"}:
+            ext = "docx"
+        item = _StudentUpload(
+            index=len(self._items),
+            liceo=_drive_folder_label(school_name, fallback="Liceo"),
+            year=int(year),
+            curso=_drive_folder_label(course_name, fallback="Curso"),
+            rut_num=rut_num,
+            doc_type=doc_type,
+            filename=_safe_filename(f"{rut_num}_{doc_type}.{ext}"),
+            mime=_student_upload_mime(ext, mime_type),
+            data=data,
+        )
+        self._items.append(item)
+        return item.index
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def flush(self) -> list[dict[str, Any]]:
+        """Sube todo lo encolado. Cada resultado es el payload o ``{"ok": False, "error": …}``."""
+        items, self._items = self._items, []
+        results: list[dict[str, Any]] = [{} for _ in items]
+        if not items:
+            return results
+        config = self.config
+        groups: OrderedDict[tuple[str, int, str], list[_StudentUpload]] = OrderedDict()
+        for item in items:
+            groups.setdefault((item.liceo, item.year, item.curso), []).append(item)
+        for group in groups.values():
+            try:
+                self._upload_course(config, group, results)
+            except Exception as exc:
+                if not _is_not_found(exc):
+                    message = _drive_api_error_message(exc)
+                    for item in group:
+                        if not results[item.index]:
+                            results[item.index] = {"ok": False, "error": message}
+                    continue
+                # Carpeta cacheada borrada en Drive: olvidar la rama del liceo y reintentar una vez.
+                _invalidate_folder_path(config, group[0].liceo)
+                pending = [item for item in group if not results[item.index]]
+                try:
+                    self._upload_course(config, pending, results)
+                except Exception as retry_exc:
+                    message = _drive_api_error_message(retry_exc)
+                    for item in pending:
+                        if not results[item.index]:
+                            results[item.index] = {"ok": False, "error": message}
+        return results
+
+    def _upload_course(
+        self,
+        config: DriveSchoolConfig,
+        group: list[_StudentUpload],
+        results: list[dict[str, Any]],
+    ) -> None:
+        course_segments = group[0].course_segments
+        _resolve_folder_path(config, course_segments)
+        student_folders: dict[str, str] = {}
+        for item in group:
+            if item.rut_num not in student_folders:
+                student_folders[item.rut_num] = _resolve_folder_path(
+                    config, course_segments + [item.rut_num]
+                )
+        existing = _existing_files_in_folders(config, list(student_folders.values()))
+
+        service = _service_for_config(config)
+        try:
+            from googleapiclient.http import MediaIoBaseUpload
+        except ImportError as exc:
+            raise ValueError("googleapiclient no está instalado.") from exc
+
+        for item in group:
+            if results[item.index]:
+                continue
+            folder_id = student_folders[item.rut_num]
+            resumable = len(item.data) >= 5 * 1024 * 1024
+            media = MediaIoBaseUpload(io.BytesIO(item.data), mimetype=item.mime, resumable=resumable)
+            existing_id = existing.get((folder_id, item.filename))
+            try:
+                if existing_id:
+                    file_meta = (
+                        service.files()
+                        .update(
+                            fileId=existing_id,
+                            media_body=media,
+                            fields="id,name,mimeType,size,webViewLink",
+                            supportsAllDrives=True,
+                        )
+                        .execute()
+                    )
+                else:
+                    file_meta = (
+                        service.files()
+                        .create(
+                            body={"name": item.filename, "parents": [folder_id]},
+                            media_body=media,
+                            fields="id,name,mimeType,size,webViewLink",
+                            supportsAllDrives=True,
+                        )
+                        .execute()
+                    )
+                    # Mismo archivo dos veces en la cola: la segunda reemplaza.
+                    existing[(folder_id, item.filename)] = file_meta.get("id")
+            except Exception as exc:
+                if _is_not_found(exc):
+                    raise
+                results[item.index] = {"ok": False, "error": _drive_api_error_message(exc)}
+                continue
+            results[item.index] = {
+                "ok": True,
+                "file_id": file_meta.get("id"),
+                "filename": file_meta.get("name") or item.filename,
+                "mime_type": file_meta.get("mimeType") or item.mime,
+                "size_bytes": int(file_meta.get("size") or len(item.data)),
+                "web_view_link": file_meta.get("webViewLink"),
+                "drive_path": f"{item.liceo}/{item.year}/{item.curso}/{item.rut_num}/{item.filename}",
+                "replaced": bool(existing_id),
+                "customer_id": self.customer_id,
+                "school_name": item.liceo,
+                "year": item.year,
+                "course_name": item.curso,
+                "student_rut_numeric": item.rut_num,
+                "document_type_name": item.doc_type,
+                "drive_config_source": config.source,
+            }
+
+
+def _existing_files_in_folders(
+    config: DriveSchoolConfig, folder_ids: list[str]
+) -> dict[tuple[str, str], str]:
+    """(folder_id, nombre) → file_id de los archivos (no carpetas) bajo esas carpetas."""
+    service = _service_for_config(config)
+    found: dict[tuple[str, str], str] = {}
+    wanted = set(folder_ids)
+    for start in range(0, len(folder_ids), _PARENTS_PER_LIST):
+        chunk = folder_ids[start : start + _PARENTS_PER_LIST]
+        parents = " or ".join(f"'{fid}' in parents" for fid in chunk)
+        query = f"({parents}) and mimeType != '{_FOLDER_MIME}' and trashed = false"
+        page_token: str | None = None
+        while True:
+            result = (
+                service.files()
+                .list(
+                    q=query,
+                    spaces="drive",
+                    fields="nextPageToken, files(id,name,parents)",
+                    pageSize=1000,
+                    pageToken=page_token,
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True,
+                )
+                .execute()
+            )
+            for f in result.get("files") or []:
+                for parent in f.get("parents") or []:
+                    if parent in wanted:
+                        found.setdefault((parent, str(f.get("name") or "")), str(f["id"]))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                break
+    return found
+
+
 def upload_student_document_tree(
     *,
     db: Any,
@@ -534,107 +868,26 @@ def upload_student_document_tree(
     Sube a Drive del customer con árbol:
       {root}/{Liceo}/{Año}/{Curso}/{RUT numérico}/{RUT_Tipo de documento}.{ext}
     Crea carpetas si no existen. Si el archivo ya existe, lo reemplaza.
+    Para varios archivos del mismo curso usar ``DriveUploadQueue``.
     """
-    from app.backend.utils.customer_drive_config import (
-        customer_drive_configured,
-        load_customer_drive_config,
-    )
-
     if not data:
         raise ValueError("El archivo está vacío.")
-    if int(customer_id) < 1:
-        raise ValueError("customer_id inválido.")
-    if not customer_drive_configured(db, int(customer_id)):
-        raise ValueError(
-            "Google Drive no está configurado para este cliente. "
-            "Conéctalo en Configuración → Google Drive."
-        )
-
-    config = load_customer_drive_config(db, int(customer_id))
-    root_id = config.root_folder_id.strip()
-    rut_num = _numeric_rut(student_rut)
-    year_label = str(int(year))
-    if int(year) < 2000 or int(year) > 2100:
-        raise ValueError("Año inválido.")
-
-    liceo = _drive_folder_label(school_name, fallback="Liceo")
-    curso = _drive_folder_label(course_name, fallback="Curso")
-    doc_type = _drive_folder_label(document_type_name, fallback="Documento")
-    ext = (file_extension or "docx").lower().lstrip(".")
-    if ext not in {"docx", "pdf", "doc"}:
-        ext = "docx"
-    filename = _safe_filename(f"{rut_num}_{doc_type}.{ext}")
-
-    try:
-        liceo_id = _ensure_folder(config, root_id, liceo)
-        year_id = _ensure_folder(config, liceo_id, year_label)
-        course_id = _ensure_folder(config, year_id, curso)
-        student_folder_id = _ensure_folder(config, course_id, rut_num)
-
-        service = _service_for_config(config)
-        try:
-            from googleapiclient.http import MediaIoBaseUpload
-        except ImportError as exc:
-            raise ValueError("googleapiclient no está instalado.") from exc
-
-        mime = mime_type or (
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-            if ext == "docx"
-            else "application/pdf"
-            if ext == "pdf"
-            else "application/octet-stream"
-        )
-        resumable = len(data) >= 5 * 1024 * 1024
-        media = MediaIoBaseUpload(io.BytesIO(data), mimetype=mime, resumable=resumable)
-
-        existing_id = _find_child_file(config, student_folder_id, filename)
-        if existing_id:
-            updated = (
-                service.files()
-                .update(
-                    fileId=existing_id,
-                    media_body=media,
-                    fields="id,name,mimeType,size,webViewLink",
-                    supportsAllDrives=True,
-                )
-                .execute()
-            )
-            file_meta = updated
-            replaced = True
-        else:
-            body = {"name": filename, "parents": [student_folder_id]}
-            file_meta = (
-                service.files()
-                .create(
-                    body=body,
-                    media_body=media,
-                    fields="id,name,mimeType,size,webViewLink",
-                    supportsAllDrives=True,
-                )
-                .execute()
-            )
-            replaced = False
-    except Exception as exc:
-        raise ValueError(_drive_api_error_message(exc)) from exc
-
-    logical = f"{liceo}/{year_label}/{curso}/{rut_num}/{filename}"
-    return {
-        "ok": True,
-        "file_id": file_meta.get("id"),
-        "filename": file_meta.get("name") or filename,
-        "mime_type": file_meta.get("mimeType") or mime,
-        "size_bytes": int(file_meta.get("size") or len(data)),
-        "web_view_link": file_meta.get("webViewLink"),
-        "drive_path": logical,
-        "replaced": replaced,
-        "customer_id": int(customer_id),
-        "school_name": liceo,
-        "year": int(year),
-        "course_name": curso,
-        "student_rut_numeric": rut_num,
-        "document_type_name": doc_type,
-        "drive_config_source": config.source,
-    }
+    queue = DriveUploadQueue(db, int(customer_id))
+    queue.config  # valida Drive configurado antes de validar el archivo
+    queue.add(
+        school_name=school_name,
+        year=year,
+        course_name=course_name,
+        student_rut=student_rut,
+        document_type_name=document_type_name,
+        data=data,
+        file_extension=file_extension,
+        mime_type=mime_type,
+    )
+    result = queue.flush()[0]
+    if not result.get("ok"):
+        raise ValueError(result.get("error") or "No se pudo subir a Google Drive.")
+    return result
 
 
 def upload_bytes(
@@ -673,17 +926,34 @@ def upload_bytes(
     except ImportError as exc:
         raise ValueError("googleapiclient no está instalado.") from exc
 
-    body = {"name": name, "parents": [folder_id]}
-    created = (
-        service.files()
-        .create(
-            body=body,
-            media_body=media,
-            fields="id,name,mimeType,size,webViewLink",
-            supportsAllDrives=True,
+    def _create(parent_id: str) -> dict[str, Any]:
+        return (
+            service.files()
+            .create(
+                body={"name": name, "parents": [parent_id]},
+                media_body=media,
+                fields="id,name,mimeType,size,webViewLink",
+                supportsAllDrives=True,
+            )
+            .execute()
         )
-        .execute()
-    )
+
+    try:
+        created = _create(folder_id)
+    except Exception as exc:
+        if not _is_not_found(exc):
+            raise
+        # Carpeta cacheada borrada en Drive: resolver la ruta de nuevo y reintentar.
+        _invalidate_folder_path(config, logical_path.split("/", 1)[0])
+        folder_id, logical_path = resolve_target_folder(
+            config=config,
+            school_id=school_id,
+            year=year,
+            flow=flow,
+            document_id=document_id,
+            student_id=student_id,
+        )
+        created = _create(folder_id)
     y = _normalize_year(year)
     flow_key = _normalize_flow(flow)
     return {
@@ -721,21 +991,23 @@ def upload_to_agent_folder(
         raise ValueError("customer_id inválido.")
 
     config = load_customer_drive_config(db, int(customer_id))
-    root_id = config.root_folder_id.strip()
     agent_label = (agent_name or "").strip() or f"agent-{customer_id}"
 
     try:
-        # La raíz ya es del customer: no anidar otro nivel customer_id.
-        agent_folder_id = _ensure_folder(config, root_id, agent_label)
-
         posix = Path(relative_path).as_posix().strip("/")
         parts = [p for p in posix.split("/") if p and p not in (".", "..")]
         if not parts:
             raise ValueError("Ruta de archivo inválida.")
 
-        parent_id = agent_folder_id
-        for segment in parts[:-1]:
-            parent_id = _ensure_folder(config, parent_id, segment)
+        # La raíz ya es del customer: no anidar otro nivel customer_id.
+        folder_segments = [agent_label] + parts[:-1]
+        try:
+            parent_id = _resolve_folder_path(config, folder_segments)
+        except Exception as exc:
+            if not _is_not_found(exc):
+                raise
+            _invalidate_folder_path(config, agent_label)
+            parent_id = _resolve_folder_path(config, folder_segments)
         name = _safe_filename(parts[-1])
 
         service = _service_for_config(config)
@@ -752,17 +1024,25 @@ def upload_to_agent_folder(
             resumable=resumable,
         )
 
-        body = {"name": name, "parents": [parent_id]}
-        created = (
-            service.files()
-            .create(
-                body=body,
-                media_body=media,
-                fields="id,name,mimeType,size,webViewLink",
-                supportsAllDrives=True,
+        def _create(folder_id: str) -> dict[str, Any]:
+            return (
+                service.files()
+                .create(
+                    body={"name": name, "parents": [folder_id]},
+                    media_body=media,
+                    fields="id,name,mimeType,size,webViewLink",
+                    supportsAllDrives=True,
+                )
+                .execute()
             )
-            .execute()
-        )
+
+        try:
+            created = _create(parent_id)
+        except Exception as exc:
+            if not _is_not_found(exc):
+                raise
+            _invalidate_folder_path(config, agent_label)
+            created = _create(_resolve_folder_path(config, folder_segments))
     except Exception as exc:
         raise ValueError(_drive_api_error_message(exc)) from exc
 
@@ -0,0 +1,110 @@
+"""Caché corta de los totales del home del profesional, por (professional_id, period_year).
+
+``ProfessionalDocumentAssignmentClass.home_stats`` guarda aquí el resultado junto con los
+cursos que enseña el profesional. Se invalida:
+
+- por profesional, cuando ``mark_completed_after_folder_upload`` o el guardado de
+  asignaciones cambian sus documentos asignados/cargados;
+- por curso, cuando cambia la matrícula (alta, baja o cambio de curso de un estudiante):
+  se descartan las entradas de todos los profesionales que enseñan ese curso.
+
+La caché es por proceso; con varios workers uvicorn el TTL acota lo que puede quedar
+desfasado en los demás. ``HOME_STATS_CACHE_TTL_SECONDS=0`` la desactiva.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any, Optional
+
+MEMORY_MAX_ENTRIES = 5_000
+
+_Key = tuple[int, Optional[int]]
+
+
+class HomeStatsCache:
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl_seconds = float(ttl_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[_Key, tuple[float, frozenset[int], dict[str, Any]]] = OrderedDict()
+
+    def get(self, professional_id: int, period_year: Optional[int]) -> Optional[dict[str, Any]]:
+        if self.ttl_seconds <= 0:
+            return None
+        key = (int(professional_id), period_year)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(entry[2])
+
+    def put(
+        self,
+        professional_id: int,
+        period_year: Optional[int],
+        course_ids: Iterable[int],
+        data: dict[str, Any],
+    ) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        key = (int(professional_id), period_year)
+        with self._lock:
+            self._entries[key] = (
+                self._clock() + self.ttl_seconds,
+                frozenset(int(c) for c in course_ids),
+                dict(data),
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > MEMORY_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def invalidate_professional(self, professional_id: int) -> None:
+        """Olvida todos los períodos de ``professional_id``."""
+        pid = int(professional_id)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == pid]:
+                del self._entries[key]
+
+    def invalidate_courses(self, course_ids: Iterable[Optional[int]]) -> None:
+        """Olvida las entradas de los profesionales que enseñan alguno de ``course_ids``."""
+        ids: set[int] = set()
+        for c in course_ids:
+            try:
+                if c and int(c) > 0:
+                    ids.add(int(c))
+            except (TypeError, ValueError):
+                continue
+        if not ids:
+            return
+        with self._lock:
+            for key in [k for k, v in self._entries.items() if not ids.isdisjoint(v[1])]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache: Optional[HomeStatsCache] = None
+
+
+def get_home_stats_cache() -> HomeStatsCache:
+    global _cache
+    if _cache is None:
+        from app.backend.core.config import settings
+
+        _cache = HomeStatsCache(settings.home_stats_cache_ttl_seconds)
+    return _cache
+
+
+def set_home_stats_cache(cache: Optional[HomeStatsCache]) -> None:
+    global _cache
+    _cache = cache
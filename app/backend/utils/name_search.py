@@ -0,0 +1,58 @@
+"""Nombre completo plegado (minúsculas, sin tildes) y trigramas para buscar estudiantes por índice.
+
+``student_personal_data.full_name_folded`` guarda ``names father mother social`` plegado y la tabla
+``student_name_trigrams`` sus trigramas por palabra. Un token de búsqueda de 3+ caracteres solo puede
+aparecer en nombres que contienen todos sus trigramas, así que el filtro por trigramas (indexado)
+acota candidatos y el ``LIKE`` sobre la columna plegada confirma.
+"""
+
+ACCENT_REPLACEMENTS = (
+    ("á", "a"),
+    ("à", "a"),
+    ("ä", "a"),
+    ("â", "a"),
+    ("é", "e"),
+    ("è", "e"),
+    ("ë", "e"),
+    ("ê", "e"),
+    ("í", "i"),
+    ("ì", "i"),
+    ("ï", "i"),
+    ("î", "i"),
+    ("ó", "o"),
+    ("ò", "o"),
+    ("ö", "o"),
+    ("ô", "o"),
+    ("ú", "u"),
+    ("ù", "u"),
+    ("ü", "u"),
+    ("û", "u"),
+    ("ñ", "n"),
+    ("ç", "c"),
+)
+
+FULL_NAME_FOLDED_MAX_LENGTH = 1024
+
+
+def fold_name_text(value):
+    """LOWER + sin tildes (mismo plegado que se aplicaba en SQL con REPLACE anidados)."""
+    folded = (value or "").lower()
+    for src, dst in ACCENT_REPLACEMENTS:
+        folded = folded.replace(src, dst)
+    return folded
+
+
+def student_full_name_folded(names, father_lastname, mother_lastname, social_name):
+    """Equivalente a concat_ws(' ', coalesce(...)) de los cuatro campos, plegado."""
+    parts = (names, father_lastname, mother_lastname, social_name)
+    joined = " ".join(p or "" for p in parts)
+    return fold_name_text(joined)[:FULL_NAME_FOLDED_MAX_LENGTH]
+
+
+def name_trigrams(folded_text):
+    """Trigramas de cada palabra (separadas por espacios) del texto ya plegado."""
+    grams = set()
+    for word in (folded_text or "").split():
+        for i in range(len(word) - 2):
+            grams.add(word[i : i + 3])
+    return grams
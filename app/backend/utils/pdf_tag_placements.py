@@ -0,0 +1,206 @@
+"""Mapa precalculado de posiciones de etiquetas ([TAG], {tag}, <<tag>>) en plantillas PDF.
+
+``DocumentsClass._generate_pdf_from_template`` buscaba cada etiqueta en cada página, en
+tres variantes de mayúsculas, con ``page.search_for`` y, si no aparecía, recorriendo los
+spans de ``get_text("dict")``. Aquí esa búsqueda se hace una vez por versión de plantilla
+(ver ``template_registry``) sobre la plantilla original y se guardan los rectángulos ya
+filtrados y sin duplicados; renderizar pasa a ser tachar e insertar en posiciones
+conocidas.
+
+Al construir el mapa se analizan todas las etiquetas que aparecen en el texto; una
+etiqueta no vista antes (p. ej. ``{{clave}}`` armada por agentes) se busca la primera vez
+que se pide y queda guardada (hasta ``MAX_EXTRA_TAGS`` por plantilla; pasado ese tope se
+busca en cada render sin guardarla).
+
+Las etiquetas pueden solaparse (``{clave}`` aparece dentro de ``{{clave}}``). Antes el
+renderer tachaba etiqueta por etiqueta y la interior ya no se encontraba; aquí se descarta
+todo rectángulo contenido en el de otra etiqueta más larga, de modo que cada zona se
+rellena una sola vez con la etiqueta más externa.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from app.backend.utils.template_registry import template_entry
+
+# Página y rectángulo (x0, y0, x1, y1) en coordenadas de la página.
+Placement = tuple[int, tuple[float, float, float, float]]
+
+# Etiquetas no halladas al analizar la plantilla que se guardan (agentes arman variantes).
+MAX_EXTRA_TAGS = 256
+# Holgura (pt) al comparar rectángulos de etiquetas solapadas.
+_NEST_TOLERANCE = 1.0
+
+_TAG_PATTERN = re.compile(r"\{\{[^{}\n]+\}\}|\{[^{}\n]+\}|\[[^\[\]\n]+\]|<<[^<>\n]+>>")
+
+
+def _search_page(page, page_dict, tag: str) -> list:
+    """Rectángulos de ``tag`` en ``page`` (misma búsqueda que hacía el renderer)."""
+    text_instances = []
+    tag_variations = [tag, tag.upper(), tag.lower()]
+
+    for tag_variant in tag_variations:
+        try:
+            found = page.search_for(tag_variant, flags=fitz.TEXT_DEHYPHENATE)
+            if found:
+                text_instances.extend(found)
+                break
+        except Exception:
+            try:
+                found = page.search_for(tag_variant)
+                if found:
+                    text_instances.extend(found)
+                    break
+            except Exception:
+                pass
+
+    if not text_instances and page_dict:
+        try:
+            for block in page_dict.get("blocks", []):
+                if "lines" not in block:
+                    continue
+                for line in block["lines"]:
+                    line_spans = [(span, span.get("text", "")) for span in line.get("spans", [])]
+                    full_line_text_upper = "".join(t for _s, t in line_spans).upper()
+                    for tag_variant in tag_variations:
+                        tag_variant_upper = tag_variant.upper()
+                        if tag_variant_upper in full_line_text_upper:
+                            matching_spans = [s for s, t in line_spans if tag_variant_upper in t.upper()]
+                            if matching_spans:
+                                x0 = min(s.get("bbox", [0, 0, 0, 0])[0] for s in matching_spans)
+                                y0 = min(s.get("bbox", [0, 0, 0, 0])[1] for s in matching_spans)
+                                x1 = max(s.get("bbox", [0, 0, 0, 0])[2] for s in matching_spans)
+                                y1 = max(s.get("bbox", [0, 0, 0, 0])[3] for s in matching_spans)
+                                text_instances.append(fitz.Rect(x0 - 2, y0 - 2, x1 + 2, y1 + 2))
+                            break
+        except Exception:
+            pass
+
+    # Dentro de la página, con área y sin duplicados.
+    seen: set[tuple[float, float, float, float]] = set()
+    unique = []
+    width, height = page.rect.width, page.rect.height
+    for rect in text_instances:
+        if isinstance(rect, (list, tuple)) and len(rect) == 4:
+            rect = fitz.Rect(rect[0], rect[1], rect[2], rect[3])
+        if (
+            rect.x0 >= 0 and rect.y0 >= 0
+            and rect.x1 <= width and rect.y1 <= height
+            and rect.x1 > rect.x0 and rect.y1 > rect.y0
+        ):
+            key = (round(rect.x0, 1), round(rect.y0, 1), round(rect.x1, 1), round(rect.y1, 1))
+            if key not in seen:
+                seen.add(key)
+                unique.append(rect)
+    return unique
+
+
+def _contains(outer: tuple[float, float, float, float], inner: tuple[float, float, float, float]) -> bool:
+    t = _NEST_TOLERANCE
+    return (
+        outer[0] - t <= inner[0] and outer[1] - t <= inner[1]
+        and inner[2] <= outer[2] + t and inner[3] <= outer[3] + t
+    )
+
+
+def drop_nested(
+    placements: dict[str, tuple[Placement, ...]],
+    context: dict[str, tuple[Placement, ...]] | None = None,
+) -> dict[str, tuple[Placement, ...]]:
+    """Quita de cada etiqueta los rectángulos contenidos en el de otra etiqueta más larga.
+
+    ``context`` aporta etiquetas que cuentan como contenedoras aunque no se devuelvan.
+    """
+    candidates = dict(context or {})
+    candidates.update(placements)
+    out: dict[str, tuple[Placement, ...]] = {}
+    for tag, items in placements.items():
+        kept = []
+        for page_num, rect in items:
+            nested = any(
+                other != tag
+                and len(other) > len(tag)
+                and other_page == page_num
+                and _contains(other_rect, rect)
+                for other, other_items in candidates.items()
+                for other_page, other_rect in other_items
+            )
+            if not nested:
+                kept.append((page_num, rect))
+        out[tag] = tuple(kept)
+    return out
+
+
+class TagPlacementMap:
+    """Posiciones de etiquetas de una versión de plantilla; seguro entre hilos."""
+
+    def __init__(self, data: bytes) -> None:
+        self._data = data
+        self._lock = threading.Lock()
+        self._placements: dict[str, tuple[Placement, ...]] = {}
+        # Etiquetas presentes en el texto de la plantilla (contenedoras para drop_nested).
+        self._template_tags: dict[str, tuple[Placement, ...]] = {}
+        self._extra = 0
+        self.page_count = 0
+        self.searches = 0
+        self._analyze()
+
+    @classmethod
+    def build(cls, data: bytes) -> "TagPlacementMap":
+        return cls(data)
+
+    def _analyze(self) -> None:
+        with fitz.open(stream=self._data, filetype="pdf") as doc:
+            self.page_count = len(doc)
+            tags: dict[str, None] = {}
+            for page in doc:
+                for tag in _TAG_PATTERN.findall(page.get_text()):
+                    tags[tag] = None
+            self._template_tags = drop_nested(self._search(doc, list(tags)))
+            self._placements.update(self._template_tags)
+
+    def _search(self, doc, tags: list[str]) -> dict[str, tuple[Placement, ...]]:
+        found: dict[str, list[Placement]] = {tag: [] for tag in tags}
+        for page_num, page in enumerate(doc):
+            try:
+                page_dict = page.get_text("dict")
+            except Exception:
+                page_dict = None
+            for tag in tags:
+                self.searches += 1
+                for rect in _search_page(page, page_dict, tag):
+                    found[tag].append((page_num, (rect.x0, rect.y0, rect.x1, rect.y1)))
+        return {tag: tuple(rects) for tag, rects in found.items()}
+
+    def placements(self, tags) -> dict[str, tuple[Placement, ...]]:
+        """Posiciones de cada etiqueta pedida (vacío si no aparece en la plantilla).
+
+        Una zona cubierta por varias etiquetas pedidas (``{{k}}`` y ``{k}``) queda solo en la
+        más larga.
+        """
+        wanted = list(dict.fromkeys(tags))
+        found = {t: self._placements[t] for t in wanted if t in self._placements}
+        missing = [t for t in wanted if t not in found]
+        if missing:
+            with self._lock:
+                missing = [t for t in missing if t not in self._placements]
+                if missing:
+                    with fitz.open(stream=self._data, filetype="pdf") as doc:
+                        searched = drop_nested(self._search(doc, missing), self._template_tags)
+                    for tag, items in searched.items():
+                        if self._extra < MAX_EXTRA_TAGS:
+                            self._placements[tag] = items
+                            self._extra += 1
+                    found.update(searched)
+                found.update({t: self._placements[t] for t in wanted if t not in found})
+        return drop_nested(found)
+
+
+def tag_placement_map(template_path: str | Path) -> TagPlacementMap:
+    """Mapa de la versión vigente de la plantilla (se recalcula si cambia en disco)."""
+    return template_entry(template_path).derived("pdf_tag_placements", TagPlacementMap.build)
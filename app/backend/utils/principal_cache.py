@@ -0,0 +1,161 @@
+"""Caché corta del usuario autenticado, por ``sub`` del JWT.
+
+``get_current_user`` resolvía el ``sub`` abriendo una ``SessionLocal`` y leyendo ``users`` en
+cada petición, antes de que la ruta abriera la suya. Ahora guarda aquí un ``Principal``
+inmutable (columnas de ``users`` sin la contraseña) y le aplica los datos del token
+(``rol_id``, ``school_id``, ``period_year``…) en cada petición con ``with_claims``.
+
+Se invalida por ``user_id`` (todas las formas de ``sub`` que resolvieron a ese usuario) al
+cambiar contraseña, roles, en ``select-role``/``select-school`` y al eliminar el usuario.
+La caché es por proceso; con varios workers uvicorn el TTL acota lo que puede quedar
+desfasado en los demás. ``PRINCIPAL_CACHE_TTL_SECONDS=0`` la desactiva.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Optional
+
+MEMORY_MAX_ENTRIES = 10_000
+
+# Claims que pisan al usuario solo si vienen en el token (como hacía get_current_user).
+_TOKEN_CLAIMS = ("customer_id", "school_id", "teaching_id", "course_id", "career_type_id")
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    customer_id: Optional[int] = None
+    deleted_status_id: Optional[int] = None
+    rut: Optional[str] = None
+    rut_normalized: Optional[str] = None
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    added_date: Optional[datetime] = None
+    updated_date: Optional[datetime] = None
+    rol_id: Optional[int] = None
+    school_id: Optional[int] = None
+    teaching_id: Optional[int] = None
+    course_id: Optional[int] = None
+    career_type_id: Optional[int] = None
+    period_year: Optional[int] = None
+
+    @classmethod
+    def from_user(cls, user: Any) -> "Principal":
+        return cls(
+            id=user.id,
+            customer_id=user.customer_id,
+            deleted_status_id=user.deleted_status_id,
+            rut=user.rut,
+            rut_normalized=user.rut_normalized,
+            full_name=user.full_name,
+            email=user.email,
+            phone=user.phone,
+            added_date=user.added_date,
+            updated_date=user.updated_date,
+        )
+
+    def with_claims(self, claims: Mapping[str, Any]) -> "Principal":
+        """Copia con los datos de sesión del token (pueden cambiar al seleccionar rol/colegio)."""
+        changes: dict[str, Any] = {}
+        # No pisar rol_id con null: algunos tokens solo traen "sub" y dejan rol_id en null → rompe permisos
+        if claims.get("rol_id") is not None:
+            changes["rol_id"] = claims["rol_id"]
+        for key in _TOKEN_CLAIMS:
+            if key in claims:
+                changes[key] = claims[key]
+        py = claims.get("period_year")
+        try:
+            changes["period_year"] = int(py) if py is not None else datetime.now().year
+        except (TypeError, ValueError):
+            changes["period_year"] = datetime.now().year
+        return replace(self, **changes)
+
+
+def principal_key(sub: Any) -> str:
+    """Clave de caché del ``sub``: los correos se buscan sin distinguir mayúsculas."""
+    s = str(sub or "").strip()
+    return s.lower() if "@" in s else s
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl_seconds = float(ttl_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        self._generation = 0
+        self.loads = 0
+
+    def get_or_load(self, sub: Any, loader: Callable[[], Optional[Principal]]) -> Optional[Principal]:
+        """Principal de ``sub``; ``loader`` se llama si no está o venció. ``None`` no se guarda."""
+        if self.ttl_seconds <= 0:
+            return loader()
+        key = principal_key(sub)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+            generation = self._generation
+        principal = loader()
+        self.loads += 1
+        if principal is None:
+            return None
+        with self._lock:
+            # Si se invalidó algo mientras se consultaba, no se guarda (podría ser el dato anterior).
+            if self._generation == generation:
+                self._entries[key] = (self._clock() + self.ttl_seconds, principal)
+                self._entries.move_to_end(key)
+                while len(self._entries) > MEMORY_MAX_ENTRIES:
+                    self._entries.popitem(last=False)
+        return principal
+
+    def invalidate_users(self, *user_ids: Any) -> None:
+        """Olvida todas las entradas (cualquier ``sub``) de ``user_ids``."""
+        ids: set[int] = set()
+        for uid in user_ids:
+            try:
+                ids.add(int(uid))
+            except (TypeError, ValueError):
+                continue
+        if not ids:
+            return
+        with self._lock:
+            self._generation += 1
+            for key in [k for k, v in self._entries.items() if v[1].id in ids]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+_cache: Optional[PrincipalCache] = None
+
+
+def get_principal_cache() -> PrincipalCache:
+    global _cache
+    if _cache is None:
+        from app.backend.core.config import settings
+
+        _cache = PrincipalCache(settings.principal_cache_ttl_seconds)
+    return _cache
+
+
+def set_principal_cache(cache: Optional[PrincipalCache]) -> None:
+    global _cache
+    _cache = cache
+
+
+def invalidate_principal(*user_ids: Any) -> None:
+    get_principal_cache().invalidate_users(*user_ids)
@@ -0,0 +1,16 @@
+"""Clave normalizada de RUT / documento para búsquedas exactas por índice.
+
+``12.345.678-k``, ``12345678-K`` y ``12345678k`` comparten la clave ``12345678K``.
+Las columnas ``rut_normalized`` (users, students, student_personal_data) guardan esta clave
+y se mantienen sincronizadas desde los modelos (``@validates``).
+"""
+
+import re
+
+RUT_NORMALIZED_MAX_LENGTH = 32
+
+
+def rut_lookup_key(value):
+    """Alfanuméricos en mayúscula (sin puntos, guion ni espacios); None si queda vacío."""
+    key = re.sub(r"[^0-9A-Za-z]", "", str(value or "").strip()).upper()
+    return key[:RUT_NORMALIZED_MAX_LENGTH] or None
@@ -0,0 +1,151 @@
+"""Registro en proceso de plantillas PDF/DOCX (``files/original_student_files``).
+
+Cada plantilla se lee una vez y queda en memoria como bytes; cada request abre su propia
+copia desde esos bytes (``open_fitz_template``, ``open_pdf_reader_template``,
+``open_docx_template``), así que nadie comparte objetos mutables entre hilos. Lo que se
+obtiene analizando la plantilla (nombres de campos AcroForm, layout del informe familia,
+...) se calcula una vez por versión con ``TemplateEntry.derived``.
+
+La versión es (tamaño, mtime_ns): reemplazar el archivo en disco invalida la entrada en
+la siguiente lectura, sin reiniciar el proceso.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Tope de plantillas en memoria (las oficiales son unas decenas de archivos chicos).
+MAX_ENTRIES = 64
+
+
+@dataclass
+class TemplateEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    data: bytes
+    _derived: dict[str, Any] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def derived(self, name: str, builder: Callable[[bytes], T]) -> T:
+        """``builder(data)`` calculado una sola vez para esta versión de la plantilla."""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = builder(self.data)
+            return self._derived[name]
+
+
+class TemplateRegistry:
+    def __init__(self, max_entries: int = MAX_ENTRIES) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self._entries: dict[str, TemplateEntry] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, path: str | Path) -> TemplateEntry:
+        """Entrada vigente de ``path``; la (re)lee si cambió en disco. OSError si no existe."""
+        key = str(Path(path).resolve())
+        st = Path(key).stat()
+        entry = self._entries.get(key)
+        if entry is not None and entry.size == st.st_size and entry.mtime_ns == st.st_mtime_ns:
+            return entry
+        data = Path(key).read_bytes()
+        entry = TemplateEntry(path=key, size=len(data), mtime_ns=st.st_mtime_ns, data=data)
+        with self._lock:
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = entry
+            self.loads += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_registry = TemplateRegistry()
+
+
+def get_template_registry() -> TemplateRegistry:
+    return _registry
+
+
+def template_entry(path: str | Path) -> TemplateEntry:
+    return _registry.get(path)
+
+
+def open_fitz_template(path: str | Path):
+    """Copia PyMuPDF de la plantilla (el documento es del llamador y debe cerrarlo)."""
+    import fitz
+
+    return fitz.open(stream=template_entry(path).data, filetype="pdf")
+
+
+def open_pdf_reader_template(path: str | Path):
+    from pypdf import PdfReader
+
+    return PdfReader(io.BytesIO(template_entry(path).data))
+
+
+def open_docx_template(path: str | Path):
+    from docx import Document
+
+    return Document(io.BytesIO(template_entry(path).data))
+
+
+def write_template_copy(path: str | Path, output_path: str | Path) -> None:
+    """Equivalente a copiar la plantilla, sin volver a leerla del disco."""
+    output = Path(output_path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(template_entry(path).data)
+
+
+def _build_pdf_form_field_names(data: bytes) -> tuple[str, ...]:
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    names: dict[str, None] = {}
+    try:
+        # Mismo orden que el recorrido original: campos de texto, árbol AcroForm y anotaciones.
+        for name in (reader.get_form_text_fields() or {}):
+            names[name] = None
+        root = reader.trailer.get("/Root", {})
+        if "/AcroForm" in root and "/Fields" in root["/AcroForm"]:
+            def walk(field_list):
+                for ref in field_list:
+                    obj = ref.get_object()
+                    if "/Kids" in obj:
+                        walk(obj["/Kids"])
+                    if "/T" in obj and obj["/T"]:
+                        names[obj["/T"]] = None
+
+            walk(root["/AcroForm"]["/Fields"])
+        for page in reader.pages:
+            if "/Annots" in page:
+                for annot in page["/Annots"]:
+                    a = annot.get_object()
+                    if "/FT" in a and "/T" in a and a.get("/T"):
+                        names[a["/T"]] = None
+    except Exception:
+        # Igual que el recorrido original: lo leído hasta el error se conserva.
+        logger.debug("Campos AcroForm incompletos para la plantilla", exc_info=True)
+    return tuple(str(n) for n in names)
+
+
+def pdf_form_field_names(path: str | Path) -> tuple[str, ...]:
+    """Nombres de campos AcroForm de la plantilla, calculados una vez por versión."""
+    return template_entry(path).derived("pdf_form_field_names", _build_pdf_form_field_names)
@@ -0,0 +1,179 @@
+"""Recepción de archivos subidos sin cargarlos completos en memoria.
+
+``stage_upload`` copia el cuerpo del ``UploadFile`` en trozos de ``UPLOAD_CHUNK_KB`` a un
+archivo temporal dentro del directorio de destino, calcula el SHA-256 mientras escribe y
+corta apenas se supera ``UPLOAD_MAX_MB`` (``UploadTooLargeError``). ``StagedUpload.commit``
+lo mueve a su nombre final con ``os.replace`` (atómico en el mismo sistema de archivos):
+quien lee la ruta ve el archivo anterior o el nuevo completo, nunca uno a medias.
+
+Con ``sha256`` el llamador puede detectar que el contenido ya está guardado (misma
+carpeta de estudiante y documento) y descartar la copia en vez de escribir otra versión.
+
+Las rutas ``async`` llaman ``await stage_upload_file(file, directorio)``: la copia corre en
+el pool ``upload`` (``core/executors.run_upload``), acotado para que muchas subidas grandes
+simultáneas no saturen disco ni hilos de BD. Si el destino final se decide después (plantillas,
+archivos de agentes), se prepara en ``staging_dir()`` y las clases reciben el ``StagedUpload``
+en lugar de ``bytes`` (``write_upload`` acepta ambos).
+"""
+
+from __future__ import annotations
+
+import errno
+import hashlib
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+from app.backend.core.config import settings
+
+PARTIAL_SUFFIX = ".part"
+
+
+class UploadTooLargeError(ValueError):
+    def __init__(self, max_bytes: int):
+        self.max_bytes = int(max_bytes)
+        super().__init__(f"El archivo supera el máximo permitido ({self.max_bytes // (1024 * 1024)} MB).")
+
+
+@dataclass
+class StagedUpload:
+    path: Path
+    size: int
+    sha256: str
+    original_filename: Optional[str] = None
+    committed: bool = False
+
+    def commit(self, destination: Union[str, Path]) -> Path:
+        """Mueve el temporal a ``destination`` (reemplaza de forma atómica si ya existe)."""
+        dest = Path(destination)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(self.path, dest)
+        except OSError as exc:
+            if exc.errno != errno.EXDEV:
+                raise
+            # Otro sistema de archivos: copia a un temporal junto al destino y rename ahí.
+            sibling = dest.parent / f".{uuid.uuid4().hex}{PARTIAL_SUFFIX}"
+            shutil.copyfile(self.path, sibling)
+            os.replace(sibling, dest)
+            self.path.unlink()
+        self.path = dest
+        self.committed = True
+        return dest
+
+    def discard(self) -> None:
+        if self.committed:
+            return
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+    def __enter__(self) -> "StagedUpload":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.discard()
+
+
+def staging_dir() -> Path:
+    """Temporales de subidas cuyo destino se decide después (bajo ``FILES_DIR``, mismo disco)."""
+    return Path(settings.files_dir).resolve() / ".uploads"
+
+
+def upload_size(data: Union[bytes, StagedUpload]) -> int:
+    return data.size if isinstance(data, StagedUpload) else len(data or b"")
+
+
+def write_upload(target: Union[str, Path], data: Union[bytes, StagedUpload]) -> Path:
+    """Deja ``data`` en ``target``: mueve el temporal si viene en streaming, o escribe los bytes."""
+    if isinstance(data, StagedUpload):
+        return data.commit(target)
+    path = Path(target)
+    path.write_bytes(data)
+    return path
+
+
+def upload_max_bytes() -> int:
+    return max(1, int(settings.upload_max_mb)) * 1024 * 1024
+
+
+def stage_upload(
+    source: BinaryIO,
+    directory: Union[str, Path],
+    *,
+    max_bytes: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    original_filename: Optional[str] = None,
+) -> StagedUpload:
+    """Copia ``source`` por trozos a ``directory/.<uuid>.part`` calculando tamaño y SHA-256."""
+    limit = upload_max_bytes() if max_bytes is None else int(max_bytes)
+    chunk = int(chunk_size or max(64, int(settings.upload_chunk_kb)) * 1024)
+    target_dir = Path(directory)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    partial = target_dir / f".{uuid.uuid4().hex}{PARTIAL_SUFFIX}"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(partial, "xb") as out:
+            while True:
+                data = source.read(chunk)
+                if not data:
+                    break
+                size += len(data)
+                if size > limit:
+                    raise UploadTooLargeError(limit)
+                digest.update(data)
+                out.write(data)
+    except BaseException:
+        try:
+            partial.unlink()
+        except OSError:
+            pass
+        raise
+    return StagedUpload(
+        path=partial,
+        size=size,
+        sha256=digest.hexdigest(),
+        original_filename=original_filename,
+    )
+
+
+async def stage_upload_file(
+    upload,
+    directory: Union[str, Path],
+    *,
+    max_bytes: Optional[int] = None,
+) -> StagedUpload:
+    """``stage_upload`` de un ``UploadFile`` en el pool ``upload``; rechaza antes de copiar si el tamaño declarado ya excede."""
+    from app.backend.core.executors import run_upload
+
+    limit = upload_max_bytes() if max_bytes is None else int(max_bytes)
+    declared = getattr(upload, "size", None)
+    if declared is not None and int(declared) > limit:
+        raise UploadTooLargeError(limit)
+    return await run_upload(
+        stage_upload,
+        upload.file,
+        directory,
+        max_bytes=limit,
+        original_filename=getattr(upload, "filename", None),
+    )
+
+
+def sha256_of_file(path: Union[str, Path], chunk_size: int = 1024 * 1024) -> Optional[str]:
+    """SHA-256 de un archivo ya guardado (None si no existe)."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                digest.update(data)
+    except OSError:
+        return None
+    return digest.hexdigest()
@@ -0,0 +1,41 @@
+"""Create customer_drive_folders (caché ruta → folder_id de Google Drive por customer).
+
+La tabla se llena sola al subir archivos; si se vacía, se reconstruye desde Drive.
+
+Run from backend/:
+  python migrations/apply_customer_drive_folders.py
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import inspect, text
+
+from app.backend.db.database import engine
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS customer_drive_folders (
+  id INT NOT NULL AUTO_INCREMENT,
+  customer_id INT NOT NULL,
+  path_hash VARCHAR(40) NOT NULL,
+  root_folder_id VARCHAR(255) NOT NULL,
+  path TEXT NOT NULL,
+  folder_id VARCHAR(255) NOT NULL,
+  created_at DATETIME NOT NULL,
+  PRIMARY KEY (id),
+  UNIQUE KEY uq_customer_drive_folders_path (customer_id, path_hash)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+
+def main() -> None:
+    tables = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        if "customer_drive_folders" not in tables:
+            conn.execute(text(CREATE_SQL))
+            print("ok: created customer_drive_folders")
+        else:
+            print("ok: customer_drive_folders already exists")
+
+
+if __name__ == "__main__":
+    main()
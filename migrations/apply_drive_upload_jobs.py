@@ -0,0 +1,54 @@
+"""Create drive_upload_jobs (outbox de subidas a Google Drive).
+
+create_document guarda el archivo local y encola aquí; el worker del proceso sube a Drive
+con reintentos. Ver app/backend/classes/drive_upload_jobs_class.py.
+
+Run from backend/:
+  python migrations/apply_drive_upload_jobs.py
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import inspect, text
+
+from app.backend.db.database import engine
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS drive_upload_jobs (
+  id INT NOT NULL AUTO_INCREMENT,
+  customer_id INT NOT NULL,
+  idempotency_key VARCHAR(64) NOT NULL,
+  student_id INT NOT NULL,
+  document_id INT NOT NULL,
+  agent_id VARCHAR(64) NULL,
+  save_id INT NULL,
+  payload_json TEXT NOT NULL,
+  status VARCHAR(16) NOT NULL DEFAULT 'pending',
+  attempts INT NOT NULL DEFAULT 0,
+  revision INT NOT NULL DEFAULT 1,
+  next_attempt_at DATETIME NOT NULL,
+  locked_at DATETIME NULL,
+  last_error TEXT NULL,
+  result_json TEXT NULL,
+  created_at DATETIME NOT NULL,
+  updated_at DATETIME NOT NULL,
+  PRIMARY KEY (id),
+  UNIQUE KEY uq_drive_upload_jobs_key (idempotency_key),
+  KEY ix_drive_upload_jobs_status_next (status, next_attempt_at),
+  KEY ix_drive_upload_jobs_customer_student (customer_id, student_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+
+def main() -> None:
+    tables = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        if "drive_upload_jobs" not in tables:
+            conn.execute(text(CREATE_SQL))
+            print("ok: created drive_upload_jobs")
+        else:
+            print("ok: drive_upload_jobs already exists")
+
+
+if __name__ == "__main__":
+    main()
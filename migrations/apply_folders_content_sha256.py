@@ -0,0 +1,31 @@
+"""Add folders.content_sha256 (hash of the uploaded file, used to skip identical re-uploads).
+
+Filas existentes quedan en NULL: la primera resubida compara contra el archivo en disco y
+guarda el hash. Re-ejecutable.
+
+Run from backend/:
+  python migrations/apply_folders_content_sha256.py
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import inspect, text
+
+from app.backend.db.database import engine
+
+
+def main() -> None:
+    if "folders" not in set(inspect(engine).get_table_names()):
+        print("skip: folders missing")
+        return
+    with engine.begin() as conn:
+        cols = {c["name"] for c in inspect(conn).get_columns("folders")}
+        if "content_sha256" in cols:
+            print("ok: folders.content_sha256 already exists")
+        else:
+            conn.execute(text("ALTER TABLE folders ADD COLUMN content_sha256 VARCHAR(64) NULL"))
+            print("ok: added folders.content_sha256")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Add indexed rut_normalized columns (users, students, student_personal_data) and backfill them.
+
+La clave es la de app/backend/utils/rut_normalize.py; desde aquí en adelante los modelos la
+mantienen al asignar `rut` / `identification_number`. Re-ejecutable: solo rellena filas
+cuya clave falta o no coincide.
+
+Run from backend/:
+  python migrations/apply_rut_normalized_columns.py
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import inspect, text
+
+from app.backend.db.database import engine
+from app.backend.utils.rut_normalize import RUT_NORMALIZED_MAX_LENGTH, rut_lookup_key
+
+# tabla -> columna fuente
+TARGETS = {
+    "users": "rut",
+    "students": "identification_number",
+    "student_personal_data": "identification_number",
+}
+BATCH_SIZE = 1000
+
+
+def _add_column_if_missing(conn, table: str) -> None:
+    cols = {c["name"] for c in inspect(conn).get_columns(table)}
+    if "rut_normalized" in cols:
+        print(f"ok: {table}.rut_normalized already exists")
+    else:
+        conn.execute(
+            text(f"ALTER TABLE {table} ADD COLUMN rut_normalized VARCHAR({RUT_NORMALIZED_MAX_LENGTH}) NULL")
+        )
+        print(f"ok: added {table}.rut_normalized")
+    index_name = f"ix_{table}_rut_normalized"
+    indexes = {ix["name"] for ix in inspect(conn).get_indexes(table)}
+    if index_name in indexes:
+        print(f"ok: {index_name} already exists")
+    else:
+        conn.execute(text(f"CREATE INDEX {index_name} ON {table} (rut_normalized)"))
+        print(f"ok: created {index_name}")
+
+
+def _backfill(conn, table: str, source: str) -> int:
+    rows = conn.execute(text(f"SELECT id, {source}, rut_normalized FROM {table}")).all()
+    pending = [
+        {"id": row_id, "key": rut_lookup_key(raw)}
+        for row_id, raw, current in rows
+        if rut_lookup_key(raw) != current
+    ]
+    for start in range(0, len(pending), BATCH_SIZE):
+        conn.execute(
+            text(f"UPDATE {table} SET rut_normalized = :key WHERE id = :id"),
+            pending[start : start + BATCH_SIZE],
+        )
+    return len(pending)
+
+
+def main() -> None:
+    tables = set(inspect(engine).get_table_names())
+    for table, source in TARGETS.items():
+        if table not in tables:
+            print(f"skip: {table} missing")
+            continue
+        with engine.begin() as conn:
+            _add_column_if_missing(conn, table)
+            updated = _backfill(conn, table, source)
+        print(f"ok: {table}.rut_normalized backfilled ({updated} rows)")
+
+
+if __name__ == "__main__":
+    main()
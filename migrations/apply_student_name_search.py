@@ -0,0 +1,102 @@
+"""Add student_personal_data.full_name_folded + student_name_trigrams and backfill them.
+
+Desde aquí en adelante StudentPersonalInfoModel los mantiene al escribir nombres
+(ver app/backend/utils/name_search.py). Re-ejecutable: recalcula solo filas desalineadas.
+
+Run from backend/:
+  python migrations/apply_student_name_search.py
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import inspect, text
+
+from app.backend.db.database import engine
+from app.backend.utils.name_search import (
+    FULL_NAME_FOLDED_MAX_LENGTH,
+    name_trigrams,
+    student_full_name_folded,
+)
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS student_name_trigrams (
+  id INT NOT NULL AUTO_INCREMENT,
+  student_personal_data_id INT NOT NULL,
+  student_id INT NULL,
+  trigram VARCHAR(3) NOT NULL,
+  PRIMARY KEY (id),
+  UNIQUE KEY uq_student_name_trigrams_row_trigram (student_personal_data_id, trigram),
+  INDEX ix_student_name_trigrams_trigram_row (trigram, student_personal_data_id),
+  INDEX ix_student_name_trigrams_student_id (student_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+BATCH_SIZE = 500
+
+
+def main() -> None:
+    tables = set(inspect(engine).get_table_names())
+    if "student_personal_data" not in tables:
+        raise SystemExit("student_personal_data table missing")
+
+    with engine.begin() as conn:
+        cols = {c["name"] for c in inspect(conn).get_columns("student_personal_data")}
+        if "full_name_folded" in cols:
+            print("ok: student_personal_data.full_name_folded already exists")
+        else:
+            conn.execute(
+                text(
+                    "ALTER TABLE student_personal_data "
+                    f"ADD COLUMN full_name_folded VARCHAR({FULL_NAME_FOLDED_MAX_LENGTH}) NULL"
+                )
+            )
+            print("ok: added student_personal_data.full_name_folded")
+        conn.execute(text(CREATE_SQL))
+        print("ok: student_name_trigrams")
+
+    with engine.begin() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT id, student_id, names, father_lastname, mother_lastname, social_name, "
+                "full_name_folded FROM student_personal_data"
+            )
+        ).all()
+        indexed = {
+            row_id
+            for (row_id,) in conn.execute(
+                text("SELECT DISTINCT student_personal_data_id FROM student_name_trigrams")
+            ).all()
+        }
+        pending = []
+        for row_id, student_id, names, father, mother, social, current in rows:
+            folded = student_full_name_folded(names, father, mother, social)
+            if folded != current or row_id not in indexed:
+                pending.append((row_id, student_id, folded))
+
+        for start in range(0, len(pending), BATCH_SIZE):
+            batch = pending[start : start + BATCH_SIZE]
+            conn.execute(
+                text("UPDATE student_personal_data SET full_name_folded = :folded WHERE id = :id"),
+                [{"id": row_id, "folded": folded} for row_id, _sid, folded in batch],
+            )
+            conn.execute(
+                text("DELETE FROM student_name_trigrams WHERE student_personal_data_id = :id"),
+                [{"id": row_id} for row_id, _sid, _folded in batch],
+            )
+            grams = [
+                {"row_id": row_id, "student_id": sid, "trigram": gram}
+                for row_id, sid, folded in batch
+                for gram in sorted(name_trigrams(folded))
+            ]
+            if grams:
+                conn.execute(
+                    text(
+                        "INSERT INTO student_name_trigrams (student_personal_data_id, student_id, trigram) "
+                        "VALUES (:row_id, :student_id, :trigram)"
+                    ),
+                    grams,
+                )
+        print(f"ok: backfilled {len(pending)} student_personal_data rows")
+
+
+if __name__ == "__main__":
+    main()
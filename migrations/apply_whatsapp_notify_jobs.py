@@ -0,0 +1,71 @@
+"""Create whatsapp_notify_jobs / whatsapp_notify_messages (outbox de avisos WhatsApp).
+
+Guardar un formulario dinámico con aviso a apoderados encola aquí; el worker del proceso
+envía a la Cloud API con concurrencia acotada, límite de tasa y reintentos. Ver
+app/backend/classes/whatsapp_notify_jobs_class.py.
+
+Run from backend/:
+  python migrations/apply_whatsapp_notify_jobs.py
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import inspect, text
+
+from app.backend.db.database import engine
+
+CREATE_JOBS_SQL = """
+CREATE TABLE IF NOT EXISTS whatsapp_notify_jobs (
+  id INT NOT NULL AUTO_INCREMENT,
+  school_id INT NULL,
+  dynamic_form_id INT NULL,
+  form_name VARCHAR(255) NOT NULL,
+  status VARCHAR(16) NOT NULL DEFAULT 'pending',
+  total INT NOT NULL DEFAULT 0,
+  created_at DATETIME NOT NULL,
+  updated_at DATETIME NOT NULL,
+  PRIMARY KEY (id),
+  KEY ix_whatsapp_notify_jobs_form (dynamic_form_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+CREATE_MESSAGES_SQL = """
+CREATE TABLE IF NOT EXISTS whatsapp_notify_messages (
+  id INT NOT NULL AUTO_INCREMENT,
+  job_id INT NOT NULL,
+  student_id INT NOT NULL,
+  student_name VARCHAR(255) NULL,
+  phone VARCHAR(32) NULL,
+  status VARCHAR(16) NOT NULL DEFAULT 'pending',
+  attempts INT NOT NULL DEFAULT 0,
+  next_attempt_at DATETIME NOT NULL,
+  locked_at DATETIME NULL,
+  claim_token VARCHAR(32) NULL,
+  provider_message_id VARCHAR(128) NULL,
+  last_error TEXT NULL,
+  created_at DATETIME NOT NULL,
+  updated_at DATETIME NOT NULL,
+  PRIMARY KEY (id),
+  KEY ix_whatsapp_notify_messages_job (job_id),
+  KEY ix_whatsapp_notify_messages_status_next (status, next_attempt_at),
+  KEY ix_whatsapp_notify_messages_claim (claim_token)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+
+def main() -> None:
+    tables = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        for name, sql in (
+            ("whatsapp_notify_jobs", CREATE_JOBS_SQL),
+            ("whatsapp_notify_messages", CREATE_MESSAGES_SQL),
+        ):
+            if name not in tables:
+                conn.execute(text(sql))
+                print(f"ok: created {name}")
+            else:
+                print(f"ok: {name} already exists")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark retrieval de textos derivados de agentes: índice invertido vs escaneo completo.
+
+Crea un agente temporal con cientos de archivos .txt (fichas de estudiantes, decretos, ejemplos),
+genera sus derivados con ``write_derived_for_file`` (que mantiene ``_derived/_index.json``),
+verifica que ambos caminos devuelven exactamente el mismo contexto y compara tiempos.
+
+Uso: python scripts/bench_agent_derived_retrieval.py [archivos] [párrafos_por_archivo]
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+_TMP = tempfile.TemporaryDirectory(prefix="pie360-bench-derived-")
+os.environ["FILES_DIR"] = _TMP.name
+
+from app.backend.utils import agents_derived_storage as derived  # noqa: E402
+from app.backend.utils import agents_storage as storage  # noqa: E402
+
+AGENT = "bench_agente"
+CUSTOMER_ID = 1
+NAMES = ["isabella", "martina", "sofia", "agustin", "benjamin", "vicente", "florencia", "tomas"]
+LASTNAMES = ["diaz", "gonzalez", "munoz", "rojas", "soto", "contreras", "silva", "morales"]
+WORDS = (
+    "lectura escritura atención memoria conducta apoyo aula familia lenguaje matemática "
+    "motricidad evaluación diagnóstico progreso objetivo estrategia recurso adecuación "
+    "participación autonomía comprensión vocabulario cálculo resolución problemas"
+).split()
+
+
+def _rut(rnd: random.Random) -> str:
+    body = rnd.randint(20_000_000, 26_000_000)
+    dv = rnd.choice("0123456789K")
+    return f"{body:,}".replace(",", ".") + f"-{dv}"
+
+
+def _seed(n_files: int, paragraphs: int) -> list[tuple[str, str]]:
+    rnd = random.Random(404)
+    folder = storage.agent_folder(AGENT, CUSTOMER_ID)
+    students: list[tuple[str, str]] = []
+    for i in range(n_files):
+        if i % 10 == 0:
+            rel = f"normativa/decreto_{i:04d}.txt"
+            owner = ""
+        elif i % 10 == 1:
+            rel = f"ejemplos/ejemplo_informe_{i:04d}.txt"
+            owner = ""
+        else:
+            name = f"{rnd.choice(NAMES)} {rnd.choice(LASTNAMES)}"
+            rut = _rut(rnd)
+            students.append((name, rut))
+            rel = f"fichas/{i:04d}_{name.replace(' ', '_').upper()}.txt"
+            owner = f"Estudiante: {name.title()}\nRUT: {rut}\n\n"
+        body = "\n\n".join(
+            " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(40, 260)))
+            for _ in range(paragraphs)
+        )
+        target = folder / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(owner + body, encoding="utf-8")
+        derived.write_derived_for_file(AGENT, rel, CUSTOMER_ID)
+    return students
+
+
+def _queries(students: list[tuple[str, str]]) -> list[dict]:
+    rnd = random.Random(7)
+    picks = rnd.sample(students, min(12, len(students)))
+    queries = [
+        {"query": "genera el informe de familia"},
+        {"query": "estrategias de apoyo en lectura y comprensión"},
+    ]
+    for name, rut in picks:
+        queries.append({"query": f"haz el informe de {name}", "student_name": name.title()})
+        queries.append(
+            {"query": "completa los campos narrativos", "student_rut": rut, "student_name": name}
+        )
+    return queries
+
+
+def _timed(fn, queries: list[dict]) -> tuple[list[dict], float]:
+    t0 = time.perf_counter()
+    out = [fn(q) for q in queries]
+    return out, time.perf_counter() - t0
+
+
+def main() -> int:
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    paragraphs = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    try:
+        t0 = time.perf_counter()
+        students = _seed(n_files, paragraphs)
+        t_seed = time.perf_counter() - t0
+        queries = _queries(students)
+
+        def _scan(q):
+            return derived.retrieve_relevant_chunks(AGENT, customer_id=CUSTOMER_ID, use_index=False, **q)
+
+        def _indexed(q):
+            return derived.retrieve_relevant_chunks(AGENT, customer_id=CUSTOMER_ID, **q)
+
+        _indexed(queries[0])  # carga del índice en memoria (una vez por proceso)
+        scan, t_scan = _timed(_scan, queries)
+        indexed, t_indexed = _timed(_indexed, queries)
+        for q, a, b in zip(queries, scan, indexed):
+            if a != b:
+                print("MISMATCH", q)
+                return 1
+
+        rebuilt = derived.rebuild_derived_index(AGENT, CUSTOMER_ID)
+        after, _ = _timed(_indexed, queries)
+        if after != indexed:
+            print("MISMATCH tras reconstruir el índice")
+            return 1
+
+        derived.delete_derived(AGENT, "normativa", CUSTOMER_ID)
+        if any(p.startswith("normativa/") for p in _indexed(queries[0])["index"]):
+            print("delete_derived no actualizó el índice")
+            return 1
+
+        n = len(queries)
+        print(f"{n_files} archivos, {rebuilt['chunks']} chunks, {n} consultas (seed {t_seed:.1f}s)")
+        print(f"escaneo : {t_scan / n * 1000:8.1f} ms/consulta")
+        print(f"índice  : {t_indexed / n * 1000:8.1f} ms/consulta")
+        print(f"speedup : {t_scan / t_indexed if t_indexed else float('inf'):.1f}x")
+        return 0
+    finally:
+        _TMP.cleanup()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,158 @@
+"""Benchmark KPI documentación transversal: motor por conjuntos vs check_document_existence por alumno.
+
+Siembra una BD SQLite en memoria (solo las tablas que usa el KPI), ejecuta ambos caminos,
+verifica que los números coinciden y compara tiempo y cantidad de consultas.
+
+Uso: python scripts/bench_kpi_documentation_progress.py [cursos] [alumnos_por_curso]
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes.kpi_documentation_progress_class import KpiDocumentationProgressClass
+from app.backend.db.database import Base
+from app.backend.db.models import (
+    BirthCertificateDocumentModel,
+    CourseModel,
+    DocumentModel,
+    EvaluaResultReportModel,
+    FolderModel,
+    HealthEvaluationModel,
+    SchoolModel,
+    SpecialEducationalNeedModel,
+    StudentAcademicInfoModel,
+    StudentModel,
+    StudentNameTrigramModel,
+    StudentPersonalInfoModel,
+)
+
+SCHOOL_ID = 1
+PERIOD = 2026
+TABLES = [
+    m.__table__
+    for m in (
+        BirthCertificateDocumentModel,
+        CourseModel,
+        DocumentModel,
+        EvaluaResultReportModel,
+        FolderModel,
+        HealthEvaluationModel,
+        SchoolModel,
+        SpecialEducationalNeedModel,
+        StudentAcademicInfoModel,
+        StudentModel,
+        StudentNameTrigramModel,
+        StudentPersonalInfoModel,
+    )
+]
+
+
+def _seed(db, n_courses: int, per_course: int) -> None:
+    rnd = random.Random(170)
+    now = datetime(2026, 3, 1)
+    db.add(SchoolModel(id=SCHOOL_ID, school_name="Liceo Bench", customer_id=1, deleted_status_id=0))
+    # Catálogo transversal: 1 (certificado), 4 (salud), 42 (evalua, sección 1 para cubrir la rama),
+    # varios de carpeta y uno eliminado.
+    catalog = [1, 4, 7, 8, 9, 10, 11, 42]
+    for doc_id in catalog:
+        db.add(DocumentModel(id=doc_id, document_type_id=1, document=f"Doc {doc_id}", deleted_date=None))
+    db.add(DocumentModel(id=12, document_type_id=1, document="Doc 12 (eliminado)", deleted_date=now))
+    db.add(DocumentModel(id=56, document_type_id=1, document="Área psicológica", deleted_date=None))
+
+    student_id = 0
+    folder_id = 0
+    for c in range(1, n_courses + 1):
+        db.add(CourseModel(id=c, school_id=SCHOOL_ID, course_name=f"Curso {c:02d}", deleted_status_id=0))
+        for _ in range(per_course):
+            student_id += 1
+            sid = student_id
+            db.add(StudentModel(id=sid, school_id=SCHOOL_ID, deleted_status_id=0, period_year=str(PERIOD)))
+            nee = rnd.choice([None, 0, 1, 2, 3])
+            db.add(StudentAcademicInfoModel(student_id=sid, course_id=c, special_educational_need_id=nee))
+            db.add(StudentPersonalInfoModel(student_id=sid, names=f"Nombre{sid}", father_lastname="Apellido"))
+            if rnd.random() < 0.6:
+                db.add(BirthCertificateDocumentModel(id=sid, student_id=sid, birth_certificate="bc.pdf"))
+            if rnd.random() < 0.5:
+                db.add(HealthEvaluationModel(id=sid, student_id=sid))
+            for doc_id in (1, 4, 7, 8, 9, 10, 11, 12, 42, 56):
+                if rnd.random() < 0.45:
+                    folder_id += 1
+                    db.add(
+                        FolderModel(
+                            id=folder_id,
+                            student_id=sid,
+                            document_id=doc_id,
+                            version_id=1,
+                            detail_id=sid if doc_id in (1, 4) and rnd.random() < 0.7 else None,
+                            file=f"f{folder_id}.pdf",
+                            period_year=str(PERIOD) if rnd.random() < 0.9 else str(PERIOD - 1),
+                            deleted_date=now if rnd.random() < 0.1 else None,
+                        )
+                    )
+    db.commit()
+
+
+def _timed(engine, fn):
+    count = {"n": 0}
+
+    def _on_exec(*_args, **_kwargs):
+        count["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", _on_exec)
+    try:
+        t0 = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - t0, count["n"]
+    finally:
+        event.remove(engine, "before_cursor_execute", _on_exec)
+
+
+def main() -> int:
+    n_courses = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    per_course = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=TABLES)
+    db = sessionmaker(bind=engine)()
+    _seed(db, n_courses, per_course)
+    svc = KpiDocumentationProgressClass(db)
+
+    legacy, t_legacy, q_legacy = _timed(
+        engine, lambda: svc.by_course_per_student(school_id=SCHOOL_ID, period_year=PERIOD)
+    )
+    batched, t_batched, q_batched = _timed(
+        engine, lambda: svc.by_course(school_id=SCHOOL_ID, period_year=PERIOD)
+    )
+    if legacy.get("status") != "success" or batched.get("status") != "success":
+        print("ERROR", legacy.get("message"), batched.get("message"))
+        return 1
+    if legacy["data"] != batched["data"]:
+        print("MISMATCH entre caminos")
+        for a, b in zip(legacy["data"], batched["data"]):
+            if a != b:
+                print("  legacy :", a)
+                print("  batched:", b)
+        return 1
+
+    students = sum(r["student_count"] for r in batched["data"])
+    print(f"{n_courses} cursos, {students} estudiantes con NEE")
+    print(f"per-student : {t_legacy * 1000:8.1f} ms  {q_legacy:6d} consultas")
+    print(f"set-based   : {t_batched * 1000:8.1f} ms  {q_batched:6d} consultas")
+    print(f"speedup     : {t_legacy / t_batched if t_batched else float('inf'):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,147 @@
+"""Benchmark cliente LLM: asyncio con pool compartido vs requests síncrono en hilos.
+
+Levanta el proveedor falso (scripts/llm_stub_server.py) en un hilo, lanza N chats
+concurrentes por ambos caminos, verifica que las respuestas coinciden y compara tiempo,
+hilos ocupados y conexiones TCP nuevas. También corta un stream a mitad (desconexión).
+
+Uso: python scripts/bench_llm_client.py [chats] [hilos_sync]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+PORT = _free_port()
+# Antes de importar la app: settings se lee una vez.
+os.environ["AGENTS_LLM_API_BASE"] = f"http://127.0.0.1:{PORT}"
+
+import uvicorn
+
+from app.backend.utils.agents_llm_client import (
+    aclose_llm_client,
+    astream_chat_completion,
+    llm_pool_metrics,
+    stream_chat_completion,
+)
+from scripts.llm_stub_server import build_app
+
+MESSAGES = [{"role": "user", "content": "Redacta el informe de prueba."}]
+TOKENS = 30
+
+
+def _start_stub() -> uvicorn.Server:
+    config = uvicorn.Config(
+        build_app(tokens=TOKENS, token_ms=10, first_ms=100),
+        host="127.0.0.1",
+        port=PORT,
+        log_level="warning",
+        limit_concurrency=10_000,
+        backlog=4096,
+    )
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.02)
+    return server
+
+
+def _sync_chat() -> str:
+    reply = ""
+    for event in stream_chat_completion(MESSAGES, api_key="stub"):
+        if event["type"] == "error":
+            raise RuntimeError(event["message"])
+        if event["type"] == "done":
+            reply = event["data"]["reply"]
+    return reply
+
+
+async def _async_chat() -> str:
+    reply = ""
+    async for event in astream_chat_completion(MESSAGES, api_key="stub"):
+        if event["type"] == "error":
+            raise RuntimeError(event["message"])
+        if event["type"] == "done":
+            reply = event["data"]["reply"]
+    return reply
+
+
+async def _async_run(n: int) -> tuple[list[str], float]:
+    t0 = time.perf_counter()
+    replies = await asyncio.gather(*(_async_chat() for _ in range(n)))
+    return list(replies), time.perf_counter() - t0
+
+
+async def _cancel_midway() -> dict:
+    stream = astream_chat_completion(MESSAGES, api_key="stub")
+    async for event in stream:
+        if event["type"] == "text_delta":
+            break
+    await stream.aclose()
+    return llm_pool_metrics()
+
+
+async def _async_main(n: int) -> tuple[list[str], float, dict, dict]:
+    await _async_run(min(n, 8))  # calentamiento: abre conexiones
+    warm = llm_pool_metrics()["new_connections"]
+    replies, elapsed = await _async_run(n)
+    metrics = llm_pool_metrics()
+    metrics["new_connections_in_run"] = metrics["new_connections"] - warm
+    cancelled = await _cancel_midway()
+    await aclose_llm_client()
+    return replies, elapsed, metrics, cancelled
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    sync_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    server = _start_stub()
+
+    try:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sync_threads) as pool:
+            sync_replies = list(pool.map(lambda _i: _sync_chat(), range(n)))
+        t_sync = time.perf_counter() - t0
+
+        async_replies, t_async, metrics, cancelled = asyncio.run(_async_main(n))
+    finally:
+        server.should_exit = True
+
+    expected = "".join(f"tok{i} " for i in range(TOKENS))
+    if any(r != expected for r in sync_replies + async_replies):
+        print("MISMATCH: respuesta incompleta")
+        return 1
+    if cancelled["active_streams"] != 0 or cancelled["cancelled"] < 1:
+        print("ERROR: el stream cancelado no liberó el pool", cancelled)
+        return 1
+
+    print(f"{n} chats concurrentes, {TOKENS} tokens c/u")
+    print(f"sync  ({sync_threads:3d} hilos) : {t_sync * 1000:8.1f} ms")
+    print(f"async (0 hilos)    : {t_async * 1000:8.1f} ms")
+    print(
+        f"pool async         : {metrics['new_connections_in_run']} conexiones nuevas, "
+        f"{metrics['open_connections']} abiertas, ttfb medio {metrics['avg_first_byte_ms']} ms"
+    )
+    print(f"cancelación        : cancelled={cancelled['cancelled']} active={cancelled['active_streams']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
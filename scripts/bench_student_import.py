@@ -0,0 +1,186 @@
+"""Benchmark import de alumnos desde Inspection: inserts por conjuntos vs store por fila.
+
+Arma un payload ``listado/alumnos`` (por defecto 2.000 filas, con RUT repetidos, otros colegios,
+cursos inexistentes y alumnos ya matriculados), lo importa por ambos caminos en dos BD SQLite
+en memoria idénticas, verifica que el reporte y las filas escritas coinciden y compara tiempo
+y cantidad de consultas.
+
+Uso: python scripts/bench_student_import.py [filas] [filas_por_bloque]
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes.student_class import StudentClass
+from app.backend.core.config import settings
+from app.backend.db.database import Base
+from app.backend.db.models import (
+    CommuneModel,
+    CourseModel,
+    FolderModel,
+    HealthEvaluationModel,
+    StudentAcademicInfoModel,
+    StudentModel,
+    StudentNameTrigramModel,
+    StudentPersonalInfoModel,
+)
+
+SCHOOL_ID = 1
+PERIOD = 2026
+MODELS = (
+    CommuneModel,
+    CourseModel,
+    FolderModel,
+    HealthEvaluationModel,
+    StudentAcademicInfoModel,
+    StudentModel,
+    StudentNameTrigramModel,
+    StudentPersonalInfoModel,
+)
+# Columnas que dependen del reloj; el resto debe quedar igual por ambos caminos.
+VOLATILE = {"added_date", "updated_date"}
+
+
+def _rut(n: int, formatted: bool) -> str:
+    body = 10_000_000 + n
+    dv = "K" if n % 11 == 0 else str(n % 10)
+    return f"{body:,}".replace(",", ".") + f"-{dv}" if formatted else f"{body}-{dv}"
+
+
+def _payload(n_rows: int) -> dict:
+    rnd = random.Random(230)
+    rows = []
+    for i in range(n_rows):
+        roll = rnd.random()
+        n = i
+        if roll < 0.03 and i > 10:
+            n = rnd.randrange(i)  # mismo RUT que otra fila del lote
+        row = {
+            "rut": _rut(n, formatted=rnd.random() < 0.5),
+            "nombres": rnd.choice(["Ana María", "José", "Ñandú", "Lucía", "Pedro"]),
+            "paterno": rnd.choice(["Pérez", "Soto", "Muñoz", ""]),
+            "materno": rnd.choice(["Díaz", "Rojas", ""]),
+            "curso_id": rnd.randint(1, 40),
+            "colegio_id": SCHOOL_ID,
+            "anio": PERIOD,
+            "fecha_nacimiento": rnd.choice(["2014-05-02", "2013-11-30 00:00:00", "", None, "02/05/2014"]),
+            "email": rnd.choice([None, "", "familia@example.cl"]),
+            "telefono": rnd.choice([None, "+56912345678"]),
+            "direccion": rnd.choice([None, "Calle 1"]),
+            "nacionalidad_id": rnd.choice([None, 1, "2"]),
+            "sexo": rnd.choice([1, 2, None]),
+            "comuna_id": rnd.choice([None, 1, 2, 99]),
+        }
+        if 0.03 <= roll < 0.05:
+            row["colegio_id"] = 2
+        elif 0.05 <= roll < 0.06:
+            row["curso_id"] = 500  # curso que no existe en el colegio
+        elif 0.06 <= roll < 0.065:
+            row["rut"] = ""
+        elif 0.065 <= roll < 0.07:
+            row["nombres"] = row["paterno"] = row["materno"] = ""
+        elif 0.07 <= roll < 0.075:
+            row["curso_id"] = None
+        rows.append(row)
+    return {"ok": True, "data": rows}
+
+
+def _database():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[m.__table__ for m in MODELS])
+    db = sessionmaker(bind=engine)()
+    db.add(CommuneModel(id=1, region_id=13, commune="Santiago"))
+    db.add(CommuneModel(id=2, region_id=None, commune="Sin región"))
+    for c in range(1, 41):
+        db.add(CourseModel(id=c, school_id=SCHOOL_ID, course_name=f"Curso {c}", period_year=PERIOD, deleted_status_id=0))
+    db.add(CourseModel(id=41, school_id=SCHOOL_ID, course_name="Eliminado", period_year=PERIOD, deleted_status_id=1))
+    # Ya matriculados: uno con RUT en otro formato y uno eliminado (este sí se importa).
+    db.add(StudentModel(id=1, school_id=SCHOOL_ID, identification_number=_rut(5, True), period_year="2025", deleted_status_id=0))
+    db.add(StudentModel(id=2, school_id=SCHOOL_ID, identification_number=_rut(6, False), period_year="2026", deleted_status_id=1))
+    # Carpeta de salud huérfana del próximo id: el import debe alinearla en vez de crear otra.
+    db.add(FolderModel(id=1, student_id=3, document_id=4, version_id=1, period_year="2020"))
+    db.commit()
+    return engine, db
+
+
+def _snapshot(db) -> dict:
+    out = {}
+    for model in MODELS:
+        cols = [c for c in model.__table__.columns if c.name not in VOLATILE]
+        rows = db.execute(model.__table__.select().with_only_columns(*cols).order_by(model.__table__.c.id)).all()
+        out[model.__tablename__] = [tuple(r) for r in rows]
+    return out
+
+
+def _timed(engine, fn):
+    count = {"n": 0}
+
+    def _on_exec(*_args, **_kwargs):
+        count["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", _on_exec)
+    try:
+        t0 = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - t0, count["n"]
+    finally:
+        event.remove(engine, "before_cursor_execute", _on_exec)
+
+
+def main() -> int:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    chunk = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    object.__setattr__(settings, "inspection_import_chunk_rows", chunk)
+    payload = _payload(n_rows)
+
+    engine_a, db_a = _database()
+    legacy, t_legacy, q_legacy = _timed(
+        engine_a, lambda: StudentClass(db_a).import_from_inspection_per_row(SCHOOL_ID, payload, PERIOD)
+    )
+    engine_b, db_b = _database()
+    bulk, t_bulk, q_bulk = _timed(
+        engine_b, lambda: StudentClass(db_b).import_from_inspection(SCHOOL_ID, payload, PERIOD)
+    )
+    if legacy.get("status") != "success" or bulk.get("status") != "success":
+        print("ERROR", legacy.get("message"), bulk.get("message"))
+        return 1
+    if legacy != bulk:
+        print("MISMATCH en el reporte")
+        for key in ("imported", "skipped", "excluded_other_school"):
+            print(f"  {key}: {legacy[key]} vs {bulk[key]}")
+        print("  errores:", len(legacy["errors"]), "vs", len(bulk["errors"]))
+        return 1
+    snap_a, snap_b = _snapshot(db_a), _snapshot(db_b)
+    for table in snap_a:
+        if snap_a[table] != snap_b[table]:
+            print(f"MISMATCH en {table}: {len(snap_a[table])} vs {len(snap_b[table])} filas")
+            for a, b in zip(snap_a[table], snap_b[table]):
+                if a != b:
+                    print("  por fila  :", a)
+                    print("  conjuntos :", b)
+                    break
+            return 1
+
+    print(
+        f"{n_rows} filas: {bulk['imported']} importados, {bulk['skipped']} omitidos, "
+        f"{bulk['excluded_other_school']} de otro colegio, {len(bulk['errors'])} errores"
+    )
+    print(f"por fila    : {t_legacy * 1000:8.1f} ms  {q_legacy:6d} consultas")
+    print(f"conjuntos   : {t_bulk * 1000:8.1f} ms  {q_bulk:6d} consultas (bloques de {chunk})")
+    print(f"speedup     : {t_legacy / t_bulk if t_bulk else float('inf'):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
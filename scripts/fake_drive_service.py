@@ -0,0 +1,230 @@
+"""Google Drive v3 falso en memoria para probar google_drive_storage sin red.
+
+Implementa lo que usa el backend: ``files().list/get/create/update(...).execute()`` con
+las queries ``'X' in parents`` (también ``(... or ...)``), ``name = '…'``,
+``mimeType =/!= '…'`` y ``trashed = false``. Cuenta llamadas por método y responde
+``HttpError`` 404 si el padre o el archivo no existen (como la API real).
+
+Uso en pruebas:
+  fake = FakeDriveService(root_id="root")
+  google_drive_storage._service_for_config = lambda config: fake
+"""
+
+from __future__ import annotations
+
+import itertools
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+FOLDER_MIME = "application/vnd.google-apps.folder"
+
+_CLAUSE_RE = re.compile(
+    r"""^'(?P<parent>(?:[^'\\]|\\.)*)'\s+in\s+parents$"""
+    r"""|^(?P<field>name|mimeType)\s*(?P<op>!=|=)\s*'(?P<value>(?:[^'\\]|\\.)*)'$"""
+    r"""|^trashed\s*=\s*(?P<trashed>true|false)$"""
+)
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\(.)", r"\1", value)
+
+
+def _split_top(text: str, sep: str) -> list[str]:
+    """Divide por ``sep`` fuera de comillas y paréntesis."""
+    parts: list[str] = []
+    depth = 0
+    quoted = False
+    start = 0
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quoted:
+            if ch == "\\":
+                i += 2
+                continue
+            if ch == "'":
+                quoted = False
+        elif ch == "'":
+            quoted = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif depth == 0 and text.startswith(sep, i):
+            parts.append(text[start:i])
+            i += len(sep)
+            start = i
+            continue
+        i += 1
+    parts.append(text[start:])
+    return [p.strip() for p in parts]
+
+
+def _not_found(what: str) -> HttpError:
+    return HttpError(httplib2.Response({"status": 404}), f"File not found: {what}".encode())
+
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self) -> Any:
+        return self._fn()
+
+
+class _Files:
+    def __init__(self, drive: FakeDriveService) -> None:
+        self._drive = drive
+
+    def list(self, *, q: str = "", pageSize: int = 100, pageToken: str | None = None, **_kw):
+        return _Request(lambda: self._drive._list(q, int(pageSize), pageToken))
+
+    def get(self, *, fileId: str, **_kw):
+        return _Request(lambda: self._drive._get(fileId))
+
+    def create(self, *, body: dict[str, Any], media_body: Any = None, **_kw):
+        return _Request(lambda: self._drive._create(body, media_body))
+
+    def update(self, *, fileId: str, body: dict[str, Any] | None = None, media_body: Any = None, **_kw):
+        return _Request(lambda: self._drive._update(fileId, body or {}, media_body))
+
+
+class FakeDriveService:
+    def __init__(self, root_id: str = "root", *, latency_seconds: float = 0.0) -> None:
+        self.root_id = root_id
+        self.latency_seconds = latency_seconds
+        self.calls: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.items: dict[str, dict[str, Any]] = {
+            root_id: {"id": root_id, "name": "root", "mimeType": FOLDER_MIME, "parents": [], "trashed": False}
+        }
+
+    def files(self) -> _Files:
+        return _Files(self)
+
+    # --- helpers de prueba ---
+    def children(self, parent_id: str, name: str | None = None) -> list[dict[str, Any]]:
+        return [
+            f
+            for f in self.items.values()
+            if parent_id in f["parents"] and not f["trashed"] and (name is None or f["name"] == name)
+        ]
+
+    def delete_tree(self, file_id: str) -> None:
+        """Borra de verdad (no papelera) la carpeta y su contenido, como un usuario en la web."""
+        with self._lock:
+            pending = [file_id]
+            while pending:
+                fid = pending.pop()
+                self.items.pop(fid, None)
+                pending.extend(f["id"] for f in self.items.values() if fid in f["parents"])
+
+    def trash_tree(self, file_id: str) -> None:
+        """Manda a la papelera la carpeta y su contenido (Drive marca ``trashed`` en los hijos)."""
+        with self._lock:
+            pending = [file_id]
+            while pending:
+                fid = pending.pop()
+                if fid in self.items:
+                    self.items[fid]["trashed"] = True
+                pending.extend(f["id"] for f in self.items.values() if fid in f["parents"])
+
+    def api_calls(self) -> int:
+        return sum(self.calls.values())
+
+    # --- API ---
+    def _tick(self, method: str) -> None:
+        self.calls[method] += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+    def _matches(self, item: dict[str, Any], q: str) -> bool:
+        for clause in _split_top(q, " and "):
+            if clause.startswith("(") and clause.endswith(")"):
+                if not any(self._matches(item, alt) for alt in _split_top(clause[1:-1], " or ")):
+                    return False
+                continue
+            m = _CLAUSE_RE.match(clause)
+            if not m:
+                raise ValueError(f"Query no soportada por FakeDriveService: {clause!r}")
+            if m.group("parent") is not None:
+                if _unescape(m.group("parent")) not in item["parents"]:
+                    return False
+            elif m.group("field"):
+                equal = item[m.group("field")] == _unescape(m.group("value"))
+                if equal != (m.group("op") == "="):
+                    return False
+            elif (m.group("trashed") == "true") != item["trashed"]:
+                return False
+        return True
+
+    def _list(self, q: str, page_size: int, page_token: str | None) -> dict[str, Any]:
+        self._tick("list")
+        with self._lock:
+            found = sorted(
+                (f for f in self.items.values() if f["id"] != self.root_id and self._matches(f, q)),
+                key=lambda f: int(f["id"][1:]) if f["id"][1:].isdigit() else 0,
+            )
+        start = int(page_token or 0)
+        page = found[start : start + page_size]
+        out: dict[str, Any] = {"files": [self._public(f) for f in page]}
+        if start + page_size < len(found):
+            out["nextPageToken"] = str(start + page_size)
+        return out
+
+    def _get(self, file_id: str) -> dict[str, Any]:
+        self._tick("get")
+        with self._lock:
+            item = self.items.get(file_id)
+            if item is None:
+                raise _not_found(file_id)
+            return self._public(item)
+
+    def _create(self, body: dict[str, Any], media_body: Any) -> dict[str, Any]:
+        self._tick("create")
+        with self._lock:
+            parents = list(body.get("parents") or [self.root_id])
+            for parent in parents:
+                if parent not in self.items:
+                    raise _not_found(parent)
+            fid = f"f{next(self._ids)}"
+            self.items[fid] = {
+                "id": fid,
+                "name": body["name"],
+                "mimeType": body.get("mimeType") or getattr(media_body, "mimetype", lambda: "")(),
+                "parents": parents,
+                "trashed": False,
+                "size": media_body.size() if media_body is not None else 0,
+            }
+            return self._public(self.items[fid])
+
+    def _update(self, file_id: str, body: dict[str, Any], media_body: Any) -> dict[str, Any]:
+        self._tick("update")
+        with self._lock:
+            item = self.items.get(file_id)
+            if item is None:
+                raise _not_found(file_id)
+            if "trashed" in body:
+                item["trashed"] = bool(body["trashed"])
+            if media_body is not None:
+                item["size"] = media_body.size()
+            return self._public(item)
+
+    @staticmethod
+    def _public(item: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "id": item["id"],
+            "name": item["name"],
+            "mimeType": item["mimeType"],
+            "parents": list(item["parents"]),
+            "size": str(item.get("size") or 0),
+            "trashed": bool(item.get("trashed")),
+            "webViewLink": f"https://drive.fake/{item['id']}",
+        }
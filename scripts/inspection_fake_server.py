@@ -0,0 +1,213 @@
+"""API Inspection falsa que responde grabaciones, para probar el cliente y el sync de colegio sin red.
+
+Una grabación es una lista de ``{"method", "path", "form"?, "status"?, "body"}``: se responde la
+primera cuyo método y ruta coinciden y cuyos campos ``form`` (multipart) están en la petición.
+``POST /api/login`` lo atiende el servidor (emite ``tok-N``); el resto exige ``Bearer`` vigente y
+``revoke_tokens()`` simula un token vencido (401). Cuenta peticiones por ruta, logins y conexiones
+TCP abiertas (para comprobar keep-alive).
+
+Uso:
+  python scripts/inspection_fake_server.py --recording grabacion.json [--port 8790] [--latency-ms 0]
+  INSPECTION_API_BASE_URL=http://127.0.0.1:8790/api (y cualquier usuario/clave no vacíos)
+
+En pruebas:
+  server = FakeInspectionServer(recording).start()
+  ... server.base_url ...
+  server.stop()
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+def parse_multipart(body: bytes, content_type: str) -> dict[str, str]:
+    """Campos de texto de un multipart/form-data (lo que envía ``requests`` con ``files={k: (None, v)}``)."""
+    boundary = ""
+    for part in content_type.split(";"):
+        part = part.strip()
+        if part.startswith("boundary="):
+            boundary = part[len("boundary="):].strip('"')
+    if not boundary:
+        return {}
+    fields: dict[str, str] = {}
+    for chunk in body.split(b"--" + boundary.encode()):
+        head, sep, value = chunk.partition(b"\r\n\r\n")
+        if not sep:
+            continue
+        name = ""
+        for line in head.decode("utf-8", "replace").split("\r\n"):
+            if line.lower().startswith("content-disposition"):
+                for attr in line.split(";"):
+                    attr = attr.strip()
+                    if attr.startswith("name="):
+                        name = attr[len("name="):].strip('"')
+        if name:
+            fields[name] = value.rstrip(b"\r\n").decode("utf-8", "replace")
+    return fields
+
+
+class FakeInspectionServer:
+    def __init__(
+        self,
+        recording: list[dict[str, Any]],
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        username: str = "user",
+        password: str = "secret",
+    ) -> None:
+        self.recording = list(recording)
+        self.latency = latency_ms / 1000
+        self.username = username
+        self.password = password
+        self.lock = threading.Lock()
+        self.hits: Counter[str] = Counter()
+        self.logins = 0
+        self.connections = 0
+        self.active = 0
+        self.max_active = 0
+        self._tokens: set[str] = set()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def revoke_tokens(self) -> None:
+        with self.lock:
+            self._tokens.clear()
+
+    def reset_counters(self) -> None:
+        with self.lock:
+            self.hits.clear()
+            self.logins = 0
+            self.connections = 0
+            self.max_active = 0
+
+    def start(self) -> "FakeInspectionServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-inspection", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _match(self, method: str, path: str, form: dict[str, str]) -> dict[str, Any] | None:
+        for entry in self.recording:
+            if entry.get("method", "GET").upper() != method or entry.get("path") != path:
+                continue
+            wanted = {k: str(v) for k, v in (entry.get("form") or {}).items()}
+            if all(form.get(k) == v for k, v in wanted.items()):
+                return entry
+        return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                with server.lock:
+                    server.connections += 1
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _reply(self, status: int, body: Any) -> None:
+                raw = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def _serve(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                form = parse_multipart(self.rfile.read(length), self.headers.get("Content-Type") or "") if length else {}
+                path = self.path.split("?", 1)[0]
+                with server.lock:
+                    server.hits[f"{method} {path}"] += 1
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    if method == "POST" and path == "/api/login":
+                        if form.get("username") != server.username or form.get("password") != server.password:
+                            self._reply(401, {"ok": False, "message": "Credenciales inválidas"})
+                            return
+                        with server.lock:
+                            server.logins += 1
+                            token = f"tok-{server.logins}"
+                            server._tokens.add(token)
+                        self._reply(200, {"ok": True, "data": {"token": token, "expires_at": "2099-01-01 00:00:00"}})
+                        return
+                    auth = self.headers.get("Authorization") or ""
+                    with server.lock:
+                        valid = auth.startswith("Bearer ") and auth[len("Bearer "):] in server._tokens
+                    if not valid:
+                        self._reply(401, {"ok": False, "message": "Token inválido o vencido"})
+                        return
+                    entry = server._match(method, path, form)
+                    if entry is None:
+                        self._reply(404, {"ok": False, "message": f"Sin grabación para {method} {path}"})
+                        return
+                    self._reply(int(entry.get("status", 200)), entry.get("body"))
+                finally:
+                    with server.lock:
+                        server.active -= 1
+
+            def do_GET(self) -> None:
+                self._serve("GET")
+
+            def do_POST(self) -> None:
+                self._serve("POST")
+
+        return Handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="API Inspection falsa con respuestas grabadas")
+    parser.add_argument("--recording", required=True, help="JSON con la lista de respuestas grabadas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--username", default="user")
+    parser.add_argument("--password", default="secret")
+    args = parser.parse_args()
+
+    with open(args.recording, encoding="utf-8") as f:
+        recording = json.load(f)
+    server = FakeInspectionServer(
+        recording,
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        username=args.username,
+        password=args.password,
+    ).start()
+    print(f"Inspection falsa en {server.base_url} ({len(recording)} grabaciones)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
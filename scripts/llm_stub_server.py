@@ -0,0 +1,89 @@
+"""Proveedor LLM falso (chat completions estilo OpenAI, SSE) para pruebas de carga locales.
+
+Responde ``POST /chat/completions`` con un stream de tokens y el chunk final de ``usage``,
+como DeepSeek, sin costo ni límites del proveedor real.
+
+Uso:
+  python scripts/llm_stub_server.py [--port 8765] [--tokens 40] [--token-ms 20] [--first-ms 200]
+  AGENTS_LLM_API_BASE=http://127.0.0.1:8765  (y cualquier AGENTS_LLM_API_KEY no vacía)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def build_app(*, tokens: int = 40, token_ms: float = 20.0, first_ms: float = 200.0) -> FastAPI:
+    app = FastAPI(title="LLM stub")
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if not (request.headers.get("authorization") or "").startswith("Bearer "):
+            return JSONResponse(status_code=401, content={"error": {"message": "missing key"}})
+        model = body.get("model") or "stub"
+        limit = int(body.get("max_tokens") or tokens)
+        prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages") or [])
+
+        async def stream():
+            created = int(time.time())
+            await asyncio.sleep(first_ms / 1000)
+            count = min(tokens, limit)
+            for i in range(count):
+                chunk = {
+                    "id": "stub",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": f"tok{i} "}}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(token_ms / 1000)
+            prompt_tokens = max(1, prompt_chars // 4)
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": count,
+                "total_tokens": prompt_tokens + count,
+            }
+            yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Proveedor LLM falso para pruebas de carga")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    parser.add_argument("--first-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(
+        build_app(tokens=args.tokens, token_ms=args.token_ms, first_ms=args.first_ms),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,8 +1,9 @@
-"""Regenera textos derivados (_derived/) de archivos de agentes.
+"""Regenera textos derivados (_derived/) de archivos de agentes y su índice invertido.
 
 Uso:
   python scripts/rebuild_agent_derived.py --customer-id 1 --agent-name mi_agente
   python scripts/rebuild_agent_derived.py --customer-id 1 --all
+  python scripts/rebuild_agent_derived.py --customer-id 1 --all --index-only
 """
 
 from __future__ import annotations
@@ -26,6 +27,11 @@ def main() -> int:
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("--agent-name", type=str, help="Nombre del agente")
     group.add_argument("--all", action="store_true", help="Todos los agentes del customer")
+    parser.add_argument(
+        "--index-only",
+        action="store_true",
+        help="Solo reconstruir _derived/_index.json desde los .txt existentes (sin re-extraer)",
+    )
     args = parser.parse_args()
 
     db = SessionLocal()
@@ -45,13 +51,18 @@ def main() -> int:
             if not name:
                 continue
             print(f"== {name} ==")
+            if args.index_only:
+                index = derived.rebuild_derived_index(name, int(args.customer_id))
+                print(f"  indexedFiles={index['files']} indexedChunks={index['chunks']}")
+                continue
             result = derived.rebuild_all_derived(name, int(args.customer_id))
             ok = int(result.get("derivedOk") or 0)
             errs = result.get("derivedErrors") or []
             total_ok += ok
             total_err += len(errs)
             print(
-                f"  processed={result.get('processed')} derivedOk={ok} errors={len(errs)}"
+                f"  processed={result.get('processed')} derivedOk={ok} errors={len(errs)} "
+                f"indexedChunks={result.get('indexedChunks')}"
             )
             for err in errs[:20]:
                 print(f"  - {err}")
@@ -0,0 +1,12 @@
+"""Render simulado para ``test_render_pool`` (módulo liviano: el hijo spawn lo importa rápido)."""
+
+from __future__ import annotations
+
+import os
+import time
+
+
+def sleepy_job(job) -> dict:
+    started = time.time()
+    time.sleep(float(job.document_data.get("sleep", 0.3)))
+    return {"status": "success", "pid": os.getpid(), "started": started, "ended": time.time()}
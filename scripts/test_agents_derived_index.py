@@ -0,0 +1,91 @@
+"""Índice derivado de agentes: upserts de varios procesos sin pisarse y búsqueda de nombre por trigramas."""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+_TMP = tempfile.TemporaryDirectory(prefix="pie360-test-derived-")
+os.environ["FILES_DIR"] = _TMP.name
+
+from app.backend.utils import agents_derived_storage as derived  # noqa: E402
+from app.backend.utils import agents_storage as storage  # noqa: E402
+
+AGENT = "agente_test"
+CUSTOMER_ID = 1
+PROCESSES = 4
+FILES_PER_PROCESS = 25
+
+
+def _writer(worker: int) -> None:
+    folder = storage.agent_folder(AGENT, CUSTOMER_ID)
+    for i in range(FILES_PER_PROCESS):
+        rel = f"w{worker}/ficha_{i:03d}.txt"
+        target = folder / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(f"Estudiante trabajador{worker} número{i}\n\nlectura y escritura", encoding="utf-8")
+        derived.write_derived_for_file(AGENT, rel, CUSTOMER_ID)
+
+
+def _concurrent_check() -> int:
+    root = derived.derived_root(AGENT, CUSTOMER_ID)
+    seed = storage.agent_folder(AGENT, CUSTOMER_ID) / "inicial.txt"
+    seed.parent.mkdir(parents=True, exist_ok=True)
+    seed.write_text("archivo inicial", encoding="utf-8")
+    derived.write_derived_for_file(AGENT, "inicial.txt", CUSTOMER_ID)
+
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_writer, args=(w,)) for w in range(PROCESSES)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    data = derived._read_index_file(root, fresh=True) or {}
+    indexed = set((data.get("files") or {}).keys())
+    expected = {"inicial.txt"} | {
+        f"w{w}/ficha_{i:03d}.txt" for w in range(PROCESSES) for i in range(FILES_PER_PROCESS)
+    }
+    if any(p.exitcode for p in procs) or indexed != expected:
+        print("FAIL upserts concurrentes:", len(indexed), "de", len(expected), [p.exitcode for p in procs])
+        return 1
+    return 0
+
+
+def _trigram_check() -> int:
+    root = derived.derived_root(AGENT, CUSTOMER_ID)
+    _data, idx = derived._load_index(root)
+    rnd = random.Random(11)
+    vocab = list(idx["postings"])
+    probes = {"trab", "trabajador2", "mero", "lectura", "zzz", "ab", "ero"}
+    for word in rnd.sample(vocab, min(20, len(vocab))):
+        start = rnd.randrange(len(word))
+        probes.add(word[start : start + rnd.randint(2, 6)])
+    failed = 0
+    for tok in sorted(probes):
+        expected = sorted(w for w in vocab if tok in w)
+        got = sorted(derived._words_containing(idx, tok))
+        if got != expected:
+            print("FAIL trigramas:", tok, got[:5], expected[:5])
+            failed += 1
+    return failed
+
+
+def main() -> int:
+    failed = _concurrent_check()
+    failed += _trigram_check()
+    print(f"{PROCESSES} procesos x {FILES_PER_PROCESS} archivos al mismo índice")
+    _TMP.cleanup()
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""Rate limit de Agentes en memoria: ventana por minuto, totales corrientes y reconciliación."""
+
+from __future__ import annotations
+
+import sys
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes.agents_rate_limit_class import AgentsRateLimitClass, record_agents_usage
+from app.backend.core.config import settings
+from app.backend.db.database import Base
+from app.backend.db.models.agents_usage import AgentsTokenUsageModel
+from app.backend.db.models.pie_core import CustomerModel
+from app.backend.utils.agents_rate_store import MemoryRateLimitStore, set_rate_limit_store
+
+
+def main() -> int:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(
+        engine, tables=[CustomerModel.__table__, AgentsTokenUsageModel.__table__]
+    )
+    db = sessionmaker(bind=engine)()
+    db.add(CustomerModel(id=1, agents_budget_usd_max=Decimal("5.00")))
+    db.add(
+        AgentsTokenUsageModel(
+            customer_id=1,
+            user_id=7,
+            model="m",
+            total_tokens=1000,
+            estimated_cost_usd=Decimal("4.50"),
+            created_at=datetime.utcnow(),
+        )
+    )
+    db.commit()
+
+    queries = {"n": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_args, **_kwargs):
+        queries["n"] += 1
+
+    store = MemoryRateLimitStore()
+    set_rate_limit_store(store)
+    limiter = AgentsRateLimitClass(db)
+    failed = 0
+
+    per_user = max(1, int(settings.agents_rate_requests_per_min_user or 10))
+    results = [
+        limiter.check_and_register_chat(user_id=7, customer_id=1, school_id=None)
+        for _ in range(per_user + 1)
+    ]
+    if not all(r["ok"] for r in results[:-1]) or results[-1]["code"] != "rate_limit_requests":
+        print("FAIL ventana por usuario:", [r["code"] for r in results])
+        failed += 1
+    # Primera llamada: cliente + 3 agregados (gasto, tokens usuario, tokens cliente); luego solo el cliente.
+    expected = 4 + per_user
+    if queries["n"] != expected:
+        print(f"FAIL consultas: {queries['n']} (esperado {expected})")
+        failed += 1
+
+    # Otro usuario del mismo cliente: la ventana es por usuario.
+    if not limiter.check_and_register_chat(user_id=8, customer_id=1, school_id=None)["ok"]:
+        print("FAIL ventana compartida entre usuarios")
+        failed += 1
+
+    # Consumo registrado suma en memoria y agota el presupuesto sin re-agregar.
+    record_agents_usage(customer_id=1, user_id=8, total_tokens=500, cost_usd=0.60)
+    before = queries["n"]
+    result = limiter.check_and_register_chat(user_id=9, customer_id=1, school_id=None)
+    if result["code"] != "budget_exceeded" or queries["n"] - before != 1:
+        print("FAIL presupuesto corriente:", result, queries["n"] - before)
+        failed += 1
+
+    # Ventana deslizante: tras 60 s vuelve a aceptar.
+    window = MemoryRateLimitStore()
+    if window.acquire([("k", 2)], now=0.0) or window.acquire([("k", 2)], now=30.0):
+        print("FAIL ventana: rechazó dentro del límite")
+        failed += 1
+    if window.acquire([("k", 2)], now=59.0) != "k" or window.acquire([("k", 2)], now=60.5):
+        print("FAIL ventana deslizante")
+        failed += 1
+
+    # Reconciliación: un total viejo se descarta y se relee de BD.
+    window.set_total("t", 10, day=None, now=0.0)
+    if window.total("t", day=None, max_age_seconds=60, now=30.0) != 10:
+        print("FAIL total vigente")
+        failed += 1
+    if window.total("t", day=None, max_age_seconds=60, now=61.0) is not None:
+        print("FAIL total vencido no se reconcilia")
+        failed += 1
+
+    # Suma registrada mientras se consulta la BD: set_total con la marca no la pierde.
+    racing = MemoryRateLimitStore()
+    mark = racing.add_mark("u", day=None, now=0.0)
+    racing.add_total("u", 5, day=None, now=0.5)  # llega entre la consulta y set_total
+    racing.set_total("u", 100, day=None, now=1.0, mark=mark)
+    racing.add_total("u", 2, day=None, now=2.0)
+    if racing.total("u", day=None, max_age_seconds=60, now=3.0) != 107:
+        print("FAIL suma durante la reconciliación:", racing.total("u", day=None, max_age_seconds=60, now=3.0))
+        failed += 1
+
+    # Claves sin uso se descartan: ventanas vencidas y totales viejos.
+    for user in range(1000):
+        racing.acquire([(("hits", "user", user), 5)], now=10.0)
+    racing.acquire([("vivo", 5)], now=200.0)
+    racing.acquire([("vivo", 5)], now=4000.0)
+    if set(racing._windows) != {"vivo"} or racing._totals or racing._added:
+        print("FAIL claves sin uso:", len(racing._windows), racing._totals, racing._added)
+        failed += 1
+
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+"""Informes masivos en paralelo: orden del resumen, reintentos transitorios, uso acumulado y rate limit."""
+
+from __future__ import annotations
+
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.backend.classes import agents_chat_class as chat_mod
+from app.backend.core.config import settings
+from app.backend.db.database import Base
+from app.backend.db.models.agent import AgentModel
+from app.backend.db.models.agents_usage import AgentsTokenUsageModel
+from app.backend.db.models.pie_core import CustomerModel
+from app.backend.utils.agents_bulk_reports import BulkPlan
+from app.backend.utils.agents_rate_store import MemoryRateLimitStore, set_rate_limit_store
+
+STUDENTS = [{"id": i, "name": f"Alumno {i:02d}", "rut": None} for i in range(1, 13)]
+FLAKY = {3, 7}
+FAILS = {5}
+
+
+class _FakeLlm:
+    def __init__(self, _db) -> None:
+        pass
+
+    def get_selected_model_code(self) -> str:
+        return "stub-model"
+
+
+class _StubChat(chat_mod.AgentsChatClass):
+    calls: dict[int, int] = {}
+    recorded: list[dict] = []
+    _lock = threading.Lock()
+
+    def _generate_one_bulk_document(self, *, student_id: int, student_name: str, stop=None, **_kw):
+        # Como el real: cada llamada al modelo pasa antes por el rate limit.
+        denied = self._register_bulk_llm_call(stop)
+        if denied is not None:
+            return {"ok": False, "reason": denied["message"], "usage": None, "rate_limited": True}
+        with self._lock:
+            n = self.calls[student_id] = self.calls.get(student_id, 0) + 1
+        time.sleep(random.uniform(0.005, 0.03))
+        usage = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+        if student_id in FLAKY and n == 1:
+            return {"ok": False, "reason": "HTTP 503", "usage": usage, "retryable": True}
+        if student_id in FAILS:
+            return {"ok": False, "reason": "campos vacíos", "usage": usage, "retryable": False}
+        return {"ok": True, "filename": f"{student_id}.docx", "usage": usage}
+
+    def _record_bulk_usage(self, **kwargs) -> None:
+        self.recorded.append(kwargs)
+
+
+def main() -> int:
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(
+        engine,
+        tables=[AgentModel.__table__, CustomerModel.__table__, AgentsTokenUsageModel.__table__],
+    )
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(AgentModel(id="agt_1", customer_id=1, name="informes", role_instructions=""))
+    db.add(CustomerModel(id=1, agents_budget_usd_max=Decimal("5.00")))
+    db.commit()
+    object.__setattr__(settings, "agents_rate_requests_per_min_user", 100)
+    object.__setattr__(settings, "agents_rate_requests_per_min_customer", 100)
+    store = MemoryRateLimitStore()
+    set_rate_limit_store(store)
+    agent_row = db.get(AgentModel, "agt_1")
+
+    chat_mod.resolve_bulk_plan = lambda *_a, **_kw: BulkPlan(
+        active=True, school_name="Liceo", year=2026, course_name="1° A", students=list(STUDENTS)
+    )
+    chat_mod.AgentsLlmModelsClass = _FakeLlm
+    chat_mod.zip_generated_files = lambda names: {"filename": "lote.zip", "count": len(names)}
+    chat_mod.BULK_RETRY_BACKOFF_SECONDS = 0.0
+
+    chat = _StubChat(db, customer_id=1, school_id=1, user_id=1, period_year=2026)
+    chat.session_factory = factory
+    t0 = time.perf_counter()
+    events = list(
+        chat._stream_bulk_reports(
+            agent_id="agt_1", agent_row=agent_row, text="informes del curso", history=None, document_id=3
+        )
+    )
+    elapsed = time.perf_counter() - t0
+
+    failed = 0
+    steps = [e["message"] for e in events if e["type"] == "step"]
+    done = events[-1]["data"]
+    generated = [s["name"] for s in STUDENTS if s["id"] not in FAILS]
+    if len(steps) != len(STUDENTS) + 1:
+        print("FAIL pasos de progreso:", steps)
+        failed += 1
+    if ", ".join(generated) not in done["reply"]:
+        print("FAIL el resumen no respeta el orden de la nómina")
+        failed += 1
+    if "Alumno 05: campos vacíos" not in done["reply"]:
+        print("FAIL omitido no informado")
+        failed += 1
+    if any(_StubChat.calls.get(i) != 2 for i in FLAKY) or _StubChat.calls.get(5) != 1:
+        print("FAIL reintentos:", _StubChat.calls)
+        failed += 1
+    expected_total = 15 * sum(_StubChat.calls.values())
+    if (done["usage"] or {}).get("total_tokens") != expected_total:
+        print("FAIL uso acumulado:", done["usage"], "esperado", expected_total)
+        failed += 1
+    if len(_StubChat.recorded) != 1:
+        print("FAIL registro de uso:", len(_StubChat.recorded))
+        failed += 1
+    hits = len(store._windows.get(("hits", "user", 1)) or ())
+    if hits != sum(_StubChat.calls.values()):
+        print("FAIL llamadas no registradas en el rate limit:", hits, sum(_StubChat.calls.values()))
+        failed += 1
+
+    # Presupuesto agotado: la tanda se detiene sin llamar al modelo y lo informa.
+    db.add(
+        AgentsTokenUsageModel(
+            customer_id=1, user_id=1, model="m", total_tokens=10,
+            estimated_cost_usd=Decimal("5.00"), created_at=datetime.utcnow(),
+        )
+    )
+    db.commit()
+    set_rate_limit_store(MemoryRateLimitStore())
+    before = sum(_StubChat.calls.values())
+    events = list(
+        chat._stream_bulk_reports(
+            agent_id="agt_1", agent_row=agent_row, text="informes del curso", history=None, document_id=3
+        )
+    )
+    if sum(_StubChat.calls.values()) != before or "presupuesto" not in events[-1]["data"]["reply"]:
+        print("FAIL presupuesto en tanda masiva:", events[-1]["data"]["reply"][-200:])
+        failed += 1
+
+    print(f"{len(STUDENTS)} estudiantes en {elapsed * 1000:.0f} ms")
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,180 @@
+"""Caché de catálogos: versión por tabla, TTL, errores sin guardar, ETag/304 en /regions/list y nombres por id."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.auth.auth_user import get_current_active_user
+from app.backend.classes.region_class import RegionClass
+from app.backend.db.database import Base, get_db
+from app.backend.db.models import GenderModel, RegionModel
+from app.backend.routes.regions import regions
+from app.backend.utils.catalog_cache import CatalogCache, catalog_name, set_catalog_cache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _unit_checks() -> int:
+    failed = 0
+    clock = FakeClock()
+    cache = CatalogCache(60, clock=clock)
+    calls = {"n": 0}
+
+    def loader():
+        calls["n"] += 1
+        return [{"id": 1, "name": f"v{calls['n']}"}]
+
+    a = cache.get_or_load("regions", "list", loader)
+    b = cache.get_or_load("regions", "list", loader)
+    if calls["n"] != 1 or a is not b or not a.etag:
+        print("FAIL lectura cacheada:", calls, a, b)
+        failed += 1
+
+    cache.bump("provinces")
+    if cache.get_or_load("regions", "list", loader) is not a:
+        print("FAIL bump de otra tabla invalidó regiones")
+        failed += 1
+
+    cache.bump("regions")
+    c = cache.get_or_load("regions", "list", loader)
+    if calls["n"] != 2 or c.etag == a.etag or cache.version("regions") != 1:
+        print("FAIL bump no invalidó:", calls, c)
+        failed += 1
+
+    clock.now += 61
+    cache.get_or_load("regions", "list", loader)
+    if calls["n"] != 3:
+        print("FAIL TTL vencido siguió sirviendo la entrada")
+        failed += 1
+
+    errors = {"n": 0}
+
+    def failing():
+        errors["n"] += 1
+        return {"status": "error", "message": "sin conexión"}
+
+    for _ in range(2):
+        entry = cache.get_or_load("genders", "list", failing)
+    if errors["n"] != 2 or entry.etag is not None:
+        print("FAIL se guardó un error:", errors, entry)
+        failed += 1
+
+    def racing():
+        cache.bump("communes")  # escritura concurrente mientras se consulta
+        return ["viejo"]
+
+    cache.get_or_load("communes", "list", racing)
+    if cache.get_or_load("communes", "list", lambda: ["nuevo"]).data != ["nuevo"]:
+        print("FAIL se guardó un dato leído durante un bump")
+        failed += 1
+
+    off = CatalogCache(0)
+    off.get_or_load("regions", "list", loader)
+    off.get_or_load("regions", "list", loader)
+    if calls["n"] != 5:
+        print("FAIL TTL 0 no desactivó la caché")
+        failed += 1
+    return failed
+
+
+def main() -> int:
+    failed = _unit_checks()
+
+    tmp = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{tmp.name}/catalog.db")
+    Base.metadata.create_all(engine, tables=[RegionModel.__table__, GenderModel.__table__])
+    Session = sessionmaker(bind=engine)
+    seed = Session()
+    seed.add_all([RegionModel(id=13, region="Metropolitana"), RegionModel(id=5, region="Valparaíso")])
+    seed.add_all([GenderModel(id=1, gender="Femenino"), GenderModel(id=2, gender="Masculino")])
+    seed.commit()
+    seed.close()
+
+    queries = {"n": 0}
+
+    def _on_exec(*_args, **_kwargs):
+        queries["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", _on_exec)
+    set_catalog_cache(CatalogCache(300))
+
+    def _db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(regions)
+    app.dependency_overrides[get_db] = _db
+    app.dependency_overrides[get_current_active_user] = lambda: {"id": 1}
+    http = TestClient(app)
+
+    first = http.get("/regions/list")
+    etag = first.headers.get("etag")
+    names = [r["region"] for r in (first.json().get("data") or [])] if first.status_code == 200 else []
+    if first.status_code != 200 or not etag or names != ["Valparaíso", "Metropolitana"]:
+        print("FAIL primera lectura:", first.status_code, first.headers, first.text[:200])
+        failed += 1
+
+    before = queries["n"]
+    again = http.get("/regions/list", headers={"If-None-Match": etag or ""})
+    if again.status_code != 304 or again.content or queries["n"] != before:
+        print("FAIL 304 sin consultar la base:", again.status_code, queries["n"] - before)
+        failed += 1
+    plain = http.get("/regions/list")
+    if plain.status_code != 200 or plain.headers.get("etag") != etag or queries["n"] != before:
+        print("FAIL lectura cacheada sin If-None-Match:", plain.status_code, queries["n"] - before)
+        failed += 1
+
+    db = Session()
+    stored = RegionClass(db).store({"region": "Biobío"})
+    db.close()
+    after = http.get("/regions/list", headers={"If-None-Match": etag or ""})
+    if stored.get("status") != "success" or after.status_code != 200 or after.headers.get("etag") == etag:
+        print("FAIL store no invalidó la caché:", stored, after.status_code)
+        failed += 1
+    elif len(after.json().get("data") or []) != 3:
+        print("FAIL lista tras store:", after.json())
+        failed += 1
+
+    db = Session()
+    before = queries["n"]
+    looked_up = [catalog_name(db, "genders", gid) for gid in (1, "2", 1, 9, None)]
+    if looked_up != ["Femenino", "Masculino", "Femenino", None, None] or queries["n"] - before != 1:
+        print("FAIL nombres por id:", looked_up, queries["n"] - before)
+        failed += 1
+    db.close()
+
+    print(
+        f"/regions/list: 200 con ETag, 304 sin consulta, nuevo ETag tras store; "
+        f"{queries['n']} consultas en total"
+    )
+    set_catalog_cache(None)
+    event.remove(engine, "before_cursor_execute", _on_exec)
+    engine.dispose()
+    tmp.cleanup()
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
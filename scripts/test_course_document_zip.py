@@ -0,0 +1,230 @@
+"""Exportación por curso: precarga en una consulta, render en paralelo y ZIP en streaming."""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes.student_class import StudentClass
+from app.backend.core.executors import BoundedExecutor
+from app.backend.db.database import Base
+from app.backend.db.models import (
+    CourseModel,
+    SpecialEducationalNeedModel,
+    StudentAcademicInfoModel,
+    StudentModel,
+    StudentNameTrigramModel,
+    StudentPersonalInfoModel,
+)
+from app.backend.utils.course_document_zip import (
+    MANIFEST_NAME,
+    CourseExportEntry,
+    iter_rendered,
+    stream_course_zip,
+)
+
+LASTNAMES = ["Soto", "Araya", "Muñoz", "Rojas", "Díaz", "Pérez"]
+FAILS = {4}
+
+
+def _seed(db) -> None:
+    db.add(CourseModel(id=1, teaching_id=10, deleted_status_id=0))
+    db.add(SpecialEducationalNeedModel(id=1, special_educational_needs="TEL"))
+    for i, lastname in enumerate(LASTNAMES, start=1):
+        deleted = 1 if i == 6 else 0
+        course_id = 2 if i == 5 else 1
+        db.add(StudentModel(id=i, school_id=1, identification_number=f"{i}-K", deleted_status_id=deleted))
+        db.add(StudentAcademicInfoModel(id=i, student_id=i, course_id=course_id, special_educational_need_id=1))
+        db.add(StudentPersonalInfoModel(id=i, student_id=i, names=f"Alumno {i}", father_lastname=lastname))
+    db.commit()
+
+
+def _shared_pool_check() -> int:
+    """Dos exportaciones a la vez comparten el pool: nunca más renders que hilos del pool."""
+    pool = BoundedExecutor("render-test", 3)
+    lock = threading.Lock()
+    state = {"active": 0, "max": 0}
+
+    def render_one(_item) -> dict:
+        with lock:
+            state["active"] += 1
+            state["max"] = max(state["max"], state["active"])
+        time.sleep(0.02)
+        with lock:
+            state["active"] -= 1
+        return {"status": "success"}
+
+    results: list[int] = []
+
+    def export() -> None:
+        results.append(sum(1 for _ in iter_rendered(range(12), render_one, 4, executor=pool)))
+
+    threads = [threading.Thread(target=export) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    pool.shutdown()
+    if results != [12, 12] or state["max"] > 3 or pool.metrics()["completed"] != 24:
+        print("FAIL pool compartido:", results, state, pool.metrics())
+        return 1
+    return 0
+
+
+def _aborted_export_check() -> int:
+    """Exportación cortada (cliente desconectado) y ``run`` cancelado en cola: ``queued`` vuelve a 0."""
+    pool = BoundedExecutor("render-abort", 1)
+    release = threading.Event()
+
+    def render_one(_item) -> dict:
+        release.wait(5)
+        return {"status": "success"}
+
+    stream = iter_rendered(range(10), render_one, 4, executor=pool)
+    release.set()
+    next(stream)
+    release.clear()
+    stream.close()  # cancela los renders que seguían en cola
+    release.set()
+
+    async def _cancel_queued() -> None:
+        blocker = asyncio.ensure_future(pool.run(time.sleep, 0.2))
+        queued = asyncio.ensure_future(pool.run(time.sleep, 0))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        await blocker
+        try:
+            await queued
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(_cancel_queued())
+    pool.shutdown()
+    metrics = pool.metrics()
+    if metrics["queued"] != 0 or metrics["active"] != 0:
+        print("FAIL cola inflada tras cancelar:", metrics)
+        return 1
+    return 0
+
+
+def main() -> int:
+    tmp = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{tmp.name}/test.db")
+    Base.metadata.create_all(
+        engine,
+        tables=[
+            m.__table__
+            for m in (
+                CourseModel,
+                SpecialEducationalNeedModel,
+                StudentModel,
+                StudentAcademicInfoModel,
+                StudentPersonalInfoModel,
+                StudentNameTrigramModel,
+            )
+        ],
+    )
+    db = sessionmaker(bind=engine)()
+    _seed(db)
+    failed = 0
+
+    statements: list[str] = []
+
+    def count(*args) -> None:
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", count)
+    students = StudentClass(db).get_by_course(1)
+    queries = len(statements)
+    event.remove(engine, "before_cursor_execute", count)
+
+    ids = [s["student_data"]["id"] for s in students]
+    if ids != [2, 3, 4, 1]:  # Araya, Muñoz, Rojas, Soto; sin el de otro curso ni el eliminado
+        print("FAIL roster:", ids)
+        failed += 1
+    if queries != 1:
+        print("FAIL consultas de precarga:", queries)
+        failed += 1
+    if any(s != StudentClass(db).get(s["student_data"]["id"]) for s in students):
+        print("FAIL precarga distinta de get()")
+        failed += 1
+
+    # Render falso: PDFs de ~200 KB con tiempos distintos; el 4 falla.
+    out_dir = Path(tmp.name)
+    finished: list[int] = []
+    lock = threading.Lock()
+
+    def render_one(student_result: dict) -> dict:
+        sid = student_result["student_data"]["id"]
+        time.sleep(0.05 * sid)
+        with lock:
+            finished.append(sid)
+        if sid in FAILS:
+            return {"status": "error", "message": "No se encontró documento para este estudiante."}
+        path = out_dir / f"doc_{sid}.pdf"
+        path.write_bytes(b"%PDF-1.4\n" + bytes([sid]) * 200_000)
+        return {"status": "success", "file_path": str(path)}
+
+    def entries():
+        for student_result, result in iter_rendered(students, render_one, 4):
+            data = student_result["student_data"]
+            yield CourseExportEntry(
+                student_id=data["id"],
+                student_name=f"{data['personal_data']['names']} {data['personal_data']['father_lastname']}",
+                status="ok" if result.get("status") == "success" else "error",
+                file_path=result.get("file_path"),
+                message=result.get("message"),
+            )
+
+    stream = stream_course_zip(entries(), {"course_id": 1, "document_id": 21})
+    first = next(stream)
+    renders_at_first_chunk = len(finished)
+    body = first + b"".join(stream)
+    chunk_ok = 0 < len(first) <= 128 * 1024
+    if renders_at_first_chunk == len(students) or not chunk_ok:
+        print("FAIL no hubo streaming:", renders_at_first_chunk, len(first))
+        failed += 1
+
+    with zipfile.ZipFile(io.BytesIO(body)) as zf:
+        names = zf.namelist()
+        manifest = json.loads(zf.read(MANIFEST_NAME))
+        bad = zf.testzip()
+        sizes = {n: zf.getinfo(n).file_size for n in names if n != MANIFEST_NAME}
+    if bad or names[-1] != MANIFEST_NAME or len(sizes) != 3 or set(sizes.values()) != {200_009}:
+        print("FAIL contenido del ZIP:", names, sizes, bad)
+        failed += 1
+    failures = [s for s in manifest["students"] if s["status"] != "ok"]
+    if manifest["ok"] != 3 or manifest["failed"] != 1 or [f["student_id"] for f in failures] != [4]:
+        print("FAIL manifest:", manifest)
+        failed += 1
+    if not failures or "No se encontró" not in (failures[0]["message"] or ""):
+        print("FAIL motivo de la falla:", failures)
+        failed += 1
+
+    failed += _shared_pool_check()
+    failed += _aborted_export_check()
+
+    db.close()
+    engine.dispose()
+    tmp.cleanup()
+    print(f"{len(students)} estudiantes en {queries} consulta, ZIP {len(body) // 1024} KB, primer trozo tras {renders_at_first_chunk} renders")
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
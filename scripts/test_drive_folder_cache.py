@@ -0,0 +1,246 @@
+"""Subidas a Drive contra un Drive falso: caché de carpetas, cola por curso, hilos, 404, papelera y carreras en BD."""
+
+from __future__ import annotations
+
+import logging
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.db.database import Base
+from app.backend.db.models.customer_drive_settings import CustomerDriveFolderModel
+from app.backend.utils import customer_drive_config
+from app.backend.utils import google_drive_storage as gdrive
+from app.backend.utils.customer_drive_config import DriveCustomerConfig
+from app.backend.utils.google_drive_folder_cache import (
+    DriveFolderCache,
+    get_drive_folder_cache,
+    set_drive_folder_cache,
+)
+from scripts.fake_drive_service import FOLDER_MIME, FakeDriveService
+
+CONFIG = DriveCustomerConfig(customer_id=1, root_folder_id="root", source="test")
+
+
+def cache_db_available() -> bool:
+    return get_drive_folder_cache()._db_available
+
+
+def _folders(fake: FakeDriveService, parent: str, name: str) -> list[dict]:
+    return [f for f in fake.children(parent, name) if f["mimeType"] == FOLDER_MIME]
+
+
+def _enqueue(queue: gdrive.DriveUploadQueue, rut: str, course: str = "1° Medio A") -> None:
+    queue.add(
+        school_name="Liceo Mixto",
+        year=2026,
+        course_name=course,
+        student_rut=rut,
+        document_type_name="Informe a la Familia",
+        data=b"docx-bytes",
+        file_extension="docx",
+    )
+
+
+def main() -> int:
+    # Archivo temporal: cada hilo usa su propia conexión, como con MySQL.
+    tmp = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{tmp.name}/drive.db", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine, tables=[CustomerDriveFolderModel.__table__])
+    factory = sessionmaker(bind=engine)
+    set_drive_folder_cache(DriveFolderCache(session_factory=factory))
+    fake = FakeDriveService(root_id="root")
+    gdrive._service_for_config = lambda config: fake
+    customer_drive_config.customer_drive_configured = lambda db, cid: True
+    customer_drive_config.load_customer_drive_config = lambda db, cid: CONFIG
+    failed = 0
+
+    ruts = [f"{20_000_000 + i}-{i % 10}" for i in range(30)]
+    queue = gdrive.DriveUploadQueue(None, 1, config=CONFIG)
+    for rut in ruts:
+        _enqueue(queue, rut)
+    results = queue.flush()
+    first_calls = fake.api_calls()
+    if not all(r.get("ok") for r in results) or results[0]["drive_path"] != (
+        "Liceo Mixto/2026/1° Medio A/200000000/200000000_Informe a la Familia.docx"
+    ):
+        print("FAIL cola:", results[:2])
+        failed += 1
+    # 3 carpetas de curso + 30 de RUT (list + create c/u) + 1 list de existentes + 30 archivos.
+    if first_calls != 2 * 33 + 1 + 30:
+        print("FAIL llamadas primera tanda:", dict(fake.calls))
+        failed += 1
+
+    # Segunda tanda (reemplazo): carpetas desde caché, un list de existentes y updates.
+    fake.calls.clear()
+    queue = gdrive.DriveUploadQueue(None, 1, config=CONFIG)
+    for rut in ruts:
+        _enqueue(queue, rut)
+    results = queue.flush()
+    if not all(r.get("replaced") for r in results) or dict(fake.calls) != {"list": 1, "update": 30}:
+        print("FAIL reemplazo:", dict(fake.calls))
+        failed += 1
+
+    # Caché persistente: un proceso nuevo (memoria vacía) no vuelve a listar carpetas;
+    # solo comprueba (una vez cada una) que las carpetas de curso y alumno no están en la papelera.
+    set_drive_folder_cache(DriveFolderCache(session_factory=factory))
+    fake.calls.clear()
+    gdrive.upload_student_document_tree(
+        db=None,
+        customer_id=1,
+        school_name="Liceo Mixto",
+        year=2026,
+        course_name="1° Medio A",
+        student_rut=ruts[0],
+        document_type_name="Informe a la Familia",
+        data=b"x",
+        file_extension="docx",
+    )
+    if dict(fake.calls) != {"get": 2, "list": 1, "update": 1}:
+        print("FAIL caché persistente:", dict(fake.calls))
+        failed += 1
+
+    # Hilos concurrentes en un curso nuevo: una sola carpeta de curso.
+    fake.latency_seconds = 0.005
+    errors: list[Exception] = []
+
+    def _worker(rut: str) -> None:
+        try:
+            gdrive.upload_student_document_tree(
+                db=None,
+                customer_id=1,
+                school_name="Liceo Mixto",
+                year=2026,
+                course_name="2° Medio B",
+                student_rut=rut,
+                document_type_name="Informe a la Familia",
+                data=b"x",
+                file_extension="docx",
+            )
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=_worker, args=(f"1{i}11111-1",)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    fake.latency_seconds = 0.0
+    liceo = _folders(fake, "root", "Liceo Mixto")
+    year = _folders(fake, liceo[0]["id"], "2026") if len(liceo) == 1 else []
+    course = _folders(fake, year[0]["id"], "2° Medio B") if len(year) == 1 else []
+    if errors or len(liceo) != 1 or len(year) != 1 or len(course) != 1:
+        print("FAIL concurrencia:", errors, len(liceo), len(year), len(course))
+        failed += 1
+
+    # Carpeta cacheada borrada en Drive (404): se invalida, se recrea y la subida sigue.
+    fake.delete_tree(_folders(fake, year[0]["id"], "1° Medio A")[0]["id"])
+    result = gdrive.upload_student_document_tree(
+        db=None,
+        customer_id=1,
+        school_name="Liceo Mixto",
+        year=2026,
+        course_name="1° Medio A",
+        student_rut=ruts[1],
+        document_type_name="Informe a la Familia",
+        data=b"x",
+        file_extension="docx",
+    )
+    recreated = _folders(fake, year[0]["id"], "1° Medio A")
+    if not result.get("ok") or result.get("replaced") or len(recreated) != 1:
+        print("FAIL 404:", result, len(recreated))
+        failed += 1
+
+    # Carpeta cacheada en la papelera: la comprobación la descarta y se crea otra.
+    course_a = _folders(fake, year[0]["id"], "1° Medio A")[0]["id"]
+    fake.trash_tree(course_a)
+    set_drive_folder_cache(DriveFolderCache(session_factory=factory))
+    result = gdrive.upload_student_document_tree(
+        db=None,
+        customer_id=1,
+        school_name="Liceo Mixto",
+        year=2026,
+        course_name="1° Medio A",
+        student_rut=ruts[2],
+        document_type_name="Informe a la Familia",
+        data=b"x",
+        file_extension="docx",
+    )
+    live = _folders(fake, year[0]["id"], "1° Medio A")
+    file_item = fake.items.get(result.get("file_id") or "", {})
+    parent_item = fake.items.get((file_item.get("parents") or [""])[0], {})
+    if not result.get("ok") or len(live) != 1 or live[0]["id"] == course_a or parent_item.get("trashed"):
+        print("FAIL carpeta en la papelera:", result, len(live))
+        failed += 1
+
+    if get_drive_folder_cache()._folder_locks:
+        print("FAIL locks de carpeta sin liberar:", len(get_drive_folder_cache()._folder_locks))
+        failed += 1
+
+    # Dos workers guardan la misma ruta: el segundo adopta el folder_id del primero (sin apagar la BD).
+    worker_a = DriveFolderCache(session_factory=factory)
+    worker_b = DriveFolderCache(session_factory=factory)
+    worker_b.lookup(1, "root", ["Carrera"])  # consulta previa: aún no existe
+    first_id = worker_a.put(1, "root", "Carrera", "id-a")
+    original_stored = factory
+
+    class _RacingSession:
+        """Sesión cuyo primer SELECT no ve la fila (como si el otro worker no hubiera hecho commit)."""
+
+        def __init__(self) -> None:
+            self._db = original_stored()
+            self._hide = True
+
+        def query(self, *args):
+            q = self._db.query(*args)
+            if self._hide:
+                self._hide = False
+                return q.filter(CustomerDriveFolderModel.id == -1)
+            return q
+
+        def __getattr__(self, name):
+            return getattr(self._db, name)
+
+    worker_b.session_factory = _RacingSession
+    second_id = worker_b.put(1, "root", "Carrera", "id-b")
+    if first_id != "id-a" or second_id != "id-a" or not worker_b._db_available:
+        print("FAIL carrera de inserción:", first_id, second_id, worker_b._db_available)
+        failed += 1
+    if worker_b.lookup(1, "root", ["Carrera"]).get("Carrera") != "id-a":
+        print("FAIL memoria tras la carrera")
+        failed += 1
+
+    # Error transitorio de BD: se registra y la persistencia sigue activa.
+    def _broken():
+        raise OperationalError("SELECT 1", {}, Exception("Lost connection to MySQL server"))
+
+    flaky = DriveFolderCache(session_factory=_broken)
+    logging.getLogger("app.backend.utils.google_drive_folder_cache").disabled = True
+    flaky.put(1, "root", "Otra", "id-x")
+    flaky.lookup(1, "root", ["Nada"])
+    logging.getLogger("app.backend.utils.google_drive_folder_cache").disabled = False
+    if not flaky._db_available:
+        print("FAIL un error transitorio apagó la BD")
+        failed += 1
+
+    if not cache_db_available():
+        print("FAIL caché cayó a solo memoria")
+        failed += 1
+
+    engine.dispose()
+    tmp.cleanup()
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,202 @@
+"""Outbox de subidas a Drive: encolar, worker, idempotencia, revisión, reintentos y reparto entre hilos."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import httplib2
+from googleapiclient.errors import HttpError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes import drive_upload_jobs_class as jobs_mod
+from app.backend.classes.drive_upload_jobs_class import DriveUploadJobsClass, process_due_drive_uploads
+from app.backend.core.config import settings
+from app.backend.core.drive_upload_worker import drive_upload_worker
+from app.backend.db.database import Base
+from app.backend.db.models.customer_drive_settings import CustomerDriveFolderModel
+from app.backend.db.models.drive_upload_jobs import DriveUploadJobModel
+from app.backend.utils import customer_drive_config
+from app.backend.utils import google_drive_storage as gdrive
+from app.backend.utils.customer_drive_config import DriveCustomerConfig
+from app.backend.utils.google_drive_folder_cache import DriveFolderCache, set_drive_folder_cache
+from scripts.fake_drive_service import FakeDriveService
+
+CONFIG = DriveCustomerConfig(customer_id=1, root_folder_id="root", source="test")
+
+
+def _payload(rut: str, file_name: str, course: str = "1° Medio A") -> dict:
+    return {
+        "school_name": "Liceo Mixto",
+        "year": 2026,
+        "course_name": course,
+        "student_rut": rut,
+        "document_type_name": "Informe a la Familia",
+        "file_extension": "docx",
+        "file_name": file_name,
+    }
+
+
+def main() -> int:
+    tmp = tempfile.TemporaryDirectory()
+    students_dir = Path(tmp.name) / "system" / "students"
+    students_dir.mkdir(parents=True)
+    object.__setattr__(settings, "files_dir", tmp.name)
+    object.__setattr__(settings, "drive_upload_max_attempts", 3)
+
+    engine = create_engine(f"sqlite:///{tmp.name}/jobs.db", connect_args={"timeout": 30})
+    Base.metadata.create_all(
+        engine, tables=[DriveUploadJobModel.__table__, CustomerDriveFolderModel.__table__]
+    )
+    factory = sessionmaker(bind=engine)
+    jobs_mod.SessionLocal = factory
+    set_drive_folder_cache(DriveFolderCache(session_factory=factory))
+    fake = FakeDriveService(root_id="root")
+    gdrive._service_for_config = lambda config: fake
+    customer_drive_config.customer_drive_configured = lambda db, cid: True
+    customer_drive_config.load_customer_drive_config = lambda db, cid: CONFIG
+    db = factory()
+    jobs = DriveUploadJobsClass(db)
+    failed = 0
+
+    def enqueue(student_id: int, rut: str, course: str = "1° Medio A") -> dict:
+        name = f"doc_{student_id}.docx"
+        (students_dir / name).write_bytes(b"docx-" + rut.encode())
+        return jobs.enqueue(
+            customer_id=1, student_id=student_id, document_id=4, payload=_payload(rut, name, course)
+        )["data"]
+
+    def status(job_id: int) -> dict:
+        db.expire_all()
+        return jobs.get(job_id=job_id, customer_id=1)["data"]
+
+    # Encolar no toca Drive; una vuelta del worker sube todo agrupado por curso.
+    queued = [enqueue(1, "11111111-1"), enqueue(2, "22222222-2"), enqueue(3, "33333333-3", "2° Medio B")]
+    if fake.api_calls() or any(j["status"] != "pending" for j in queued):
+        print("FAIL encolar subió en línea:", dict(fake.calls))
+        failed += 1
+    if process_due_drive_uploads() != 3:
+        print("FAIL worker no tomó los 3 jobs")
+        failed += 1
+    done = [status(j["jobId"]) for j in queued]
+    if any(j["status"] != "done" for j in done) or not done[0].get("drive_path", "").endswith(
+        "111111111/111111111_Informe a la Familia.docx"
+    ):
+        print("FAIL subida:", done)
+        failed += 1
+
+    # Idempotencia: re-generar el mismo documento reutiliza el job y vuelve a pending.
+    again = enqueue(1, "11111111-1")
+    if again["jobId"] != queued[0]["jobId"] or again["status"] != "pending":
+        print("FAIL idempotencia:", again)
+        failed += 1
+
+    # Re-encolado mientras sube: el worker no cierra la revisión vieja.
+    claim_db = factory()
+    claimed = jobs_mod._claim_jobs(claim_db, limit=10, job_ids=None, now=datetime.utcnow())
+    enqueue(1, "11111111-1")
+    jobs_mod._finish_jobs(
+        claim_db,
+        [jobs_mod._Outcome(job=c, ok=True, result={"ok": True}) for c in claimed],
+        now=datetime.utcnow(),
+    )
+    claim_db.close()
+    if len(claimed) != 1 or status(again["jobId"])["status"] != "pending":
+        print("FAIL revisión:", len(claimed), status(again["jobId"]))
+        failed += 1
+    process_due_drive_uploads()
+    if status(again["jobId"])["status"] != "done":
+        print("FAIL revisión nueva no subió")
+        failed += 1
+
+    # Error transitorio de Drive: reintento con backoff y luego failed al agotar intentos.
+    real_create = fake._create
+
+    def _boom(body, media_body):
+        raise HttpError(httplib2.Response({"status": 503}), b"backend error")
+
+    fake._create = _boom
+    flaky = enqueue(9, "99999999-9")
+    process_due_drive_uploads()
+    first = status(flaky["jobId"])
+    if first["status"] != "pending" or first["attempts"] != 1 or not first["lastError"]:
+        print("FAIL reintento:", first)
+        failed += 1
+    if process_due_drive_uploads() != 0:
+        print("FAIL reintento antes del backoff")
+        failed += 1
+    for _ in range(2):
+        db.query(DriveUploadJobModel).filter(DriveUploadJobModel.id == flaky["jobId"]).update(
+            {"next_attempt_at": datetime.utcnow() - timedelta(seconds=1)}
+        )
+        db.commit()
+        process_due_drive_uploads()
+    if status(flaky["jobId"])["status"] != "failed":
+        print("FAIL max intentos:", status(flaky["jobId"]))
+        failed += 1
+    fake._create = real_create
+
+    # Archivo local borrado: falla sin reintentar.
+    gone = enqueue(10, "10101010-1")
+    (students_dir / "doc_10.docx").unlink()
+    process_due_drive_uploads()
+    if status(gone["jobId"])["status"] != "failed":
+        print("FAIL archivo ausente:", status(gone["jobId"]))
+        failed += 1
+
+    # Dos workers en paralelo no suben el mismo job dos veces.
+    fake.latency_seconds = 0.003
+    many = [enqueue(100 + i, f"4{i:07d}-{i % 10}", "3° Medio C") for i in range(12)]
+    fake.calls.clear()
+    threads = [threading.Thread(target=process_due_drive_uploads, kwargs={"limit": 6}) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    process_due_drive_uploads()
+    fake.latency_seconds = 0.0
+    files_created = fake.calls["create"] - 13  # 12 carpetas RUT + 1 carpeta de curso
+    if any(status(j["jobId"])["status"] != "done" for j in many) or files_created != 12:
+        print("FAIL reparto:", [status(j["jobId"])["status"] for j in many], dict(fake.calls))
+        failed += 1
+
+    # Worker async: encolar lo despierta sin esperar el sondeo.
+    async def _worker_roundtrip() -> float:
+        await drive_upload_worker.start(workers=1)
+        try:
+            await asyncio.sleep(0.05)
+            job = await asyncio.to_thread(enqueue, 200, "50000000-5")
+            started = time.perf_counter()
+            while time.perf_counter() - started < 1.5:
+                if (await asyncio.to_thread(status, job["jobId"]))["status"] == "done":
+                    return time.perf_counter() - started
+                await asyncio.sleep(0.02)
+            return -1.0
+        finally:
+            await drive_upload_worker.stop()
+
+    object.__setattr__(settings, "drive_upload_poll_seconds", 30.0)
+    elapsed = asyncio.run(_worker_roundtrip())
+    if elapsed < 0:
+        print("FAIL worker no despertó al encolar")
+        failed += 1
+
+    db.close()
+    engine.dispose()
+    tmp.cleanup()
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
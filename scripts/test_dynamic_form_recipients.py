@@ -0,0 +1,137 @@
+"""Destinatarios de formularios dinámicos: consultas fijas sin importar el tamaño del curso."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes import dynamic_form_class as form_mod
+from app.backend.classes.dynamic_form_class import DynamicFormClass
+from app.backend.db.database import Base
+from app.backend.db.models import (
+    DynamicFormModel,
+    DynamicFormSubmissionModel,
+    SpecialEducationalNeedModel,
+    StudentAcademicInfoModel,
+    StudentGuardianModel,
+    StudentModel,
+    StudentNameTrigramModel,
+    StudentPersonalInfoModel,
+)
+
+TABLES = (
+    SpecialEducationalNeedModel,
+    StudentModel,
+    StudentAcademicInfoModel,
+    StudentPersonalInfoModel,
+    StudentNameTrigramModel,
+    StudentGuardianModel,
+    DynamicFormModel,
+    DynamicFormSubmissionModel,
+)
+
+
+def _seed(db, course_id: int, size: int, first_id: int) -> None:
+    db.add(DynamicFormModel(id=course_id, school_id=1, course_id=course_id, name=f"Encuesta {course_id}", fields_json="[]"))
+    for sid in range(first_id, first_id + size):
+        db.add(StudentModel(id=sid, school_id=1, identification_number=f"{sid}-K", deleted_status_id=0))
+        db.add(StudentAcademicInfoModel(id=sid, student_id=sid, course_id=course_id))
+        db.add(StudentPersonalInfoModel(id=sid, student_id=sid, names=f"Alumno {sid}", father_lastname="Rojas"))
+        if sid % 3 == 0:
+            continue  # sin apoderado
+        # Apoderado antiguo y el vigente (mayor id); cada cuarto sin celular.
+        db.add(StudentGuardianModel(student_id=sid, names="Antiguo", celphone="+56900000000"))
+        db.add(StudentGuardianModel(student_id=sid, names=f"Apoderado {sid}", celphone="" if sid % 4 == 0 else f"+5699{sid:07d}"))
+    if size:
+        db.add(DynamicFormSubmissionModel(dynamic_form_id=course_id, student_id=first_id, school_id=1, answers_json="{}"))
+    db.commit()
+
+
+def main() -> int:
+    tmp = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{tmp.name}/test.db")
+    Base.metadata.create_all(engine, tables=[m.__table__ for m in TABLES])
+    db = sessionmaker(bind=engine)()
+    _seed(db, course_id=1, size=4, first_id=1)
+    _seed(db, course_id=2, size=40, first_id=100)
+    failed = 0
+
+    statements: list[str] = []
+
+    def count(*args) -> None:
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", count)
+    forms = DynamicFormClass(db)
+    queries = {}
+    for course_id in (1, 2):
+        statements.clear()
+        status = forms.list_students_status(course_id, school_id=1, customer_id=None)
+        queries[course_id] = len(statements)
+        if status.get("status") != "success":
+            print("FAIL list_students_status:", status)
+            failed += 1
+    event.remove(engine, "before_cursor_execute", count)
+    if queries[1] != queries[2]:
+        print("FAIL consultas crecen con el curso:", queries)
+        failed += 1
+
+    rows = {r["studentId"]: r for r in forms.get_course_recipients(2, 1, None)["data"]}
+    if len(rows) != 40 or rows[101]["guardianName"] != "Apoderado 101" or rows[101]["guardianPhone"] != "+56990000101":
+        print("FAIL último apoderado:", rows.get(101))
+        failed += 1
+    if rows[102]["guardianName"] != "—" or rows[104]["guardianName"] != "Apoderado 104" or rows[104]["guardianPhone"] != "—":
+        print("FAIL apoderado ausente o sin celular:", rows.get(102), rows.get(104))
+        failed += 1
+    status = {r["studentId"]: r["status"] for r in forms.list_students_status(2, 1, None)["data"]}
+    if status[100] != "respondido" or status[101] != "en_espera":
+        print("FAIL estado:", status[100], status[101])
+        failed += 1
+
+    # WhatsApp: nombre y celular salen de lo ya cargado; sin celular o sin apoderado -> None.
+    sent: dict = {}
+
+    def fake_notify(_db, student_ids, form_name, label, phone):
+        sent.update({sid: (label(sid), phone(sid)) for sid in student_ids})
+        return {"attempted": len(student_ids)}
+
+    form_mod.notify_guardians_for_form = fake_notify
+    result = forms.notify_whatsapp_bulk(2, [100, 101, 102, 103, 104, 3], school_id=1, customer_id=None)
+    if result.get("status") != "success" or sorted(sent) != [101, 102, 103, 104]:
+        print("FAIL notify_whatsapp_bulk:", result, sent)
+        failed += 1
+    elif (
+        sent[101] != ("Alumno 101 Rojas", "+56990000101")
+        or sent[103][1] != "+56990000103"
+        or sent[102][1] is not None
+        or sent[104][1] is not None
+    ):
+        print("FAIL destinatarios:", sent)
+        failed += 1
+    sent.clear()
+    resend = forms.resend_whatsapp_to_guardian(2, 105, school_id=1, customer_id=None)
+    if resend.get("status") != "success" or sent != {105: ("Alumno 105 Rojas", None)}:
+        print("FAIL reenvío:", resend, sent)
+        failed += 1
+    if forms.resend_whatsapp_to_guardian(2, 1, school_id=1, customer_id=None).get("status") != "error":
+        print("FAIL reenvío a estudiante de otro curso")
+        failed += 1
+
+    db.close()
+    engine.dispose()
+    tmp.cleanup()
+    print(f"list_students_status: {queries[1]} consultas con 4 estudiantes, {queries[2]} con 40")
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
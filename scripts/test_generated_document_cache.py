@@ -0,0 +1,125 @@
+"""Caché de PDFs generados: acierto sin renderizar, ETag/If-None-Match y poda por tamaño/edad."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.backend.classes.documents_class import DocumentsClass
+from app.backend.utils import generated_document_cache as gdc
+from app.backend.utils.generated_document_cache import (
+    GeneratedDocumentCache,
+    etag_matches,
+    response_etag,
+    track_generation_etags,
+)
+
+DATA = {
+    "student_fullname": "Ana Pérez",
+    "student_rut": "11111111-1",
+    "observations": "Texto de prueba " * 40,
+}
+
+
+def main() -> int:
+    tmp = tempfile.TemporaryDirectory()
+    out_dir = str(Path(tmp.name) / "system" / "students")
+    cache_dir = Path(tmp.name) / "system" / gdc.CACHE_DIR_NAME
+    renders = {"n": 0}
+    real_uncached = DocumentsClass._generate_document_pdf_uncached
+
+    def _counting(*args, **kwargs):
+        renders["n"] += 1
+        return real_uncached(*args, **kwargs)
+
+    DocumentsClass._generate_document_pdf_uncached = staticmethod(_counting)
+    failed = 0
+
+    def generate(data: dict) -> dict:
+        return DocumentsClass.generate_document_pdf(
+            document_id=1, document_data=data, output_directory=out_dir
+        )
+
+    started = time.perf_counter()
+    with track_generation_etags() as keys:
+        first = generate(dict(DATA))
+    miss_ms = (time.perf_counter() - started) * 1000
+    if first.get("status") != "success" or renders["n"] != 1 or keys != [first.get("etag")]:
+        print("FAIL primera generación:", first, keys)
+        failed += 1
+
+    # Mismos datos (otro orden de claves): acierto, sin renderizar ni crear archivos nuevos.
+    started = time.perf_counter()
+    with track_generation_etags() as keys:
+        second = generate(dict(reversed(list(DATA.items()))))
+    hit_ms = (time.perf_counter() - started) * 1000
+    files_before = sorted(os.listdir(out_dir))
+    third = generate(dict(DATA))
+    if (
+        not second.get("cache_hit")
+        or renders["n"] != 1
+        or second["etag"] != first["etag"]
+        or keys != [first["etag"]]
+        or sorted(os.listdir(out_dir)) != files_before
+        or third["file_path"] != first["file_path"]
+    ):
+        print("FAIL acierto:", second, renders, files_before, os.listdir(out_dir))
+        failed += 1
+
+    # La ruta mueve el PDF a su nombre estable: el siguiente acierto lo vuelve a dejar.
+    shutil.move(first["file_path"], str(Path(out_dir) / "1_1_0.pdf"))
+    again = generate(dict(DATA))
+    if not again.get("cache_hit") or not Path(again["file_path"]).is_file():
+        print("FAIL acierto tras mover:", again)
+        failed += 1
+
+    # Datos distintos: otra clave y otro render.
+    changed = generate({**DATA, "observations": "Otro texto"})
+    if changed.get("etag") == first["etag"] or renders["n"] != 2:
+        print("FAIL datos cambiados:", changed.get("etag"), renders)
+        failed += 1
+
+    # ETag / If-None-Match.
+    etag = response_etag([first["etag"]])
+    if not (
+        etag_matches(etag, etag)
+        and etag_matches(f'"otro", W/{etag}', etag)
+        and etag_matches("*", etag)
+        and not etag_matches('"otro"', etag)
+        and not etag_matches(None, etag)
+    ):
+        print("FAIL If-None-Match")
+        failed += 1
+
+    # Poda: tope de tamaño elimina las menos usadas; edad elimina las vencidas.
+    keep_bytes = (cache_dir / f"{first['etag']}.blob").stat().st_size
+    cache = GeneratedDocumentCache(cache_dir, max_bytes=keep_bytes, max_age_seconds=3600)
+    old_meta = cache_dir / f"{changed['etag']}.json"
+    os.utime(old_meta, (time.time() - 100, time.time() - 100))
+    stats = cache.evict()
+    remaining = {p.name for p in cache_dir.iterdir()}
+    if stats["removed"] != 1 or old_meta.name in remaining or f"{first['etag']}.json" not in remaining:
+        print("FAIL poda por tamaño:", stats, remaining)
+        failed += 1
+    aged = GeneratedDocumentCache(cache_dir, max_bytes=10**9, max_age_seconds=60)
+    if aged.evict(now=time.time() + 3600)["removed"] != 1 or any(cache_dir.iterdir()):
+        print("FAIL poda por edad:", list(cache_dir.iterdir()))
+        failed += 1
+
+    DocumentsClass._generate_document_pdf_uncached = staticmethod(real_uncached)
+    tmp.cleanup()
+    print(f"render {miss_ms:.1f} ms, acierto {hit_ms:.1f} ms")
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
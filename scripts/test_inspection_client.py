@@ -0,0 +1,206 @@
+"""Cliente Inspection contra un servidor grabado: keep-alive, caché de catálogos, token único y sync de colegio."""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes.inspection_api_client import (
+    InspectionApiClient,
+    clear_inspection_catalog_cache,
+    reset_inspection_session,
+)
+from app.backend.classes.inspection_school_sync_class import InspectionSchoolSyncClass
+from app.backend.core.config import settings
+from app.backend.db.database import Base
+from app.backend.db.models import (
+    CourseModel,
+    StudentAcademicInfoModel,
+    StudentModel,
+    StudentNameTrigramModel,
+    StudentPersonalInfoModel,
+)
+from scripts.inspection_fake_server import FakeInspectionServer
+
+LATENCY_MS = 80
+
+RECORDING = [
+    {"method": "POST", "path": "/api/getDatosAlumno", "form": {"rut": "11111111-1"},
+     "body": {"ok": True, "data": {"rut": "11111111-1", "nombres": "Ana"}}},
+    {"method": "GET", "path": "/api/listado/comunas",
+     "body": {"ok": True, "data": [{"id": 1, "nombre": "Santiago", "provincia_id": 131}]}},
+    {"method": "GET", "path": "/api/listado/colegios",
+     "body": {"ok": True, "data": [
+         {"id": 1, "nombre": "Liceo", "tiposEnsenanzas": [{"id": 110, "codigo": "110", "nombre": "Básica"}]},
+         {"id": 2, "nombre": "Escuela", "tiposEnsenanzas": [{"id": 310, "codigo": "310", "nombre": "Media"}]},
+     ]}},
+    {"method": "POST", "path": "/api/listado/cursos", "form": {"colegio": "1", "anio": "2026"},
+     "body": {"ok": True, "data": [
+         {"id": 10, "nombre": "1° A", "tipo_ensenanza_id": 110, "colegio_id": 1, "anio": 2026},
+         {"id": 11, "nombre": "1° B", "tipo_ensenanza_id": 110, "colegio_id": 1, "anio": 2026},
+         {"id": 12, "nombre": "2° A", "tipo_ensenanza_id": 110, "colegio_id": 1, "anio": 2026},
+         {"id": 90, "nombre": "Ajeno", "tipo_ensenanza_id": 110, "colegio_id": 2, "anio": 2026},
+     ]}},
+    {"method": "POST", "path": "/api/listado/alumnos", "form": {"colegio": "1", "anio": "2026"},
+     "body": {"ok": True, "data": [
+         {"rut": "11.111.111-1", "nombres": "Ana", "paterno": "Pérez", "curso_id": 10, "colegio_id": 1},
+         {"rut": "22222222-2", "nombres": "Beto", "paterno": "Soto", "curso_id": 12, "colegio_id": 1},
+         {"rut": "33333333-3", "nombres": "Carla", "paterno": "Díaz", "curso_id": 11, "colegio_id": 1},
+         {"rut": "55555555-5", "nombres": "Otro", "curso_id": 90, "colegio_id": 2},
+     ]}},
+]
+
+
+def _seed(db) -> None:
+    db.add(CourseModel(id=10, school_id=1, teaching_id=110, course_name="1° A", period_year=2026, deleted_status_id=0))
+    db.add(CourseModel(id=11, school_id=1, teaching_id=110, course_name="1° B antiguo", period_year=2026, deleted_status_id=0))
+    db.add(CourseModel(id=13, school_id=1, teaching_id=110, course_name="3° A", period_year=2026, deleted_status_id=0))
+    db.add(CourseModel(id=14, school_id=1, teaching_id=110, course_name="Cerrado", period_year=2025, deleted_status_id=0))
+    for sid, rut, course in ((1, "11111111-1", 10), (2, "22.222.222-2", 10), (4, "44444444-4", 13)):
+        db.add(StudentModel(id=sid, school_id=1, identification_number=rut, period_year="2026", deleted_status_id=0))
+        db.add(StudentAcademicInfoModel(student_id=sid, course_id=course))
+    db.commit()
+
+
+def main() -> int:
+    server = FakeInspectionServer(RECORDING, latency_ms=LATENCY_MS).start()
+    os.environ["INSPECTION_API_BASE_URL"] = server.base_url
+    os.environ["INSPECTION_API_USERNAME"] = server.username
+    os.environ["INSPECTION_API_PASSWORD"] = server.password
+    object.__setattr__(settings, "inspection_api_catalog_ttl_seconds", 600.0)
+    reset_inspection_session()
+    clear_inspection_catalog_cache()
+    InspectionApiClient._token = None
+    InspectionApiClient._expires_at = None
+    client = InspectionApiClient()
+    failed = 0
+
+    # Keep-alive: muchas consultas por RUT reutilizan una conexión y un solo login.
+    for _ in range(10):
+        res = client.fetch_student_data("11111111-1")
+        if res.get("data", {}).get("nombres") != "Ana":
+            print("FAIL respuesta grabada:", res)
+            failed += 1
+            break
+    if server.logins != 1 or server.connections != 1:
+        print("FAIL conexiones reutilizadas:", server.logins, server.connections)
+        failed += 1
+
+    # Caché de catálogos: una sola descarga; copiar evita que el llamador la modifique.
+    first = client.fetch_communes_list()
+    first["data"].clear()
+    second = InspectionApiClient().fetch_communes_list()
+    if server.hits["GET /api/listado/comunas"] != 1 or len(second["data"]) != 1:
+        print("FAIL caché de catálogo:", server.hits, second)
+        failed += 1
+    for sid in (1, 2):
+        teachings = client.fetch_teachings_for_active_school(sid)
+        if not teachings.get("ok") or len(teachings["data"]) != 1:
+            print("FAIL enseñanzas del colegio:", sid, teachings)
+            failed += 1
+    if server.hits["GET /api/listado/colegios"] != 1:
+        print("FAIL enseñanzas no usaron la caché:", server.hits)
+        failed += 1
+    object.__setattr__(settings, "inspection_api_catalog_ttl_seconds", 0.0)
+    client.fetch_communes_list()
+    if server.hits["GET /api/listado/comunas"] != 2:
+        print("FAIL TTL 0 no desactivó la caché")
+        failed += 1
+    object.__setattr__(settings, "inspection_api_catalog_ttl_seconds", 600.0)
+
+    # Token vencido con 8 hilos a la vez: un solo login nuevo.
+    server.revoke_tokens()
+    before = server.logins
+    results: list[dict] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(InspectionApiClient().fetch_student_data("11111111-1")))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if server.logins != before + 1 or not all(r.get("ok") for r in results):
+        print("FAIL renovación concurrente:", server.logins - before, [r.get("message") for r in results])
+        failed += 1
+
+    # Cursos y alumnos en paralelo.
+    server.reset_counters()
+    started = time.perf_counter()
+    lists = client.fetch_school_lists(1, 2026)
+    parallel_ms = (time.perf_counter() - started) * 1000
+    if not (lists["courses"].get("ok") and lists["students"].get("ok")) or server.max_active != 2:
+        print("FAIL listas en paralelo:", server.max_active, lists)
+        failed += 1
+
+    # Diff contra tablas locales.
+    tmp = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{tmp.name}/sync.db")
+    Base.metadata.create_all(
+        engine,
+        tables=[
+            m.__table__
+            for m in (CourseModel, StudentModel, StudentAcademicInfoModel, StudentNameTrigramModel, StudentPersonalInfoModel)
+        ],
+    )
+    db = sessionmaker(bind=engine)()
+    _seed(db)
+    diff = InspectionSchoolSyncClass(db, client).diff(1, 2026)
+    courses, students = diff.get("courses") or {}, diff.get("students") or {}
+    expected_courses = (
+        [c["id"] for c in courses.get("new", [])] == [12]
+        and [c["id"] for c in courses.get("renamed", [])] == [11]
+        and [c["id"] for c in courses.get("missing_remote", [])] == [13]
+        and courses.get("unchanged") == 1
+        and courses.get("excluded_other_school") == 1
+    )
+    if not expected_courses:
+        print("FAIL diff de cursos:", courses)
+        failed += 1
+    expected_students = (
+        [s["rut"] for s in students.get("new", [])] == ["33333333-3"]
+        and [(s["student_id"], s["local_course_id"], s["remote_course_id"]) for s in students.get("course_changed", [])]
+        == [(2, 10, 12)]
+        and [s["student_id"] for s in students.get("missing_remote", [])] == [4]
+        and students.get("unchanged") == 1
+        and students.get("excluded_other_school") == 1
+    )
+    if not expected_students:
+        print("FAIL diff de alumnos:", students)
+        failed += 1
+    if db.query(CourseModel).count() != 4 or db.query(StudentModel).count() != 3:
+        print("FAIL el diff escribió en la base")
+        failed += 1
+
+    failing = InspectionSchoolSyncClass(db, client).diff(1, 2030)
+    if failing.get("status") != "error" or failing.get("source") != "courses":
+        print("FAIL error remoto:", failing)
+        failed += 1
+
+    db.close()
+    engine.dispose()
+    tmp.cleanup()
+    reset_inspection_session()
+    clear_inspection_catalog_cache()
+    server.stop()
+    print(
+        f"cursos+alumnos con {LATENCY_MS} ms de latencia: {parallel_ms:.0f} ms en paralelo "
+        f"(secuencial ~{2 * LATENCY_MS} ms); 10 consultas por RUT en 1 conexión"
+    )
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,149 @@
+"""Mapa de posiciones de etiquetas PDF: búsqueda una vez por plantilla y relleno correcto."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import fitz
+
+from app.backend.classes.documents_class import DocumentsClass
+from app.backend.utils import pdf_tag_placements
+from app.backend.utils.pdf_tag_placements import _search_page, tag_placement_map
+from app.backend.utils.template_registry import get_template_registry
+
+PAGES = 6
+TAGS = [f"[CAMPO_{i}]" for i in range(12)]
+
+
+def _make_template(path: Path) -> None:
+    doc = fitz.open()
+    for p in range(PAGES):
+        page = doc.new_page()
+        page.insert_text((72, 60), f"Página {p + 1} - Nombre: [STUDENT_FULLNAME]", fontsize=11)
+        for i, tag in enumerate(TAGS):
+            page.insert_text((72, 100 + i * 40), f"Etiqueta {i}: {tag}", fontsize=11)
+    doc.save(str(path))
+    doc.close()
+
+
+def _nested_tags_check(folder: Path) -> int:
+    """``{nombre}`` está dentro de ``{{nombre}}``: el agente manda las cuatro formas y se escribe una vez."""
+    failed = 0
+    template = folder / "anidadas.pdf"
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 80), "{{nombre}}", fontsize=11)
+    page.insert_text((72, 120), "Curso: [curso]", fontsize=11)
+    doc.save(str(template))
+    doc.close()
+
+    tag_map = {}
+    for key, val in (("nombre", "Ana"), ("curso", "1A")):
+        for form in (f"{{{key}}}", f"[{key}]", f"<<{key}>>", f"{{{{{key}}}}}"):
+            tag_map[form] = val
+    res = DocumentsClass._generate_pdf_from_template(str(template), tag_map, 1, {}, output_directory=str(folder))
+    if res.get("status") != "success":
+        print("FAIL render anidadas:", res)
+        return 1
+    with fitz.open(res["file_path"]) as out:
+        text = out[0].get_text()
+    if text.count("Ana") != 1 or "{" in text or text.count("1A") != 1:
+        print("FAIL etiquetas anidadas escritas más de una vez:", repr(text))
+        failed += 1
+
+    # Las etiquetas desconocidas guardadas tienen tope; pasado el tope se buscan sin guardarse.
+    placement_map = tag_placement_map(template)
+    limit = pdf_tag_placements.MAX_EXTRA_TAGS
+    placement_map.placements([f"{{x{i}}}" for i in range(limit + 20)])
+    if len(placement_map._placements) > limit + len(placement_map._template_tags):
+        print("FAIL caché de etiquetas sin tope:", len(placement_map._placements))
+        failed += 1
+    return failed
+
+
+def _search_every_time(path: Path, tags: list[str]) -> None:
+    """Costo anterior: buscar todas las etiquetas en todas las páginas en cada render."""
+    doc = fitz.open(str(path))
+    for page in doc:
+        page_dict = page.get_text("dict")
+        for tag in tags:
+            _search_page(page, page_dict, tag)
+    doc.close()
+
+
+def main() -> int:
+    tmp = tempfile.TemporaryDirectory()
+    template = Path(tmp.name) / "plantilla.pdf"
+    _make_template(template)
+    get_template_registry().clear()
+    failed = 0
+
+    data = {"student_fullname": "Ana Pérez", **{f"campo_{i}": f"valor {i}" for i in range(12)}}
+    tags = DocumentsClass._generate_tag_replacements(data)
+
+    started = time.perf_counter()
+    first = DocumentsClass._generate_pdf_from_template(
+        str(template), tags, 1, data, output_directory=tmp.name
+    )
+    first_ms = (time.perf_counter() - started) * 1000
+    placement_map = tag_placement_map(template)
+    searches = placement_map.searches
+
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        result = DocumentsClass._generate_pdf_from_template(
+            str(template), tags, 1, data, output_directory=tmp.name
+        )
+        timings.append((time.perf_counter() - started) * 1000)
+    if placement_map.searches != searches or tag_placement_map(template) is not placement_map:
+        print("FAIL se volvió a buscar:", searches, placement_map.searches)
+        failed += 1
+
+    for res in (first, result):
+        if res.get("status") != "success":
+            print("FAIL render:", res)
+            failed += 1
+            continue
+        with fitz.open(res["file_path"]) as out:
+            text = "\n".join(page.get_text() for page in out)
+        if "[CAMPO_" in text or "[STUDENT_FULLNAME]" in text or text.count("valor 11") != PAGES:
+            print("FAIL relleno:", text[:300])
+            failed += 1
+        if text.count("Ana Pérez") != PAGES:
+            print("FAIL nombre:", text.count("Ana Pérez"))
+            failed += 1
+
+    # Etiqueta ausente: se busca una vez y queda registrada sin posiciones.
+    missing = placement_map.placements(["{{no_existe}}"])
+    before = placement_map.searches
+    placement_map.placements(["{{no_existe}}"])
+    if missing["{{no_existe}}"] or placement_map.searches != before:
+        print("FAIL etiqueta ausente:", missing)
+        failed += 1
+
+    failed += _nested_tags_check(Path(tmp.name))
+
+    started = time.perf_counter()
+    _search_every_time(template, list(tags))
+    search_ms = (time.perf_counter() - started) * 1000
+
+    get_template_registry().clear()
+    tmp.cleanup()
+    print(
+        f"{PAGES} páginas x {len(tags)} etiquetas: primer render {first_ms:.1f} ms, "
+        f"siguientes {min(timings):.1f} ms (solo buscar costaba {search_ms:.1f} ms)"
+    )
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,173 @@
+"""Usuario autenticado cacheado: una lectura de ``users`` por sub, claims del token por petición e invalidación."""
+
+from __future__ import annotations
+
+import dataclasses
+import os
+import sys
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.auth import auth_user
+from app.backend.auth.auth_user import get_current_active_user
+from app.backend.classes.authentication_class import AuthenticationClass
+from app.backend.classes.user_class import UserClass
+from app.backend.db.database import Base
+from app.backend.db.models import UserModel
+from app.backend.utils.principal_cache import Principal, PrincipalCache, set_principal_cache
+
+N_REQUESTS = 50
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def main() -> int:
+    failed = 0
+    tmp = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{tmp.name}/principal.db")
+    Base.metadata.create_all(engine, tables=[UserModel.__table__])
+    Session = sessionmaker(bind=engine)
+    seed = Session()
+    seed.add(UserModel(id=7, customer_id=3, deleted_status_id=0, rut="11.111.111-1", full_name="Ana", email="Ana@Colegio.cl"))
+    seed.add(UserModel(id=8, customer_id=3, deleted_status_id=0, rut="22.222.222-2", full_name="Beto", email="beto@colegio.cl"))
+    seed.commit()
+    seed.close()
+
+    queries = {"n": 0}
+
+    def _on_exec(_conn, _cursor, statement, *_args):
+        if "FROM users" in statement:
+            queries["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", _on_exec)
+    original_session_local = auth_user.SessionLocal
+    auth_user.SessionLocal = Session
+    clock = FakeClock()
+    set_principal_cache(PrincipalCache(60, clock=clock))
+
+    app = FastAPI()
+
+    @app.get("/me")
+    def me(session_user: Principal = Depends(get_current_active_user)):
+        return dataclasses.asdict(session_user) | {"added_date": None, "updated_date": None}
+
+    http = TestClient(app)
+
+    def token(sub: str, **claims) -> dict:
+        db = Session()
+        try:
+            tok = AuthenticationClass(db).create_token({"sub": sub, **claims}, timedelta(minutes=5))
+        finally:
+            db.close()
+        return {"Authorization": f"Bearer {tok}"}
+
+    school_a = token("ana@colegio.cl", rol_id=4, school_id=10, period_year=2026)
+    school_b = token("ANA@colegio.cl", rol_id=4, school_id=20, period_year="x")
+
+    # Muchas peticiones del mismo usuario: una sola lectura de `users`.
+    bodies = [http.get("/me", headers=school_a if i % 2 else school_b).json() for i in range(N_REQUESTS)]
+    if queries["n"] != 1:
+        print("FAIL lecturas de users:", queries["n"])
+        failed += 1
+    a, b = bodies[1], bodies[0]
+    if (a["id"], a["school_id"], a["period_year"], a["rol_id"]) != (7, 10, 2026, 4) or b["school_id"] != 20:
+        print("FAIL claims del token por petición:", a, b)
+        failed += 1
+    if "hashed_password" in a or b["period_year"] is None:
+        print("FAIL principal:", a, b)
+        failed += 1
+    no_claims = http.get("/me", headers=token("7")).json()
+    if no_claims["rol_id"] is not None or no_claims["customer_id"] != 3 or queries["n"] != 2:
+        print("FAIL token sin claims (sub numérico):", no_claims, queries["n"])
+        failed += 1
+
+    try:
+        Principal(id=1).school_id = 5  # type: ignore[misc]
+        print("FAIL Principal no es inmutable")
+        failed += 1
+    except dataclasses.FrozenInstanceError:
+        pass
+
+    # Cambio de datos del usuario: se invalida y se vuelve a leer (la propia update lee users una vez).
+    db = Session()
+    UserClass(db).update(7, {"full_name": "Ana María"})
+    db.close()
+    renamed = http.get("/me", headers=school_a).json()
+    if renamed["full_name"] != "Ana María" or queries["n"] != 4:
+        print("FAIL update no invalidó:", renamed, queries["n"])
+        failed += 1
+
+    # Otro usuario no se ve afectado; el TTL vence.
+    http.get("/me", headers=token("beto@colegio.cl"))
+    db = Session()
+    UserClass(db).delete(7)
+    db.close()
+    before = queries["n"]
+    http.get("/me", headers=token("beto@colegio.cl"))
+    if queries["n"] != before:
+        print("FAIL invalidar a Ana borró a Beto")
+        failed += 1
+    clock.now += 61
+    http.get("/me", headers=token("beto@colegio.cl"))
+    if queries["n"] != before + 1:
+        print("FAIL TTL vencido siguió sirviendo la entrada")
+        failed += 1
+
+    # Usuario eliminado: 401 de inmediato (y no se cachea el "no encontrado").
+    gone = [http.get("/me", headers=school_a).status_code for _ in range(2)]
+    if gone != [401, 401]:
+        print("FAIL usuario eliminado:", gone)
+        failed += 1
+
+    # Invalidación durante la lectura: no se guarda el dato leído.
+    cache = PrincipalCache(60)
+    cache.get_or_load("x@y.cl", lambda: (cache.invalidate_users(1), Principal(id=1, full_name="viejo"))[1])
+    fresh = cache.get_or_load("x@y.cl", lambda: Principal(id=1, full_name="nuevo"))
+    if fresh is None or fresh.full_name != "nuevo":
+        print("FAIL se guardó un principal leído durante una invalidación:", fresh)
+        failed += 1
+
+    off = PrincipalCache(0)
+    loads = {"n": 0}
+
+    def _load():
+        loads["n"] += 1
+        return Principal(id=2)
+
+    off.get_or_load("2", _load)
+    off.get_or_load("2", _load)
+    if loads["n"] != 2:
+        print("FAIL TTL 0 no desactivó la caché")
+        failed += 1
+
+    print(f"{N_REQUESTS} peticiones autenticadas del mismo usuario: 1 lectura de users (antes {N_REQUESTS})")
+    auth_user.SessionLocal = original_session_local
+    set_principal_cache(None)
+    event.remove(engine, "before_cursor_execute", _on_exec)
+    engine.dispose()
+    tmp.cleanup()
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,183 @@
+"""Home del profesional: totales en consultas agregadas, caché por (profesional, período) e invalidación."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes.app_alert_class import AppAlertClass
+from app.backend.classes.professional_document_assignment_class import ProfessionalDocumentAssignmentClass
+from app.backend.classes.student_class import StudentClass
+from app.backend.db.database import Base
+from app.backend.db.models import (
+    CourseModel,
+    ProfessionalDocumentAssignmentModel,
+    ProfessionalTeachingCourseModel,
+    StudentAcademicInfoModel,
+    StudentModel,
+    StudentNameTrigramModel,
+    StudentPersonalInfoModel,
+)
+from app.backend.utils.home_stats_cache import HomeStatsCache, set_home_stats_cache
+
+PID = 7
+COURSES = [1, 2, 3, 4, 5, 6]
+
+
+def _seed(db) -> None:
+    for cid in COURSES + [9]:
+        db.add(CourseModel(id=cid, teaching_id=1, deleted_status_id=0))
+    for cid in COURSES:
+        db.add(ProfessionalTeachingCourseModel(professional_id=PID, course_id=cid, teaching_id=1, deleted_status_id=0))
+    db.add(ProfessionalTeachingCourseModel(professional_id=PID, course_id=9, teaching_id=1, deleted_status_id=1))
+    sid = 0
+    for cid in COURSES + [9]:
+        for i in range(cid * 3):
+            sid += 1
+            deleted = 1 if i == 0 else 0
+            period = "2025" if i == 1 else "2026"
+            db.add(StudentModel(id=sid, school_id=1, identification_number=f"{sid}-K", period_year=period, deleted_status_id=deleted))
+            db.add(StudentAcademicInfoModel(student_id=sid, course_id=cid))
+            if i < 4:
+                db.add(
+                    ProfessionalDocumentAssignmentModel(
+                        id=sid, period_year=int(period), course_id=cid, professional_id=PID, student_id=sid,
+                        document_type_id=3, document_catalog_id=0, status_id=1 if i == 3 else 0,
+                    )
+                )
+    db.commit()
+
+
+def _loop_stats(db, py):
+    """Cálculo anterior (una cuenta por curso), como referencia."""
+    q = db.query(ProfessionalDocumentAssignmentModel).filter(ProfessionalDocumentAssignmentModel.professional_id == PID)
+    if py is not None:
+        q = q.filter(ProfessionalDocumentAssignmentModel.period_year == py)
+    students = 0
+    for cid in COURSES:
+        sq = db.query(StudentModel).join(
+            StudentAcademicInfoModel, StudentAcademicInfoModel.student_id == StudentModel.id
+        ).filter(StudentAcademicInfoModel.course_id == cid, StudentModel.deleted_status_id == 0)
+        if py is not None:
+            sq = sq.filter(StudentModel.period_year == str(py))
+        students += sq.count()
+    return {
+        "assigned_documents": q.count(),
+        "loaded_documents": q.filter(ProfessionalDocumentAssignmentModel.status_id == 1).count(),
+        "courses_assigned": len(COURSES),
+        "students_in_courses": students,
+    }
+
+
+def main() -> int:
+    tmp = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{tmp.name}/home.db")
+    Base.metadata.create_all(
+        engine,
+        tables=[
+            m.__table__
+            for m in (
+                CourseModel,
+                ProfessionalDocumentAssignmentModel,
+                ProfessionalTeachingCourseModel,
+                StudentModel,
+                StudentAcademicInfoModel,
+                StudentNameTrigramModel,
+                StudentPersonalInfoModel,
+            )
+        ],
+    )
+    db = sessionmaker(bind=engine)()
+    _seed(db)
+    clock = [0.0]
+    set_home_stats_cache(HomeStatsCache(30, clock=lambda: clock[0]))
+    svc = ProfessionalDocumentAssignmentClass(db)
+    failed = 0
+
+    statements: list[str] = []
+
+    def count(*args) -> None:
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", count)
+
+    def stats(py):
+        statements.clear()
+        result = svc.home_stats(professional_id=PID, period_year=py)
+        return result["data"], len(statements)
+
+    for py in (2026, None):
+        data, queries = stats(py)
+        expected = _loop_stats(db, py)
+        if data != expected or queries != 3:
+            print("FAIL agregado:", py, data, expected, queries)
+            failed += 1
+
+    data, queries = stats(2026)
+    if queries != 0:
+        print("FAIL caché no usada:", queries)
+        failed += 1
+    clock[0] = 31.0
+    if stats(2026)[1] != 3:
+        print("FAIL TTL no expiró")
+        failed += 1
+
+    # Cargar un documento en carpeta invalida al profesional (las alertas no son parte de esto).
+    AppAlertClass.sync_scope_summary_from_assignments = lambda self, **kwargs: None
+    pending = db.query(ProfessionalDocumentAssignmentModel).filter_by(status_id=0, period_year=2026).first()
+    before = stats(2026)[0]
+    svc.mark_completed_after_folder_upload(
+        period_year=2026, student_id=pending.student_id, document_catalog_id=55,
+        document_type_id=3, professional_id=PID, course_id=pending.course_id,
+    )
+    after, queries = stats(2026)
+    if queries != 3 or after["loaded_documents"] != before["loaded_documents"] + 1:
+        print("FAIL invalidación por carga:", before, after, queries)
+        failed += 1
+
+    # Cambios de matrícula invalidan por curso.
+    created = StudentClass(db).store(
+        {"school_id": 1, "identification_number": "99-9", "period_year": 2026, "course_id": 2, "names": "Nuevo"}
+    )
+    after_store, queries = stats(2026)
+    if queries != 3 or after_store["students_in_courses"] != after["students_in_courses"] + 1:
+        print("FAIL invalidación por alta:", created, after_store, queries)
+        failed += 1
+    StudentClass(db).update(created["student_id"], {"academic_info": {"course_id": 9}})
+    after_move, queries = stats(2026)
+    if queries != 3 or after_move["students_in_courses"] != after["students_in_courses"]:
+        print("FAIL invalidación por cambio de curso:", after_move, queries)
+        failed += 1
+    StudentClass(db).update(created["student_id"], {"academic_info": {"course_id": 3}})
+    stats(2026)
+    StudentClass(db).delete(created["student_id"])
+    after_delete, queries = stats(2026)
+    if queries != 3 or after_delete["students_in_courses"] != after["students_in_courses"]:
+        print("FAIL invalidación por baja:", after_delete, queries)
+        failed += 1
+    stats(2026)
+    StudentClass(db).store({"school_id": 1, "identification_number": "98-9", "period_year": 2026, "course_id": 9})
+    if stats(2026)[1] != 0:
+        print("FAIL se invalidó por un curso ajeno")
+        failed += 1
+
+    event.remove(engine, "before_cursor_execute", count)
+    set_home_stats_cache(None)
+    db.close()
+    engine.dispose()
+    tmp.cleanup()
+    print(f"home del profesional con {len(COURSES)} cursos: 3 consultas (antes {2 + len(COURSES) + 1}), 0 con caché")
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
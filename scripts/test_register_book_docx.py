@@ -0,0 +1,125 @@
+"""Libro de registro en memoria: mismo DOCX que la cadena por archivo (copiar, clonar, rellenar)."""
+
+from __future__ import annotations
+
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from docx.oxml.ns import qn
+
+from app.backend.classes import docx_register_book_layout as layout
+from app.backend.classes.documents_class import DocumentsClass
+from app.backend.classes.docx_register_book_layout import RegisterBookDocxBuilder
+
+TEMPLATE = ROOT / "files" / "original_student_files" / "register_book.docx"
+
+# (método del builder, función por ruta, argumentos): un curso con varias asignaturas,
+# apoyos, intervenciones y actas, como arma _generate_register_book_impl.
+STEPS = [
+    ("clone_section_b_blocks", layout.clone_register_book_section_b_blocks, (3, 11)),
+    ("clone_pai_support_tables", layout.clone_pai_support_tables, (2,)),
+    ("clone_course_record_support_tables", layout.clone_course_record_support_tables, (2,)),
+    ("expand_raeg_intervention_rows", layout.expand_raeg_intervention_rows, (1, 3)),
+    ("expand_raeg_intervention_rows", layout.expand_raeg_intervention_rows, (2, 2)),
+    ("expand_learning_achievement_rows", layout.expand_learning_achievement_rows, (1, 5)),
+    (
+        "apply_learning_achievement_period_top_spacing",
+        layout.apply_learning_achievement_period_top_spacing,
+        ([1, 3],),
+    ),
+    ("clone_course_activity_record_blocks", layout.clone_course_activity_record_blocks, (2,)),
+    ("clone_course_community_activity_blocks", layout.clone_course_community_activity_blocks, (2,)),
+    ("clone_course_acta_reunion_blocks", layout.clone_course_acta_reunion_blocks, (2,)),
+    ("expand_rafc_participant_rows", layout.expand_rafc_participant_rows, (1, 3)),
+    ("expand_tcee_participant_rows", layout.expand_tcee_participant_rows, (2, 2)),
+    ("expand_arn_participant_rows", layout.expand_arn_participant_rows, (1, 4)),
+]
+
+
+def _sdt_tags(doc) -> list[str]:
+    tags = []
+    for tag in doc.element.body.iter(qn("w:tag")):
+        val = tag.get(qn("w:val"))
+        if val:
+            tags.append(val)
+    return tags
+
+
+def _parts(path: Path) -> dict[str, bytes]:
+    with zipfile.ZipFile(path) as zf:
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+def main() -> int:
+    if not TEMPLATE.is_file():
+        print("SKIP sin plantilla:", TEMPLATE)
+        print("OK")
+        return 0
+    tmp = tempfile.TemporaryDirectory(prefix="pie360-test-rb-")
+    out = Path(tmp.name)
+    failed = 0
+
+    # Reemplazos para todas las etiquetas que quedan tras clonar (incluidas las renumeradas).
+    probe = RegisterBookDocxBuilder(TEMPLATE)
+    for method, _fn, args in STEPS:
+        getattr(probe, method)(*args)
+    replacements = {tag: f"V-{tag}" for tag in _sdt_tags(probe.doc)}
+    replacements.update({"emac": "X", "FC": "X", "school_coordinator_full_name": "Ana Soto"})
+
+    # Cadena anterior: copia de trabajo, cada paso abre y guarda el archivo, relleno aparte.
+    started = time.perf_counter()
+    work = out / "_rb_work.docx"
+    shutil.copy(TEMPLATE, work)
+    baseline_flags = [fn(work, *args) for _method, fn, args in STEPS]
+    baseline_out = out / "baseline.docx"
+    filled = DocumentsClass.fill_docx_form(str(work), replacements, str(baseline_out))
+    baseline_ms = (time.perf_counter() - started) * 1000
+
+    # Builder: una carga de la plantilla y una sola escritura.
+    started = time.perf_counter()
+    book = RegisterBookDocxBuilder(TEMPLATE)
+    builder_flags = [getattr(book, method)(*args) for method, _fn, args in STEPS]
+    DocumentsClass.fill_docx_document(book.doc, replacements)
+    builder_out = out / "builder.docx"
+    book.save(builder_out)
+    builder_ms = (time.perf_counter() - started) * 1000
+
+    if filled.get("status") == "error":
+        print("FAIL relleno por archivo:", filled)
+        failed += 1
+    if builder_flags != baseline_flags or not all(builder_flags):
+        print("FAIL resultados de los pasos:", builder_flags, baseline_flags)
+        failed += 1
+
+    expected, got = _parts(baseline_out), _parts(builder_out)
+    if sorted(expected) != sorted(got):
+        print("FAIL partes del DOCX:", sorted(set(expected) ^ set(got)))
+        failed += 1
+    differing = [name for name in expected if name in got and expected[name] != got[name]]
+    if differing:
+        print("FAIL partes distintas:", differing)
+        failed += 1
+    document_xml = got.get("word/document.xml", b"").decode("utf-8")
+    if "V-" not in document_xml or len(replacements) < 50:
+        print("FAIL el relleno no llegó al documento:", len(replacements))
+        failed += 1
+
+    tmp.cleanup()
+    print(
+        f"{len(STEPS)} pasos, {len(replacements)} etiquetas: por archivo {baseline_ms:.0f} ms, "
+        f"en memoria {builder_ms:.0f} ms"
+    )
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,163 @@
+"""Pool de procesos de render: PDFs fuera del proceso, límite por tipo, timeout de ejecución y reciclaje."""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.backend.classes.documents_class import DocumentsClass
+from app.backend.core.config import settings
+from app.backend.core.render_pool import RenderJob, RenderPool, parse_type_limits, render_pool
+from scripts.render_pool_targets import sleepy_job
+
+
+def _paci(i: int) -> dict:
+    return {
+        "paci_full": True,
+        "student_full_name": f"Estudiante {i}",
+        "student_rut": "11111111-1",
+        "school_background": "Antecedentes escolares. " * 80,
+        "evaluation_background": "Antecedentes de evaluación. " * 80,
+        "curricular_subjects": [
+            {
+                "subject_name": f"Asignatura {s}",
+                "adaptation_type": "Acceso",
+                "strategies": "Estrategias " * 30,
+                "learning_objectives": [
+                    {"level_code": f"OA{k}", "level_description": "Descripción " * 15, "is_priority": k % 2 == 0}
+                    for k in range(20)
+                ],
+            }
+            for s in range(12)
+        ],
+    }
+
+
+def _overlap(a: dict, b: dict) -> bool:
+    return a["started"] < b["ended"] and b["started"] < a["ended"]
+
+
+def main() -> int:
+    tmp = tempfile.TemporaryDirectory()
+    object.__setattr__(settings, "generated_cache_enabled", False)
+    failed = 0
+
+    if parse_type_limits("21:1, 22:3,x:2,bad") != {21: 1, 22: 3}:
+        print("FAIL parse_type_limits")
+        failed += 1
+
+    # PDF real (PACI completo) renderizado en un proceso hijo vía generate_document_pdf.
+    result = DocumentsClass.generate_document_pdf(21, _paci(0), output_directory=tmp.name)
+    if result.get("status") != "success" or result.get("render_pid") in (None, os.getpid()):
+        print("FAIL PACI en pool:", result)
+        failed += 1
+    elif not Path(result["file_path"]).is_file():
+        print("FAIL PDF no quedó en disco:", result["file_path"])
+        failed += 1
+
+    # Paralelismo real vs. render en línea (hilos que comparten el GIL).
+    jobs = [_paci(i) for i in range(4)]
+    with ThreadPoolExecutor(2) as ex:  # con los dos procesos ya levantados
+        list(ex.map(lambda d: DocumentsClass.generate_document_pdf(21, d, output_directory=tmp.name), jobs[:2]))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(4) as ex:
+        pooled = list(ex.map(lambda d: DocumentsClass.generate_document_pdf(21, d, output_directory=tmp.name), jobs))
+    pooled_ms = (time.perf_counter() - started) * 1000
+    object.__setattr__(settings, "render_pool_enabled", False)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(4) as ex:
+        inline = list(ex.map(lambda d: DocumentsClass.generate_document_pdf(21, d, output_directory=tmp.name), jobs))
+    inline_ms = (time.perf_counter() - started) * 1000
+    object.__setattr__(settings, "render_pool_enabled", True)
+    if any(r.get("status") != "success" for r in pooled + inline) or any("render_pid" in r for r in inline):
+        print("FAIL render paralelo:", pooled, inline)
+        failed += 1
+
+    # Límite por tipo: el 99 va de a uno; el 98 usa los dos procesos.
+    pool = RenderPool(workers=2, timeout_seconds=20, max_tasks_per_child=50, type_limits={99: 1}, target=sleepy_job)
+    with ThreadPoolExecutor(2) as ex:  # levanta los dos procesos
+        list(ex.map(pool.render, [RenderJob(98, {"sleep": 1}), RenderJob(98, {"sleep": 1})]))
+    with ThreadPoolExecutor(2) as ex:
+        limited = list(ex.map(pool.render, [RenderJob(99, {}), RenderJob(99, {})]))
+    with ThreadPoolExecutor(2) as ex:
+        free = list(ex.map(pool.render, [RenderJob(98, {}), RenderJob(98, {})]))
+    if _overlap(*limited) or not _overlap(*free):
+        print("FAIL límite por tipo:", limited, free)
+        failed += 1
+
+    # Timeout: el render colgado se corta y lo siguiente va a un pool nuevo (el timeout cuenta
+    # desde que el hijo empieza, no incluye levantar el proceso spawn).
+    slow = RenderPool(workers=1, timeout_seconds=4, max_tasks_per_child=50, target=sleepy_job)
+    t0 = time.perf_counter()
+    timed_out = slow.render(RenderJob(97, {"sleep": 30}))
+    elapsed = time.perf_counter() - t0
+    after = slow.render(RenderJob(97, {"sleep": 0}))
+    metrics = slow.metrics()
+    if timed_out.get("status") != "error" or elapsed > 12 or after.get("status") != "success" or metrics["timeouts"] != 1 or metrics["recycled"] != 1:
+        print("FAIL timeout:", timed_out, elapsed, after, metrics)
+        failed += 1
+
+    # La espera en cola no cuenta: dos renders de 1.5 s en un solo proceso con timeout 2 s.
+    queued = RenderPool(workers=1, timeout_seconds=2, max_tasks_per_child=50, target=sleepy_job)
+    queued.render(RenderJob(95, {"sleep": 0}))  # levanta el proceso
+    with ThreadPoolExecutor(2) as ex:
+        in_line = list(ex.map(queued.render, [RenderJob(95, {"sleep": 1.5}), RenderJob(95, {"sleep": 1.5})]))
+    if any(r.get("status") != "success" for r in in_line) or queued.metrics()["timeouts"]:
+        print("FAIL espera en cola contó como timeout:", in_line, queued.metrics())
+        failed += 1
+
+    # Un render colgado no hace fallar a otro que corre en el mismo pool.
+    shared = RenderPool(workers=2, timeout_seconds=3, max_tasks_per_child=50, target=sleepy_job)
+    with ThreadPoolExecutor(2) as ex:
+        list(ex.map(shared.render, [RenderJob(94, {"sleep": 0.5}), RenderJob(94, {"sleep": 0.5})]))
+
+    def _late_neighbour() -> dict:
+        time.sleep(1)
+        return shared.render(RenderJob(94, {"sleep": 3}))
+
+    with ThreadPoolExecutor(2) as ex:
+        hung_f = ex.submit(shared.render, RenderJob(94, {"sleep": 30}))
+        neighbour_f = ex.submit(_late_neighbour)
+        hung, neighbour = hung_f.result(), neighbour_f.result()
+    fresh = shared.render(RenderJob(94, {"sleep": 0}))
+    metrics = shared.metrics()
+    if hung.get("status") != "error" or neighbour.get("status") != "success" or fresh.get("status") != "success":
+        print("FAIL render vecino de uno colgado:", hung, neighbour, fresh)
+        failed += 1
+    elif metrics["timeouts"] != 1 or metrics["recycled"] != 1 or neighbour["pid"] == fresh["pid"]:
+        print("FAIL retiro del pool colgado:", metrics, neighbour, fresh)
+        failed += 1
+
+    # Reciclaje: con max_tasks_per_child=1 cada documento usa un proceso nuevo.
+    recycling = RenderPool(workers=1, timeout_seconds=20, max_tasks_per_child=1, target=sleepy_job)
+    pids = {recycling.render(RenderJob(96, {"sleep": 0}))["pid"] for _ in range(3)}
+    if sys.version_info >= (3, 11) and len(pids) != 3:
+        print("FAIL reciclaje de procesos:", pids)
+        failed += 1
+
+    # Datos no serializables: None para que el llamador renderice en línea.
+    if pool.render(RenderJob(98, {"fn": lambda: None})) is not None or pool.metrics()["inline_fallbacks"] != 1:
+        print("FAIL fallback en línea")
+        failed += 1
+
+    for p in (pool, slow, queued, shared, recycling, render_pool):
+        p.shutdown()
+    tmp.cleanup()
+    print(
+        f"4 PACI ({os.cpu_count()} CPU): pool de procesos {pooled_ms:.0f} ms, "
+        f"hilos en línea {inline_ms:.0f} ms"
+    )
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+"""Clave de RUT indexada: normalización, sincronización por @validates y búsqueda igual al recorrido anterior."""
+
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.db.database import Base
+from app.backend.db.models import (
+    StudentModel,
+    StudentNameTrigramModel,
+    StudentPersonalInfoModel,
+    UserModel,
+)
+from app.backend.utils.agents_chat_context import lookup_student_id_by_rut, normalize_rut
+from app.backend.utils.rut_normalize import RUT_NORMALIZED_MAX_LENGTH, rut_lookup_key
+
+N_STUDENTS = 300
+
+
+def _formats(body: str, dv: str) -> list[str]:
+    """El mismo RUT escrito como llega de formularios, planillas e importaciones."""
+    dotted = f"{int(body):,}".replace(",", ".")
+    return [
+        f"{dotted}-{dv}",
+        f"{body}-{dv}",
+        f"{body}{dv}",
+        f"{dotted}-{dv.lower()}",
+        f" {body} {dv} ",
+        f"{body}-{dv.lower()}",
+    ]
+
+
+def _baseline_lookup(db, rut: str) -> int | None:
+    """``lookup_student_id_by_rut`` antes del índice: recorre las fichas y compara normalizado."""
+    target = normalize_rut(rut)
+    if len(target) < 8:
+        return None
+    rows = (
+        db.query(StudentPersonalInfoModel.student_id, StudentPersonalInfoModel.identification_number)
+        .filter(StudentPersonalInfoModel.identification_number.isnot(None))
+        .filter(StudentPersonalInfoModel.identification_number != "")
+        .order_by(StudentPersonalInfoModel.id.asc())
+        .all()
+    )
+    for student_id, identification in rows:
+        if normalize_rut(identification or "") == target:
+            return int(student_id)
+    student_rows = (
+        db.query(StudentModel.id, StudentModel.identification_number)
+        .filter(StudentModel.identification_number.isnot(None))
+        .filter(StudentModel.identification_number != "")
+        .order_by(StudentModel.id.asc())
+        .all()
+    )
+    for student_id, identification in student_rows:
+        if normalize_rut(identification or "") == target:
+            return int(student_id)
+    return None
+
+
+def _key_checks() -> int:
+    failed = 0
+    cases = {
+        "12.345.678-k": "12345678K",
+        "12345678-K": "12345678K",
+        " 12 345 678 k ": "12345678K",
+        "7.654.321-0": "76543210",
+        "AB-123.456": "AB123456",
+        "": None,
+        None: None,
+        " .- ": None,
+        12345678: "12345678",
+    }
+    for raw, expected in cases.items():
+        if rut_lookup_key(raw) != expected:
+            print("FAIL rut_lookup_key:", repr(raw), rut_lookup_key(raw), "esperado", expected)
+            failed += 1
+    if len(rut_lookup_key("9" * 80) or "") != RUT_NORMALIZED_MAX_LENGTH:
+        print("FAIL clave no recortada al largo de la columna")
+        failed += 1
+    rnd = random.Random(5)
+    for _ in range(200):
+        body, dv = str(rnd.randint(1_000_000, 29_999_999)), rnd.choice("0123456789K")
+        keys = {rut_lookup_key(f) for f in _formats(body, dv)}
+        if keys != {normalize_rut(f"{body}-{dv}")}:
+            print("FAIL formatos con claves distintas:", body, dv, keys)
+            failed += 1
+            break
+    return failed
+
+
+def main() -> int:
+    failed = _key_checks()
+
+    tmp = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{tmp.name}/rut.db")
+    Base.metadata.create_all(
+        engine,
+        tables=[
+            m.__table__
+            for m in (UserModel, StudentModel, StudentPersonalInfoModel, StudentNameTrigramModel)
+        ],
+    )
+    Session = sessionmaker(bind=engine)
+    db = Session()
+
+    # Alta: la clave se guarda junto con el valor tal como viene.
+    user = UserModel(id=1, rut="12.345.678-k", email="a@b.cl")
+    student = StudentModel(id=1, school_id=1, identification_number="9.876.543-2", deleted_status_id=0)
+    personal = StudentPersonalInfoModel(id=1, student_id=1, identification_number="9876543-2", names="Ana")
+    db.add_all([user, student, personal])
+    db.commit()
+    db.expire_all()
+    stored = (db.get(UserModel, 1).rut_normalized, db.get(StudentModel, 1).rut_normalized,
+              db.get(StudentPersonalInfoModel, 1).rut_normalized)
+    if stored != ("12345678K", "98765432", "98765432") or db.get(UserModel, 1).rut != "12.345.678-k":
+        print("FAIL clave al insertar:", stored)
+        failed += 1
+
+    # Edición: cambiar el RUT actualiza la clave; vaciarlo la deja en NULL.
+    db.get(UserModel, 1).rut = "11.111.111-1"
+    db.get(StudentModel, 1).identification_number = "22222222-k"
+    db.get(StudentPersonalInfoModel, 1).identification_number = ""
+    db.commit()
+    db.expire_all()
+    updated = (db.get(UserModel, 1).rut_normalized, db.get(StudentModel, 1).rut_normalized,
+               db.get(StudentPersonalInfoModel, 1).rut_normalized)
+    if updated != ("111111111", "22222222K", None):
+        print("FAIL clave al actualizar:", updated)
+        failed += 1
+    in_db = db.execute(
+        StudentModel.__table__.select().where(StudentModel.__table__.c.rut_normalized == "22222222K")
+    ).fetchall()
+    if len(in_db) != 1:
+        print("FAIL la clave no quedó escrita en la tabla:", in_db)
+        failed += 1
+
+    # Búsqueda por índice = recorrido anterior, para RUT escritos en cualquier formato.
+    rnd = random.Random(17)
+    ruts: list[tuple[str, str]] = []
+    for i in range(2, N_STUDENTS + 2):
+        body, dv = str(rnd.randint(1_000_000, 29_999_999)), rnd.choice("0123456789K")
+        ruts.append((body, dv))
+        stored_as = rnd.choice(_formats(body, dv))
+        db.add(StudentModel(id=i, school_id=1, identification_number=stored_as, deleted_status_id=0))
+        if i % 3:  # algunas fichas sin datos personales: se resuelven por students
+            db.add(StudentPersonalInfoModel(id=i, student_id=i, identification_number=stored_as))
+    db.commit()
+
+    queries = {"n": 0}
+
+    def _count(*_args, **_kwargs):
+        queries["n"] += 1
+
+    probes = [rnd.choice(_formats(body, dv)) for body, dv in rnd.sample(ruts, 60)]
+    probes += ["22.222.222-K", "1.234.567-8", "123", "sin rut"]
+    mismatches = 0
+    indexed_queries = 0
+    for probe in probes:
+        expected = _baseline_lookup(db, probe)
+        event.listen(engine, "before_cursor_execute", _count)
+        got = lookup_student_id_by_rut(db, probe)
+        event.remove(engine, "before_cursor_execute", _count)
+        indexed_queries = max(indexed_queries, queries["n"])
+        queries["n"] = 0
+        if got != expected:
+            mismatches += 1
+            print("FAIL búsqueda por RUT:", probe, got, "esperado", expected)
+    if mismatches:
+        failed += 1
+    if indexed_queries > 2:
+        print("FAIL consultas por búsqueda:", indexed_queries)
+        failed += 1
+
+    db.close()
+    engine.dispose()
+    tmp.cleanup()
+    print(f"{len(probes)} búsquedas por RUT sobre {N_STUDENTS} estudiantes: iguales al recorrido, ≤{indexed_queries} consultas")
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,155 @@
+"""Pistas de Excel por estudiante: índices de ``_SheetIndex`` (RUT y trigramas de nombre) = recorrido anterior."""
+
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pandas as pd
+
+from app.backend.utils.agents_file_context import (
+    _SheetIndex,
+    _cell_matches_rut,
+    _fold_sheet_text,
+    _name_tokens,
+    _normalize_rut,
+)
+
+N_ROWS = 300
+
+FIRST = ["José", "María", "Ángela", "Iñaki", "Sofía", "Benjamín", "Martina", "Tomás"]
+LAST = ["Muñoz", "González", "Díaz", "Pérez", "Núñez", "Soto", "Ibáñez", "Araya"]
+AREAS = ["Fonoaudiología", "Kinesiología", "Terapia Ocupacional", "Psicología"]
+
+
+def _rut_formats(body: str, dv: str) -> list[str]:
+    """El mismo RUT como aparece en planillas: con puntos, sin guion, DV en minúscula, sin DV o con cero a la izquierda."""
+    dotted = f"{int(body):,}".replace(",", ".")
+    return [
+        f"{dotted}-{dv}",
+        f"{body}-{dv}",
+        f"{body}{dv}",
+        f"{dotted}-{dv.lower()}",
+        body,
+        f"0{body}-{dv}",
+        f" {body} {dv} ",
+    ]
+
+
+def _baseline_rows(rows: list[tuple[str, ...]], target: str, tokens: list[str]) -> set[int]:
+    """Filas que aceptaba el recorrido anterior (``_row_matches_student`` fila por fila)."""
+    found: set[int] = set()
+    for row_idx, row_values in enumerate(rows):
+        if row_idx == 0 or not any(row_values):
+            continue
+        if target and any(_cell_matches_rut(v, target) for v in row_values if v):
+            found.add(row_idx)
+            continue
+        if len(tokens) >= 2:
+            blob = _fold_sheet_text(" ".join(row_values))
+            if sum(1 for t in tokens if t in blob) >= min(2, len(tokens)):
+                found.add(row_idx)
+    return found
+
+
+def _make_sheet(rnd: random.Random) -> tuple[pd.DataFrame, list[tuple[str, str]], list[str]]:
+    ruts: list[tuple[str, str]] = []
+    names: list[str] = []
+    data = [["Marca temporal", "RUT del estudiante", "Nombre", "Especialidad", "Observación", "Teléfono"]]
+    for i in range(N_ROWS):
+        # Algunos cuerpos comparten prefijo (7 y 8 dígitos) para ejercitar las reglas sin DV.
+        body = str(rnd.randint(1_000_000, 29_999_999)) if i % 10 else f"{rnd.randint(10, 12)}345678"
+        dv = rnd.choice("0123456789K")
+        name = f"{rnd.choice(FIRST)} {rnd.choice(LAST)} {rnd.choice(LAST)}"
+        ruts.append((body, dv))
+        names.append(name)
+        if i % 17 == 0:
+            data.append([None] * 6)
+            continue
+        data.append(
+            [
+                f"2024-0{rnd.randint(1, 9)}-1{rnd.randint(0, 9)}",
+                rnd.choice(_rut_formats(body, dv)) if i % 5 else None,
+                name,
+                rnd.choice(AREAS),
+                rnd.choice(["Logrado", "En proceso", "Requiere apoyo kk", "—"]),
+                f"+569{rnd.randint(10_000_000, 99_999_999)}",
+            ]
+        )
+    return pd.DataFrame(data, dtype=object), ruts, names
+
+
+def main() -> int:
+    failed = 0
+    rnd = random.Random(7)
+    df, ruts, names = _make_sheet(rnd)
+    sheet = _SheetIndex.build("Respuestas", df)
+    rows = sheet.rows
+
+    # Por RUT: el valor buscado en cualquier formato, con y sin DV, más valores que no son alumnos.
+    probes = [rnd.choice(_rut_formats(body, dv)) for body, dv in rnd.sample(ruts, 80)]
+    probes += ["12.345.678-9", "11345678", "1234567", "2024-03-15", "+56912345678", "K", "123", ""]
+    rut_checks = 0
+    for probe in probes:
+        target = _normalize_rut(probe)
+        expected = _baseline_rows(rows, target, [])
+        got = sheet.rows_for_rut(target)
+        rut_checks += 1
+        if got != expected:
+            print("FAIL filas por RUT:", repr(probe), sorted(got ^ expected)[:5])
+            failed += 1
+
+    # Por nombre: tokens plegados (2 de N como substring), con tildes y parciales.
+    name_probes = [rnd.choice(names) for _ in range(40)]
+    name_probes += ["jose munoz", "MARÍA DÍAZ", "ange gonz", "Sofía", "ibañez araya soto", "xyz abc", "kine fono"]
+    for student_name in name_probes:
+        tokens = _name_tokens(student_name)
+        expected = _baseline_rows(rows, "", tokens)
+        got = sheet.rows_for_name(tokens)
+        if got != expected:
+            print("FAIL filas por nombre:", repr(student_name), sorted(got ^ expected)[:5])
+            failed += 1
+
+    # Trigramas → palabras: mismo resultado que recorrer el vocabulario de la hoja con ``in``.
+    vocab = list(sheet.words)
+    fragments = {"gonz", "alez", "nun", "ez", "kine", "fono", "logia", "2024", "569", "xyz", "ara"}
+    for word in rnd.sample(vocab, min(60, len(vocab))):
+        start = rnd.randrange(len(word))
+        fragments.add(word[start : start + rnd.randint(2, 7)])
+    for fragment in sorted(fragments):
+        expected_words = sorted(w for w in vocab if fragment in w)
+        if sorted(sheet._words_containing(fragment)) != expected_words:
+            print("FAIL palabras por trigramas:", fragment, expected_words[:5])
+            failed += 1
+    for fragment_pair in [("alez", "iba"), ("unoz", "naki"), ("omas", "ena"), ("ngel", "araya")]:
+        tokens = list(fragment_pair)
+        if sheet.rows_for_name(tokens) != _baseline_rows(rows, "", tokens):
+            print("FAIL filas por fragmentos de nombre:", tokens)
+            failed += 1
+
+    # Combinado, como lo usa extract_spreadsheet_hint_for_student.
+    for (body, dv), student_name in rnd.sample(list(zip(ruts, names)), 30):
+        target = _normalize_rut(f"{body}-{dv}")
+        tokens = _name_tokens(student_name)
+        expected = _baseline_rows(rows, target, tokens)
+        got = sheet.rows_for_rut(target) | sheet.rows_for_name(tokens)
+        if got != expected:
+            print("FAIL filas combinadas:", body, student_name, sorted(got ^ expected)[:5])
+            failed += 1
+
+    if 0 in sheet.rows_for_name(_name_tokens("rut estudiante nombre")):
+        print("FAIL la fila de encabezado entró en los resultados")
+        failed += 1
+
+    print(f"{rut_checks} RUT y {len(name_probes)} nombres sobre {len(rows)} filas: iguales al recorrido")
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+"""Búsqueda de estudiantes por nombre: trigramas como prefiltro (superconjunto) y tabla al día con las fichas."""
+
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import unicodedata
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes.student_class import (
+    _apply_student_names_filter,
+    _name_token_variants,
+    _strip_accents,
+    trigram_personal_ids_subquery,
+)
+from app.backend.db.database import Base
+from app.backend.db.models import StudentNameTrigramModel, StudentPersonalInfoModel
+from app.backend.utils.name_search import name_trigrams
+
+N_STUDENTS = 400
+
+NAMES = ["José", "María", "Ángela", "Iñaki", "Sofía", "Benjamín", "Martina", "Agustín", "Valentina", "Tomás"]
+LASTNAMES = ["Muñoz", "González", "Díaz", "Pérez", "Núñez", "Rodríguez", "Soto", "Ibáñez", "Araya", "Peña"]
+SOCIAL = [None, None, None, "Cote", "Beni"]
+
+
+def _fold(value: str) -> str:
+    """Plegado independiente del módulo: minúsculas y sin marcas diacríticas."""
+    text = unicodedata.normalize("NFD", (value or "").lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _baseline_ids(rows: dict[int, str], names: str) -> set[int]:
+    """Filtro anterior (LIKE sobre el nombre plegado por fila, con las mismas variantes por token)."""
+    ids = set(rows)
+    for token in [t for t in names.split() if len(t.strip()) >= 2]:
+        variants = _name_token_variants(token)
+        if not variants:
+            continue
+        matched = set()
+        for variant in variants:
+            folded = _strip_accents(variant).lower()
+            patterns = [folded]
+            if len(folded) >= 4:
+                patterns.append(folded[: max(3, len(folded) - 1)])
+            matched |= {pid for pid, full in rows.items() if any(p in full for p in patterns)}
+        ids &= matched
+    return ids
+
+
+def _stored_trigrams(db) -> dict[int, tuple[int | None, set[str]]]:
+    out: dict[int, tuple[int | None, set[str]]] = {}
+    for pid, student_id, gram in db.execute(
+        select(
+            StudentNameTrigramModel.student_personal_data_id,
+            StudentNameTrigramModel.student_id,
+            StudentNameTrigramModel.trigram,
+        )
+    ):
+        out.setdefault(pid, (student_id, set()))[1].add(gram)
+    return out
+
+
+def _sync_failures(db, label: str) -> int:
+    """Los trigramas guardados son exactamente los del nombre plegado actual de cada ficha."""
+    stored = _stored_trigrams(db)
+    expected = {}
+    for row in db.query(StudentPersonalInfoModel).all():
+        grams = name_trigrams(_fold(" ".join(
+            p or "" for p in (row.names, row.father_lastname, row.mother_lastname, row.social_name)
+        )))
+        if grams:
+            expected[row.id] = (row.student_id, grams)
+    if stored != expected:
+        bad = sorted(set(stored) ^ set(expected) | {k for k in stored if stored[k] != expected.get(k)})
+        print(f"FAIL trigramas desfasados tras {label}:", bad[:5])
+        return 1
+    return 0
+
+
+def main() -> int:
+    failed = 0
+    tmp = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{tmp.name}/names.db")
+    Base.metadata.create_all(
+        engine, tables=[StudentPersonalInfoModel.__table__, StudentNameTrigramModel.__table__]
+    )
+    Session = sessionmaker(bind=engine)
+    db = Session()
+
+    rnd = random.Random(23)
+    for i in range(1, N_STUDENTS + 1):
+        db.add(
+            StudentPersonalInfoModel(
+                id=i,
+                student_id=1000 + i,
+                names=f"{rnd.choice(NAMES)} {rnd.choice(NAMES)}" if i % 4 else rnd.choice(NAMES),
+                father_lastname=rnd.choice(LASTNAMES),
+                mother_lastname=rnd.choice(LASTNAMES) if i % 7 else None,
+                social_name=rnd.choice(SOCIAL),
+            )
+        )
+    db.commit()
+    failed += _sync_failures(db, "insertar")
+
+    # Edición de nombres, cambio de student_id, nombre vaciado y borrado.
+    db.get(StudentPersonalInfoModel, 1).father_lastname = "Zúñiga"
+    db.get(StudentPersonalInfoModel, 2).names = "Renée Ágata"
+    db.get(StudentPersonalInfoModel, 3).student_id = 9003
+    row4 = db.get(StudentPersonalInfoModel, 4)
+    row4.names = row4.father_lastname = row4.mother_lastname = row4.social_name = None
+    db.get(StudentPersonalInfoModel, 5).address = "Av. Siempre Viva 742"  # sin cambios de nombre
+    db.delete(db.get(StudentPersonalInfoModel, 6))
+    db.commit()
+    failed += _sync_failures(db, "actualizar y borrar")
+    if 6 in _stored_trigrams(db) or 4 in _stored_trigrams(db):
+        print("FAIL quedaron trigramas de fichas borradas o sin nombre")
+        failed += 1
+    if "zun" not in _stored_trigrams(db).get(1, (None, set()))[1]:
+        print("FAIL el apellido editado no llegó a los trigramas")
+        failed += 1
+
+    rows = {
+        r.id: _fold(" ".join(p or "" for p in (r.names, r.father_lastname, r.mother_lastname, r.social_name)))
+        for r in db.query(StudentPersonalInfoModel).all()
+    }
+
+    # Prefiltro por trigramas: nunca descarta una fila que el LIKE habría encontrado.
+    patterns = {"jose", "muno", "nunez", "ibanez", "ang", "zuniga", "renee", "cote", "xyz", "ria go", "ez"}
+    for full in rnd.sample(list(rows.values()), 40):
+        start = rnd.randrange(len(full))
+        patterns.add(full[start : start + rnd.randint(3, 9)].strip())
+    for pattern in sorted(p for p in patterns if len(p) >= 3 and name_trigrams(p)):
+        candidates = set(db.execute(trigram_personal_ids_subquery(pattern)).scalars())
+        expected = {pid for pid, full in rows.items() if pattern in full}
+        if not expected <= candidates:
+            print("FAIL el prefiltro perdió filas:", pattern, sorted(expected - candidates)[:5])
+            failed += 1
+
+    # Filtro completo (prefiltro + LIKE sobre la columna plegada) = filtro anterior.
+    searches = ["josé", "MUÑOZ", "munoz", "diiaz", "Ángela Peña", "maria gonz", "ib", "Zúñiga", "sofia  soto", "xyz"]
+    for pid in rnd.sample([pid for pid, full in rows.items() if full.strip()], 20):
+        words = rows[pid].split()
+        searches.append(" ".join(rnd.sample(words, min(2, len(words)))))
+    for names in searches:
+        got = {r.id for r in _apply_student_names_filter(db.query(StudentPersonalInfoModel), names).all()}
+        expected = _baseline_ids(rows, names)
+        if got != expected:
+            print("FAIL filtro por nombre:", repr(names), sorted(got ^ expected)[:5])
+            failed += 1
+
+    db.close()
+    engine.dispose()
+    tmp.cleanup()
+    print(f"{len(patterns)} patrones y {len(searches)} búsquedas sobre {len(rows)} fichas: iguales al filtro anterior")
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
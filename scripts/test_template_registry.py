@@ -0,0 +1,110 @@
+"""Registro de plantillas: una lectura por versión, copias independientes y mapas precalculados."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.backend.utils.agents_familia_fill import fill_familia_template
+from app.backend.utils.fur_docx_export import fill_fur_docx, iter_content_controls
+from app.backend.utils.template_registry import (
+    get_template_registry,
+    open_docx_template,
+    open_fitz_template,
+    pdf_form_field_names,
+    template_entry,
+)
+
+TEMPLATES = ROOT / "files" / "original_student_files"
+
+
+def main() -> int:
+    tmp = tempfile.TemporaryDirectory()
+    registry = get_template_registry()
+    registry.clear()
+    failed = 0
+
+    # PDF AcroForm: los campos se calculan una vez y coinciden con los de pypdf.
+    pdf = Path(tmp.name) / "health_evaluation.pdf"
+    shutil.copy2(TEMPLATES / "health_evaluation.pdf", pdf)
+    from pypdf import PdfReader
+
+    expected = set(PdfReader(str(pdf)).get_fields() or {})
+    started = time.perf_counter()
+    names = pdf_form_field_names(pdf)
+    first_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    for _ in range(20):
+        pdf_form_field_names(pdf)
+    cached_ms = (time.perf_counter() - started) * 1000 / 20
+    if not names or not set(names) <= expected or registry.loads != 1:
+        print("FAIL campos AcroForm:", len(names), len(expected), registry.loads)
+        failed += 1
+
+    # Cada copia es independiente: modificar una no toca la plantilla en memoria.
+    doc_a = open_fitz_template(pdf)
+    doc_a[0].insert_text((50, 50), "MODIFICADO")
+    doc_a.close()
+    doc_b = open_fitz_template(pdf)
+    if "MODIFICADO" in doc_b[0].get_text():
+        print("FAIL copia compartida")
+        failed += 1
+    doc_b.close()
+
+    # Reemplazar el archivo invalida la entrada (y sus datos derivados).
+    old = template_entry(pdf)
+    pdf.write_bytes(pdf.read_bytes() + b"\n")
+    os.utime(pdf, ns=(old.mtime_ns + 10**9, old.mtime_ns + 10**9))
+    if template_entry(pdf) is old or registry.loads != 2 or pdf_form_field_names(pdf) != names:
+        print("FAIL invalidación por mtime:", registry.loads)
+        failed += 1
+
+    # FUR: dos rellenos desde la misma plantilla leída una vez.
+    fur_template = TEMPLATES / "fur1_tel_formulario.docx"
+    loads = registry.loads
+    outputs = []
+    for i in range(2):
+        out = Path(tmp.name) / f"fur_{i}.docx"
+        result = fill_fur_docx(fur_template, {"full_name": f"Estudiante {i}"}, out)
+        outputs.append(out)
+        if result.get("status") != "success":
+            print("FAIL FUR:", result)
+            failed += 1
+    if registry.loads != loads + 1:
+        print("FAIL FUR releyó la plantilla:", registry.loads - loads)
+        failed += 1
+    pristine = {t for _s, _p, t in iter_content_controls(open_docx_template(fur_template))}
+    if not pristine:
+        print("FAIL plantilla FUR sin controles")
+        failed += 1
+
+    # Informe familia: el layout se detecta una vez por versión de la plantilla.
+    familia = TEMPLATES / "family_report.docx"
+    for i in range(2):
+        result = fill_familia_template(
+            familia, Path(tmp.name) / f"familia_{i}.docx", {"student_full_name": f"Ana {i}"}
+        )
+        if result.get("status") != "success":
+            print("FAIL familia:", result)
+            failed += 1
+    if "familia_layout" not in template_entry(familia)._derived:
+        print("FAIL layout familia no quedó precalculado")
+        failed += 1
+
+    registry.clear()
+    tmp.cleanup()
+    print(f"campos AcroForm: {first_ms:.1f} ms primera vez, {cached_ms:.3f} ms desde el registro")
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,231 @@
+"""Subidas por trozos: SHA-256 al vuelo, tope de tamaño, rename atómico y deduplicación en folders (también por ruta)."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.datastructures import UploadFile
+
+from app.backend.classes.student_document_file_class import FolderClass
+from app.backend.core.config import settings
+from app.backend.core.executors import upload_executor
+from app.backend.db.database import Base, get_db
+from app.backend.db.models import DocumentModel, FolderModel, StudentModel
+from app.backend.routes.folders import folders as folders_router
+from app.backend.utils.upload_sink import (
+    PARTIAL_SUFFIX,
+    UploadTooLargeError,
+    stage_upload,
+    stage_upload_file,
+    write_upload,
+)
+
+MB = 1024 * 1024
+
+
+def _pdf(size: int, seed: int) -> bytes:
+    block = hashlib.sha256(str(seed).encode()).digest() * 2048
+    return (b"%PDF-1.4\n" + block * (size // len(block) + 1))[:size]
+
+
+def _spooled(data: bytes) -> UploadFile:
+    spool = tempfile.SpooledTemporaryFile(max_size=MB)
+    spool.write(data)
+    spool.seek(0)
+    return UploadFile(file=spool, size=len(data), filename="escaneo.pdf")
+
+
+def _folders_route_check(base: Path) -> int:
+    """``/folders/upload``: copia en el pool ``upload``, hash guardado y sin versión nueva si el contenido se repite."""
+    failed = 0
+    files_dir = base / "files"
+    previous_files_dir = os.environ.get("FILES_DIR")
+    os.environ["FILES_DIR"] = str(files_dir)
+    engine = create_engine(f"sqlite:///{base}/route.db")
+    Base.metadata.create_all(engine)  # StudentClass.get une varias tablas del estudiante
+    Session = sessionmaker(bind=engine)
+    seed = Session()
+    seed.add(StudentModel(id=7, school_id=1, identification_number="11.111.111-1", deleted_status_id=0))
+    seed.add(DocumentModel(id=21, document_type_id=3, document="Informe"))
+    seed.commit()
+    seed.close()
+
+    def _db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(folders_router)
+    app.dependency_overrides[get_db] = _db
+    http = TestClient(app)
+    scan = _pdf(2 * MB, 5)
+
+    def _post(body: bytes) -> dict:
+        files = {"file": ("escaneo.pdf", body, "application/pdf")}
+        return http.post("/folders/upload/7/21?period_year=2026", files=files).json()
+
+    submitted = upload_executor.metrics()["submitted"]
+    first, repeated = _post(scan), _post(scan)
+    if upload_executor.metrics()["submitted"] - submitted != 2:
+        print("FAIL la copia no pasó por el pool upload")
+        failed += 1
+    if first.get("status") != 201 or repeated.get("status") != 200 or not repeated["data"]["deduplicated"]:
+        print("FAIL resubida idéntica en /folders/upload:", first, repeated)
+        failed += 1
+    db = Session()
+    rows = db.query(FolderModel).filter(FolderModel.student_id == 7).all()
+    if len(rows) != 1 or rows[0].content_sha256 != hashlib.sha256(scan).hexdigest():
+        print("FAIL versiones/hash en folders:", [(r.version_id, r.content_sha256) for r in rows])
+        failed += 1
+    changed = _post(_pdf(2 * MB, 6))
+    if changed.get("status") != 201 or changed["data"]["version_id"] != 2:
+        print("FAIL contenido distinto no creó versión:", changed)
+        failed += 1
+    db.close()
+    engine.dispose()
+    if previous_files_dir is None:
+        os.environ.pop("FILES_DIR", None)
+    else:
+        os.environ["FILES_DIR"] = previous_files_dir
+    return failed
+
+
+def main() -> int:
+    tmp = tempfile.TemporaryDirectory()
+    base = Path(tmp.name)
+    object.__setattr__(settings, "upload_chunk_kb", 256)
+    object.__setattr__(settings, "upload_max_mb", 20)
+    failed = 0
+
+    # Hash y tamaño al vuelo; el temporal vive en el directorio destino y no queda nada tras commit.
+    data = _pdf(5 * MB + 123, 1)
+    staged = stage_upload(io.BytesIO(data), base / "students")
+    if staged.sha256 != hashlib.sha256(data).hexdigest() or staged.size != len(data):
+        print("FAIL hash/tamaño:", staged)
+        failed += 1
+    dest = base / "students" / "7_21_3.pdf"
+    dest.write_bytes(b"version anterior")
+    staged.commit(dest)
+    leftovers = [p for p in (base / "students").iterdir() if p.name.endswith(PARTIAL_SUFFIX)]
+    if dest.read_bytes() != data or leftovers:
+        print("FAIL commit:", dest.stat().st_size, leftovers)
+        failed += 1
+
+    # Tope: corta apenas lo supera y borra el parcial; con tamaño declarado ni siquiera copia.
+    big = _pdf(21 * MB, 2)
+    source = io.BytesIO(big)
+    try:
+        stage_upload(source, base / "students")
+        print("FAIL no se aplicó el tope")
+        failed += 1
+    except UploadTooLargeError:
+        if source.tell() > 20 * MB + 256 * 1024:
+            print("FAIL leyó de más:", source.tell())
+            failed += 1
+    upload = _spooled(big)
+    try:
+        asyncio.run(stage_upload_file(upload, base / "students"))
+        print("FAIL no se aplicó el tope declarado")
+        failed += 1
+    except UploadTooLargeError:
+        if upload.file.tell() != 0:
+            print("FAIL copió pese al tamaño declarado")
+            failed += 1
+    if any(p.name.endswith(PARTIAL_SUFFIX) for p in (base / "students").iterdir()):
+        print("FAIL quedaron parciales tras rechazar")
+        failed += 1
+
+    # Memoria: 4 escaneos de 8 MB a la vez; el pico no crece con el tamaño del archivo.
+    uploads = [_spooled(_pdf(8 * MB, 10 + i)) for i in range(4)]
+
+    async def _concurrent():
+        return await asyncio.gather(*(stage_upload_file(u, base / "batch") for u in uploads))
+
+    tracemalloc.start()
+    results = asyncio.run(_concurrent())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if peak > 4 * MB or len({r.sha256 for r in results}) != 4:
+        print("FAIL memoria:", peak)
+        failed += 1
+    for r in results:
+        r.discard()
+
+    # Deduplicación contra la última versión en folders.
+    engine = create_engine(f"sqlite:///{tmp.name}/folders.db")
+    Base.metadata.create_all(engine, tables=[FolderModel.__table__])
+    db = sessionmaker(bind=engine)()
+    folders = FolderClass(db)
+    folder_dir = base / "student_document_files"
+
+    first = stage_upload(io.BytesIO(data), folder_dir)
+    write_upload(folder_dir / "v1.pdf", first)
+    stored = folders.store(student_id=7, document_id=21, file_path="v1.pdf", period_year=2026, content_sha256=first.sha256)
+    again = stage_upload(io.BytesIO(data), folder_dir)
+    dup = folders.find_identical_upload(7, 21, 2026, again, folder_dir)
+    if dup is None or dup.id != stored["id"]:
+        print("FAIL no detectó contenido idéntico:", dup)
+        failed += 1
+    if folders.find_identical_upload(7, 21, 2025, again, folder_dir) is not None:
+        print("FAIL deduplicó entre períodos")
+        failed += 1
+    again.discard()
+    other = stage_upload(io.BytesIO(_pdf(len(data), 3)), folder_dir)
+    if folders.find_identical_upload(7, 21, 2026, other, folder_dir) is not None:
+        print("FAIL deduplicó contenido distinto del mismo tamaño")
+        failed += 1
+    other.discard()
+
+    # Fila anterior a la columna (hash NULL): se compara contra el disco y queda guardado.
+    row = db.query(FolderModel).filter(FolderModel.id == stored["id"]).one()
+    row.content_sha256 = None
+    db.commit()
+    legacy = stage_upload(io.BytesIO(data), folder_dir)
+    dup = folders.find_identical_upload(7, 21, "2026", legacy, folder_dir)
+    db.refresh(row)
+    if dup is None or row.content_sha256 != legacy.sha256:
+        print("FAIL fila sin hash:", dup, row.content_sha256)
+        failed += 1
+    legacy.discard()
+
+    # Archivo reescrito fuera de la subida (PDF generado): el hash guardado no basta.
+    (folder_dir / "v1.pdf").write_bytes(_pdf(len(data), 4))
+    stale = stage_upload(io.BytesIO(data), folder_dir)
+    if folders.find_identical_upload(7, 21, 2026, stale, folder_dir) is not None:
+        print("FAIL confió en un hash desactualizado")
+        failed += 1
+    stale.discard()
+
+    db.close()
+    engine.dispose()
+    failed += _folders_route_check(base)
+    left = [p for p in base.rglob(f"*{PARTIAL_SUFFIX}")]
+    if left:
+        print("FAIL temporales sin borrar:", left)
+        failed += 1
+    tmp.cleanup()
+    print(f"4 subidas de 8 MB en paralelo: pico {peak / MB:.2f} MB en memoria (leerlas enteras: 32 MB)")
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
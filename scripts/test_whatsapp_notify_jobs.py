@@ -0,0 +1,218 @@
+"""Outbox de avisos WhatsApp: encolar sin esperar, envío concurrente, límite de tasa y reintentos."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes import whatsapp_notify_jobs_class as jobs_mod
+from app.backend.classes.whatsapp_meta_class import WhatsAppMetaClass
+from app.backend.classes.whatsapp_notify_jobs_class import (
+    WhatsAppNotifyJobsClass,
+    process_due_whatsapp_messages,
+    set_whatsapp_rate_limiter,
+    whatsapp_job_summary,
+)
+from app.backend.core.config import settings
+from app.backend.core.whatsapp_notify_worker import whatsapp_notify_worker
+from app.backend.db.database import Base
+from app.backend.db.models.whatsapp_notify_jobs import (
+    WhatsAppNotifyJobModel,
+    WhatsAppNotifyMessageModel,
+)
+from app.backend.utils.token_bucket import TokenBucket
+
+LATENCY = 0.05
+
+
+class FakeMeta:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.calls: list[str] = []
+        self.active = 0
+        self.max_active = 0
+        self.latency = LATENCY
+
+    def send_template(self, to_e164: str, body_texts=None) -> dict:
+        with self.lock:
+            self.calls.append(to_e164)
+            n = self.calls.count(to_e164)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self.lock:
+                self.active -= 1
+        if to_e164.endswith("0503") and n == 1:
+            return {"ok": False, "skipped": False, "status_code": 503, "response": {}}
+        if to_e164.endswith("0400"):
+            error = {"code": 100, "message": "Invalid parameter"}
+            return {"ok": False, "skipped": False, "status_code": 400, "response": {"error": error}}
+        return {"ok": True, "skipped": False, "response": {"messages": [{"id": f"wamid.{to_e164}"}]}}
+
+
+def _recipients(n: int) -> list[dict]:
+    out = []
+    for i in range(n):
+        phone = f"+5699{i:07d}"
+        if i == 1:
+            phone = ""
+        elif i == 2:
+            phone = "+56990000503"
+        elif i == 3:
+            phone = "+56990000400"
+        out.append({"student_id": 100 + i, "student_name": f"Alumno {i}", "phone": phone})
+    return out
+
+
+def main() -> int:
+    tmp = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{tmp.name}/whatsapp.db", connect_args={"timeout": 30})
+    Base.metadata.create_all(
+        engine, tables=[WhatsAppNotifyJobModel.__table__, WhatsAppNotifyMessageModel.__table__]
+    )
+    factory = sessionmaker(bind=engine)
+    jobs_mod.SessionLocal = factory
+    fake = FakeMeta()
+    WhatsAppMetaClass.send_template = staticmethod(fake.send_template)
+    object.__setattr__(settings, "whatsapp_send_concurrency", 8)
+    db = factory()
+    jobs = WhatsAppNotifyJobsClass(db)
+    failed = 0
+
+    # Token bucket con reloj falso: ráfaga de 2 y después 1 ficha cada 0.5 s.
+    clock = [0.0]
+    bucket = TokenBucket(2, 2, clock=lambda: clock[0], sleep=lambda s: clock.__setitem__(0, clock[0] + s))
+    for _ in range(6):
+        bucket.acquire()
+    if abs(clock[0] - 2.0) > 1e-6 or bucket.acquire(timeout=0.1):
+        print("FAIL token bucket:", clock[0])
+        failed += 1
+
+    # Encolar responde sin enviar nada.
+    started = time.perf_counter()
+    queued = jobs.enqueue(form_name="Encuesta", recipients=_recipients(40), school_id=1, dynamic_form_id=7)
+    enqueue_ms = (time.perf_counter() - started) * 1000
+    job = queued["data"]
+    if fake.calls or job["status"] != "pending" or job["total"] != 40 or job["failed"] != 1:
+        print("FAIL enqueue:", job, len(fake.calls))
+        failed += 1
+
+    # Envío concurrente (8 a la vez), acotado por el bucket.
+    set_whatsapp_rate_limiter(TokenBucket(400, 8))
+    started = time.perf_counter()
+    taken = process_due_whatsapp_messages()
+    pooled_s = time.perf_counter() - started
+    sequential_s = 39 * LATENCY
+    if taken != 39 or pooled_s > sequential_s / 2 or not 1 < fake.max_active <= 8:
+        print("FAIL concurrencia:", taken, round(pooled_s, 3), fake.max_active)
+        failed += 1
+
+    state = jobs.get(job_id=job["jobId"])["data"]
+    by_student = {m["studentId"]: m for m in state["messages"]}
+    if state["status"] != "running" or state["sent"] != 37 or state["failed"] != 2 or state["pending"] != 1:
+        print("FAIL estado tras la primera tanda:", {k: state[k] for k in ("status", "sent", "failed", "pending")})
+        failed += 1
+    if by_student[101]["lastError"] != "invalid_or_missing_phone" or by_student[103]["status"] != "failed":
+        print("FAIL errores permanentes:", by_student[101], by_student[103])
+        failed += 1
+    if by_student[102]["status"] != "pending" or by_student[102]["attempts"] != 1 or not by_student[102]["nextAttemptAt"]:
+        print("FAIL reintento programado:", by_student[102])
+        failed += 1
+    if by_student[100]["providerMessageId"] != "wamid.56990000000":
+        print("FAIL id de Meta:", by_student[100])
+        failed += 1
+
+    summary = whatsapp_job_summary(state)
+    reasons = {f["student_id"]: f["reason"] for f in summary["failed"]}
+    if (summary["attempted"], summary["sent"], summary["skipped_config"]) != (40, 37, False) or reasons != {
+        101: "invalid_or_missing_phone",
+        103: "send_failed",
+    }:
+        print("FAIL resumen con la forma de siempre:", summary)
+        failed += 1
+
+    # Antes del backoff no se toma; vencido, se reenvía y el job termina.
+    if process_due_whatsapp_messages() != 0:
+        print("FAIL se reintentó antes del backoff")
+        failed += 1
+    db.execute(
+        update(WhatsAppNotifyMessageModel)
+        .where(WhatsAppNotifyMessageModel.status == "pending")
+        .values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1))
+    )
+    db.commit()
+    process_due_whatsapp_messages()
+    db.expire_all()
+    state = jobs.get(job_id=job["jobId"], include_messages=False)["data"]
+    if state["status"] != "done" or state["sent"] != 38 or state["failed"] != 2 or state["pending"] != 0:
+        print("FAIL estado final:", state)
+        failed += 1
+
+    # Tasa: 10 mensajes a 20/s con ráfaga 2 tardan al menos ~0.4 s aunque la API responda al instante.
+    fake.latency = 0.0
+    set_whatsapp_rate_limiter(TokenBucket(20, 2))
+    limited = jobs.enqueue(form_name="Tasa", recipients=_recipients(60)[10:20])["data"]
+    started = time.perf_counter()
+    process_due_whatsapp_messages(job_ids=[limited["jobId"]])
+    rate_s = time.perf_counter() - started
+    if rate_s < 0.35:
+        print("FAIL límite de tasa:", round(rate_s, 3))
+        failed += 1
+
+    # Worker async: encolar lo despierta sin esperar el sondeo.
+    set_whatsapp_rate_limiter(TokenBucket(400, 8))
+    object.__setattr__(settings, "whatsapp_notify_poll_seconds", 30.0)
+
+    async def _worker_roundtrip() -> float:
+        await whatsapp_notify_worker.start()
+        try:
+            await asyncio.sleep(0.05)
+            queued_job = await asyncio.to_thread(
+                lambda: WhatsAppNotifyJobsClass(factory()).enqueue(
+                    form_name="Worker", recipients=_recipients(30)[20:25]
+                )["data"]
+            )
+            started = time.perf_counter()
+            while time.perf_counter() - started < 2.0:
+                current = await asyncio.to_thread(
+                    lambda: WhatsAppNotifyJobsClass(factory()).get(job_id=queued_job["jobId"])["data"]
+                )
+                if current["status"] == "done":
+                    return time.perf_counter() - started
+                await asyncio.sleep(0.02)
+            return -1.0
+        finally:
+            await whatsapp_notify_worker.stop()
+
+    if asyncio.run(_worker_roundtrip()) < 0:
+        print("FAIL worker no despertó al encolar")
+        failed += 1
+
+    set_whatsapp_rate_limiter(None)
+    db.close()
+    engine.dispose()
+    tmp.cleanup()
+    print(
+        f"40 avisos: encolar {enqueue_ms:.1f} ms; envío {pooled_s * 1000:.0f} ms con "
+        f"{fake.max_active} simultáneos (secuencial ~{sequential_s * 1000:.0f} ms)"
+    )
+    print("OK" if not failed else f"{failed} fallos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())